@@ -0,0 +1,72 @@
+"""
+Micro-benchmark da análise de uma avaliação
+
+Compara o tempo por avaliação do pipeline genérico (PIPELINE.executar com
+todas as etapas) com o caminho rápido fundido (calcular_completo), usado por
+processar_avaliacao quando todas as seções são pedidas, e confere que os dois
+produzem exatamente o mesmo resultado.
+
+Uso:
+    python benchmark_analisador.py [repeticoes]
+"""
+import sys
+import os
+import pickle
+import timeit
+from datetime import date
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.models.usuario import Usuario, Sexo
+from src.models.medidas import Medidas
+from src.services.pipeline import PIPELINE, calcular_completo
+
+
+PERFIS = {
+    'completo (M)': (
+        Sexo.MASCULINO,
+        Medidas(altura=178, peso=80, pescoco=38, ombros=120, peitoral=100, cintura=82, abdomen=85,
+                quadril=98, braco_relaxado=33, braco_contraido=36, antebraco=29, coxa=56, panturrilha=37)
+    ),
+    'completo (F)': (
+        Sexo.FEMININO,
+        Medidas(altura=165, peso=62, pescoco=32, ombros=100, peitoral=88, cintura=68, abdomen=72,
+                quadril=96, braco_relaxado=27, braco_contraido=29, antebraco=23, coxa=55, panturrilha=35)
+    ),
+    'mínimo (M)': (
+        Sexo.MASCULINO,
+        Medidas(altura=180, peso=85, cintura=90, quadril=100)
+    ),
+}
+
+
+def medir(funcao, repeticoes: int) -> float:
+    """Melhor de 5 rodadas, em microssegundos por avaliação"""
+    return min(timeit.repeat(funcao, number=repeticoes, repeat=5)) / repeticoes * 1e6
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    print(f"Tempo por avaliação (µs, melhor de 5 x {repeticoes}):\n")
+    print(f"{'perfil':<15} {'pipeline':>10} {'rápido':>10} {'ganho':>8}")
+
+    for nome, (sexo, medidas) in PERFIS.items():
+        usuario = Usuario(nome="Benchmark", sexo=sexo, data_nascimento=date(1990, 5, 15))
+
+        esperado = PIPELINE.executar(medidas, usuario)
+        obtido = calcular_completo(medidas, usuario)
+        if pickle.dumps(esperado) != pickle.dumps(obtido):
+            print(f"✗ {nome}: caminho rápido diverge do pipeline")
+            sys.exit(1)
+
+        pipeline = medir(lambda: PIPELINE.executar(medidas, usuario), repeticoes)
+        rapido = medir(lambda: calcular_completo(medidas, usuario), repeticoes)
+        print(f"{nome:<15} {pipeline:>10.1f} {rapido:>10.1f} {pipeline / rapido:>7.2f}x")
+
+    print("\n✅ Resultados idênticos nos dois caminhos")
+
+
+if __name__ == '__main__':
+    main()
@@ -48,13 +48,523 @@ CREATE TABLE IF NOT EXISTS avaliacoes (
     imc DECIMAL(5,2),
     gordura_corporal DECIMAL(5,2),
     massa_magra DECIMAL(5,2),
+    resultados JSONB,          -- resultados completos do AnalisadorAvaliacao
+    versao_calculo INTEGER,    -- AnalisadorAvaliacao.VERSAO_CALCULO usada
     
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
     UNIQUE(usuario_id, data)
 );
 
+-- Migração de bancos criados antes da persistência dos resultados
+ALTER TABLE avaliacoes ADD COLUMN IF NOT EXISTS resultados JSONB;
+ALTER TABLE avaliacoes ADD COLUMN IF NOT EXISTS versao_calculo INTEGER;
+
+-- Sincronização incremental (GET /api/avaliacoes?since=<token>):
+-- cada alteração nas avaliações de um usuário incrementa usuarios.versao_alteracoes
+-- e grava o novo valor na avaliação (ou em avaliacoes_removidas, se apagada)
+ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS versao_alteracoes BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE avaliacoes ADD COLUMN IF NOT EXISTS versao_alteracao BIGINT;
+
+CREATE TABLE IF NOT EXISTS avaliacoes_removidas (
+    usuario_id INTEGER NOT NULL,
+    avaliacao_id INTEGER NOT NULL,
+    versao BIGINT NOT NULL,
+    PRIMARY KEY (usuario_id, avaliacao_id)
+);
+
+CREATE OR REPLACE FUNCTION registrar_versao_avaliacao() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE usuarios SET versao_alteracoes = versao_alteracoes + 1
+        WHERE id = OLD.usuario_id;
+        INSERT INTO avaliacoes_removidas (usuario_id, avaliacao_id, versao)
+        SELECT id, OLD.id, versao_alteracoes FROM usuarios WHERE id = OLD.usuario_id
+        ON CONFLICT (usuario_id, avaliacao_id) DO UPDATE SET versao = EXCLUDED.versao;
+        RETURN OLD;
+    END IF;
+    UPDATE usuarios SET versao_alteracoes = versao_alteracoes + 1
+    WHERE id = NEW.usuario_id
+    RETURNING versao_alteracoes INTO NEW.versao_alteracao;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Só as colunas que o usuário altera: o backfill dos resultados (versao_calculo
+-- nova) não muda a versão - a ETag da lista já inclui VERSAO_CALCULO
+DROP TRIGGER IF EXISTS trg_avaliacoes_versao ON avaliacoes;
+CREATE TRIGGER trg_avaliacoes_versao
+    BEFORE INSERT OR UPDATE OF usuario_id, data, peso, pescoco, ombros, peitoral, cintura, abdomen,
+        quadril, braco_relaxado, braco_contraido, antebraco, punho, coxa_proximal, coxa_medial,
+        coxa_distal, panturrilha, tornozelo ON avaliacoes
+    FOR EACH ROW EXECUTE FUNCTION registrar_versao_avaliacao();
+
+DROP TRIGGER IF EXISTS trg_avaliacoes_removida ON avaliacoes;
+CREATE TRIGGER trg_avaliacoes_removida
+    AFTER DELETE ON avaliacoes
+    FOR EACH ROW EXECUTE FUNCTION registrar_versao_avaliacao();
+
 -- Índices para melhorar performance
 CREATE INDEX IF NOT EXISTS idx_usuarios_conta ON usuarios(conta_id);
 CREATE INDEX IF NOT EXISTS idx_avaliacoes_usuario ON avaliacoes(usuario_id);
 CREATE INDEX IF NOT EXISTS idx_avaliacoes_data ON avaliacoes(data);
+-- Histórico paginado por cursor: WHERE usuario_id = ? AND data < ? ORDER BY data DESC
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_usuario_data ON avaliacoes(usuario_id, data DESC);
+-- Sincronização: WHERE usuario_id = ? AND versao_alteracao > ?
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_usuario_versao ON avaliacoes(usuario_id, versao_alteracao);
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_removidas_versao ON avaliacoes_removidas(usuario_id, versao);
+-- Painel admin: WHERE lower(nome) LIKE 'prefixo%' e faixas de medidas
+CREATE INDEX IF NOT EXISTS idx_contas_nome ON contas(lower(nome) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_peso ON avaliacoes(peso);
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_imc ON avaliacoes(imc);
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_gordura ON avaliacoes(gordura_corporal);
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_massa_magra ON avaliacoes(massa_magra);
+
+-- Estatísticas do painel admin (web/estatisticas.py): GET /api/admin/stats lê
+-- contadores mantidos por triggers em vez de contar as tabelas.
+-- avaliacoes -> estatisticas_usuarios (gordura e avaliação mais recente por usuário)
+--            -> estatisticas (totais, gordura por sexo) e estatisticas_datas
+CREATE TABLE IF NOT EXISTS estatisticas (
+    chave VARCHAR(60) PRIMARY KEY,   -- contas, usuarios, avaliacoes, gordura_soma:<sexo>, gordura_n:<sexo>
+    valor DOUBLE PRECISION NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS estatisticas_datas (
+    data DATE PRIMARY KEY,
+    avaliacoes INTEGER NOT NULL DEFAULT 0,
+    ultimas INTEGER NOT NULL DEFAULT 0   -- usuários cuja avaliação mais recente é desta data
+);
+
+CREATE TABLE IF NOT EXISTS estatisticas_usuarios (
+    usuario_id INTEGER PRIMARY KEY,
+    sexo VARCHAR(20) NOT NULL,
+    gordura_soma DOUBLE PRECISION NOT NULL DEFAULT 0,
+    gordura_n INTEGER NOT NULL DEFAULT 0,
+    ultima_avaliacao DATE,
+    data_nascimento DATE          -- perfil das coortes (abaixo), junto com sexo
+);
+
+ALTER TABLE estatisticas_usuarios ADD COLUMN IF NOT EXISTS data_nascimento DATE;
+
+CREATE OR REPLACE FUNCTION somar_estatistica(p_chave TEXT, p_valor DOUBLE PRECISION) RETURNS void AS $$
+    INSERT INTO estatisticas (chave, valor) VALUES (p_chave, p_valor)
+    ON CONFLICT (chave) DO UPDATE SET valor = estatisticas.valor + EXCLUDED.valor;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION somar_data(p_data DATE, p_avaliacoes INTEGER, p_ultimas INTEGER) RETURNS void AS $$
+    INSERT INTO estatisticas_datas (data, avaliacoes, ultimas)
+    SELECT p_data, p_avaliacoes, p_ultimas WHERE p_data IS NOT NULL
+    ON CONFLICT (data) DO UPDATE SET
+        avaliacoes = estatisticas_datas.avaliacoes + EXCLUDED.avaliacoes,
+        ultimas = estatisticas_datas.ultimas + EXCLUDED.ultimas;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION contar_conta() RETURNS trigger AS $$
+BEGIN
+    PERFORM somar_estatistica('contas', CASE TG_OP WHEN 'INSERT' THEN 1 ELSE -1 END);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_contas_estatisticas ON contas;
+CREATE TRIGGER trg_contas_estatisticas
+    AFTER INSERT OR DELETE ON contas
+    FOR EACH ROW EXECUTE FUNCTION contar_conta();
+
+-- Repassa cada linha de estatisticas_usuarios aos totais (UPDATE: sai a antiga, entra a nova)
+CREATE OR REPLACE FUNCTION contar_estatisticas_usuario() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM somar_estatistica('gordura_soma:' || OLD.sexo, -OLD.gordura_soma);
+        PERFORM somar_estatistica('gordura_n:' || OLD.sexo, -OLD.gordura_n);
+        PERFORM somar_data(OLD.ultima_avaliacao, 0, -1);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM somar_estatistica('gordura_soma:' || NEW.sexo, NEW.gordura_soma);
+        PERFORM somar_estatistica('gordura_n:' || NEW.sexo, NEW.gordura_n);
+        PERFORM somar_data(NEW.ultima_avaliacao, 0, 1);
+    END IF;
+    IF TG_OP <> 'UPDATE' THEN
+        PERFORM somar_estatistica('usuarios', CASE TG_OP WHEN 'INSERT' THEN 1 ELSE -1 END);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_estatisticas_usuarios ON estatisticas_usuarios;
+CREATE TRIGGER trg_estatisticas_usuarios
+    AFTER INSERT OR UPDATE OR DELETE ON estatisticas_usuarios
+    FOR EACH ROW EXECUTE FUNCTION contar_estatisticas_usuario();
+
+-- A avaliação mais recente vem de idx_avaliacoes_usuario_data
+CREATE OR REPLACE FUNCTION contar_avaliacao() RETURNS trigger AS $$
+DECLARE
+    v_usuario INTEGER;
+    v_removida DOUBLE PRECISION;
+    v_incluida DOUBLE PRECISION;
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        v_usuario := OLD.usuario_id;
+        v_removida := OLD.gordura_corporal;
+        PERFORM somar_data(OLD.data, -1, 0);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        v_usuario := NEW.usuario_id;
+        v_incluida := NEW.gordura_corporal;
+        PERFORM somar_data(NEW.data, 1, 0);
+    END IF;
+    IF TG_OP <> 'UPDATE' THEN
+        PERFORM somar_estatistica('avaliacoes', CASE TG_OP WHEN 'INSERT' THEN 1 ELSE -1 END);
+    END IF;
+    UPDATE estatisticas_usuarios SET
+        gordura_soma = gordura_soma + COALESCE(v_incluida, 0) - COALESCE(v_removida, 0),
+        gordura_n = gordura_n + (v_incluida IS NOT NULL)::int - (v_removida IS NOT NULL)::int,
+        ultima_avaliacao = (SELECT MAX(data) FROM avaliacoes WHERE usuario_id = v_usuario)
+    WHERE usuario_id = v_usuario;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_avaliacoes_estatisticas ON avaliacoes;
+CREATE TRIGGER trg_avaliacoes_estatisticas
+    AFTER INSERT OR DELETE ON avaliacoes
+    FOR EACH ROW EXECUTE FUNCTION contar_avaliacao();
+
+DROP TRIGGER IF EXISTS trg_avaliacoes_estatisticas_update ON avaliacoes;
+CREATE TRIGGER trg_avaliacoes_estatisticas_update
+    AFTER UPDATE OF data, gordura_corporal ON avaliacoes
+    FOR EACH ROW WHEN (OLD.data IS DISTINCT FROM NEW.data OR OLD.gordura_corporal IS DISTINCT FROM NEW.gordura_corporal)
+    EXECUTE FUNCTION contar_avaliacao();
+
+-- Agregados por coorte (web/coortes.py): GET /api/admin/cohorts lê linhas
+-- mantidas por triggers em vez de percorrer as avaliações. Uma linha por
+-- métrica, sexo, faixa etária, mês e intervalo do histograma (ou categoria)
+CREATE TABLE IF NOT EXISTS coortes (
+    metrica VARCHAR(40) NOT NULL,
+    sexo VARCHAR(20) NOT NULL,
+    faixa VARCHAR(10) NOT NULL,
+    mes CHAR(7) NOT NULL,            -- AAAA-MM da avaliação
+    classe VARCHAR(40) NOT NULL,     -- índice do intervalo ou categoria
+    n INTEGER NOT NULL DEFAULT 0,
+    soma DOUBLE PRECISION NOT NULL DEFAULT 0,
+    soma_quadrados DOUBLE PRECISION NOT NULL DEFAULT 0,
+    minimo DOUBLE PRECISION,
+    maximo DOUBLE PRECISION,
+    PRIMARY KEY (metrica, sexo, faixa, mes, classe)
+);
+
+-- Métricas agregadas: mesmos valores de METRICAS_COORTE (web/coortes.py).
+-- Sem largura, a métrica é categórica. Ao mudar os intervalos, rode
+-- SELECT recalcular_coortes();
+CREATE TABLE IF NOT EXISTS coortes_metricas (
+    metrica VARCHAR(40) PRIMARY KEY,
+    caminho TEXT[] NOT NULL,         -- caminho em resultados
+    inicio DOUBLE PRECISION,
+    largura DOUBLE PRECISION,
+    intervalos INTEGER
+);
+
+INSERT INTO coortes_metricas (metrica, caminho, inicio, largura, intervalos) VALUES
+    ('percentual_gordura', '{percentual_gordura}', 0, 2.5, 24),
+    ('imc', '{imc}', 10, 1, 40),
+    ('rca', '{rca}', 0.3, 0.02, 30),
+    ('score_estetico', '{score_estetico_avancado,score_total}', 0, 5, 20),
+    ('somatotipo', '{somatotipo}', NULL, NULL, NULL)
+ON CONFLICT (metrica) DO UPDATE SET
+    caminho = EXCLUDED.caminho, inicio = EXCLUDED.inicio,
+    largura = EXCLUDED.largura, intervalos = EXCLUDED.intervalos;
+
+-- Faixas etárias de FAIXAS_ETARIAS (web/coortes.py)
+CREATE OR REPLACE FUNCTION faixa_etaria(p_nascimento DATE, p_data DATE) RETURNS TEXT AS $$
+    SELECT CASE
+        WHEN idade >= 65 THEN '65+'
+        WHEN idade >= 55 THEN '55-64'
+        WHEN idade >= 45 THEN '45-54'
+        WHEN idade >= 35 THEN '35-44'
+        WHEN idade >= 25 THEN '25-34'
+        WHEN idade >= 18 THEN '18-24'
+        WHEN idade >= 0 THEN '<18'
+    END
+    FROM (SELECT date_part('year', age(p_data, p_nascimento))::int AS idade) AS i;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Linhas de coortes de uma avaliação (valor é NULL nas métricas categóricas)
+CREATE OR REPLACE FUNCTION contribuicoes_coorte(p_resultados JSONB, p_data DATE, p_sexo TEXT, p_nascimento DATE)
+RETURNS TABLE (metrica TEXT, sexo TEXT, faixa TEXT, mes TEXT, classe TEXT, valor DOUBLE PRECISION) AS $$
+    SELECT m.metrica::text, p_sexo, f.faixa, to_char(p_data, 'YYYY-MM'),
+           CASE WHEN m.largura IS NULL THEN p_resultados #>> m.caminho
+                ELSE LEAST(GREATEST(floor(((p_resultados #>> m.caminho)::float - m.inicio) / m.largura), 0),
+                           m.intervalos - 1)::int::text
+           END,
+           CASE WHEN m.largura IS NOT NULL THEN (p_resultados #>> m.caminho)::float END
+    FROM coortes_metricas m, (SELECT faixa_etaria(p_nascimento, p_data) AS faixa) AS f
+    WHERE p_sexo IS NOT NULL AND f.faixa IS NOT NULL
+      AND jsonb_typeof(p_resultados #> m.caminho) = CASE WHEN m.largura IS NULL THEN 'string' ELSE 'number' END;
+$$ LANGUAGE sql STABLE;
+
+-- Soma (p_sinal = 1) ou retira (-1) uma avaliação das coortes. Retiradas não
+-- mexem nos extremos (não há como desfazê-los); um intervalo vazio recomeça do zero
+CREATE OR REPLACE FUNCTION somar_coortes(p_resultados JSONB, p_data DATE, p_sexo TEXT, p_nascimento DATE,
+                                         p_sinal INTEGER) RETURNS void AS $$
+    INSERT INTO coortes AS c (metrica, sexo, faixa, mes, classe, n, soma, soma_quadrados, minimo, maximo)
+    SELECT x.metrica, x.sexo, x.faixa, x.mes, x.classe, p_sinal,
+           p_sinal * COALESCE(x.valor, 0), p_sinal * COALESCE(x.valor * x.valor, 0),
+           CASE WHEN p_sinal > 0 THEN x.valor END, CASE WHEN p_sinal > 0 THEN x.valor END
+    FROM contribuicoes_coorte(p_resultados, p_data, p_sexo, p_nascimento) AS x
+    ON CONFLICT (metrica, sexo, faixa, mes, classe) DO UPDATE SET
+        n = c.n + EXCLUDED.n,
+        soma = CASE WHEN c.n + EXCLUDED.n > 0 THEN c.soma + EXCLUDED.soma ELSE 0 END,
+        soma_quadrados = CASE WHEN c.n + EXCLUDED.n > 0 THEN c.soma_quadrados + EXCLUDED.soma_quadrados ELSE 0 END,
+        minimo = CASE WHEN c.n + EXCLUDED.n > 0 THEN LEAST(c.minimo, EXCLUDED.minimo) END,
+        maximo = CASE WHEN c.n + EXCLUDED.n > 0 THEN GREATEST(c.maximo, EXCLUDED.maximo) END;
+$$ LANGUAGE sql;
+
+-- Perfil (sexo e nascimento) de cada usuário em estatisticas_usuarios. Ao
+-- remover um usuário, suas avaliações saem das coortes uma vez só: aqui as que
+-- ainda existem, ou em agregar_coortes_avaliacao enquanto o perfil existe
+CREATE OR REPLACE FUNCTION acompanhar_usuario() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO estatisticas_usuarios (usuario_id, sexo, data_nascimento)
+        VALUES (NEW.id, NEW.sexo, NEW.data_nascimento)
+        ON CONFLICT (usuario_id) DO NOTHING;
+    ELSIF TG_OP = 'UPDATE' THEN
+        -- As avaliações mudam de coorte: saem com o perfil antigo e entram com o novo
+        PERFORM somar_coortes(a.resultados, a.data, OLD.sexo, OLD.data_nascimento, -1)
+        FROM avaliacoes a WHERE a.usuario_id = OLD.id;
+        UPDATE estatisticas_usuarios SET sexo = NEW.sexo, data_nascimento = NEW.data_nascimento
+        WHERE usuario_id = NEW.id;
+        PERFORM somar_coortes(a.resultados, a.data, NEW.sexo, NEW.data_nascimento, 1)
+        FROM avaliacoes a WHERE a.usuario_id = NEW.id;
+    ELSE
+        PERFORM somar_coortes(a.resultados, a.data, OLD.sexo, OLD.data_nascimento, -1)
+        FROM avaliacoes a WHERE a.usuario_id = OLD.id;
+        DELETE FROM estatisticas_usuarios WHERE usuario_id = OLD.id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_usuarios_estatisticas ON usuarios;
+CREATE TRIGGER trg_usuarios_estatisticas
+    AFTER INSERT OR DELETE ON usuarios
+    FOR EACH ROW EXECUTE FUNCTION acompanhar_usuario();
+
+DROP TRIGGER IF EXISTS trg_usuarios_estatisticas_sexo ON usuarios;
+DROP TRIGGER IF EXISTS trg_usuarios_estatisticas_perfil ON usuarios;
+CREATE TRIGGER trg_usuarios_estatisticas_perfil
+    AFTER UPDATE OF sexo, data_nascimento ON usuarios
+    FOR EACH ROW WHEN (OLD.sexo IS DISTINCT FROM NEW.sexo OR OLD.data_nascimento IS DISTINCT FROM NEW.data_nascimento)
+    EXECUTE FUNCTION acompanhar_usuario();
+
+CREATE OR REPLACE FUNCTION agregar_coortes_avaliacao() RETURNS trigger AS $$
+DECLARE
+    v_perfil estatisticas_usuarios%ROWTYPE;
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        SELECT * INTO v_perfil FROM estatisticas_usuarios WHERE usuario_id = OLD.usuario_id;
+        IF FOUND THEN
+            PERFORM somar_coortes(OLD.resultados, OLD.data, v_perfil.sexo, v_perfil.data_nascimento, -1);
+        END IF;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        SELECT * INTO v_perfil FROM estatisticas_usuarios WHERE usuario_id = NEW.usuario_id;
+        IF FOUND THEN
+            PERFORM somar_coortes(NEW.resultados, NEW.data, v_perfil.sexo, v_perfil.data_nascimento, 1);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_avaliacoes_coortes ON avaliacoes;
+CREATE TRIGGER trg_avaliacoes_coortes
+    AFTER INSERT OR DELETE ON avaliacoes
+    FOR EACH ROW EXECUTE FUNCTION agregar_coortes_avaliacao();
+
+DROP TRIGGER IF EXISTS trg_avaliacoes_coortes_update ON avaliacoes;
+CREATE TRIGGER trg_avaliacoes_coortes_update
+    AFTER UPDATE OF usuario_id, data, resultados ON avaliacoes
+    FOR EACH ROW WHEN (OLD.usuario_id IS DISTINCT FROM NEW.usuario_id OR OLD.data IS DISTINCT FROM NEW.data
+                       OR OLD.resultados IS DISTINCT FROM NEW.resultados)
+    EXECUTE FUNCTION agregar_coortes_avaliacao();
+
+-- Reconstrução completa das coortes (backfill; exata também nos mínimos e máximos)
+CREATE OR REPLACE FUNCTION recalcular_coortes() RETURNS void AS $$
+BEGIN
+    LOCK TABLE usuarios, avaliacoes IN SHARE MODE;
+
+    UPDATE estatisticas_usuarios e SET data_nascimento = u.data_nascimento
+    FROM usuarios u
+    WHERE u.id = e.usuario_id AND e.data_nascimento IS DISTINCT FROM u.data_nascimento;
+
+    DELETE FROM coortes;
+    INSERT INTO coortes (metrica, sexo, faixa, mes, classe, n, soma, soma_quadrados, minimo, maximo)
+    SELECT x.metrica, x.sexo, x.faixa, x.mes, x.classe, COUNT(*), COALESCE(SUM(x.valor), 0),
+           COALESCE(SUM(x.valor * x.valor), 0), MIN(x.valor), MAX(x.valor)
+    FROM avaliacoes a
+    JOIN usuarios u ON u.id = a.usuario_id
+    CROSS JOIN LATERAL contribuicoes_coorte(a.resultados, a.data, u.sexo, u.data_nascimento) AS x
+    GROUP BY x.metrica, x.sexo, x.faixa, x.mes, x.classe;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Esboços de quantis por coorte (web/quantis.py): os percentis de
+-- GET /api/avaliacoes saem de um esboço KLL por métrica, sexo e faixa etária,
+-- serializado em esboco. Os triggers só enfileiram a avaliação em
+-- quantis_pendentes e contam em quantis_obsoletos os valores que ela deixou
+-- para trás; a aplicação incorpora a fila aos esboços em lote, em segundo
+-- plano (db.agendar_quantis), e a leitura é só um SELECT
+CREATE TABLE IF NOT EXISTS quantis (
+    metrica VARCHAR(40) NOT NULL,
+    sexo VARCHAR(20) NOT NULL,
+    faixa VARCHAR(10) NOT NULL,
+    esboco JSONB NOT NULL,
+    PRIMARY KEY (metrica, sexo, faixa)
+);
+
+CREATE TABLE IF NOT EXISTS quantis_pendentes (
+    avaliacao_id INTEGER PRIMARY KEY
+);
+
+-- Valores já incluídos nos esboços de cada sexo: a versão dos percentis na
+-- ETag de GET /api/avaliacoes (nunca diminui, nem na reconstrução)
+CREATE TABLE IF NOT EXISTS quantis_versoes (
+    sexo VARCHAR(20) PRIMARY KEY,
+    versao BIGINT NOT NULL DEFAULT 0
+);
+
+-- Valores que saíram de cada coorte (resultados recalculados, avaliações
+-- removidas, perfis alterados) e continuam nos esboços, pois KLL não desfaz
+-- uma inclusão. Passando de LIMITE_OBSOLETOS (web/quantis.py) do tamanho da
+-- coorte, db.incorporar_quantis reconstrói os esboços dela
+CREATE TABLE IF NOT EXISTS quantis_obsoletos (
+    sexo VARCHAR(20) NOT NULL,
+    faixa VARCHAR(10) NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (sexo, faixa)
+);
+
+CREATE OR REPLACE FUNCTION marcar_quantis_obsoletos(p_sexo TEXT, p_faixa TEXT, p_n INTEGER) RETURNS void AS $$
+    INSERT INTO quantis_obsoletos AS o (sexo, faixa, n)
+    SELECT p_sexo, p_faixa, p_n WHERE p_sexo IS NOT NULL AND p_faixa IS NOT NULL AND p_n > 0
+    ON CONFLICT (sexo, faixa) DO UPDATE SET n = o.n + EXCLUDED.n;
+$$ LANGUAGE sql;
+
+-- A avaliação entra na fila sempre que é gravada com resultados novos (ou
+-- muda de data ou de dono); os resultados anteriores ficam obsoletos. O
+-- perfil vem de estatisticas_usuarios, como nas coortes: ao remover um
+-- usuário, cada avaliação é contada uma vez só
+CREATE OR REPLACE FUNCTION enfileirar_quantis() RETURNS trigger AS $$
+DECLARE
+    v_perfil estatisticas_usuarios%ROWTYPE;
+BEGIN
+    -- Ainda na fila, a avaliação não chegou aos esboços: nada fica obsoleto
+    IF TG_OP <> 'INSERT' AND OLD.resultados IS NOT NULL
+            AND NOT EXISTS (SELECT 1 FROM quantis_pendentes WHERE avaliacao_id = OLD.id) THEN
+        SELECT * INTO v_perfil FROM estatisticas_usuarios WHERE usuario_id = OLD.usuario_id;
+        IF FOUND THEN
+            PERFORM marcar_quantis_obsoletos(v_perfil.sexo, faixa_etaria(v_perfil.data_nascimento, OLD.data), 1);
+        END IF;
+    END IF;
+    IF TG_OP <> 'DELETE' AND NEW.resultados IS NOT NULL THEN
+        INSERT INTO quantis_pendentes (avaliacao_id) VALUES (NEW.id) ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_avaliacoes_quantis ON avaliacoes;
+CREATE TRIGGER trg_avaliacoes_quantis
+    AFTER INSERT OR DELETE ON avaliacoes
+    FOR EACH ROW EXECUTE FUNCTION enfileirar_quantis();
+
+DROP TRIGGER IF EXISTS trg_avaliacoes_quantis_update ON avaliacoes;
+CREATE TRIGGER trg_avaliacoes_quantis_update
+    AFTER UPDATE OF usuario_id, data, resultados ON avaliacoes
+    FOR EACH ROW WHEN (OLD.usuario_id IS DISTINCT FROM NEW.usuario_id OR OLD.data IS DISTINCT FROM NEW.data
+                       OR OLD.resultados IS DISTINCT FROM NEW.resultados)
+    EXECUTE FUNCTION enfileirar_quantis();
+
+-- Perfil alterado: as avaliações saem da coorte antiga (obsoletas) e voltam à
+-- fila com o perfil novo; usuário removido: as que ainda existem saem
+CREATE OR REPLACE FUNCTION enfileirar_quantis_perfil() RETURNS trigger AS $$
+BEGIN
+    PERFORM marcar_quantis_obsoletos(OLD.sexo, f.faixa, COUNT(*)::int)
+    FROM avaliacoes a, LATERAL (SELECT faixa_etaria(OLD.data_nascimento, a.data) AS faixa) AS f
+    WHERE a.usuario_id = OLD.id AND a.resultados IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM quantis_pendentes p WHERE p.avaliacao_id = a.id)
+    GROUP BY f.faixa;
+    IF TG_OP = 'UPDATE' THEN
+        INSERT INTO quantis_pendentes (avaliacao_id)
+        SELECT id FROM avaliacoes WHERE usuario_id = NEW.id AND resultados IS NOT NULL
+        ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_usuarios_quantis ON usuarios;
+CREATE TRIGGER trg_usuarios_quantis
+    AFTER DELETE ON usuarios
+    FOR EACH ROW EXECUTE FUNCTION enfileirar_quantis_perfil();
+
+DROP TRIGGER IF EXISTS trg_usuarios_quantis_perfil ON usuarios;
+CREATE TRIGGER trg_usuarios_quantis_perfil
+    AFTER UPDATE OF sexo, data_nascimento ON usuarios
+    FOR EACH ROW WHEN (OLD.sexo IS DISTINCT FROM NEW.sexo OR OLD.data_nascimento IS DISTINCT FROM NEW.data_nascimento)
+    EXECUTE FUNCTION enfileirar_quantis_perfil();
+
+-- Reconstrução dos esboços: todas as avaliações com resultados voltam à fila
+CREATE OR REPLACE FUNCTION recalcular_quantis() RETURNS void AS $$
+BEGIN
+    LOCK TABLE quantis IN SHARE ROW EXCLUSIVE MODE;
+    DELETE FROM quantis;
+    DELETE FROM quantis_obsoletos;
+    DELETE FROM quantis_pendentes;
+    INSERT INTO quantis_pendentes (avaliacao_id) SELECT id FROM avaliacoes WHERE resultados IS NOT NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reconstrução completa dos contadores a partir das tabelas
+CREATE OR REPLACE FUNCTION recalcular_estatisticas() RETURNS void AS $$
+BEGIN
+    -- Bloqueia as escritas durante a reconstrução (as leituras seguem)
+    LOCK TABLE contas, usuarios, avaliacoes IN SHARE MODE;
+
+    DELETE FROM estatisticas_usuarios;
+    INSERT INTO estatisticas_usuarios (usuario_id, sexo, data_nascimento, gordura_soma, gordura_n, ultima_avaliacao)
+    SELECT u.id, u.sexo, u.data_nascimento, COALESCE(SUM(a.gordura_corporal), 0), COUNT(a.gordura_corporal),
+           MAX(a.data)
+    FROM usuarios u LEFT JOIN avaliacoes a ON a.usuario_id = u.id
+    GROUP BY u.id, u.sexo, u.data_nascimento;
+
+    DELETE FROM estatisticas;
+    INSERT INTO estatisticas (chave, valor)
+    SELECT 'contas', COUNT(*) FROM contas
+    UNION ALL SELECT 'usuarios', COUNT(*) FROM estatisticas_usuarios
+    UNION ALL SELECT 'avaliacoes', COUNT(*) FROM avaliacoes
+    UNION ALL SELECT 'gordura_soma:' || sexo, SUM(gordura_soma) FROM estatisticas_usuarios GROUP BY sexo
+    UNION ALL SELECT 'gordura_n:' || sexo, SUM(gordura_n) FROM estatisticas_usuarios GROUP BY sexo;
+
+    DELETE FROM estatisticas_datas;
+    INSERT INTO estatisticas_datas (data, avaliacoes, ultimas)
+    SELECT data, SUM(avaliacoes), SUM(ultimas) FROM (
+        SELECT data, COUNT(*) AS avaliacoes, 0 AS ultimas FROM avaliacoes GROUP BY data
+        UNION ALL
+        SELECT ultima_avaliacao, 0, COUNT(*) FROM estatisticas_usuarios
+        WHERE ultima_avaliacao IS NOT NULL GROUP BY ultima_avaliacao
+    ) AS por_data
+    GROUP BY data;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Banco criado antes das estatísticas: conta o que já existe
+SELECT recalcular_estatisticas() WHERE NOT EXISTS (SELECT 1 FROM estatisticas WHERE chave = 'contas');
+
+-- Banco criado antes das coortes: agrega as avaliações que já existem
+SELECT recalcular_coortes() WHERE NOT EXISTS (SELECT 1 FROM coortes);
+
+-- Banco criado antes dos esboços: enfileira as avaliações que já têm resultados
+SELECT recalcular_quantis()
+WHERE NOT EXISTS (SELECT 1 FROM quantis) AND NOT EXISTS (SELECT 1 FROM quantis_pendentes);
@@ -0,0 +1,337 @@
+"""
+Tabelas de faixas para classificação por limites
+
+Todas as classificações por limites (IMC, gordura, RCQ, RCA, mapa corporal,
+score estético, somatotipo, proporções) são descritas como dados em
+DADOS_FAIXAS e montadas uma única vez, na importação. A mesma tabela
+classifica um valor (bisect) ou uma coluna inteira (numpy.searchsorted), o
+que mantém o cálculo escalar e o vetorizado (lote.py) sempre iguais.
+
+Formato de cada tabela:
+    limites: limites crescentes que separam as faixas; o valor cai na faixa
+        seguinte ao atingir o limite ("valor < limite" fica abaixo). Use
+        ('<=', limite) para um limite inclusivo ("valor <= limite" fica abaixo).
+        Pode ser uma tupla (sem dimensões), um dicionário sexo -> tupla, ou
+        sexo -> {idade mínima: tupla} para faixas por idade.
+    rotulos: um rótulo por faixa (len(limites) + 1), do menor para o maior.
+"""
+
+import math
+from bisect import bisect_right
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+
+def _limite(especificacao) -> float:
+    """Converte um limite em limite estrito (inclusivo vira o próximo float)"""
+    if isinstance(especificacao, tuple):
+        operador, valor = especificacao
+        if operador != '<=':
+            raise ValueError(f"Operador de limite desconhecido: {operador}")
+        return math.nextafter(float(valor), math.inf)
+    return float(especificacao)
+
+
+class TabelaFaixas:
+    """
+    Classifica valores em faixas definidas por limites crescentes.
+
+    Args:
+        nome: Nome da tabela (mensagens de erro)
+        limites: Limites (ver formato no início do módulo)
+        rotulos: Rótulo de cada faixa, do menor para o maior
+
+    Raises:
+        ValueError: Se os limites não forem crescentes ou não houver um rótulo por faixa
+    """
+
+    def __init__(self, nome: str, limites, rotulos: Sequence[Any]):
+        self.nome = nome
+        self.rotulos = tuple(rotulos)
+        self.por_sexo = isinstance(limites, dict)
+        grupos = limites if self.por_sexo else {None: limites}
+        # Cada grupo vira {idade mínima: limites}; sem faixas etárias, uma única a partir de 0
+        grupos = {sexo: grupo if isinstance(grupo, dict) else {0: grupo} for sexo, grupo in grupos.items()}
+        self.por_idade = any(len(grupo) > 1 for grupo in grupos.values())
+
+        # sexo -> limites (lista) ou, com idade, (idades mínimas, [limites por faixa etária])
+        self._grupos = {}
+        self._arrays = {}
+        for sexo, grupo in grupos.items():
+            idades = sorted(grupo)
+            if idades[0] != 0:
+                raise ValueError(f"Tabela {nome}: faixas etárias de {sexo} devem começar em 0")
+            bandas = [self._preparar(grupo[idade]) for idade in idades]
+            if self.por_idade:
+                self._grupos[sexo] = (idades, bandas)
+                self._arrays[sexo] = (np.asarray(idades, dtype=float),
+                                      [np.asarray(banda) for banda in bandas])
+            else:
+                self._grupos[sexo] = bandas[0]
+                self._arrays[sexo] = np.asarray(bandas[0])
+        # Sem sexo nem idade (a maioria): classificar vai direto ao bisect
+        self._limites = None if self.por_sexo or self.por_idade else self._grupos[None]
+
+    def _preparar(self, especificacoes) -> list:
+        limites = [_limite(e) for e in especificacoes]
+        if any(a >= b for a, b in zip(limites, limites[1:])):
+            raise ValueError(f"Tabela {self.nome}: limites devem ser crescentes")
+        if len(limites) + 1 != len(self.rotulos):
+            raise ValueError(f"Tabela {self.nome}: {len(limites) + 1} faixas e {len(self.rotulos)} rótulos")
+        return limites
+
+    def indice(self, valor: float, sexo: Optional[str] = None, idade: Optional[int] = None) -> Optional[int]:
+        """Índice da faixa do valor (None se o sexo não existir na tabela)"""
+        grupo = self._grupos.get(sexo if self.por_sexo else None)
+        if grupo is None:
+            return None
+        if self.por_idade:
+            idades, bandas = grupo
+            grupo = bandas[bisect_right(idades, idade) - 1]
+        return bisect_right(grupo, valor)
+
+    def classificar(self, valor: float, sexo: Optional[str] = None, idade: Optional[int] = None,
+                    padrao: Any = None) -> Any:
+        """Rótulo da faixa do valor (padrao se o sexo não existir na tabela)"""
+        if self._limites is not None:
+            return self.rotulos[bisect_right(self._limites, valor)]
+        i = self.indice(valor, sexo, idade)
+        return padrao if i is None else self.rotulos[i]
+
+    def indices(self, valores: np.ndarray, masculino: Optional[np.ndarray] = None,
+                idades: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Índice da faixa de cada valor (NaN cai na última faixa).
+
+        Args:
+            valores: Valores a classificar
+            masculino: Máscara de sexo (obrigatória em tabelas por sexo)
+            idades: Idade de cada valor (obrigatória em tabelas por idade)
+        """
+        valores = np.asarray(valores, dtype=float)
+        if not self.por_sexo:
+            return np.searchsorted(self._arrays[None], valores, side='right')
+        if masculino is None:
+            raise ValueError(f"Tabela {self.nome} depende do sexo")
+        if self.por_idade and idades is None:
+            raise ValueError(f"Tabela {self.nome} depende da idade")
+
+        resultado = np.zeros(valores.shape, dtype=np.intp)
+        for sexo, grupo in self._arrays.items():
+            do_sexo = masculino if sexo == 'M' else ~masculino
+            if not self.por_idade:
+                resultado[do_sexo] = np.searchsorted(grupo, valores[do_sexo], side='right')
+                continue
+            limites_idade, bandas = grupo
+            banda = np.searchsorted(limites_idade, np.asarray(idades, dtype=float), side='right') - 1
+            for k, limites in enumerate(bandas):
+                mascara = do_sexo & (banda == k)
+                resultado[mascara] = np.searchsorted(limites, valores[mascara], side='right')
+        return resultado
+
+    def rotulos_de(self, indices: np.ndarray) -> np.ndarray:
+        """Rótulos (array de objetos) correspondentes aos índices"""
+        return np.asarray(self.rotulos, dtype=object)[indices]
+
+
+# ===== DADOS =====
+
+# Faixa ideal de gordura (%) no score estético, usada também nas penalizações
+GORDURA_IDEAL = {'M': (10, 15), 'F': (18, 23)}
+
+DADOS_FAIXAS: Dict[str, Dict[str, Any]] = {
+    # OMS
+    'imc': {
+        'limites': (16, 17, 18.5, 25, 30, 35, 40),
+        'rotulos': (
+            ("MAGREZA_GRAVE", "Magreza grau III"),
+            ("MAGREZA_MODERADA", "Magreza grau II"),
+            ("MAGREZA_LEVE", "Magreza grau I"),
+            ("NORMAL", "Peso normal"),
+            ("SOBREPESO", "Sobrepeso (pré-obesidade)"),
+            ("OBESIDADE_I", "Obesidade grau I"),
+            ("OBESIDADE_II", "Obesidade grau II"),
+            ("OBESIDADE_III", "Obesidade grau III (mórbida)"),
+        ),
+    },
+    # ACE: as faixas não variam com a idade (uma única faixa etária, a partir de 0);
+    # com mais de uma faixa etária, a idade passa a ser exigida também no lote
+    'gordura': {
+        'limites': {'M': {0: (6, 14, 18, 25)}, 'F': {0: (14, 21, 25, 32)}},
+        'rotulos': ("Essencial (muito baixo)", "Atleta", "Fitness", "Aceitável", "Obesidade"),
+    },
+    'rcq': {
+        'limites': {'M': (0.85, 0.90), 'F': (0.75, 0.85)},
+        'rotulos': (("BAIXO", "Risco baixo"), ("MODERADO", "Risco moderado"), ("ALTO", "Risco alto")),
+    },
+    'rca': {
+        'limites': (0.40, 0.50, 0.60, 0.70),
+        'rotulos': (
+            ("MUITO_BAIXO", "Extremamente magro"),
+            ("SAUDAVEL", "Peso saudável"),
+            ("SOBREPESO", "Sobrepeso - risco aumentado"),
+            ("OBESIDADE", "Obesidade - risco alto"),
+            ("OBESIDADE_MORBIDA", "Obesidade mórbida - risco muito alto"),
+        ),
+    },
+
+    # Mapa corporal
+    'desenvolvimento': {
+        'limites': (0.90, ('<=', 1.10)),
+        'rotulos': (
+            ('subdesenvolvido', 'Subdesenvolvido', '#ff6b6b'),
+            ('equilibrado', 'Equilibrado', '#51cf66'),
+            ('excesso', 'Excesso', '#ffa94d'),
+        ),
+    },
+    'gordura_central_rca': {
+        'limites': (('<=', 0.49), ('<=', 0.54)),
+        'rotulos': (
+            ('saudavel', 'Saudável', '#51cf66'),
+            ('moderado', 'Risco Moderado', '#ffa94d'),
+            ('elevado', 'Risco Elevado', '#ff6b6b'),
+        ),
+    },
+    'gordura_central_rcq': {
+        'limites': {'M': (('<=', 0.90),), 'F': (('<=', 0.85),)},
+        'rotulos': (('normal', 'Normal', '#51cf66'), ('elevado', 'Elevado', '#ff6b6b')),
+    },
+
+    # Score estético
+    'score_gordura': {
+        'limites': {sexo: (minimo, ('<=', maximo)) for sexo, (minimo, maximo) in GORDURA_IDEAL.items()},
+        'rotulos': ('abaixo', 'ideal', 'acima'),
+    },
+    # Fração do peso máximo conforme a razão real/ideal
+    'score_proporcao': {
+        'limites': (0.80, 0.85, 0.90, 0.95, ('<=', 1.05), ('<=', 1.10), ('<=', 1.15), ('<=', 1.20)),
+        'rotulos': (0.2, 0.4, 0.6, 0.8, 1, 0.8, 0.6, 0.4, 0.2),
+    },
+    # Média dos desvios das regiões; None = penalização contínua
+    'score_simetria': {
+        'limites': (('<=', 0.05), ('<=', 0.10), ('<=', 0.15), ('<=', 0.20)),
+        'rotulos': (15.0, 12.0, 9.0, 6.0, None),
+    },
+    'score_gordura_central': {
+        'limites': (('<=', 0.45), ('<=', 0.49), ('<=', 0.54), ('<=', 0.60)),
+        'rotulos': (10.0, 8.0, 5.0, 2.0, 0),
+    },
+    'classificacao_score': {
+        'limites': (31, 61, 85),
+        'rotulos': (
+            ('A Desenvolver', '#ff6b6b'),
+            ('Intermediário', '#ffa94d'),
+            ('Estético', '#51cf66'),
+            ('Atlético', '#20c997'),
+        ),
+    },
+
+    # Somatotipo: pontos somados a (ectomorfo, mesomorfo, endomorfo)
+    'somatotipo_imc': {
+        'limites': (18.5, 25, 30),
+        'rotulos': ((3, 0, 0), (1, 2, 0), (0, 1, 2), (0, 0, 3)),
+    },
+    'somatotipo_rca': {
+        'limites': (0.45, 0.50, 0.60),
+        'rotulos': ((2, 0, 0), (0, 2, 0), (0, 0, 2), (0, 0, 3)),
+    },
+    'somatotipo_rcq': {
+        'limites': (0.80, 0.90),
+        'rotulos': ((2, 1, 0), (0, 2, 0), (0, 0, 3)),
+    },
+    'somatotipo_ombro_cintura': {
+        'limites': (('<=', 0), 1.4, 1.6),
+        'rotulos': ((0, 0, 0), (1, 0, 0), (0, 2, 0), (0, 3, 0)),
+    },
+    'somatotipo_peitoral_cintura': {
+        'limites': (1.2, 1.4),
+        'rotulos': ((0, 0, 0), (0, 1, 0), (0, 2, 0)),
+    },
+
+    # Análise de simetria das proporções
+    'simetria_ombro_cintura': {
+        'limites': (1.4, 1.6),
+        'rotulos': ("Desenvolver ombros ou reduzir cintura", "Boa proporção",
+                    "Excelente proporção (formato V)"),
+    },
+    'simetria_peitoral_cintura': {
+        'limites': (1.2, 1.4),
+        'rotulos': ("Desenvolver peitoral", "Bom desenvolvimento", "Excelente desenvolvimento torácico"),
+    },
+    # Desvio |braço/panturrilha - 1|; None = depende de qual lado domina
+    'simetria_braco_panturrilha': {
+        'limites': (('<=', 0.05), ('<=', 0.10)),
+        'rotulos': ("Simetria perfeita", "Boa simetria", None),
+    },
+    'simetria_cintura_altura': {
+        'limites': (45, ('<=', 47)),
+        'rotulos': ("Cintura fina (excelente)", "Proporção ideal", "Reduzir gordura abdominal"),
+    },
+    'simetria_peitoral_altura': {
+        'limites': (55, ('<=', 60)),
+        'rotulos': ("Desenvolver peitoral", "Proporção ideal", "Desenvolvimento acima do ideal"),
+    },
+    # Ganho percentual do braço contraído
+    'simetria_bracos': {
+        'limites': (5, ('<=', 15)),
+        'rotulos': ("Pouca hipertrofia ({:.1f}%)", "Contração normal ({:.1f}%)",
+                    "Excelente hipertrofia ({:.1f}%)"),
+    },
+
+    # Pontuação estética; None = pontuação proporcional
+    'pontos_ombro_cintura': {
+        'limites': (1.4, 1.5, 1.6),
+        'rotulos': (None, 15, 20, 25),
+    },
+    'pontos_peitoral_cintura': {
+        'limites': (1.3, 1.4),
+        'rotulos': (None, 15, 20),
+    },
+    'classificacao_estetica': {
+        'limites': (50, 60, 70, 80, 90),
+        'rotulos': ("A Desenvolver", "Médio", "Bom", "Muito Bom", "Excelente", "Excepcional"),
+    },
+}
+
+TABELAS: Dict[str, TabelaFaixas] = {
+    nome: TabelaFaixas(nome, dados['limites'], dados['rotulos'])
+    for nome, dados in DADOS_FAIXAS.items()
+}
+
+IMC = TABELAS['imc']
+GORDURA = TABELAS['gordura']
+RCQ = TABELAS['rcq']
+RCA = TABELAS['rca']
+DESENVOLVIMENTO = TABELAS['desenvolvimento']
+GORDURA_CENTRAL_RCA = TABELAS['gordura_central_rca']
+GORDURA_CENTRAL_RCQ = TABELAS['gordura_central_rcq']
+SCORE_GORDURA = TABELAS['score_gordura']
+SCORE_PROPORCAO = TABELAS['score_proporcao']
+SCORE_SIMETRIA = TABELAS['score_simetria']
+SCORE_GORDURA_CENTRAL = TABELAS['score_gordura_central']
+CLASSIFICACAO_SCORE = TABELAS['classificacao_score']
+SOMATOTIPO_IMC = TABELAS['somatotipo_imc']
+SOMATOTIPO_RCA = TABELAS['somatotipo_rca']
+SOMATOTIPO_RCQ = TABELAS['somatotipo_rcq']
+SOMATOTIPO_OMBRO_CINTURA = TABELAS['somatotipo_ombro_cintura']
+SOMATOTIPO_PEITORAL_CINTURA = TABELAS['somatotipo_peitoral_cintura']
+SIMETRIA_OMBRO_CINTURA = TABELAS['simetria_ombro_cintura']
+SIMETRIA_PEITORAL_CINTURA = TABELAS['simetria_peitoral_cintura']
+SIMETRIA_BRACO_PANTURRILHA = TABELAS['simetria_braco_panturrilha']
+SIMETRIA_CINTURA_ALTURA = TABELAS['simetria_cintura_altura']
+SIMETRIA_PEITORAL_ALTURA = TABELAS['simetria_peitoral_altura']
+SIMETRIA_BRACOS = TABELAS['simetria_bracos']
+PONTOS_OMBRO_CINTURA = TABELAS['pontos_ombro_cintura']
+PONTOS_PEITORAL_CINTURA = TABELAS['pontos_peitoral_cintura']
+CLASSIFICACAO_ESTETICA = TABELAS['classificacao_estetica']
+
+
+def chave_sexo(sexo: str) -> Optional[str]:
+    """'M'/'MASCULINO' -> 'M', 'F'/'FEMININO' -> 'F' (qualquer caixa); outros -> None"""
+    sexo = sexo.upper()
+    if sexo in ('M', 'MASCULINO'):
+        return 'M'
+    if sexo in ('F', 'FEMININO'):
+        return 'F'
+    return None
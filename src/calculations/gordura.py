@@ -4,6 +4,7 @@ Cálculos de estimativa de percentual de gordura corporal
 
 import math
 from typing import Optional
+from .faixas import GORDURA, chave_sexo
 
 
 def calcular_gordura_us_navy(
@@ -77,7 +78,8 @@ def classificar_gordura(percentual: float, sexo: str, idade: int) -> str:
     """
     Classifica o percentual de gordura segundo faixas recomendadas.
     
-    Baseado em padrões do American Council on Exercise (ACE).
+    Baseado em padrões do American Council on Exercise (ACE); as faixas
+    (por sexo e idade) estão em faixas.DADOS_FAIXAS['gordura'].
     
     Args:
         percentual: Percentual de gordura corporal
@@ -87,33 +89,7 @@ def classificar_gordura(percentual: float, sexo: str, idade: int) -> str:
     Returns:
         Classificação do percentual de gordura
     """
-    sexo = sexo.upper()
-    
-    if sexo in ['M', 'MASCULINO']:
-        if percentual < 6:
-            return "Essencial (muito baixo)"
-        elif percentual < 14:
-            return "Atleta"
-        elif percentual < 18:
-            return "Fitness"
-        elif percentual < 25:
-            return "Aceitável"
-        else:
-            return "Obesidade"
-    
-    elif sexo in ['F', 'FEMININO']:
-        if percentual < 14:
-            return "Essencial (muito baixo)"
-        elif percentual < 21:
-            return "Atleta"
-        elif percentual < 25:
-            return "Fitness"
-        elif percentual < 32:
-            return "Aceitável"
-        else:
-            return "Obesidade"
-    
-    return "Desconhecido"
+    return GORDURA.classificar(percentual, chave_sexo(sexo), idade, padrao="Desconhecido")
 
 
 def calcular_massa_gorda(peso: float, percentual_gordura: float) -> float:
@@ -3,6 +3,7 @@ Cálculos relacionados ao Índice de Massa Corporal (IMC)
 """
 
 from typing import Tuple
+from .faixas import IMC
 
 
 def calcular_imc(peso: float, altura_cm: float) -> float:
@@ -43,22 +44,7 @@ def classificar_imc(imc: float) -> Tuple[str, str]:
     Returns:
         Tupla (classificação, descrição)
     """
-    if imc < 16:
-        return ("MAGREZA_GRAVE", "Magreza grau III")
-    elif imc < 17:
-        return ("MAGREZA_MODERADA", "Magreza grau II")
-    elif imc < 18.5:
-        return ("MAGREZA_LEVE", "Magreza grau I")
-    elif imc < 25:
-        return ("NORMAL", "Peso normal")
-    elif imc < 30:
-        return ("SOBREPESO", "Sobrepeso (pré-obesidade)")
-    elif imc < 35:
-        return ("OBESIDADE_I", "Obesidade grau I")
-    elif imc < 40:
-        return ("OBESIDADE_II", "Obesidade grau II")
-    else:
-        return ("OBESIDADE_III", "Obesidade grau III (mórbida)")
+    return IMC.classificar(imc)
 
 
 def obter_imc_ideal(altura_cm: float) -> Tuple[float, float]:
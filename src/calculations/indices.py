@@ -3,6 +3,7 @@ Cálculos de índices corporais: RCQ e RCA
 """
 
 from typing import Tuple
+from .faixas import RCQ, RCA, chave_sexo
 
 
 def calcular_rcq(cintura_cm: float, quadril_cm: float) -> float:
@@ -39,25 +40,7 @@ def classificar_rcq(rcq: float, sexo: str) -> Tuple[str, str]:
     Returns:
         Tupla (classificação, descrição_risco)
     """
-    sexo = sexo.upper()
-    
-    if sexo in ['M', 'MASCULINO']:
-        if rcq < 0.85:
-            return ("BAIXO", "Risco baixo")
-        elif rcq < 0.90:
-            return ("MODERADO", "Risco moderado")
-        else:
-            return ("ALTO", "Risco alto")
-    
-    elif sexo in ['F', 'FEMININO']:
-        if rcq < 0.75:
-            return ("BAIXO", "Risco baixo")
-        elif rcq < 0.85:
-            return ("MODERADO", "Risco moderado")
-        else:
-            return ("ALTO", "Risco alto")
-    
-    return ("DESCONHECIDO", "Sexo não especificado")
+    return RCQ.classificar(rcq, chave_sexo(sexo), padrao=("DESCONHECIDO", "Sexo não especificado"))
 
 
 def calcular_rca(cintura_cm: float, altura_cm: float) -> float:
@@ -94,16 +77,7 @@ def classificar_rca(rca: float) -> Tuple[str, str]:
     Returns:
         Tupla (classificação, descrição)
     """
-    if rca < 0.40:
-        return ("MUITO_BAIXO", "Extremamente magro")
-    elif rca < 0.50:
-        return ("SAUDAVEL", "Peso saudável")
-    elif rca < 0.60:
-        return ("SOBREPESO", "Sobrepeso - risco aumentado")
-    elif rca < 0.70:
-        return ("OBESIDADE", "Obesidade - risco alto")
-    else:
-        return ("OBESIDADE_MORBIDA", "Obesidade mórbida - risco muito alto")
+    return RCA.classificar(rca)
 
 
 def calcular_indice_conicidade(cintura_cm: float, peso_kg: float, altura_cm: float) -> float:
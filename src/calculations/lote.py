@@ -0,0 +1,562 @@
+"""
+Cálculos vetorizados (NumPy) para processamento de avaliações em lote
+
+Cada função recebe colunas (arrays, uma posição por avaliação) e reproduz a
+função escalar correspondente, inclusive arredondamentos. As classificações
+usam as mesmas tabelas de faixas (faixas.py) do cálculo escalar, uma chamada
+vetorizada por índice.
+Medidas não informadas são NaN; os resultados são NaN onde o cálculo não se
+aplica.
+"""
+
+import sys
+import math
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+from . import faixas
+from .proporcoes import TEXTOS_SIMETRIA
+
+
+# ===== UTILITÁRIOS =====
+
+def coluna(valores: Sequence) -> np.ndarray:
+    """Converte uma sequência de medidas em array float (None vira NaN)"""
+    return np.array(valores, dtype=float)
+
+
+def presente(valores: np.ndarray) -> np.ndarray:
+    """Máscara dos valores "verdadeiros" no sentido do Python (informados e não zero)"""
+    return ~np.isnan(valores) & (valores != 0)
+
+
+def arredondar(valores: np.ndarray, casas: int) -> np.ndarray:
+    """
+    Equivalente a round(valor, casas) elemento a elemento.
+
+    np.round coincide com round() exceto perto de empates (x,xx5), onde o
+    produto pela escala pode cair do outro lado; esses poucos casos são
+    refeitos com round().
+    """
+    escala = 10.0 ** casas
+    escalado = valores * escala
+    resultado = np.round(escalado) / escala
+    duvidosos = np.abs(escalado - np.floor(escalado) - 0.5) < 1e-6
+    for i in np.flatnonzero(duvidosos):
+        resultado[i] = round(float(valores[i]), casas)
+    return resultado
+
+
+def log10(valores: np.ndarray) -> np.ndarray:
+    """
+    math.log10 elemento a elemento (NaN onde o valor não é positivo).
+
+    np.log10 pode diferir de math.log10 no último bit, o que mudaria o
+    arredondamento do percentual de gordura em relação ao cálculo escalar.
+    """
+    resultado = np.full(valores.shape, np.nan)
+    validos = valores > 0
+    resultado[validos] = np.fromiter(
+        map(math.log10, valores[validos].tolist()), dtype=float, count=int(validos.sum())
+    )
+    return resultado
+
+
+def somar(parcelas: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    sum() elemento a elemento, na mesma ordem das parcelas (parcela 0 = ausente).
+
+    A partir do Python 3.12, sum() de floats usa a soma compensada de Neumaier;
+    o mesmo algoritmo é aplicado aqui para obter resultados idênticos.
+    """
+    total = np.zeros_like(parcelas[0])
+    if sys.version_info < (3, 12):
+        for parcela in parcelas:
+            total = total + parcela
+        return total
+
+    compensacao = np.zeros_like(total)
+    for parcela in parcelas:
+        t = total + parcela
+        compensacao += np.where(
+            np.abs(total) >= np.abs(parcela), (total - t) + parcela, (parcela - t) + total
+        )
+        total = t
+    return np.where((compensacao != 0) & np.isfinite(compensacao), total + compensacao, total)
+
+
+def valores_faixa(tabela: faixas.TabelaFaixas, valores: np.ndarray,
+                  continuo: np.ndarray = None) -> np.ndarray:
+    """
+    Rótulo numérico da faixa de cada valor.
+
+    Onde o rótulo é None (pontuação proporcional na função escalar), usa o
+    valor correspondente de `continuo`.
+    """
+    rotulos = np.array([np.nan if r is None else r for r in tabela.rotulos], dtype=float)
+    resultado = rotulos[tabela.indices(valores)]
+    if continuo is None:
+        return resultado
+    return np.where(np.isnan(resultado), continuo, resultado)
+
+
+# ===== IMC =====
+
+CLASSIFICACOES_IMC = faixas.IMC.rotulos
+
+
+def calcular_imc_lote(peso: np.ndarray, altura_cm: np.ndarray) -> np.ndarray:
+    """IMC de cada avaliação (ver calcular_imc)"""
+    altura_m = altura_cm / 100
+    return arredondar(peso / (altura_m ** 2), 2)
+
+
+def classificar_imc_lote(imc: np.ndarray) -> np.ndarray:
+    """Índice em CLASSIFICACOES_IMC (ver classificar_imc)"""
+    return faixas.IMC.indices(imc)
+
+
+# ===== GORDURA =====
+
+CLASSIFICACOES_GORDURA = faixas.GORDURA.rotulos
+
+ERRO_CINTURA_PESCOCO = "Cintura deve ser maior que pescoço"
+ERRO_SOMA_PESCOCO = "Soma de cintura e quadril deve ser maior que pescoço"
+
+
+def calcular_gordura_us_navy_lote(
+    altura_cm: np.ndarray,
+    cintura_cm: np.ndarray,
+    pescoco_cm: np.ndarray,
+    quadril_cm: np.ndarray,
+    masculino: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Percentual de gordura US Navy (ver calcular_gordura_us_navy).
+
+    Returns:
+        Tupla (percentual, invalido, inteiro):
+        percentual é NaN onde as medidas não permitem o cálculo; invalido marca
+        os casos em que a função escalar levantaria ValueError; inteiro marca os
+        valores presos nos limites 3/60 (que a função escalar retorna como int)
+    """
+    diferenca = cintura_cm - pescoco_cm
+    denominador = cintura_cm + quadril_cm - pescoco_cm
+
+    homens = masculino & (diferenca > 0)
+    mulheres = ~masculino & (denominador > 0)
+    invalido = (masculino & (diferenca <= 0)) | (~masculino & (denominador <= 0))
+
+    altura_log = log10(altura_cm)
+    gordura = np.full(altura_cm.shape, np.nan)
+    gordura[homens] = (
+        86.010 * log10(diferenca[homens]) -
+        70.041 * altura_log[homens] +
+        36.76
+    )
+    gordura[mulheres] = (
+        163.205 * log10(denominador[mulheres]) -
+        97.684 * altura_log[mulheres] -
+        78.387
+    )
+
+    inteiro = (gordura <= 3) | (gordura >= 60)
+    gordura = np.clip(gordura, 3, 60)
+    return arredondar(gordura, 1), invalido, inteiro
+
+
+def classificar_gordura_lote(percentual: np.ndarray, masculino: np.ndarray,
+                             idades: np.ndarray = None) -> np.ndarray:
+    """Índice em CLASSIFICACOES_GORDURA (ver classificar_gordura)"""
+    return faixas.GORDURA.indices(percentual, masculino, idades)
+
+
+def calcular_massas_lote(peso: np.ndarray, percentual: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Massa gorda e massa magra em kg (ver calcular_massa_gorda/calcular_massa_magra)"""
+    massa_gorda = peso * (percentual / 100)
+    return arredondar(massa_gorda, 1), arredondar(peso - massa_gorda, 1)
+
+
+def calcular_composicao_tecidual_lote(
+    peso: np.ndarray,
+    percentual_gordura: np.ndarray,
+    masculino: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """Composição tecidual (ver calcular_composicao_tecidual)"""
+    massa_gorda = peso * (percentual_gordura / 100)
+    massa_magra = peso - massa_gorda
+    massa_ossea = massa_magra * np.where(masculino, 0.15, 0.12)
+    massa_muscular = massa_magra - massa_ossea
+    outros_tecidos = peso - (massa_gorda + massa_muscular + massa_ossea)
+
+    return {
+        'massa_gorda_kg': arredondar(massa_gorda, 2),
+        'massa_muscular_kg': arredondar(massa_muscular, 2),
+        'massa_ossea_kg': arredondar(massa_ossea, 2),
+        'outros_tecidos_kg': arredondar(outros_tecidos, 2),
+        'percentual_gordura': arredondar(percentual_gordura, 2),
+        'percentual_muscular': arredondar((massa_muscular / peso) * 100, 2),
+        'percentual_osseo': arredondar((massa_ossea / peso) * 100, 2),
+        'percentual_outros': arredondar((outros_tecidos / peso) * 100, 2),
+    }
+
+
+# ===== ÍNDICES =====
+
+CLASSIFICACOES_RCQ = faixas.RCQ.rotulos
+CLASSIFICACOES_RCA = faixas.RCA.rotulos
+
+
+def calcular_rcq_lote(cintura_cm: np.ndarray, quadril_cm: np.ndarray) -> np.ndarray:
+    """Relação cintura-quadril (ver calcular_rcq)"""
+    return arredondar(cintura_cm / quadril_cm, 3)
+
+
+def classificar_rcq_lote(rcq: np.ndarray, masculino: np.ndarray) -> np.ndarray:
+    """Índice em CLASSIFICACOES_RCQ (ver classificar_rcq)"""
+    return faixas.RCQ.indices(rcq, masculino)
+
+
+def calcular_rca_lote(cintura_cm: np.ndarray, altura_cm: np.ndarray) -> np.ndarray:
+    """Relação cintura-altura (ver calcular_rca)"""
+    return arredondar(cintura_cm / altura_cm, 3)
+
+
+def classificar_rca_lote(rca: np.ndarray) -> np.ndarray:
+    """Índice em CLASSIFICACOES_RCA (ver classificar_rca)"""
+    return faixas.RCA.indices(rca)
+
+
+# ===== PROPORÇÕES =====
+
+CAMPOS_PROPORCOES = (
+    'ombro_cintura', 'peitoral_cintura', 'braco_panturrilha', 'coxa_panturrilha',
+    'cintura_altura', 'peitoral_altura', 'coxa_altura', 'panturrilha_altura',
+    'simetria_bracos'
+)
+
+CLASSIFICACOES_ESTETICAS = faixas.CLASSIFICACAO_ESTETICA.rotulos
+
+
+def calcular_proporcoes_lote(medidas: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Proporções corporais (ver calcular_proporcoes); NaN onde não calculadas"""
+    altura = medidas['altura']
+    cintura = medidas['cintura']
+    panturrilha = medidas['panturrilha']
+    braco_rel = medidas['braco_relaxado']
+    braco_cont = medidas['braco_contraido']
+
+    def razao(numerador, denominador, casas, condicao, fator=None):
+        valor = numerador / denominador if fator is None else (numerador / denominador) * fator
+        return np.where(condicao, arredondar(valor, casas), np.nan)
+
+    tem_altura = presente(altura) & (altura > 0)
+    return {
+        'ombro_cintura': razao(medidas['ombros'], cintura, 2,
+                               presente(medidas['ombros']) & presente(cintura) & (cintura > 0)),
+        'peitoral_cintura': razao(medidas['peitoral'], cintura, 2,
+                                  presente(medidas['peitoral']) & presente(cintura) & (cintura > 0)),
+        'braco_panturrilha': razao(braco_cont, panturrilha, 2,
+                                   presente(braco_cont) & presente(panturrilha) & (panturrilha > 0)),
+        'coxa_panturrilha': razao(medidas['coxa'], panturrilha, 2,
+                                  presente(medidas['coxa']) & presente(panturrilha) & (panturrilha > 0)),
+        'cintura_altura': razao(cintura, altura, 1, tem_altura & presente(cintura), 100),
+        'peitoral_altura': razao(medidas['peitoral'], altura, 1, tem_altura & presente(medidas['peitoral']), 100),
+        'coxa_altura': razao(medidas['coxa'], altura, 1, tem_altura & presente(medidas['coxa']), 100),
+        'panturrilha_altura': razao(panturrilha, altura, 1, tem_altura & presente(panturrilha), 100),
+        'simetria_bracos': razao(braco_cont, braco_rel, 2,
+                                 presente(braco_cont) & presente(braco_rel) & (braco_rel > 0)),
+    }
+
+
+ANALISE_SIMETRIA = TEXTOS_SIMETRIA
+
+
+def analisar_simetria_lote(proporcoes: Dict[str, np.ndarray]) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """
+    Análise de simetria (ver analisar_simetria).
+
+    Returns:
+        Tupla (indices, ganho): indices[campo] indexa ANALISE_SIMETRIA[campo]
+        (só vale onde a proporção está presente); ganho é o ganho percentual
+        dos braços usado no texto de simetria_bracos
+    """
+    bp = proporcoes['braco_panturrilha']
+    ganho = (proporcoes['simetria_bracos'] - 1) * 100
+    braco_panturrilha = faixas.SIMETRIA_BRACO_PANTURRILHA.indices(np.abs(bp - 1.0))
+
+    indices = {
+        'ombro_cintura': faixas.SIMETRIA_OMBRO_CINTURA.indices(proporcoes['ombro_cintura']),
+        'peitoral_cintura': faixas.SIMETRIA_PEITORAL_CINTURA.indices(proporcoes['peitoral_cintura']),
+        'braco_panturrilha': np.where(braco_panturrilha < 2, braco_panturrilha, np.where(bp > 1.0, 2, 3)),
+        'cintura_altura': faixas.SIMETRIA_CINTURA_ALTURA.indices(proporcoes['cintura_altura']),
+        'peitoral_altura': faixas.SIMETRIA_PEITORAL_ALTURA.indices(proporcoes['peitoral_altura']),
+        'simetria_bracos': faixas.SIMETRIA_BRACOS.indices(ganho),
+    }
+    return indices, ganho
+
+
+def calcular_pontuacao_estetica_lote(proporcoes: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pontuação estética (ver calcular_pontuacao_estetica).
+
+    Returns:
+        Tupla (pontuacao, classificacao, total_metricas); classificacao é o
+        índice em CLASSIFICACOES_ESTETICAS
+    """
+    oc = proporcoes['ombro_cintura']
+    pc = proporcoes['peitoral_cintura']
+    bp = proporcoes['braco_panturrilha']
+    ca = proporcoes['cintura_altura']
+    sb = proporcoes['simetria_bracos']
+
+    # Mesma ordem de acumulação da função escalar; métricas ausentes somam 0
+    parcelas = []
+    total_metricas = np.zeros(oc.shape, dtype=int)
+
+    tem = presente(oc)
+    parcelas.append(np.where(tem, valores_faixa(
+        faixas.PONTOS_OMBRO_CINTURA, oc, np.maximum(0, (oc / 1.6) * 25)
+    ), 0.0))
+    total_metricas += tem
+
+    tem = presente(pc)
+    parcelas.append(np.where(tem, valores_faixa(
+        faixas.PONTOS_PEITORAL_CINTURA, pc, np.maximum(0, (pc / 1.4) * 20)
+    ), 0.0))
+    total_metricas += tem
+
+    tem = presente(bp)
+    parcelas.append(np.where(tem, np.maximum(0, 15 * (1 - np.abs(bp - 1.0) * 2)), 0.0))
+    total_metricas += tem
+
+    tem = presente(ca)
+    desvio = np.minimum(np.abs(ca - 46), 10)
+    parcelas.append(np.where(tem, np.where(
+        faixas.SIMETRIA_CINTURA_ALTURA.indices(ca) == 1, 20, np.maximum(0, 20 - desvio * 2)
+    ), 0.0))
+    total_metricas += tem
+
+    tem = presente(sb)
+    ganho = (sb - 1) * 100
+    desvio = np.minimum(np.abs(ganho - 10), 10)
+    parcelas.append(np.where(tem, np.where(
+        faixas.SIMETRIA_BRACOS.indices(ganho) == 1, 20, np.maximum(0, 20 - desvio * 2)
+    ), 0.0))
+    total_metricas += tem
+
+    pontos = np.zeros(oc.shape)
+    for parcela in parcelas:
+        pontos = pontos + parcela
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pontuacao = np.where(total_metricas > 0, (pontos / total_metricas) * (100 / 100), 0.0)
+    classificacao = faixas.CLASSIFICACAO_ESTETICA.indices(pontuacao)
+    return arredondar(pontuacao, 1), classificacao, total_metricas
+
+
+# ===== MAPA CORPORAL =====
+
+REGIOES_MAPA = ('pescoco', 'ombros', 'peitoral', 'cintura', 'abdomen',
+                'braco', 'antebraco', 'quadril', 'coxa', 'panturrilha')
+
+DESENVOLVIMENTO = faixas.DESENVOLVIMENTO.rotulos
+GORDURA_CENTRAL_RCA = faixas.GORDURA_CENTRAL_RCA.rotulos
+GORDURA_CENTRAL_RCQ = faixas.GORDURA_CENTRAL_RCQ.rotulos
+
+
+def calcular_proporcoes_ideais_lote(cintura: np.ndarray, masculino: np.ndarray) -> Dict[str, np.ndarray]:
+    """Medidas ideais baseadas na cintura (ver calcular_proporcoes_ideais)"""
+    braco_feminino = cintura * 0.32
+
+    def ideal(masc, fem):
+        return arredondar(np.where(masculino, masc, fem), 1)
+
+    return {
+        'pescoco': ideal(cintura * 0.42, cintura * 0.38),
+        'ombros': ideal(cintura * 1.60, cintura * 1.40),
+        'peitoral': ideal(cintura * 1.40, cintura * 1.30),
+        'cintura': ideal(cintura, cintura),
+        'abdomen': ideal(cintura * 1.05, cintura * 1.03),
+        'braco': ideal(cintura * 0.36, braco_feminino),
+        'antebraco': ideal(cintura * 0.36 * 0.85, braco_feminino * 0.85),
+        'quadril': ideal(cintura * 1.12, cintura * 1.38),
+        'coxa': ideal(cintura * 0.75, cintura * 0.80),
+        'panturrilha': ideal(cintura * 0.36, braco_feminino * 0.95),
+    }
+
+
+def medidas_regioes_lote(medidas: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Medida real usada para cada região do mapa (braço: contraído ou relaxado)"""
+    regioes = {parte: medidas[parte] for parte in REGIOES_MAPA if parte in medidas}
+    braco_cont = medidas['braco_contraido']
+    regioes['braco'] = np.where(presente(braco_cont), braco_cont, medidas['braco_relaxado'])
+    return {parte: regioes[parte] for parte in REGIOES_MAPA}
+
+
+def classificar_desenvolvimento_lote(real: np.ndarray, ideal: np.ndarray) -> Dict[str, np.ndarray]:
+    """Razão, classificação e diferença de cada região (ver classificar_desenvolvimento)"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = real / ideal
+    return {
+        'ratio': arredondar(ratio, 2),
+        'classificacao': faixas.DESENVOLVIMENTO.indices(ratio),
+        'diferenca_cm': arredondar(real - ideal, 1),
+    }
+
+
+def avaliar_gordura_central_lote(
+    cintura: np.ndarray,
+    altura: np.ndarray,
+    quadril: np.ndarray,
+    masculino: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """Índices de gordura central (ver avaliar_gordura_central)"""
+    rca = cintura / altura
+    rcq = cintura / quadril
+    return {
+        'rca': arredondar(rca, 3),
+        'rca_status': faixas.GORDURA_CENTRAL_RCA.indices(rca),
+        'rcq': arredondar(rcq, 3),
+        'rcq_status': faixas.GORDURA_CENTRAL_RCQ.indices(rcq, masculino),
+    }
+
+
+# ===== SCORE ESTÉTICO =====
+
+CLASSIFICACOES_SCORE = faixas.CLASSIFICACAO_SCORE.rotulos
+
+
+def calcular_score_proporcao_lote(real: np.ndarray, ideal: np.ndarray, peso_maximo: float) -> np.ndarray:
+    """Score de uma proporção (ver calcular_score_proporcao); 0 onde a medida falta"""
+    ratio = real / ideal
+    score = peso_maximo * valores_faixa(faixas.SCORE_PROPORCAO, ratio)
+    return np.where(presente(real), score, 0.0)
+
+
+def calcular_score_estetico_lote(
+    percentual_gordura: np.ndarray,
+    percentual_inteiro: np.ndarray,
+    medidas: Dict[str, np.ndarray],
+    masculino: np.ndarray,
+    ratios_regioes: Sequence[np.ndarray]
+) -> Dict[str, np.ndarray]:
+    """
+    Score estético completo (ver calcular_score_estetico).
+
+    Args:
+        percentual_inteiro: Percentuais que a função escalar trata como int
+        ratios_regioes: Razões arredondadas das regiões do mapa, na ordem de
+            REGIOES_MAPA (NaN = região não medida)
+
+    Returns:
+        Componentes, total e classificação; as máscaras *_inteiro indicam onde
+        a função escalar retorna int (0 ou valores presos nos limites)
+    """
+    cintura = medidas['cintura']
+    altura = medidas['altura']
+
+    # 1. Gordura
+    ideal_min = np.where(masculino, faixas.GORDURA_IDEAL['M'][0], faixas.GORDURA_IDEAL['F'][0])
+    ideal_max = np.where(masculino, faixas.GORDURA_IDEAL['M'][1], faixas.GORDURA_IDEAL['F'][1])
+    faixa_gordura = faixas.SCORE_GORDURA.indices(percentual_gordura, masculino)
+    abaixo = faixa_gordura == 0
+    score_gordura = np.select(
+        [faixa_gordura == 1, abaixo],
+        [30.0, np.maximum(0, 30 - ((ideal_min - percentual_gordura) * 2))],
+        np.maximum(0, 30 - ((percentual_gordura - ideal_max) * 1.5))
+    )
+    gordura_inteiro = (score_gordura == 0) | (abaixo & percentual_inteiro)
+
+    # 2 e 3. Ombro/cintura e peitoral/cintura
+    score_ombro = calcular_score_proporcao_lote(
+        medidas['ombros'], cintura * np.where(masculino, 1.60, 1.40), 25.0
+    )
+    score_peitoral = calcular_score_proporcao_lote(
+        medidas['peitoral'], cintura * np.where(masculino, 1.40, 1.30), 20.0
+    )
+
+    # 4. Simetria: média de |1 - ratio| das regiões medidas
+    diferencas = [np.where(presente(ratio), np.abs(1.0 - ratio), 0.0) for ratio in ratios_regioes]
+    quantidade = sum(presente(ratio).astype(int) for ratio in ratios_regioes)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = somar(diferencas) / quantidade
+    score_simetria = np.where(
+        quantidade > 0,
+        valores_faixa(faixas.SCORE_SIMETRIA, media, np.maximum(0, 15 - (media * 50))),
+        0.0
+    )
+
+    # 5. Gordura central
+    rca = cintura / altura
+    score_central = np.where(
+        presente(cintura),
+        valores_faixa(faixas.SCORE_GORDURA_CENTRAL, rca),
+        0.0
+    )
+
+    soma = score_gordura + score_ombro + score_peitoral + score_simetria + score_central
+    soma_inteiro = gordura_inteiro & (score_ombro == 0) & (score_peitoral == 0) & \
+        (score_simetria == 0) & (score_central == 0)
+    total = np.clip(soma, 0, 100)
+
+    return {
+        'gordura': score_gordura,
+        'gordura_inteiro': gordura_inteiro,
+        'ombro_cintura': score_ombro,
+        'peitoral_cintura': score_peitoral,
+        'simetria': score_simetria,
+        'gordura_central': score_central,
+        'total': total,
+        'total_inteiro': soma_inteiro | (soma <= 0) | (soma >= 100),
+        'classificacao': faixas.CLASSIFICACAO_SCORE.indices(total),
+    }
+
+
+# ===== SOMATOTIPO =====
+
+def classificar_somatotipo_lote(
+    rcq: np.ndarray,
+    rca: np.ndarray,
+    imc: np.ndarray,
+    ombro_cintura: np.ndarray,
+    peitoral_cintura: np.ndarray
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Pontuação de somatotipo (ver classificar_somatotipo).
+
+    Args:
+        ombro_cintura, peitoral_cintura: 0 onde a proporção não foi calculada
+
+    Returns:
+        Tupla (tipo, scores): tipo indexa ('ectomorfo', 'mesomorfo', 'endomorfo',
+        'ecto-mesomorfo', 'meso-endomorfo'); scores já normalizados em %
+    """
+    # Cada tabela soma pontos (ectomorfo, mesomorfo, endomorfo) conforme a faixa
+    pontos = np.zeros(imc.shape + (3,))
+    for tabela, valores in ((faixas.SOMATOTIPO_IMC, imc),
+                            (faixas.SOMATOTIPO_RCA, rca),
+                            (faixas.SOMATOTIPO_RCQ, rcq),
+                            (faixas.SOMATOTIPO_OMBRO_CINTURA, ombro_cintura),
+                            (faixas.SOMATOTIPO_PEITORAL_CINTURA, peitoral_cintura)):
+        pontos += np.asarray(tabela.rotulos, dtype=float)[tabela.indices(valores)]
+    ecto, meso, endo = pontos[:, 0], pontos[:, 1], pontos[:, 2]
+
+    # Tipo dominante ou misto
+    ordenados = np.sort(np.stack([ecto, meso, endo]), axis=0)
+    maximo = ordenados[2]
+    misto = ordenados[2] - ordenados[1] <= 1
+    tipo = np.select(
+        [misto & (ecto >= endo), misto, ecto == maximo, meso == maximo],
+        [3, 4, 0, 1],
+        2
+    )
+
+    total = ecto + meso + endo
+    scores = {
+        'ectomorfo': arredondar((ecto / total) * 100, 1),
+        'mesomorfo': arredondar((meso / total) * 100, 1),
+        'endomorfo': arredondar((endo / total) * 100, 1),
+    }
+    return tipo, scores
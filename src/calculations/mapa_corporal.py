@@ -3,7 +3,27 @@ Módulo de Mapa Corporal
 Analisa distribuição de gordura e desenvolvimento muscular por região
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, Optional
+from .faixas import DESENVOLVIMENTO, GORDURA_CENTRAL_RCA, GORDURA_CENTRAL_RCQ
+
+
+# Medida usada para cada região do mapa (na ordem de calcular_proporcoes_ideais);
+# com mais de uma, vale a primeira informada
+MEDIDAS_REGIOES = (
+    ('pescoco', ('pescoco',)),
+    ('ombros', ('ombros',)),
+    ('peitoral', ('peitoral',)),
+    ('cintura', ('cintura',)),
+    ('abdomen', ('abdomen',)),
+    ('braco', ('braco_contraido', 'braco_relaxado')),
+    ('antebraco', ('antebraco',)),
+    ('quadril', ('quadril',)),
+    ('coxa', ('coxa',)),
+    ('panturrilha', ('panturrilha',)),
+)
+
+# (classificacao, descricao, cor) de uma região sem medida
+NAO_MEDIDO = ('nao_medido', 'Não medido', '#868e96')
 
 
 def calcular_proporcoes_ideais(cintura: float, sexo: str) -> Dict[str, float]:
@@ -61,18 +81,7 @@ def classificar_desenvolvimento(medida_real: float, medida_ideal: float) -> Dict
     """
     ratio = medida_real / medida_ideal
     
-    if ratio < 0.90:
-        classificacao = 'subdesenvolvido'
-        cor = '#ff6b6b'  # Vermelho
-        descricao = 'Subdesenvolvido'
-    elif ratio <= 1.10:
-        classificacao = 'equilibrado'
-        cor = '#51cf66'  # Verde
-        descricao = 'Equilibrado'
-    else:
-        classificacao = 'excesso'
-        cor = '#ffa94d'  # Laranja
-        descricao = 'Excesso'
+    classificacao, descricao, cor = DESENVOLVIMENTO.classificar(ratio)
     
     return {
         'ratio': round(ratio, 2),
@@ -99,31 +108,11 @@ def avaliar_gordura_central(cintura: float, altura: float, quadril: float, sexo:
     # Índice cintura/altura
     rca = cintura / altura
     
-    if rca <= 0.49:
-        rca_status = 'saudavel'
-        rca_descricao = 'Saudável'
-        rca_cor = '#51cf66'
-    elif rca <= 0.54:
-        rca_status = 'moderado'
-        rca_descricao = 'Risco Moderado'
-        rca_cor = '#ffa94d'
-    else:
-        rca_status = 'elevado'
-        rca_descricao = 'Risco Elevado'
-        rca_cor = '#ff6b6b'
+    rca_status, rca_descricao, rca_cor = GORDURA_CENTRAL_RCA.classificar(rca)
     
     # Relação cintura/quadril
     rcq = cintura / quadril
-    limite_rcq = 0.90 if sexo == 'M' else 0.85
-    
-    if rcq <= limite_rcq:
-        rcq_status = 'normal'
-        rcq_descricao = 'Normal'
-        rcq_cor = '#51cf66'
-    else:
-        rcq_status = 'elevado'
-        rcq_descricao = 'Elevado'
-        rcq_cor = '#ff6b6b'
+    rcq_status, rcq_descricao, rcq_cor = GORDURA_CENTRAL_RCQ.classificar(rcq, 'M' if sexo == 'M' else 'F')
     
     return {
         'rca': round(rca, 3),
@@ -155,56 +144,64 @@ def gerar_mapa_corporal(medidas: Dict[str, float], altura: float, sexo: str) ->
           f"abdomen={medidas.get('abdomen')}, coxa={medidas.get('coxa')}")
     
     cintura = medidas.get('cintura')
-    quadril = medidas.get('quadril')
     
     if not cintura:
         return {'erro': 'Cintura é obrigatória para análise corporal'}
     
+    return montar_mapa_corporal(medidas.get, altura, sexo)
+
+
+def montar_mapa_corporal(medida: Callable[[str], Optional[float]], altura: float, sexo: str) -> Dict[str, Any]:
+    """
+    Monta o mapa corporal lendo cada medida por `medida(campo)`.
+    
+    Usado por gerar_mapa_corporal (dicionário) e pelo caminho rápido do
+    analisador, que lê direto de Medidas sem montar um dicionário.
+    
+    Args:
+        medida: Função campo -> valor (None se não informado); cintura obrigatória
+        altura: Altura em cm
+        sexo: 'M' para masculino, 'F' para feminino
+        
+    Returns:
+        Dicionário com análise completa do mapa corporal
+    """
+    cintura = medida('cintura')
+    quadril = medida('quadril')
+    
     # Calcular proporções ideais
     ideais = calcular_proporcoes_ideais(cintura, sexo)
     
     # Analisar cada região
     regioes = {}
     
-    for parte, ideal in ideais.items():
-        real = None
-        
-        # Mapear nomes das medidas
-        if parte == 'pescoco':
-            real = medidas.get('pescoco')
-        elif parte == 'ombros':
-            real = medidas.get('ombros')
-        elif parte == 'peitoral':
-            real = medidas.get('peitoral')
-        elif parte == 'cintura':
-            real = medidas.get('cintura')
-        elif parte == 'abdomen':
-            real = medidas.get('abdomen')
-        elif parte == 'braco':
-            real = medidas.get('braco_contraido') or medidas.get('braco_relaxado')
-        elif parte == 'antebraco':
-            real = medidas.get('antebraco')
-        elif parte == 'quadril':
-            real = medidas.get('quadril')
-        elif parte == 'coxa':
-            real = medidas.get('coxa')
-            print(f"🔍 COXA - Valor encontrado: {real}")
-        elif parte == 'panturrilha':
-            real = medidas.get('panturrilha')
+    for parte, campos in MEDIDAS_REGIOES:
+        ideal = ideais[parte]
+        for campo in campos:
+            real = medida(campo)
+            if real:
+                break
         
         if real:
+            # Mesmo cálculo de classificar_desenvolvimento, montado direto na região
+            ratio = real / ideal
+            classificacao, descricao, cor = DESENVOLVIMENTO.classificar(ratio)
             regioes[parte] = {
                 'real': real,
                 'ideal': ideal,
-                **classificar_desenvolvimento(real, ideal)
+                'ratio': round(ratio, 2),
+                'classificacao': classificacao,
+                'descricao': descricao,
+                'cor': cor,
+                'diferenca_cm': round(real - ideal, 1)
             }
         else:
             regioes[parte] = {
                 'real': None,
                 'ideal': ideal,
-                'classificacao': 'nao_medido',
-                'descricao': 'Não medido',
-                'cor': '#868e96'
+                'classificacao': NAO_MEDIDO[0],
+                'descricao': NAO_MEDIDO[1],
+                'cor': NAO_MEDIDO[2]
             }
     
     # Avaliar gordura central
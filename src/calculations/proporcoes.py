@@ -2,8 +2,28 @@
 Análise de proporções corporais e simetria
 """
 
-from typing import Dict, Optional, List, Tuple
+from typing import Callable, Dict, Optional, List, Tuple
 from dataclasses import dataclass
+from .faixas import (
+    SIMETRIA_OMBRO_CINTURA, SIMETRIA_PEITORAL_CINTURA, SIMETRIA_BRACO_PANTURRILHA,
+    SIMETRIA_CINTURA_ALTURA, SIMETRIA_PEITORAL_ALTURA, SIMETRIA_BRACOS,
+    PONTOS_OMBRO_CINTURA, PONTOS_PEITORAL_CINTURA, CLASSIFICACAO_ESTETICA
+)
+
+
+# Textos da análise de simetria de cada proporção, na ordem das faixas;
+# braco_panturrilha acima de 10% de desvio depende do lado dominante
+TEXTOS_SIMETRIA = {
+    'ombro_cintura': SIMETRIA_OMBRO_CINTURA.rotulos,
+    'peitoral_cintura': SIMETRIA_PEITORAL_CINTURA.rotulos,
+    'braco_panturrilha': SIMETRIA_BRACO_PANTURRILHA.rotulos[:2] + (
+        "Braços dominantes - treinar panturrilhas",
+        "Panturrilhas dominantes - treinar braços",
+    ),
+    'cintura_altura': SIMETRIA_CINTURA_ALTURA.rotulos,
+    'peitoral_altura': SIMETRIA_PEITORAL_ALTURA.rotulos,
+    'simetria_bracos': SIMETRIA_BRACOS.rotulos,
+}
 
 
 @dataclass
@@ -34,19 +54,35 @@ def calcular_proporcoes(medidas: Dict[str, float]) -> Proporcoes:
             Chaves esperadas: altura, cintura, peitoral, ombros, braco_relaxado,
             braco_contraido, coxa, panturrilha, etc.
     
+    Returns:
+        Objeto Proporcoes com todos os cálculos possíveis
+    """
+    return montar_proporcoes(medidas.get)
+
+
+def montar_proporcoes(medida: Callable[[str], Optional[float]]) -> Proporcoes:
+    """
+    Calcula as proporções lendo cada medida por `medida(campo)`.
+    
+    Usado por calcular_proporcoes (dicionário) e pelo caminho rápido do
+    analisador, que lê direto de Medidas sem montar um dicionário.
+    
+    Args:
+        medida: Função campo -> valor (None se não informado)
+    
     Returns:
         Objeto Proporcoes com todos os cálculos possíveis
     """
     prop = Proporcoes()
     
-    altura = medidas.get('altura')
-    cintura = medidas.get('cintura')
-    peitoral = medidas.get('peitoral')
-    ombros = medidas.get('ombros')
-    braco_rel = medidas.get('braco_relaxado')
-    braco_cont = medidas.get('braco_contraido')
-    coxa = medidas.get('coxa')
-    panturrilha = medidas.get('panturrilha')
+    altura = medida('altura')
+    cintura = medida('cintura')
+    peitoral = medida('peitoral')
+    ombros = medida('ombros')
+    braco_rel = medida('braco_relaxado')
+    braco_cont = medida('braco_contraido')
+    coxa = medida('coxa')
+    panturrilha = medida('panturrilha')
     
     # Relações entre circunferências
     if ombros and cintura and cintura > 0:
@@ -103,60 +139,32 @@ def analisar_simetria(proporcoes: Proporcoes) -> Dict[str, str]:
     
     # Análise ombro/cintura
     if proporcoes.ombro_cintura:
-        if proporcoes.ombro_cintura >= 1.6:
-            analise['ombro_cintura'] = "Excelente proporção (formato V)"
-        elif proporcoes.ombro_cintura >= 1.4:
-            analise['ombro_cintura'] = "Boa proporção"
-        else:
-            analise['ombro_cintura'] = "Desenvolver ombros ou reduzir cintura"
+        analise['ombro_cintura'] = SIMETRIA_OMBRO_CINTURA.classificar(proporcoes.ombro_cintura)
     
     # Análise peitoral/cintura
     if proporcoes.peitoral_cintura:
-        if proporcoes.peitoral_cintura >= 1.4:
-            analise['peitoral_cintura'] = "Excelente desenvolvimento torácico"
-        elif proporcoes.peitoral_cintura >= 1.2:
-            analise['peitoral_cintura'] = "Bom desenvolvimento"
-        else:
-            analise['peitoral_cintura'] = "Desenvolver peitoral"
+        analise['peitoral_cintura'] = SIMETRIA_PEITORAL_CINTURA.classificar(proporcoes.peitoral_cintura)
     
     # Análise braço/panturrilha (simetria)
     if proporcoes.braco_panturrilha:
         diff = abs(proporcoes.braco_panturrilha - 1.0)
-        if diff <= 0.05:
-            analise['braco_panturrilha'] = "Simetria perfeita"
-        elif diff <= 0.10:
-            analise['braco_panturrilha'] = "Boa simetria"
-        elif proporcoes.braco_panturrilha > 1.0:
-            analise['braco_panturrilha'] = "Braços dominantes - treinar panturrilhas"
-        else:
-            analise['braco_panturrilha'] = "Panturrilhas dominantes - treinar braços"
+        texto = SIMETRIA_BRACO_PANTURRILHA.classificar(diff)
+        if texto is None:
+            dominante = 2 if proporcoes.braco_panturrilha > 1.0 else 3
+            texto = TEXTOS_SIMETRIA['braco_panturrilha'][dominante]
+        analise['braco_panturrilha'] = texto
     
     # Análise proporções baseadas em altura
     if proporcoes.cintura_altura:
-        if 45 <= proporcoes.cintura_altura <= 47:
-            analise['cintura_altura'] = "Proporção ideal"
-        elif proporcoes.cintura_altura < 45:
-            analise['cintura_altura'] = "Cintura fina (excelente)"
-        else:
-            analise['cintura_altura'] = "Reduzir gordura abdominal"
+        analise['cintura_altura'] = SIMETRIA_CINTURA_ALTURA.classificar(proporcoes.cintura_altura)
     
     if proporcoes.peitoral_altura:
-        if 55 <= proporcoes.peitoral_altura <= 60:
-            analise['peitoral_altura'] = "Proporção ideal"
-        elif proporcoes.peitoral_altura < 55:
-            analise['peitoral_altura'] = "Desenvolver peitoral"
-        else:
-            analise['peitoral_altura'] = "Desenvolvimento acima do ideal"
+        analise['peitoral_altura'] = SIMETRIA_PEITORAL_ALTURA.classificar(proporcoes.peitoral_altura)
     
     # Análise contração do braço
     if proporcoes.simetria_bracos:
         ganho_percentual = (proporcoes.simetria_bracos - 1) * 100
-        if 5 <= ganho_percentual <= 15:
-            analise['simetria_bracos'] = f"Contração normal ({ganho_percentual:.1f}%)"
-        elif ganho_percentual < 5:
-            analise['simetria_bracos'] = f"Pouca hipertrofia ({ganho_percentual:.1f}%)"
-        else:
-            analise['simetria_bracos'] = f"Excelente hipertrofia ({ganho_percentual:.1f}%)"
+        analise['simetria_bracos'] = SIMETRIA_BRACOS.classificar(ganho_percentual).format(ganho_percentual)
     
     return analise
 
@@ -180,24 +188,18 @@ def calcular_pontuacao_estetica(proporcoes: Proporcoes) -> Tuple[float, str]:
     # Ombro/Cintura (peso 25%)
     if proporcoes.ombro_cintura:
         total_metricas += 1
-        if proporcoes.ombro_cintura >= 1.6:
-            pontos += 25
-        elif proporcoes.ombro_cintura >= 1.5:
-            pontos += 20
-        elif proporcoes.ombro_cintura >= 1.4:
-            pontos += 15
-        else:
-            pontos += max(0, (proporcoes.ombro_cintura / 1.6) * 25)
+        pontos_faixa = PONTOS_OMBRO_CINTURA.classificar(proporcoes.ombro_cintura)
+        if pontos_faixa is None:
+            pontos_faixa = max(0, (proporcoes.ombro_cintura / 1.6) * 25)
+        pontos += pontos_faixa
     
     # Peitoral/Cintura (peso 20%)
     if proporcoes.peitoral_cintura:
         total_metricas += 1
-        if proporcoes.peitoral_cintura >= 1.4:
-            pontos += 20
-        elif proporcoes.peitoral_cintura >= 1.3:
-            pontos += 15
-        else:
-            pontos += max(0, (proporcoes.peitoral_cintura / 1.4) * 20)
+        pontos_faixa = PONTOS_PEITORAL_CINTURA.classificar(proporcoes.peitoral_cintura)
+        if pontos_faixa is None:
+            pontos_faixa = max(0, (proporcoes.peitoral_cintura / 1.4) * 20)
+        pontos += pontos_faixa
     
     # Braço/Panturrilha (peso 15%)
     if proporcoes.braco_panturrilha:
@@ -208,7 +210,7 @@ def calcular_pontuacao_estetica(proporcoes: Proporcoes) -> Tuple[float, str]:
     # Cintura/Altura (peso 20%)
     if proporcoes.cintura_altura:
         total_metricas += 1
-        if 45 <= proporcoes.cintura_altura <= 47:
+        if SIMETRIA_CINTURA_ALTURA.indice(proporcoes.cintura_altura) == 1:
             pontos += 20
         else:
             desvio = min(abs(proporcoes.cintura_altura - 46), 10)
@@ -218,7 +220,7 @@ def calcular_pontuacao_estetica(proporcoes: Proporcoes) -> Tuple[float, str]:
     if proporcoes.simetria_bracos:
         total_metricas += 1
         ganho = (proporcoes.simetria_bracos - 1) * 100
-        if 5 <= ganho <= 15:
+        if SIMETRIA_BRACOS.indice(ganho) == 1:
             pontos += 20
         else:
             desvio = min(abs(ganho - 10), 10)
@@ -231,17 +233,6 @@ def calcular_pontuacao_estetica(proporcoes: Proporcoes) -> Tuple[float, str]:
         pontuacao = 0
     
     # Classificação
-    if pontuacao >= 90:
-        classificacao = "Excepcional"
-    elif pontuacao >= 80:
-        classificacao = "Excelente"
-    elif pontuacao >= 70:
-        classificacao = "Muito Bom"
-    elif pontuacao >= 60:
-        classificacao = "Bom"
-    elif pontuacao >= 50:
-        classificacao = "Médio"
-    else:
-        classificacao = "A Desenvolver"
+    classificacao = CLASSIFICACAO_ESTETICA.classificar(pontuacao)
     
     return (round(pontuacao, 1), classificacao)
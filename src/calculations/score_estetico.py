@@ -4,6 +4,20 @@ Calcula pontuação 0-100 baseada em múltiplos fatores corporais
 """
 
 from typing import Dict, Any
+from .faixas import (
+    GORDURA_IDEAL, SCORE_GORDURA, SCORE_PROPORCAO, SCORE_SIMETRIA,
+    SCORE_GORDURA_CENTRAL, CLASSIFICACAO_SCORE
+)
+
+
+# Peso de cada componente no score total
+PESOS_SCORE = {
+    'gordura': '30%',
+    'ombro_cintura': '25%',
+    'peitoral_cintura': '20%',
+    'simetria': '15%',
+    'gordura_central': '10%'
+}
 
 
 def calcular_score_gordura(percentual_gordura: float, sexo: str) -> float:
@@ -11,14 +25,13 @@ def calcular_score_gordura(percentual_gordura: float, sexo: str) -> float:
     Calcula score baseado no percentual de gordura (30% do total).
     Faixa ideal: 10-15% homens, 18-23% mulheres
     """
-    if sexo == 'M':
-        ideal_min, ideal_max = 10, 15
-    else:
-        ideal_min, ideal_max = 18, 23
+    sexo = 'M' if sexo == 'M' else 'F'
+    ideal_min, ideal_max = GORDURA_IDEAL[sexo]
+    faixa = SCORE_GORDURA.classificar(percentual_gordura, sexo)
     
-    if ideal_min <= percentual_gordura <= ideal_max:
+    if faixa == 'ideal':
         return 30.0  # Score máximo
-    elif percentual_gordura < ideal_min:
+    elif faixa == 'abaixo':
         # Penalização por estar muito baixo
         diferenca = ideal_min - percentual_gordura
         return max(0, 30 - (diferenca * 2))
@@ -37,17 +50,8 @@ def calcular_score_proporcao(medida_real: float, medida_ideal: float, peso_maxim
     
     ratio = medida_real / medida_ideal
     
-    # Score máximo quando ratio entre 0.95 e 1.05
-    if 0.95 <= ratio <= 1.05:
-        return peso_maximo
-    elif 0.90 <= ratio <= 1.10:
-        return peso_maximo * 0.8
-    elif 0.85 <= ratio <= 1.15:
-        return peso_maximo * 0.6
-    elif 0.80 <= ratio <= 1.20:
-        return peso_maximo * 0.4
-    else:
-        return peso_maximo * 0.2
+    # Score máximo quando ratio entre 0.95 e 1.05, decrescendo a cada 0.05 de desvio
+    return peso_maximo * SCORE_PROPORCAO.classificar(ratio)
 
 
 def calcular_score_simetria(regioes: Dict[str, Dict]) -> float:
@@ -70,16 +74,10 @@ def calcular_score_simetria(regioes: Dict[str, Dict]) -> float:
     media_diferenca = sum(diferencas) / len(diferencas)
     
     # Converter para score (0.0 = perfeito, quanto menor melhor)
-    if media_diferenca <= 0.05:
-        return 15.0
-    elif media_diferenca <= 0.10:
-        return 12.0
-    elif media_diferenca <= 0.15:
-        return 9.0
-    elif media_diferenca <= 0.20:
-        return 6.0
-    else:
+    score = SCORE_SIMETRIA.classificar(media_diferenca)
+    if score is None:
         return max(0, 15 - (media_diferenca * 50))
+    return score
 
 
 def calcular_score_gordura_central(cintura: float, altura: float) -> float:
@@ -89,16 +87,7 @@ def calcular_score_gordura_central(cintura: float, altura: float) -> float:
     """
     rca = cintura / altura
     
-    if rca <= 0.45:
-        return 10.0
-    elif rca <= 0.49:
-        return 8.0
-    elif rca <= 0.54:
-        return 5.0
-    elif rca <= 0.60:
-        return 2.0
-    else:
-        return 0
+    return SCORE_GORDURA_CENTRAL.classificar(rca)
 
 
 def calcular_score_estetico(
@@ -155,18 +144,7 @@ def calcular_score_estetico(
     score_total = min(100, max(0, score_total))  # Limitar entre 0 e 100
     
     # Classificação
-    if score_total >= 85:
-        classificacao = 'Atlético'
-        cor = '#20c997'
-    elif score_total >= 61:
-        classificacao = 'Estético'
-        cor = '#51cf66'
-    elif score_total >= 31:
-        classificacao = 'Intermediário'
-        cor = '#ffa94d'
-    else:
-        classificacao = 'A Desenvolver'
-        cor = '#ff6b6b'
+    classificacao, cor = CLASSIFICACAO_SCORE.classificar(score_total)
     
     return {
         'score_total': round(score_total, 1),
@@ -179,11 +157,5 @@ def calcular_score_estetico(
             'simetria': round(score_simetria, 1),
             'gordura_central': round(score_central, 1)
         },
-        'pesos': {
-            'gordura': '30%',
-            'ombro_cintura': '25%',
-            'peitoral_cintura': '20%',
-            'simetria': '15%',
-            'gordura_central': '10%'
-        }
+        'pesos': dict(PESOS_SCORE)
     }
@@ -5,6 +5,10 @@ Sistema heurístico para classificação de perfis físicos.
 
 from typing import Dict, Tuple
 from enum import Enum
+from .faixas import (
+    SOMATOTIPO_IMC, SOMATOTIPO_RCA, SOMATOTIPO_RCQ,
+    SOMATOTIPO_OMBRO_CINTURA, SOMATOTIPO_PEITORAL_CINTURA
+)
 
 
 class Somatotipo(Enum):
@@ -17,6 +21,131 @@ class Somatotipo(Enum):
     EQUILIBRADO = "equilibrado"
 
 
+DESCRICOES_SOMATOTIPO = {
+    Somatotipo.ECTOMORFO: (
+        "Ectomorfo: estrutura delgada, metabolismo acelerado, "
+        "dificuldade em ganhar peso"
+    ),
+    Somatotipo.MESOMORFO: (
+        "Mesomorfo: estrutura atlética natural, boa resposta ao treino, "
+        "facilidade para ganhar músculo"
+    ),
+    Somatotipo.ENDOMORFO: (
+        "Endomorfo: estrutura mais arredondada, tendência a acumular gordura, "
+        "requer atenção à dieta"
+    ),
+    Somatotipo.ECTO_MESO: "Ecto-Mesomorfo: magro com potencial atlético",
+    Somatotipo.MESO_ENDO: "Meso-Endomorfo: estrutura forte com tendência a ganhar gordura",
+}
+
+
+RECOMENDACOES_SOMATOTIPO = {
+    Somatotipo.ECTOMORFO: {
+        'treino': (
+            "Foco em exercícios compostos (agachamento, supino, levantamento terra). "
+            "Treinos mais curtos e intensos (45-60min). Cardio moderado. "
+            "Priorizar hipertrofia com 8-12 repetições."
+        ),
+        'dieta': (
+            "Dieta hipercalórica com superávit calórico. "
+            "Carboidratos abundantes (50-60% das calorias). "
+            "Proteína moderada a alta (1.8-2.2g/kg). "
+            "Não temer gorduras saudáveis. Refeições frequentes (5-6x/dia)."
+        ),
+        'dicas': (
+            "Durma bem (8+ horas). Evite cardio excessivo. "
+            "Seja paciente - ganhos serão mais lentos mas duradouros. "
+            "Suplementação: whey protein, creatina, hipercalóricos."
+        )
+    },
+    Somatotipo.MESOMORFO: {
+        'treino': (
+            "Variedade de estímulos. Combine força (5-8 reps) e hipertrofia (8-12 reps). "
+            "Cardio moderado para definição. Responde bem a periodização. "
+            "Pode treinar com maior volume."
+        ),
+        'dieta': (
+            "Dieta balanceada e flexível. "
+            "Carboidratos moderados (40-50% das calorias). "
+            "Proteína moderada (1.6-2.0g/kg). "
+            "Ajustar calorias conforme objetivo (bulking ou cutting)."
+        ),
+        'dicas': (
+            "Aproveite a genética favorável mas não descuide da dieta. "
+            "Varie os treinos para evitar estagnação. "
+            "Fácil ganhar mas também fácil perder forma - mantenha consistência."
+        )
+    },
+    Somatotipo.ENDOMORFO: {
+        'treino': (
+            "Combine musculação com cardio regular. "
+            "HIIT eficiente para queima de gordura. "
+            "Treinos com maior volume e frequência. "
+            "Foco em compostos + exercícios metabólicos."
+        ),
+        'dieta': (
+            "Controle calórico rigoroso. Déficit para perda de gordura. "
+            "Carboidratos controlados (30-40% das calorias), preferir baixo IG. "
+            "Proteína alta (2.0-2.5g/kg) para preservar massa magra. "
+            "Atenção ao timing dos carboidratos (pré/pós-treino)."
+        ),
+        'dicas': (
+            "A genética pode ser desafiadora mas não é limitante. "
+            "Monitore calorias e macros de perto. "
+            "Sono e gestão de estresse são críticos (afetam hormônios). "
+            "Evite períodos longos sem atividade."
+        )
+    },
+    Somatotipo.ECTO_MESO: {
+        'treino': (
+            "Treinos de força e hipertrofia, volume moderado. "
+            "Cardio leve a moderado. Foco em construir massa muscular "
+            "sem cardio excessivo que prejudique ganhos."
+        ),
+        'dieta': (
+            "Leve superávit calórico para construção muscular. "
+            "Carboidratos moderados a altos. Proteína alta (1.8-2.2g/kg). "
+            "Mais flexibilidade que ectomorfo puro."
+        ),
+        'dicas': (
+            "Boa capacidade de definição com dieta adequada. "
+            "Aproveite facilidade para construir físico atlético e definido."
+        )
+    },
+    Somatotipo.MESO_ENDO: {
+        'treino': (
+            "Musculação pesada + cardio regular para controle de gordura. "
+            "HIIT 2-3x/semana. Volume alto de treino. "
+            "Bom potencial para ganho de força e massa."
+        ),
+        'dieta': (
+            "Atenção ao excesso calórico. Carboidratos moderados. "
+            "Proteína alta. Monitorar percentual de gordura regularmente. "
+            "Ciclos de bulking/cutting bem estruturados."
+        ),
+        'dicas': (
+            "Facilidade para ganhar massa mas também gordura. "
+            "Disciplina alimentar é chave. Potencial para físicos imponentes "
+            "se bem trabalhado."
+        )
+    },
+    Somatotipo.EQUILIBRADO: {
+        'treino': (
+            "Abordagem balanceada. Variar entre fases de força, "
+            "hipertrofia e resistência. Cardio moderado."
+        ),
+        'dieta': (
+            "Dieta equilibrada e flexível. Ajustar conforme objetivos. "
+            "Proteína moderada (1.6-2.0g/kg)."
+        ),
+        'dicas': (
+            "Versatilidade é seu ponto forte. Pode adaptar-se a diferentes "
+            "objetivos com relativa facilidade."
+        )
+    }
+}
+
+
 def classificar_somatotipo(
     rcq: float,
     rca: float,
@@ -53,55 +182,23 @@ def classificar_somatotipo(
         'endomorfo': 0.0
     }
     
-    # === ANÁLISE DO IMC ===
-    if imc < 18.5:
-        scores['ectomorfo'] += 3
-    elif imc < 25:
-        scores['mesomorfo'] += 2
-        scores['ectomorfo'] += 1
-    elif imc < 30:
-        scores['mesomorfo'] += 1
-        scores['endomorfo'] += 2
-    else:
-        scores['endomorfo'] += 3
-    
-    # === ANÁLISE DO RCA ===
-    if rca < 0.45:
-        scores['ectomorfo'] += 2
-    elif rca < 0.50:
-        scores['mesomorfo'] += 2
-    elif rca < 0.60:
-        scores['endomorfo'] += 2
-    else:
-        scores['endomorfo'] += 3
-    
-    # === ANÁLISE DO RCQ ===
-    # Valores diferentes para homens e mulheres, usando média
-    if rcq < 0.80:
-        scores['ectomorfo'] += 2
-        scores['mesomorfo'] += 1
-    elif rcq < 0.90:
-        scores['mesomorfo'] += 2
-    else:
-        scores['endomorfo'] += 3
-    
-    # === ANÁLISE DE PROPORÇÕES ===
     ombro_cintura = proporcoes.get('ombro_cintura', 0)
     peitoral_cintura = proporcoes.get('peitoral_cintura', 0)
     
-    # Relação ombro/cintura (quanto maior, mais mesomorfo)
-    if ombro_cintura >= 1.6:
-        scores['mesomorfo'] += 3
-    elif ombro_cintura >= 1.4:
-        scores['mesomorfo'] += 2
-    elif ombro_cintura > 0:
-        scores['ectomorfo'] += 1
-    
-    # Relação peitoral/cintura
-    if peitoral_cintura >= 1.4:
-        scores['mesomorfo'] += 2
-    elif peitoral_cintura >= 1.2:
-        scores['mesomorfo'] += 1
+    # Pontos de cada índice por faixa (ver faixas.DADOS_FAIXAS['somatotipo_*']):
+    # IMC; RCA; RCQ (valores diferentes para homens e mulheres, usando média);
+    # ombro/cintura e peitoral/cintura (quanto maior, mais mesomorfo)
+    for tabela, valor in (
+        (SOMATOTIPO_IMC, imc),
+        (SOMATOTIPO_RCA, rca),
+        (SOMATOTIPO_RCQ, rcq),
+        (SOMATOTIPO_OMBRO_CINTURA, ombro_cintura),
+        (SOMATOTIPO_PEITORAL_CINTURA, peitoral_cintura),
+    ):
+        ecto, meso, endo = tabela.classificar(valor)
+        scores['ectomorfo'] += ecto
+        scores['mesomorfo'] += meso
+        scores['endomorfo'] += endo
     
     # === DETERMINA O SOMATOTIPO DOMINANTE ===
     max_score = max(scores.values())
@@ -112,30 +209,17 @@ def classificar_somatotipo(
         # Praticamente empatado - tipos mistos
         if scores['ectomorfo'] >= scores['endomorfo']:
             tipo = Somatotipo.ECTO_MESO
-            descricao = "Ecto-Mesomorfo: magro com potencial atlético"
         else:
             tipo = Somatotipo.MESO_ENDO
-            descricao = "Meso-Endomorfo: estrutura forte com tendência a ganhar gordura"
     else:
         # Um tipo claramente dominante
         if scores['ectomorfo'] == max_score:
             tipo = Somatotipo.ECTOMORFO
-            descricao = (
-                "Ectomorfo: estrutura delgada, metabolismo acelerado, "
-                "dificuldade em ganhar peso"
-            )
         elif scores['mesomorfo'] == max_score:
             tipo = Somatotipo.MESOMORFO
-            descricao = (
-                "Mesomorfo: estrutura atlética natural, boa resposta ao treino, "
-                "facilidade para ganhar músculo"
-            )
         else:
             tipo = Somatotipo.ENDOMORFO
-            descricao = (
-                "Endomorfo: estrutura mais arredondada, tendência a acumular gordura, "
-                "requer atenção à dieta"
-            )
+    descricao = DESCRICOES_SOMATOTIPO[tipo]
     
     # Normaliza scores para porcentagem
     total = sum(scores.values())
@@ -155,110 +239,5 @@ def obter_recomendacoes_somatotipo(somatotipo: Somatotipo) -> Dict[str, str]:
     Returns:
         Dicionário com recomendações de treino, dieta e dicas
     """
-    recomendacoes = {
-        Somatotipo.ECTOMORFO: {
-            'treino': (
-                "Foco em exercícios compostos (agachamento, supino, levantamento terra). "
-                "Treinos mais curtos e intensos (45-60min). Cardio moderado. "
-                "Priorizar hipertrofia com 8-12 repetições."
-            ),
-            'dieta': (
-                "Dieta hipercalórica com superávit calórico. "
-                "Carboidratos abundantes (50-60% das calorias). "
-                "Proteína moderada a alta (1.8-2.2g/kg). "
-                "Não temer gorduras saudáveis. Refeições frequentes (5-6x/dia)."
-            ),
-            'dicas': (
-                "Durma bem (8+ horas). Evite cardio excessivo. "
-                "Seja paciente - ganhos serão mais lentos mas duradouros. "
-                "Suplementação: whey protein, creatina, hipercalóricos."
-            )
-        },
-        Somatotipo.MESOMORFO: {
-            'treino': (
-                "Variedade de estímulos. Combine força (5-8 reps) e hipertrofia (8-12 reps). "
-                "Cardio moderado para definição. Responde bem a periodização. "
-                "Pode treinar com maior volume."
-            ),
-            'dieta': (
-                "Dieta balanceada e flexível. "
-                "Carboidratos moderados (40-50% das calorias). "
-                "Proteína moderada (1.6-2.0g/kg). "
-                "Ajustar calorias conforme objetivo (bulking ou cutting)."
-            ),
-            'dicas': (
-                "Aproveite a genética favorável mas não descuide da dieta. "
-                "Varie os treinos para evitar estagnação. "
-                "Fácil ganhar mas também fácil perder forma - mantenha consistência."
-            )
-        },
-        Somatotipo.ENDOMORFO: {
-            'treino': (
-                "Combine musculação com cardio regular. "
-                "HIIT eficiente para queima de gordura. "
-                "Treinos com maior volume e frequência. "
-                "Foco em compostos + exercícios metabólicos."
-            ),
-            'dieta': (
-                "Controle calórico rigoroso. Déficit para perda de gordura. "
-                "Carboidratos controlados (30-40% das calorias), preferir baixo IG. "
-                "Proteína alta (2.0-2.5g/kg) para preservar massa magra. "
-                "Atenção ao timing dos carboidratos (pré/pós-treino)."
-            ),
-            'dicas': (
-                "A genética pode ser desafiadora mas não é limitante. "
-                "Monitore calorias e macros de perto. "
-                "Sono e gestão de estresse são críticos (afetam hormônios). "
-                "Evite períodos longos sem atividade."
-            )
-        },
-        Somatotipo.ECTO_MESO: {
-            'treino': (
-                "Treinos de força e hipertrofia, volume moderado. "
-                "Cardio leve a moderado. Foco em construir massa muscular "
-                "sem cardio excessivo que prejudique ganhos."
-            ),
-            'dieta': (
-                "Leve superávit calórico para construção muscular. "
-                "Carboidratos moderados a altos. Proteína alta (1.8-2.2g/kg). "
-                "Mais flexibilidade que ectomorfo puro."
-            ),
-            'dicas': (
-                "Boa capacidade de definição com dieta adequada. "
-                "Aproveite facilidade para construir físico atlético e definido."
-            )
-        },
-        Somatotipo.MESO_ENDO: {
-            'treino': (
-                "Musculação pesada + cardio regular para controle de gordura. "
-                "HIIT 2-3x/semana. Volume alto de treino. "
-                "Bom potencial para ganho de força e massa."
-            ),
-            'dieta': (
-                "Atenção ao excesso calórico. Carboidratos moderados. "
-                "Proteína alta. Monitorar percentual de gordura regularmente. "
-                "Ciclos de bulking/cutting bem estruturados."
-            ),
-            'dicas': (
-                "Facilidade para ganhar massa mas também gordura. "
-                "Disciplina alimentar é chave. Potencial para físicos imponentes "
-                "se bem trabalhado."
-            )
-        },
-        Somatotipo.EQUILIBRADO: {
-            'treino': (
-                "Abordagem balanceada. Variar entre fases de força, "
-                "hipertrofia e resistência. Cardio moderado."
-            ),
-            'dieta': (
-                "Dieta equilibrada e flexível. Ajustar conforme objetivos. "
-                "Proteína moderada (1.6-2.0g/kg)."
-            ),
-            'dicas': (
-                "Versatilidade é seu ponto forte. Pode adaptar-se a diferentes "
-                "objetivos com relativa facilidade."
-            )
-        }
-    }
-    
-    return recomendacoes.get(somatotipo, recomendacoes[Somatotipo.EQUILIBRADO])
+    # Cópia rasa: quem recebe pode alterar o dicionário sem afetar a tabela
+    return dict(RECOMENDACOES_SOMATOTIPO.get(somatotipo, RECOMENDACOES_SOMATOTIPO[Somatotipo.EQUILIBRADO]))
@@ -3,196 +3,450 @@ Serviço de Análise de Avaliações
 Processa avaliações e calcula todos os índices corporais.
 """
 
-from typing import Dict, Any, Optional
+import pickle
+from dataclasses import is_dataclass, asdict, fields
+from enum import Enum
+from typing import Dict, Any, FrozenSet, Iterable, List, Optional, Sequence
+import numpy as np
 from ..models.avaliacao import Avaliacao
 from ..models.medidas import Medidas
 from ..models.usuario import Usuario, Sexo
-from ..calculations import (
-    calcular_imc, classificar_imc,
-    calcular_gordura_us_navy, classificar_gordura,
-    calcular_rcq, calcular_rca, classificar_rcq, classificar_rca,
-    calcular_proporcoes, analisar_simetria
-)
-from ..calculations.gordura import calcular_massa_gorda, calcular_massa_magra
-from ..calculations.somatotipo import classificar_somatotipo, obter_recomendacoes_somatotipo
-from ..calculations.proporcoes import calcular_pontuacao_estetica
-from ..calculations.composicao_tecidual import calcular_composicao_tecidual
-from ..calculations.mapa_corporal import gerar_mapa_corporal
-from ..calculations.score_estetico import calcular_score_estetico
+from ..calculations.somatotipo import Somatotipo, DESCRICOES_SOMATOTIPO, obter_recomendacoes_somatotipo
+from ..calculations import lote
+from ..calculations.mapa_corporal import NAO_MEDIDO
+from ..calculations.score_estetico import PESOS_SCORE
+from .cache import CacheLRU
+from .pipeline import PIPELINE, calcular_completo
+
+
+_CAMPOS_MEDIDAS = fields(Medidas)
+
+# Seções de resultados: chaves que cada uma produz (na ordem de cálculo)
+SECOES = PIPELINE.secoes()
+
+# Seções que precisam ser calculadas antes de cada uma
+DEPENDENCIAS_SECOES = PIPELINE.dependencias_secoes()
+
+_TODAS_SECOES = frozenset(SECOES)
 
 
 class AnalisadorAvaliacao:
     """Processa avaliações e calcula todos os índices corporais possíveis"""
     
+    # Versão das fórmulas: incrementar sempre que um cálculo mudar, para que
+    # resultados persistidos com versões anteriores sejam recalculados
+    VERSAO_CALCULO = 1
+    
+    # Cache de resultados (opcional, ver ativar_cache)
+    _cache: Optional[CacheLRU] = None
+    
     @staticmethod
-    def processar_avaliacao(avaliacao: Avaliacao, usuario: Usuario) -> Dict[str, Any]:
+    def processar_avaliacao(avaliacao: Avaliacao, usuario: Usuario,
+                            secoes: Optional[Iterable[str]] = None) -> Dict[str, Any]:
         """
         Processa uma avaliação completa e calcula todos os índices possíveis.
         
         Args:
             avaliacao: Objeto Avaliacao a ser processado
             usuario: Usuário sendo avaliado
+            secoes: Seções desejadas (ver SECOES); None = todas. Só elas e suas
+                dependências são calculadas, e só elas são devolvidas
             
         Returns:
             Dicionário com todos os resultados calculados
         """
-        medidas = avaliacao.medidas
-        resultados = {}
+        calcular = AnalisadorAvaliacao.resolver_secoes(secoes)
+        cache = AnalisadorAvaliacao._cache
+        if cache is None:
+            resultados = AnalisadorAvaliacao._calcular(avaliacao.medidas, usuario, calcular)
+        else:
+            chave = AnalisadorAvaliacao._chave_cache(avaliacao.medidas, usuario, calcular)
+            guardado = cache.obter(chave)
+            if guardado is None:
+                resultados = AnalisadorAvaliacao._calcular(avaliacao.medidas, usuario, calcular)
+                cache.guardar(chave, pickle.dumps(resultados, pickle.HIGHEST_PROTOCOL))
+            else:
+                # Guardado serializado: cada acerto devolve uma cópia independente
+                # (mais barato que deepcopy), que quem recebe pode alterar à vontade
+                resultados = pickle.loads(guardado)
+        
+        if secoes is not None:
+            resultados = AnalisadorAvaliacao.filtrar_secoes(resultados, secoes)
         
-        # === CÁLCULOS BÁSICOS ===
+        # Adiciona resultados à avaliação
+        avaliacao.resultados = resultados
         
-        # IMC
-        imc = calcular_imc(medidas.peso, medidas.altura)
-        classificacao_imc, descricao_imc = classificar_imc(imc)
+        return resultados
+    
+    @staticmethod
+    def resolver_secoes(secoes: Optional[Iterable[str]]) -> FrozenSet[str]:
+        """
+        Seções pedidas mais as que elas precisam (None = todas).
         
-        resultados['imc'] = imc
-        resultados['imc_classificacao'] = classificacao_imc
-        resultados['imc_descricao'] = descricao_imc
+        Raises:
+            ValueError: Se alguma seção não existir
+        """
+        if secoes is None:
+            return _TODAS_SECOES
+        resolvidas = set()
+        pendentes = list(secoes)
+        while pendentes:
+            secao = pendentes.pop()
+            if secao not in SECOES:
+                raise ValueError(f"Seção desconhecida: {secao}")
+            if secao not in resolvidas:
+                resolvidas.add(secao)
+                pendentes.extend(DEPENDENCIAS_SECOES.get(secao, ()))
+        return frozenset(resolvidas)
+    
+    @staticmethod
+    def filtrar_secoes(resultados: Dict[str, Any], secoes: Iterable[str]) -> Dict[str, Any]:
+        """Mantém apenas as chaves das seções pedidas (sem as dependências)"""
+        chaves = {chave for secao in secoes for chave in SECOES[secao]}
+        return {chave: valor for chave, valor in resultados.items() if chave in chaves}
+
+    @staticmethod
+    def recalcular_avaliacao(avaliacao: Avaliacao, usuario: Usuario, anteriores: Dict[str, Any],
+                             campos_alterados: Iterable[str]) -> Dict[str, Any]:
+        """
+        Atualiza resultados anteriores após a correção de algumas medidas.
+
+        Só as etapas do pipeline que leem os campos alterados (e as que dependem
+        delas) são recalculadas; o restante é reaproveitado de `anteriores`.
+
+        Args:
+            avaliacao: Avaliação já com as medidas novas
+            usuario: Usuário avaliado
+            anteriores: Resultados completos calculados com as medidas antigas
+                (objetos ou já serializados)
+            campos_alterados: Campos de Medidas que mudaram ('sexo'/'idade' para
+                mudanças no usuário)
+
+        Returns:
+            Dicionário com os resultados atualizados
+        """
+        resultados = PIPELINE.recalcular(avaliacao.medidas, usuario, anteriores, campos_alterados)
+        avaliacao.resultados = resultados
+        return resultados
+
+    @staticmethod
+    def ativar_cache(capacidade: int = 1024) -> None:
+        """
+        Ativa o cache LRU de resultados de processar_avaliacao (desativado por padrão).
         
-        # === PERCENTUAL DE GORDURA (US Navy) ===
-        sexo_str = usuario.sexo.value
-        
-        if medidas.tem_medidas_minimas_us_navy(sexo_str):
-            try:
-                percentual_gordura = calcular_gordura_us_navy(
-                    altura_cm=medidas.altura,
-                    cintura_cm=medidas.cintura,
-                    pescoco_cm=medidas.pescoco,
-                    sexo=sexo_str,
-                    quadril_cm=medidas.quadril
-                )
-                
-                resultados['percentual_gordura'] = percentual_gordura
-                resultados['classificacao_gordura'] = classificar_gordura(
-                    percentual_gordura, sexo_str, usuario.idade
-                )
-                
-                # Massas
-                resultados['massa_gorda_kg'] = calcular_massa_gorda(
-                    medidas.peso, percentual_gordura
-                )
-                resultados['massa_magra_kg'] = calcular_massa_magra(
-                    medidas.peso, percentual_gordura
-                )
-            except ValueError as e:
-                resultados['erro_gordura'] = str(e)
+        A chave é o conteúdo das medidas, o sexo, a idade e VERSAO_CALCULO:
+        avaliações idênticas (ex.: recarregar o painel) não são recalculadas.
+        """
+        AnalisadorAvaliacao._cache = CacheLRU(capacidade)
+    
+    @staticmethod
+    def desativar_cache() -> None:
+        """Desativa e descarta o cache de resultados"""
+        AnalisadorAvaliacao._cache = None
+    
+    @staticmethod
+    def estatisticas_cache() -> Optional[Dict[str, Any]]:
+        """Acertos, falhas, remoções e taxa de acerto do cache (None se desativado)"""
+        cache = AnalisadorAvaliacao._cache
+        return cache.estatisticas() if cache is not None else None
+    
+    @staticmethod
+    def _chave_cache(medidas: Medidas, usuario: Usuario, calcular: FrozenSet[str]) -> tuple:
+        """Chave canônica: valores das medidas (na ordem dos campos), sexo, idade, seções e versão"""
+        return (
+            AnalisadorAvaliacao.VERSAO_CALCULO,
+            calcular,
+            usuario.sexo.value,
+            usuario.idade,
+            tuple(getattr(medidas, campo.name) for campo in _CAMPOS_MEDIDAS)
+        )
+    
+    @staticmethod
+    def _calcular(medidas: Medidas, usuario: Usuario,
+                  calcular: FrozenSet[str] = _TODAS_SECOES) -> Dict[str, Any]:
+        """Calcula os índices das seções em `calcular` (já com as dependências)"""
+        if calcular == _TODAS_SECOES:
+            # Caso comum: todas as etapas fundidas, sem percorrer o grafo
+            return calcular_completo(medidas, usuario)
+        return PIPELINE.executar(medidas, usuario, PIPELINE.etapas_das_secoes(calcular))
+    
+    @staticmethod
+    def processar_lote(colunas: Dict[str, Sequence], sexos: Sequence,
+                       idades: Optional[Sequence] = None) -> List[Dict[str, Any]]:
+        """
+        Processa várias avaliações de uma vez, com os cálculos vetorizados (NumPy).
         
-        # === ÍNDICES CORPORAIS ===
+        Usado para recalcular avaliações persistidas e em importações: cada
+        resultado é idêntico a serializar_resultados(processar_avaliacao(...))
+        da mesma avaliação.
         
-        # RCQ
-        if medidas.cintura and medidas.quadril:
-            rcq = calcular_rcq(medidas.cintura, medidas.quadril)
-            classificacao_rcq, desc_rcq = classificar_rcq(rcq, sexo_str)
+        Args:
+            colunas: Campo de Medidas -> valores de cada avaliação (None ou NaN
+                para medida não informada); altura e peso são obrigatórios
+            sexos: Sexo de cada avaliação (Sexo ou 'M'/'F')
+            idades: Idade de cada avaliação (usada pelas tabelas com faixas etárias)
             
-            resultados['rcq'] = rcq
-            resultados['rcq_classificacao'] = classificacao_rcq
-            resultados['rcq_descricao'] = desc_rcq
-        
-        # RCA
-        if medidas.cintura:
-            rca = calcular_rca(medidas.cintura, medidas.altura)
-            classificacao_rca, desc_rca = classificar_rca(rca)
+        Returns:
+            Lista de resultados (tipos JSON puros), na ordem das avaliações
             
-            resultados['rca'] = rca
-            resultados['rca_classificacao'] = classificacao_rca
-            resultados['rca_descricao'] = desc_rca
+        Raises:
+            ValueError: Se alguma medida for inválida (mesmas regras de Medidas)
+        """
+        n = len(sexos)
+        m = {}
+        for campo in (f.name for f in fields(Medidas)):
+            valores = colunas.get(campo)
+            m[campo] = lote.coluna(valores) if valores is not None else np.full(n, np.nan)
+            if len(m[campo]) != n:
+                raise ValueError(f"Coluna {campo} com {len(m[campo])} valores (esperado: {n})")
+        AnalisadorAvaliacao._validar_lote(m)
+        
+        masculino = np.array([Sexo(sexo).value == 'M' for sexo in sexos], dtype=bool)
+        informado = {campo: ~np.isnan(valores) for campo, valores in m.items()}
+        
+        # === CÁLCULOS BÁSICOS ===
+        imc = lote.calcular_imc_lote(m['peso'], m['altura'])
+        imc_classe = lote.classificar_imc_lote(imc)
+        
+        # === PERCENTUAL DE GORDURA (US Navy) ===
+        tem_gordura = informado['cintura'] & informado['pescoco'] & (masculino | informado['quadril'])
+        gordura, invalido, gordura_inteiro = lote.calcular_gordura_us_navy_lote(
+            m['altura'], m['cintura'], m['pescoco'], m['quadril'], masculino
+        )
+        erro_gordura = tem_gordura & invalido
+        tem_gordura &= ~invalido
+        gordura = np.where(tem_gordura, gordura, np.nan)
+        gordura_classe = lote.classificar_gordura_lote(
+            gordura, masculino, None if idades is None else lote.coluna(idades)
+        )
+        massa_gorda, massa_magra = lote.calcular_massas_lote(m['peso'], gordura)
+        composicao = lote.calcular_composicao_tecidual_lote(m['peso'], gordura, masculino)
+        
+        # === ÍNDICES CORPORAIS ===
+        tem_rca = lote.presente(m['cintura'])
+        tem_rcq = tem_rca & lote.presente(m['quadril'])
+        rcq = lote.calcular_rcq_lote(m['cintura'], m['quadril'])
+        rcq_classe = lote.classificar_rcq_lote(rcq, masculino)
+        rca = lote.calcular_rca_lote(m['cintura'], m['altura'])
+        rca_classe = lote.classificar_rca_lote(rca)
         
         # === PROPORÇÕES E SIMETRIA ===
+        tem_proporcoes = informado['cintura'] & (informado['peitoral'] | informado['ombros'])
+        proporcoes = lote.calcular_proporcoes_lote(m)
+        simetria, ganho_bracos = lote.analisar_simetria_lote(proporcoes)
+        pontuacao, pontuacao_classe, metricas = lote.calcular_pontuacao_estetica_lote(proporcoes)
+        
+        # === MAPA CORPORAL E SCORE ===
+        ideais = lote.calcular_proporcoes_ideais_lote(m['cintura'], masculino)
+        reais = lote.medidas_regioes_lote(m)
+        regioes = {parte: lote.classificar_desenvolvimento_lote(reais[parte], ideais[parte])
+                   for parte in lote.REGIOES_MAPA}
+        central = lote.avaliar_gordura_central_lote(m['cintura'], m['altura'], m['quadril'], masculino)
+        score = lote.calcular_score_estetico_lote(
+            gordura, gordura_inteiro, m, masculino,
+            [np.where(lote.presente(reais[parte]), regioes[parte]['ratio'], np.nan)
+             for parte in lote.REGIOES_MAPA]
+        )
         
-        if medidas.tem_medidas_proporcao():
-            medidas_dict = {
-                'altura': medidas.altura,
-                'cintura': medidas.cintura,
-                'peitoral': medidas.peitoral,
-                'ombros': medidas.ombros,
-                'braco_relaxado': medidas.braco_relaxado,
-                'braco_contraido': medidas.braco_contraido,
-                'coxa': medidas.coxa,
-                'panturrilha': medidas.panturrilha
-            }
+        # === SOMATOTIPO ===
+        somatotipo, somatotipo_scores = lote.classificar_somatotipo_lote(
+            rcq, rca, imc,
+            np.where(tem_proporcoes, np.nan_to_num(proporcoes['ombro_cintura']), 0),
+            np.where(tem_proporcoes, np.nan_to_num(proporcoes['peitoral_cintura']), 0)
+        )
+        tipos = (Somatotipo.ECTOMORFO, Somatotipo.MESOMORFO, Somatotipo.ENDOMORFO,
+                 Somatotipo.ECTO_MESO, Somatotipo.MESO_ENDO)
+        recomendacoes = {tipo: obter_recomendacoes_somatotipo(tipo) for tipo in tipos}
+        
+        # === MONTAGEM DOS RESULTADOS (mesma estrutura e ordem do cálculo escalar) ===
+        def lista(valores):
+            return valores.tolist()
+        
+        def linhas(colunas_dict, chaves):
+            # Transpõe colunas em uma tupla de valores por avaliação (None no lugar de NaN)
+            return [tuple(None if v != v else v for v in linha)
+                    for linha in zip(*(lista(colunas_dict[chave]) for chave in chaves))]
+        
+        def numero(valor, inteiro):
+            # Onde o cálculo escalar produz int (limites, max(0, ...)), mantém int
+            return int(valor) if inteiro else valor
+        
+        c = {campo: lista(valores) for campo, valores in m.items()}
+        sexo_m = lista(masculino)
+        imc_l, imc_classe_l = lista(imc), lista(imc_classe)
+        tem_gordura_l, erro_gordura_l = lista(tem_gordura), lista(erro_gordura)
+        gordura_l, gordura_inteiro_l, gordura_classe_l = lista(gordura), lista(gordura_inteiro), lista(gordura_classe)
+        massa_gorda_l, massa_magra_l = lista(massa_gorda), lista(massa_magra)
+        chaves_composicao = tuple(composicao)
+        composicao_l = linhas(composicao, chaves_composicao)
+        tem_rca_l, tem_rcq_l = lista(tem_rca), lista(tem_rcq)
+        rcq_l, rcq_classe_l, rca_l, rca_classe_l = lista(rcq), lista(rcq_classe), lista(rca), lista(rca_classe)
+        tem_proporcoes_l = lista(tem_proporcoes)
+        proporcoes_l = linhas(proporcoes, lote.CAMPOS_PROPORCOES)
+        simetria_l = {campo: lista(valores) for campo, valores in simetria.items()}
+        ganho_l = lista(ganho_bracos)
+        pontuacao_l, pontuacao_classe_l, metricas_l = lista(pontuacao), lista(pontuacao_classe), lista(metricas)
+        ideais_l = {parte: lista(valores) for parte, valores in ideais.items()}
+        reais_l = {parte: lista(valores) for parte, valores in reais.items()}
+        regioes_l = {parte: {chave: lista(valores) for chave, valores in dados.items()}
+                     for parte, dados in regioes.items()}
+        central_l = {chave: lista(valores) for chave, valores in central.items()}
+        score_l = {chave: lista(valores) for chave, valores in score.items()}
+        breakdown_l = {chave: lista(lote.arredondar(score[chave], 1))
+                       for chave in ('gordura', 'ombro_cintura', 'peitoral_cintura', 'simetria', 'gordura_central')}
+        score_total_l = lista(lote.arredondar(score['total'], 1))
+        somatotipo_l = lista(somatotipo)
+        chaves_somatotipo = tuple(somatotipo_scores)
+        somatotipo_scores_l = linhas(somatotipo_scores, chaves_somatotipo)
+        
+        todos = []
+        for i in range(n):
+            r = {}
+            r['imc'] = imc_l[i]
+            r['imc_classificacao'], r['imc_descricao'] = lote.CLASSIFICACOES_IMC[imc_classe_l[i]]
             
-            proporcoes = calcular_proporcoes(medidas_dict)
-            analise = analisar_simetria(proporcoes)
+            if erro_gordura_l[i]:
+                r['erro_gordura'] = lote.ERRO_CINTURA_PESCOCO if sexo_m[i] else lote.ERRO_SOMA_PESCOCO
+            elif tem_gordura_l[i]:
+                r['percentual_gordura'] = numero(gordura_l[i], gordura_inteiro_l[i])
+                r['classificacao_gordura'] = lote.CLASSIFICACOES_GORDURA[gordura_classe_l[i]]
+                r['massa_gorda_kg'] = massa_gorda_l[i]
+                r['massa_magra_kg'] = massa_magra_l[i]
             
-            resultados['proporcoes'] = proporcoes
-            resultados['analise_simetria'] = analise
+            if tem_rcq_l[i]:
+                r['rcq'] = rcq_l[i]
+                r['rcq_classificacao'], r['rcq_descricao'] = lote.CLASSIFICACOES_RCQ[rcq_classe_l[i]]
             
-            # Pontuação estética
-            pontuacao, classificacao_est = calcular_pontuacao_estetica(proporcoes)
-            resultados['pontuacao_estetica'] = pontuacao
-            resultados['classificacao_estetica'] = classificacao_est
-        
-        # === MÓDULOS AVANÇADOS ===
-        
-        # Composição Tecidual
-        if 'percentual_gordura' in resultados:
-            composicao = calcular_composicao_tecidual(
-                peso=medidas.peso,
-                percentual_gordura=resultados['percentual_gordura'],
-                sexo=sexo_str
-            )
-            resultados['composicao_tecidual'] = composicao
-        
-        # Mapa Corporal de Distribuição
-        if medidas.cintura:
-            medidas_dict_completo = {
-                'pescoco': medidas.pescoco,
-                'ombros': medidas.ombros,
-                'peitoral': medidas.peitoral,
-                'cintura': medidas.cintura,
-                'abdomen': medidas.abdomen,
-                'quadril': medidas.quadril,
-                'braco_relaxado': medidas.braco_relaxado,
-                'braco_contraido': medidas.braco_contraido,
-                'antebraco': medidas.antebraco,
-                'coxa': medidas.coxa,
-                'panturrilha': medidas.panturrilha
-            }
-            print(f"🔍 ANALISADOR - Coxa no dict: {medidas_dict_completo.get('coxa')}")
-            mapa = gerar_mapa_corporal(medidas_dict_completo, medidas.altura, sexo_str)
-            resultados['mapa_corporal'] = mapa
+            if tem_rca_l[i]:
+                r['rca'] = rca_l[i]
+                r['rca_classificacao'], r['rca_descricao'] = lote.CLASSIFICACOES_RCA[rca_classe_l[i]]
             
-            # Score Estético Avançado
-            if 'percentual_gordura' in resultados and 'mapa_corporal' in resultados:
-                score = calcular_score_estetico(
-                    percentual_gordura=resultados['percentual_gordura'],
-                    medidas=medidas_dict_completo,
-                    altura=medidas.altura,
-                    sexo=sexo_str,
-                    mapa_corporal=mapa
-                )
-                resultados['score_estetico_avancado'] = score
-        
-        # === SOMATOTIPO ===
-        
-        # Precisa de RCQ, RCA e IMC
-        if 'rcq' in resultados and 'rca' in resultados:
-            proporcoes_dict = {}
-            if 'proporcoes' in resultados:
-                prop = resultados['proporcoes']
-                proporcoes_dict = {
-                    'ombro_cintura': prop.ombro_cintura,
-                    'peitoral_cintura': prop.peitoral_cintura
-                }
+            if tem_proporcoes_l[i]:
+                prop = dict(zip(lote.CAMPOS_PROPORCOES, proporcoes_l[i]))
+                r['proporcoes'] = prop
+                analise = {}
+                for campo, textos in lote.ANALISE_SIMETRIA.items():
+                    if prop[campo]:
+                        analise[campo] = textos[simetria_l[campo][i]].format(ganho_l[i])
+                r['analise_simetria'] = analise
+                r['pontuacao_estetica'] = numero(pontuacao_l[i], metricas_l[i] == 0)
+                r['classificacao_estetica'] = lote.CLASSIFICACOES_ESTETICAS[pontuacao_classe_l[i]]
+            
+            if tem_gordura_l[i]:
+                composicao_i = dict(zip(chaves_composicao, composicao_l[i]))
+                composicao_i['percentual_gordura'] = numero(composicao_i['percentual_gordura'], gordura_inteiro_l[i])
+                composicao_i['peso_total'] = c['peso'][i]
+                r['composicao_tecidual'] = composicao_i
             
-            somatotipo, desc_somato, scores_somato = classificar_somatotipo(
-                rcq=resultados['rcq'],
-                rca=resultados['rca'],
-                imc=imc,
-                proporcoes=proporcoes_dict
-            )
+            if tem_rca_l[i]:
+                regioes_i = {}
+                for parte in lote.REGIOES_MAPA:
+                    real = reais_l[parte][i]
+                    ideal = ideais_l[parte][i]
+                    if real == real and real:
+                        dados = regioes_l[parte]
+                        classificacao, descricao, cor = lote.DESENVOLVIMENTO[dados['classificacao'][i]]
+                        regioes_i[parte] = {
+                            'real': real,
+                            'ideal': ideal,
+                            'ratio': dados['ratio'][i],
+                            'classificacao': classificacao,
+                            'descricao': descricao,
+                            'cor': cor,
+                            'diferenca_cm': dados['diferenca_cm'][i]
+                        }
+                    else:
+                        regioes_i[parte] = {
+                            'real': None,
+                            'ideal': ideal,
+                            'classificacao': NAO_MEDIDO[0],
+                            'descricao': NAO_MEDIDO[1],
+                            'cor': NAO_MEDIDO[2]
+                        }
+                
+                gordura_central = None
+                if tem_rcq_l[i]:
+                    rca_status, rca_descricao, rca_cor = lote.GORDURA_CENTRAL_RCA[central_l['rca_status'][i]]
+                    rcq_status, rcq_descricao, rcq_cor = lote.GORDURA_CENTRAL_RCQ[central_l['rcq_status'][i]]
+                    gordura_central = {
+                        'rca': central_l['rca'][i],
+                        'rca_status': rca_status,
+                        'rca_descricao': rca_descricao,
+                        'rca_cor': rca_cor,
+                        'rcq': central_l['rcq'][i],
+                        'rcq_status': rcq_status,
+                        'rcq_descricao': rcq_descricao,
+                        'rcq_cor': rcq_cor
+                    }
+                
+                r['mapa_corporal'] = {
+                    'regioes': regioes_i,
+                    'gordura_central': gordura_central,
+                    'proporcoes_ideais': {parte: ideais_l[parte][i] for parte in lote.REGIOES_MAPA}
+                }
+                
+                if tem_gordura_l[i]:
+                    classificacao, cor = lote.CLASSIFICACOES_SCORE[score_l['classificacao'][i]]
+                    breakdown = {
+                        chave: numero(valores[i], score_l[chave][i] == 0)
+                        for chave, valores in breakdown_l.items()
+                    }
+                    breakdown['gordura'] = numero(breakdown_l['gordura'][i], score_l['gordura_inteiro'][i])
+                    r['score_estetico_avancado'] = {
+                        'score_total': numero(score_total_l[i], score_l['total_inteiro'][i]),
+                        'classificacao': classificacao,
+                        'cor': cor,
+                        'breakdown': breakdown,
+                        'pesos': dict(PESOS_SCORE)
+                    }
             
-            resultados['somatotipo'] = somatotipo.value
-            resultados['somatotipo_descricao'] = desc_somato
-            resultados['somatotipo_scores'] = scores_somato
+            if tem_rcq_l[i]:
+                tipo = tipos[somatotipo_l[i]]
+                r['somatotipo'] = tipo.value
+                r['somatotipo_descricao'] = DESCRICOES_SOMATOTIPO[tipo]
+                r['somatotipo_scores'] = dict(zip(chaves_somatotipo, somatotipo_scores_l[i]))
+                r['recomendacoes'] = dict(recomendacoes[tipo])
             
-            # Recomendações
-            recomendacoes = obter_recomendacoes_somatotipo(somatotipo)
-            resultados['recomendacoes'] = recomendacoes
+            todos.append(r)
         
-        # Adiciona resultados à avaliação
-        avaliacao.resultados = resultados
+        return todos
+    
+    @staticmethod
+    def _validar_lote(medidas: Dict[str, np.ndarray]) -> None:
+        """Aplica às colunas as mesmas validações de Medidas.__post_init__"""
+        altura, peso = medidas['altura'], medidas['peso']
+        for i in np.flatnonzero(~((altura > 0) & (altura <= 300))):
+            raise ValueError(f"Avaliação {i}: Altura inválida: {altura[i]} cm")
+        for i in np.flatnonzero(~((peso > 0) & (peso <= 500))):
+            raise ValueError(f"Avaliação {i}: Peso inválido: {peso[i]} kg")
+        for campo, valores in medidas.items():
+            if campo in ('altura', 'peso'):
+                continue
+            for i in np.flatnonzero(valores <= 0):
+                raise ValueError(f"Avaliação {i}: {campo} deve ser positivo: {valores[i]}")
+    
+    @staticmethod
+    def serializar_resultados(resultados: Any) -> Any:
+        """
+        Converte os resultados para tipos JSON puros (dicts, listas, números).
+        
+        Dataclasses (ex.: Proporcoes) viram dicionários e Enums viram seus valores,
+        para que os resultados possam ser persistidos e recarregados sem perdas.
         
+        Args:
+            resultados: Dicionário retornado por processar_avaliacao
+            
+        Returns:
+            Cópia serializável dos resultados
+        """
+        if is_dataclass(resultados) and not isinstance(resultados, type):
+            return AnalisadorAvaliacao.serializar_resultados(asdict(resultados))
+        if isinstance(resultados, dict):
+            return {chave: AnalisadorAvaliacao.serializar_resultados(valor) for chave, valor in resultados.items()}
+        if isinstance(resultados, (list, tuple)):
+            return [AnalisadorAvaliacao.serializar_resultados(valor) for valor in resultados]
+        if isinstance(resultados, Enum):
+            return resultados.value
         return resultados
     
     @staticmethod
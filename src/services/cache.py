@@ -0,0 +1,64 @@
+"""
+Cache LRU limitado, seguro entre threads, com métricas de uso.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class CacheLRU:
+    """
+    Guarda até `capacidade` itens; ao exceder, descarta o usado há mais tempo.
+
+    Args:
+        capacidade: Número máximo de itens
+    """
+
+    def __init__(self, capacidade: int = 1024):
+        if capacidade < 1:
+            raise ValueError(f"Capacidade inválida: {capacidade}")
+        self.capacidade = capacidade
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+
+    def obter(self, chave: Hashable) -> Optional[Any]:
+        """Retorna o valor guardado (ou None) e o marca como usado recentemente"""
+        with self._lock:
+            valor = self._itens.get(chave)
+            if valor is None:
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def guardar(self, chave: Hashable, valor: Any) -> None:
+        """Guarda o valor, descartando o item menos usado se o cache estiver cheio"""
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+                self.remocoes += 1
+
+    def limpar(self) -> None:
+        """Remove todos os itens (as métricas são mantidas)"""
+        with self._lock:
+            self._itens.clear()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Acertos, falhas, remoções por falta de espaço e ocupação"""
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                'capacidade': self.capacidade,
+                'itens': len(self._itens),
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'remocoes': self.remocoes,
+                'taxa_acerto': round(self.acertos / consultas, 4) if consultas else None
+            }
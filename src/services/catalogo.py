@@ -0,0 +1,206 @@
+"""
+Catálogo de textos dos resultados
+
+Recomendações, descrições de somatotipo, frases da análise de simetria e
+descrições/cores das classificações são sempre os mesmos textos, repetidos
+em cada avaliação. Na forma compacta dos resultados (compactar_resultados)
+eles viram códigos estáveis e o texto fica no CATALOGO, servido uma única vez
+(versionado por VERSAO_CATALOGO) e resolvido pelo cliente (expandir_resultados
+aqui; i18n.expandirResultados no navegador).
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from ..calculations.faixas import (
+    IMC, RCQ, RCA, DESENVOLVIMENTO, GORDURA_CENTRAL_RCA, GORDURA_CENTRAL_RCQ, CLASSIFICACAO_SCORE
+)
+from ..calculations.mapa_corporal import NAO_MEDIDO
+from ..calculations.proporcoes import TEXTOS_SIMETRIA
+from ..calculations.score_estetico import PESOS_SCORE
+from ..calculations.somatotipo import DESCRICOES_SOMATOTIPO, RECOMENDACOES_SOMATOTIPO
+
+
+def _cores(rotulos) -> Dict[str, Dict[str, str]]:
+    return {codigo: {'descricao': descricao, 'cor': cor} for codigo, descricao, cor in rotulos}
+
+
+CATALOGO: Dict[str, Any] = {
+    # código da classificação -> descrição
+    'imc': dict(IMC.rotulos),
+    'rcq': dict(RCQ.rotulos),
+    'rca': dict(RCA.rotulos),
+    # somatotipo -> descrição
+    'somatotipo': {tipo.value: descricao for tipo, descricao in DESCRICOES_SOMATOTIPO.items()},
+    # recomendacao_id -> {treino, dieta, dicas}
+    'recomendacoes': {tipo.value: textos for tipo, textos in RECOMENDACOES_SOMATOTIPO.items()},
+    # proporção -> frases, indexadas pelo código; {valor} = ganho percentual dos
+    # braços com uma casa, a partir de proporcoes.simetria_bracos
+    'analise_simetria': {
+        campo: [texto.replace('{:.1f}', '{valor}') for texto in textos]
+        for campo, textos in TEXTOS_SIMETRIA.items()
+    },
+    # classificação da região -> descrição e cor
+    'desenvolvimento': _cores(DESENVOLVIMENTO.rotulos + (NAO_MEDIDO,)),
+    'gordura_central_rca': _cores(GORDURA_CENTRAL_RCA.rotulos),
+    'gordura_central_rcq': _cores(GORDURA_CENTRAL_RCQ.rotulos),
+    # classificação do score estético -> cor
+    'score': {classificacao: cor for classificacao, cor in CLASSIFICACAO_SCORE.rotulos},
+    'pesos_score': PESOS_SCORE,
+}
+
+# Muda sempre que algum texto mudar: clientes podem guardar o catálogo por versão
+VERSAO_CATALOGO = hashlib.sha256(
+    json.dumps(CATALOGO, sort_keys=True, ensure_ascii=False).encode('utf-8')
+).hexdigest()[:12]
+
+# Campo com código -> (campo com o texto, seção do catálogo)
+_DESCRICOES = {
+    'imc_classificacao': ('imc_descricao', 'imc'),
+    'rcq_classificacao': ('rcq_descricao', 'rcq'),
+    'rca_classificacao': ('rca_descricao', 'rca'),
+    'somatotipo': ('somatotipo_descricao', 'somatotipo'),
+}
+# Campo com o texto -> campo com o código
+_CODIGOS = {texto: codigo for codigo, (texto, _) in _DESCRICOES.items()}
+
+# Textos das subestruturas: campo do código -> (campo do texto, chave no catálogo)
+_REGIAO = {'classificacao': (('descricao', 'descricao'), ('cor', 'cor'))}
+_CENTRAL_RCA = {'rca_status': (('rca_descricao', 'descricao'), ('rca_cor', 'cor'))}
+_CENTRAL_RCQ = {'rcq_status': (('rcq_descricao', 'descricao'), ('rcq_cor', 'cor'))}
+
+# Primeira frase de cada bloco de recomendações -> recomendacao_id
+_RECOMENDACOES = {textos['treino']: codigo for codigo, textos in CATALOGO['recomendacoes'].items()}
+
+
+def _simetria(campo: str, texto: str) -> Optional[int]:
+    """Código (índice) da frase de simetria; None se não for uma frase do catálogo"""
+    for codigo, modelo in enumerate(CATALOGO['analise_simetria'].get(campo, ())):
+        if '{valor}' in modelo:
+            prefixo, sufixo = modelo.split('{valor}')
+            if texto.startswith(prefixo) and texto.endswith(sufixo):
+                return codigo
+        elif texto == modelo:
+            return codigo
+    return None
+
+
+def _sem_textos(dados: Dict[str, Any], chaves: Dict[str, tuple], secao: str) -> Dict[str, Any]:
+    """
+    Remove de `dados` os textos derivados de um código (chaves: campo do código
+    -> campos de texto), só quando batem com o catálogo.
+    """
+    removidos = set()
+    for campo_codigo, campos_texto in chaves.items():
+        textos = CATALOGO[secao].get(dados.get(campo_codigo))
+        if textos is not None and all(dados.get(campo) == textos[chave] for campo, chave in campos_texto):
+            removidos.update(campo for campo, _ in campos_texto)
+    return {chave: valor for chave, valor in dados.items() if chave not in removidos}
+
+
+def compactar_resultados(resultados: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Troca os textos repetidos de resultados serializados por códigos do CATALOGO.
+
+    Não altera `resultados`. Textos que não estão no catálogo (ex.: resultados
+    antigos) são mantidos como estão, então expandir_resultados sempre
+    reconstrói o original.
+    """
+    compactos = {}
+    for chave, valor in resultados.items():
+        if chave in _CODIGOS:
+            campo_codigo = _CODIGOS[chave]
+            if CATALOGO[_DESCRICOES[campo_codigo][1]].get(resultados.get(campo_codigo)) != valor:
+                compactos[chave] = valor
+        elif chave == 'recomendacoes' and isinstance(valor, dict):
+            codigo = _RECOMENDACOES.get(valor.get('treino'))
+            if codigo is not None and CATALOGO['recomendacoes'][codigo] == valor:
+                compactos['recomendacao_id'] = codigo
+            else:
+                compactos[chave] = valor
+        elif chave == 'analise_simetria' and isinstance(valor, dict):
+            analise = {}
+            for campo, texto in valor.items():
+                codigo = _simetria(campo, texto)
+                analise[campo] = texto if codigo is None else codigo
+            compactos[chave] = analise
+        elif chave == 'mapa_corporal' and isinstance(valor, dict) and 'regioes' in valor:
+            mapa = dict(valor)
+            mapa['regioes'] = {
+                parte: _sem_textos(regiao, _REGIAO, 'desenvolvimento')
+                for parte, regiao in valor['regioes'].items()
+            }
+            if valor.get('gordura_central'):
+                central = _sem_textos(valor['gordura_central'], _CENTRAL_RCA, 'gordura_central_rca')
+                mapa['gordura_central'] = _sem_textos(central, _CENTRAL_RCQ, 'gordura_central_rcq')
+            compactos[chave] = mapa
+        elif chave == 'score_estetico_avancado' and isinstance(valor, dict):
+            score = dict(valor)
+            if CATALOGO['score'].get(score.get('classificacao')) == score.get('cor'):
+                del score['cor']
+            if score.get('pesos') == PESOS_SCORE:
+                del score['pesos']
+            compactos[chave] = score
+        else:
+            compactos[chave] = valor
+    return compactos
+
+
+def _frase(campo: str, codigo: Any, compactos: Dict[str, Any]) -> str:
+    """Frase de simetria de um código (textos fora do catálogo vêm como estão)"""
+    if isinstance(codigo, str):
+        return codigo
+    modelo = CATALOGO['analise_simetria'][campo][codigo]
+    if '{valor}' in modelo:
+        ganho = (compactos['proporcoes']['simetria_bracos'] - 1) * 100
+        modelo = modelo.replace('{valor}', f"{ganho:.1f}")
+    return modelo
+
+
+def _com_textos(dados: Dict[str, Any], chaves: Dict[str, tuple], secao: str) -> Dict[str, Any]:
+    """Reinsere, logo após cada código, os textos removidos por _sem_textos"""
+    expandidos = {}
+    for chave, valor in dados.items():
+        expandidos[chave] = valor
+        if chave in chaves:
+            textos = CATALOGO[secao].get(valor)
+            for campo, chave_texto in chaves[chave]:
+                if campo not in dados and textos is not None:
+                    expandidos[campo] = textos[chave_texto]
+    return expandidos
+
+
+def expandir_resultados(compactos: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverso de compactar_resultados (mesmas chaves, na mesma ordem)"""
+    resultados = {}
+    for chave, valor in compactos.items():
+        if chave == 'recomendacao_id':
+            resultados['recomendacoes'] = dict(CATALOGO['recomendacoes'][valor])
+            continue
+        if chave == 'analise_simetria':
+            valor = {campo: _frase(campo, codigo, compactos) for campo, codigo in valor.items()}
+        elif chave == 'mapa_corporal' and isinstance(valor, dict) and 'regioes' in valor:
+            valor = dict(valor)
+            valor['regioes'] = {
+                parte: _com_textos(regiao, _REGIAO, 'desenvolvimento')
+                for parte, regiao in valor['regioes'].items()
+            }
+            if valor.get('gordura_central'):
+                central = _com_textos(valor['gordura_central'], _CENTRAL_RCA, 'gordura_central_rca')
+                valor['gordura_central'] = _com_textos(central, _CENTRAL_RCQ, 'gordura_central_rcq')
+        elif chave == 'score_estetico_avancado' and isinstance(valor, dict):
+            score = {}
+            for campo, item in valor.items():
+                score[campo] = item
+                if campo == 'classificacao' and 'cor' not in valor and item in CATALOGO['score']:
+                    score['cor'] = CATALOGO['score'][item]
+            if 'pesos' not in score:
+                score['pesos'] = dict(PESOS_SCORE)
+            valor = score
+        resultados[chave] = valor
+        if chave in _DESCRICOES:
+            campo_texto, secao = _DESCRICOES[chave]
+            if campo_texto not in compactos and valor in CATALOGO[secao]:
+                resultados[campo_texto] = CATALOGO[secao][valor]
+    return resultados
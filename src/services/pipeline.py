@@ -0,0 +1,465 @@
+"""
+Pipeline de análise como grafo de dependências (DAG).
+
+Cada etapa declara as medidas que lê, as etapas de que depende e as chaves de
+resultado que produz. Com isso o grafo sabe em que ordem executar, quais
+etapas podem ser puladas e, quando uma medida muda, quais precisam rodar de
+novo sobre um conjunto de resultados anterior.
+"""
+
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from ..models.medidas import Medidas
+from ..models.usuario import Usuario
+from ..calculations import (
+    calcular_imc, classificar_imc,
+    calcular_gordura_us_navy, classificar_gordura,
+    calcular_rcq, calcular_rca, classificar_rcq, classificar_rca,
+    analisar_simetria
+)
+from ..calculations.gordura import calcular_massa_gorda, calcular_massa_magra
+from ..calculations.somatotipo import Somatotipo, classificar_somatotipo, obter_recomendacoes_somatotipo
+from ..calculations.proporcoes import calcular_pontuacao_estetica, montar_proporcoes
+from ..calculations.composicao_tecidual import calcular_composicao_tecidual
+from ..calculations.mapa_corporal import montar_mapa_corporal
+from ..calculations.score_estetico import calcular_score_estetico
+
+
+# Dados do usuário que as etapas podem ler, tratados como medidas
+SEXO = 'sexo'
+IDADE = 'idade'
+
+
+@dataclass(frozen=True)
+class Etapa:
+    """
+    Nó do pipeline.
+
+    Attributes:
+        nome: Identificador único da etapa
+        secao: Seção de resultados a que as saídas pertencem (ver SECOES)
+        campos: Campos de Medidas (ou SEXO/IDADE) lidos pela etapa
+        entradas: Etapas cujas saídas a etapa lê
+        saidas: Chaves de resultado que a etapa pode produzir
+        funcao: (medidas, usuario, resultados) -> novas chaves; `resultados`
+            já contém as saídas das entradas e não deve ser alterado
+    """
+    nome: str
+    secao: str
+    campos: Tuple[str, ...]
+    entradas: Tuple[str, ...]
+    saidas: Tuple[str, ...]
+    funcao: Callable[[Medidas, Usuario, Dict[str, Any]], Dict[str, Any]]
+
+
+class PipelineAnalise:
+    """
+    Executa etapas em ordem topológica (empates seguem a ordem de declaração).
+
+    Args:
+        etapas: Etapas do pipeline, em qualquer ordem
+
+    Raises:
+        ValueError: Se houver nomes ou saídas repetidos, entradas inexistentes ou ciclos
+    """
+
+    def __init__(self, etapas: Iterable[Etapa]):
+        etapas = list(etapas)
+        self.etapas = {}
+        donos = {}
+        for etapa in etapas:
+            if etapa.nome in self.etapas:
+                raise ValueError(f"Etapa repetida: {etapa.nome}")
+            self.etapas[etapa.nome] = etapa
+            for chave in etapa.saidas:
+                if chave in donos:
+                    raise ValueError(f"Saída {chave} produzida por {donos[chave]} e {etapa.nome}")
+                donos[chave] = etapa.nome
+
+        dependentes = {etapa.nome: [] for etapa in etapas}
+        for etapa in etapas:
+            for entrada in etapa.entradas:
+                if entrada not in self.etapas:
+                    raise ValueError(f"Etapa {etapa.nome} depende de etapa inexistente: {entrada}")
+                dependentes[entrada].append(etapa.nome)
+        self._dependentes = dependentes
+
+        # Kahn, escolhendo sempre a primeira etapa pronta na ordem de declaração
+        pendentes = {etapa.nome: len(set(etapa.entradas)) for etapa in etapas}
+        ordem = []
+        while pendentes:
+            prontas = [nome for nome, faltam in pendentes.items() if faltam == 0]
+            if not prontas:
+                raise ValueError(f"Ciclo entre as etapas: {', '.join(pendentes)}")
+            nome = prontas[0]
+            del pendentes[nome]
+            ordem.append(nome)
+            for dependente in set(dependentes[nome]):
+                pendentes[dependente] -= 1
+        self.ordem = tuple(ordem)
+
+        self.chaves = tuple(chave for nome in self.ordem for chave in self.etapas[nome].saidas)
+
+    def secoes(self) -> Dict[str, Tuple[str, ...]]:
+        """Seção -> chaves que produz, na ordem de cálculo"""
+        secoes = {}
+        for nome in self.ordem:
+            etapa = self.etapas[nome]
+            secoes[etapa.secao] = secoes.get(etapa.secao, ()) + etapa.saidas
+        return secoes
+
+    def dependencias_secoes(self) -> Dict[str, Tuple[str, ...]]:
+        """Seção -> outras seções cujas etapas ela lê"""
+        dependencias = {}
+        for nome in self.ordem:
+            etapa = self.etapas[nome]
+            for entrada in etapa.entradas:
+                secao = self.etapas[entrada].secao
+                atuais = dependencias.get(etapa.secao, ())
+                if secao != etapa.secao and secao not in atuais:
+                    dependencias[etapa.secao] = atuais + (secao,)
+        return dependencias
+
+    def etapas_das_secoes(self, secoes: Iterable[str]) -> FrozenSet[str]:
+        """Etapas que pertencem às seções dadas"""
+        secoes = set(secoes)
+        return frozenset(nome for nome, etapa in self.etapas.items() if etapa.secao in secoes)
+
+    def fechamento(self, nomes: Iterable[str]) -> FrozenSet[str]:
+        """Etapas dadas mais todas as de que elas dependem, direta ou indiretamente"""
+        resolvidas = set()
+        pendentes = list(nomes)
+        while pendentes:
+            nome = pendentes.pop()
+            if nome not in self.etapas:
+                raise ValueError(f"Etapa desconhecida: {nome}")
+            if nome not in resolvidas:
+                resolvidas.add(nome)
+                pendentes.extend(self.etapas[nome].entradas)
+        return frozenset(resolvidas)
+
+    def afetadas(self, campos: Iterable[str]) -> FrozenSet[str]:
+        """Etapas que leem algum dos campos dados, mais todas as que dependem delas"""
+        campos = set(campos)
+        afetadas = set()
+        pendentes = [nome for nome, etapa in self.etapas.items() if campos.intersection(etapa.campos)]
+        while pendentes:
+            nome = pendentes.pop()
+            if nome not in afetadas:
+                afetadas.add(nome)
+                pendentes.extend(self._dependentes[nome])
+        return frozenset(afetadas)
+
+    def executar(self, medidas: Medidas, usuario: Usuario,
+                 nomes: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Calcula do zero as etapas em `nomes` (None = todas).
+
+        As dependências não são incluídas automaticamente (ver fechamento):
+        uma etapa cujas entradas não rodaram vê as chaves delas ausentes.
+        """
+        selecionadas = self.etapas if nomes is None else frozenset(nomes)
+        resultados = {}
+        for nome in self.ordem:
+            if nome in selecionadas:
+                resultados.update(self.etapas[nome].funcao(medidas, usuario, resultados))
+        return resultados
+
+    def recalcular(self, medidas: Medidas, usuario: Usuario, anteriores: Dict[str, Any],
+                   campos_alterados: Iterable[str],
+                   nomes: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Atualiza resultados anteriores depois que alguns campos mudaram.
+
+        Só as etapas afetadas pelos campos (e presentes em `nomes`, None = todas)
+        rodam de novo; as demais chaves são reaproveitadas de `anteriores`, que
+        pode estar serializado (ver AnalisadorAvaliacao.serializar_resultados).
+
+        Args:
+            medidas: Medidas já com os valores novos
+            usuario: Usuário avaliado
+            anteriores: Resultados calculados com as medidas antigas
+            campos_alterados: Campos de Medidas (ou SEXO/IDADE) que mudaram
+            nomes: Etapas consideradas
+
+        Returns:
+            Novo dicionário de resultados, na mesma ordem de um cálculo completo
+        """
+        rodar = self.afetadas(campos_alterados)
+        if nomes is not None:
+            rodar = rodar & frozenset(nomes)
+
+        resultados = dict(anteriores)
+        for nome in self.ordem:
+            if nome in rodar:
+                etapa = self.etapas[nome]
+                for chave in etapa.saidas:
+                    resultados.pop(chave, None)
+                resultados.update(etapa.funcao(medidas, usuario, resultados))
+
+        ordenados = {chave: resultados[chave] for chave in self.chaves if chave in resultados}
+        for chave, valor in resultados.items():
+            ordenados.setdefault(chave, valor)
+        return ordenados
+
+
+# === ETAPAS DA ANÁLISE ===
+
+_CAMPOS_PROPORCOES = ('altura', 'cintura', 'peitoral', 'ombros', 'braco_relaxado',
+                      'braco_contraido', 'coxa', 'panturrilha')
+_CAMPOS_MAPA = ('pescoco', 'ombros', 'peitoral', 'cintura', 'abdomen', 'quadril',
+                'braco_relaxado', 'braco_contraido', 'antebraco', 'coxa', 'panturrilha')
+
+
+def _medidas_score(medidas: Medidas) -> Dict[str, Optional[float]]:
+    return {'cintura': medidas.cintura, 'ombros': medidas.ombros, 'peitoral': medidas.peitoral}
+
+
+def _proporcoes_somatotipo(prop: Any) -> Dict[str, float]:
+    # Proporções lidas pelo somatotipo; `prop` é Proporcoes ou já serializado (dict)
+    valor = prop.get if isinstance(prop, dict) else partial(getattr, prop)
+    proporcoes = {}
+    for chave in ('ombro_cintura', 'peitoral_cintura'):
+        if valor(chave) is not None:
+            proporcoes[chave] = valor(chave)
+    return proporcoes
+
+
+def _imc(medidas: Medidas, usuario: Usuario, resultados: Dict[str, Any]) -> Dict[str, Any]:
+    imc = calcular_imc(medidas.peso, medidas.altura)
+    classificacao_imc, descricao_imc = classificar_imc(imc)
+    return {'imc': imc, 'imc_classificacao': classificacao_imc, 'imc_descricao': descricao_imc}
+
+
+def _gordura(medidas: Medidas, usuario: Usuario, resultados: Dict[str, Any]) -> Dict[str, Any]:
+    sexo_str = usuario.sexo.value
+    if not medidas.tem_medidas_minimas_us_navy(sexo_str):
+        return {}
+    try:
+        percentual_gordura = calcular_gordura_us_navy(
+            altura_cm=medidas.altura,
+            cintura_cm=medidas.cintura,
+            pescoco_cm=medidas.pescoco,
+            sexo=sexo_str,
+            quadril_cm=medidas.quadril
+        )
+    except ValueError as e:
+        return {'erro_gordura': str(e)}
+    return {
+        'percentual_gordura': percentual_gordura,
+        'classificacao_gordura': classificar_gordura(percentual_gordura, sexo_str, usuario.idade),
+        'massa_gorda_kg': calcular_massa_gorda(medidas.peso, percentual_gordura),
+        'massa_magra_kg': calcular_massa_magra(medidas.peso, percentual_gordura)
+    }
+
+
+def _rcq(medidas: Medidas, usuario: Usuario, resultados: Dict[str, Any]) -> Dict[str, Any]:
+    if not (medidas.cintura and medidas.quadril):
+        return {}
+    rcq = calcular_rcq(medidas.cintura, medidas.quadril)
+    classificacao_rcq, desc_rcq = classificar_rcq(rcq, usuario.sexo.value)
+    return {'rcq': rcq, 'rcq_classificacao': classificacao_rcq, 'rcq_descricao': desc_rcq}
+
+
+def _rca(medidas: Medidas, usuario: Usuario, resultados: Dict[str, Any]) -> Dict[str, Any]:
+    if not medidas.cintura:
+        return {}
+    rca = calcular_rca(medidas.cintura, medidas.altura)
+    classificacao_rca, desc_rca = classificar_rca(rca)
+    return {'rca': rca, 'rca_classificacao': classificacao_rca, 'rca_descricao': desc_rca}
+
+
+def _proporcoes(medidas: Medidas, usuario: Usuario, resultados: Dict[str, Any]) -> Dict[str, Any]:
+    if not medidas.tem_medidas_proporcao():
+        return {}
+    proporcoes = montar_proporcoes(partial(getattr, medidas))
+    pontuacao, classificacao_est = calcular_pontuacao_estetica(proporcoes)
+    return {
+        'proporcoes': proporcoes,
+        'analise_simetria': analisar_simetria(proporcoes),
+        'pontuacao_estetica': pontuacao,
+        'classificacao_estetica': classificacao_est
+    }
+
+
+def _composicao(medidas: Medidas, usuario: Usuario, resultados: Dict[str, Any]) -> Dict[str, Any]:
+    if 'percentual_gordura' not in resultados:
+        return {}
+    return {'composicao_tecidual': calcular_composicao_tecidual(
+        peso=medidas.peso,
+        percentual_gordura=resultados['percentual_gordura'],
+        sexo=usuario.sexo.value
+    )}
+
+
+def _mapa(medidas: Medidas, usuario: Usuario, resultados: Dict[str, Any]) -> Dict[str, Any]:
+    if not medidas.cintura:
+        return {}
+    return {'mapa_corporal': montar_mapa_corporal(partial(getattr, medidas), medidas.altura, usuario.sexo.value)}
+
+
+def _score(medidas: Medidas, usuario: Usuario, resultados: Dict[str, Any]) -> Dict[str, Any]:
+    if 'mapa_corporal' not in resultados or 'percentual_gordura' not in resultados:
+        return {}
+    return {'score_estetico_avancado': calcular_score_estetico(
+        percentual_gordura=resultados['percentual_gordura'],
+        medidas=_medidas_score(medidas),
+        altura=medidas.altura,
+        sexo=usuario.sexo.value,
+        mapa_corporal=resultados['mapa_corporal']
+    )}
+
+
+def _somatotipo(medidas: Medidas, usuario: Usuario, resultados: Dict[str, Any]) -> Dict[str, Any]:
+    # Precisa de RCQ, RCA e IMC
+    if 'rcq' not in resultados or 'rca' not in resultados:
+        return {}
+    proporcoes_dict = {}
+    if 'proporcoes' in resultados:
+        proporcoes_dict = _proporcoes_somatotipo(resultados['proporcoes'])
+    somatotipo, desc_somato, scores_somato = classificar_somatotipo(
+        rcq=resultados['rcq'],
+        rca=resultados['rca'],
+        imc=resultados['imc'],
+        proporcoes=proporcoes_dict
+    )
+    return {
+        'somatotipo': somatotipo.value,
+        'somatotipo_descricao': desc_somato,
+        'somatotipo_scores': scores_somato
+    }
+
+
+def _recomendacoes(medidas: Medidas, usuario: Usuario, resultados: Dict[str, Any]) -> Dict[str, Any]:
+    if 'somatotipo' not in resultados:
+        return {}
+    return {'recomendacoes': obter_recomendacoes_somatotipo(Somatotipo(resultados['somatotipo']))}
+
+
+ETAPAS: List[Etapa] = [
+    Etapa('imc', 'basico', ('peso', 'altura'), (),
+          ('imc', 'imc_classificacao', 'imc_descricao'), _imc),
+    Etapa('gordura', 'gordura', ('altura', 'cintura', 'pescoco', 'quadril', 'peso', SEXO, IDADE), (),
+          ('percentual_gordura', 'classificacao_gordura', 'massa_gorda_kg', 'massa_magra_kg',
+           'erro_gordura'), _gordura),
+    Etapa('rcq', 'indices', ('cintura', 'quadril', SEXO), (),
+          ('rcq', 'rcq_classificacao', 'rcq_descricao'), _rcq),
+    Etapa('rca', 'indices', ('cintura', 'altura'), (),
+          ('rca', 'rca_classificacao', 'rca_descricao'), _rca),
+    Etapa('proporcoes', 'proporcoes', _CAMPOS_PROPORCOES, (),
+          ('proporcoes', 'analise_simetria', 'pontuacao_estetica', 'classificacao_estetica'), _proporcoes),
+    Etapa('composicao_tecidual', 'gordura', ('peso', SEXO), ('gordura',),
+          ('composicao_tecidual',), _composicao),
+    Etapa('mapa_corporal', 'mapa', _CAMPOS_MAPA + ('altura', SEXO), (),
+          ('mapa_corporal',), _mapa),
+    Etapa('score_estetico', 'score', _CAMPOS_MAPA + ('altura', SEXO), ('gordura', 'mapa_corporal'),
+          ('score_estetico_avancado',), _score),
+    Etapa('somatotipo', 'somatotipo', (), ('imc', 'rcq', 'rca', 'proporcoes'),
+          ('somatotipo', 'somatotipo_descricao', 'somatotipo_scores'), _somatotipo),
+    Etapa('recomendacoes', 'recomendacoes', (), ('somatotipo',),
+          ('recomendacoes',), _recomendacoes),
+]
+
+PIPELINE = PipelineAnalise(ETAPAS)
+
+
+# === CAMINHO RÁPIDO ===
+
+def calcular_completo(medidas: Medidas, usuario: Usuario) -> Dict[str, Any]:
+    """
+    Todas as etapas fundidas em uma só função.
+
+    Produz exatamente o mesmo que PIPELINE.executar(medidas, usuario), mas
+    sem a contabilidade do grafo nem os dicionários de cada etapa: os valores
+    passam por variáveis locais e as chaves entram direto no resultado, já na
+    ordem canônica. Usado quando todas as seções são pedidas; qualquer
+    mudança nas etapas acima precisa ser refletida aqui (benchmark_analisador.py
+    confere a igualdade).
+    """
+    sexo = usuario.sexo.value
+    medida = partial(getattr, medidas)
+    altura = medidas.altura
+    cintura = medidas.cintura
+    r = {}
+
+    # imc
+    imc = calcular_imc(medidas.peso, altura)
+    r['imc'] = imc
+    r['imc_classificacao'], r['imc_descricao'] = classificar_imc(imc)
+
+    # gordura
+    percentual_gordura = None
+    if medidas.tem_medidas_minimas_us_navy(sexo):
+        try:
+            percentual_gordura = calcular_gordura_us_navy(
+                altura_cm=altura,
+                cintura_cm=cintura,
+                pescoco_cm=medidas.pescoco,
+                sexo=sexo,
+                quadril_cm=medidas.quadril
+            )
+        except ValueError as e:
+            r['erro_gordura'] = str(e)
+        else:
+            r['percentual_gordura'] = percentual_gordura
+            r['classificacao_gordura'] = classificar_gordura(percentual_gordura, sexo, usuario.idade)
+            r['massa_gorda_kg'] = calcular_massa_gorda(medidas.peso, percentual_gordura)
+            r['massa_magra_kg'] = calcular_massa_magra(medidas.peso, percentual_gordura)
+
+    # rcq e rca
+    tem_rcq = bool(cintura and medidas.quadril)
+    if tem_rcq:
+        rcq = calcular_rcq(cintura, medidas.quadril)
+        r['rcq'] = rcq
+        r['rcq_classificacao'], r['rcq_descricao'] = classificar_rcq(rcq, sexo)
+    if cintura:
+        rca = calcular_rca(cintura, altura)
+        r['rca'] = rca
+        r['rca_classificacao'], r['rca_descricao'] = classificar_rca(rca)
+
+    # proporcoes
+    proporcoes = None
+    if medidas.tem_medidas_proporcao():
+        proporcoes = montar_proporcoes(medida)
+        pontuacao, classificacao_est = calcular_pontuacao_estetica(proporcoes)
+        r['proporcoes'] = proporcoes
+        r['analise_simetria'] = analisar_simetria(proporcoes)
+        r['pontuacao_estetica'] = pontuacao
+        r['classificacao_estetica'] = classificacao_est
+
+    # composicao_tecidual
+    if percentual_gordura is not None:
+        r['composicao_tecidual'] = calcular_composicao_tecidual(
+            peso=medidas.peso,
+            percentual_gordura=percentual_gordura,
+            sexo=sexo
+        )
+
+    # mapa_corporal e score_estetico
+    if cintura:
+        mapa = montar_mapa_corporal(medida, altura, sexo)
+        r['mapa_corporal'] = mapa
+        if percentual_gordura is not None:
+            r['score_estetico_avancado'] = calcular_score_estetico(
+                percentual_gordura=percentual_gordura,
+                medidas=_medidas_score(medidas),
+                altura=altura,
+                sexo=sexo,
+                mapa_corporal=mapa
+            )
+
+    # somatotipo e recomendacoes
+    if tem_rcq:
+        somatotipo, desc_somato, scores_somato = classificar_somatotipo(
+            rcq=rcq,
+            rca=rca,
+            imc=imc,
+            proporcoes=_proporcoes_somatotipo(proporcoes) if proporcoes is not None else {}
+        )
+        r['somatotipo'] = somatotipo.value
+        r['somatotipo_descricao'] = desc_somato
+        r['somatotipo_scores'] = scores_somato
+        r['recomendacoes'] = obter_recomendacoes_somatotipo(somatotipo)
+
+    return r
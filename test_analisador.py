@@ -0,0 +1,117 @@
+"""
+Teste do processamento vetorizado (AnalisadorAvaliacao.processar_lote) contra o escalar
+"""
+import os
+import random
+import sys
+from datetime import date
+from dataclasses import fields
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.models.avaliacao import Avaliacao
+from src.models.medidas import Medidas
+from src.models.usuario import Usuario, Sexo
+from src.services.analisador import AnalisadorAvaliacao
+
+# Faixa plausível de cada medida obrigatória (cm, kg) e circunferência opcional (cm)
+OBRIGATORIAS = {'altura': (145, 205), 'peso': (40, 140)}
+FAIXAS = {
+    'pescoco': (28, 50), 'peitoral': (75, 130), 'cintura': (55, 130), 'abdomen': (60, 135),
+    'quadril': (75, 140), 'braco_relaxado': (22, 48), 'braco_contraido': (24, 52),
+    'coxa': (40, 75), 'panturrilha': (28, 48), 'antebraco': (20, 38), 'ombros': (90, 145),
+    'punho': (14, 21), 'joelho': (30, 45), 'tornozelo': (18, 28),
+}
+
+
+def valor_aleatorio(sorteio: random.Random, campo: str) -> float:
+    minimo, maximo = OBRIGATORIAS.get(campo) or FAIXAS[campo]
+    return round(sorteio.uniform(minimo, maximo), 1)
+
+
+def medidas_aleatorias(sorteio: random.Random) -> dict:
+    """Medidas com falhas: opcionais ausentes e, às vezes, cintura/pescoço que invalidam a gordura"""
+    medidas = {campo: valor_aleatorio(sorteio, campo) for campo in OBRIGATORIAS}
+    for campo in FAIXAS:
+        if sorteio.random() < 0.7:
+            medidas[campo] = valor_aleatorio(sorteio, campo)
+    if sorteio.random() < 0.15:
+        # US Navy sem solução: cintura (+ quadril) não maior que o pescoço
+        medidas['pescoco'] = round(sorteio.uniform(40, 50), 1)
+        medidas['cintura'] = round(sorteio.uniform(30, medidas['pescoco']), 1)
+        medidas['quadril'] = round(sorteio.uniform(1, 5), 1)
+    return medidas
+
+
+def test_processar_lote_igual_ao_escalar():
+    """Cada resultado do lote é o serializado de processar_avaliacao da mesma avaliação"""
+    sorteio = random.Random(2024)
+    hoje = date.today()
+    avaliacoes = []
+    for _ in range(300):
+        sexo = sorteio.choice([Sexo.MASCULINO, Sexo.FEMININO])
+        idade = sorteio.randint(18, 80)
+        avaliacoes.append((medidas_aleatorias(sorteio), sexo, idade))
+
+    campos = [campo.name for campo in fields(Medidas)]
+    colunas = {campo: [medidas.get(campo) for medidas, _, _ in avaliacoes] for campo in campos}
+    lote = AnalisadorAvaliacao.processar_lote(
+        colunas, [sexo for _, sexo, _ in avaliacoes], [idade for _, _, idade in avaliacoes]
+    )
+
+    assert len(lote) == len(avaliacoes)
+    for (medidas, sexo, idade), resultado in zip(avaliacoes, lote):
+        usuario = Usuario(nome='Teste', sexo=sexo, data_nascimento=date(hoje.year - idade, 1, 1))
+        assert usuario.idade == idade
+        avaliacao = Avaliacao(data=hoje, medidas=Medidas(**medidas))
+        esperado = AnalisadorAvaliacao.serializar_resultados(
+            AnalisadorAvaliacao.processar_avaliacao(avaliacao, usuario)
+        )
+        assert resultado == esperado, medidas
+
+    # A amostra passa pelos casos difíceis, nos dois sexos
+    for chave in ('erro_gordura', 'percentual_gordura'):
+        assert {sexo for (_, sexo, _), resultado in zip(avaliacoes, lote) if chave in resultado} \
+            == {Sexo.MASCULINO, Sexo.FEMININO}
+    assert any('rcq' not in resultado for resultado in lote)
+
+
+
+def test_recalcular_igual_ao_calculo_completo():
+    """Depois de corrigir 1 a 3 medidas, recalcular_avaliacao dá o mesmo que processar_avaliacao"""
+    sorteio = random.Random(2025)
+    hoje = date.today()
+    campos = [campo.name for campo in fields(Medidas)]
+    for _ in range(300):
+        usuario = Usuario(nome='Teste', sexo=sorteio.choice([Sexo.MASCULINO, Sexo.FEMININO]),
+                          data_nascimento=date(hoje.year - sorteio.randint(18, 80), 1, 1))
+        medidas = medidas_aleatorias(sorteio)
+        anteriores = AnalisadorAvaliacao.serializar_resultados(
+            AnalisadorAvaliacao.processar_avaliacao(Avaliacao(data=hoje, medidas=Medidas(**medidas)), usuario)
+        )
+
+        # Correções: valor novo ou, nas opcionais, medida apagada
+        alterados = sorteio.sample(campos, sorteio.randint(1, 3))
+        novas = dict(medidas)
+        for campo in alterados:
+            if campo in FAIXAS and sorteio.random() < 0.2:
+                novas[campo] = None
+            else:
+                novas[campo] = valor_aleatorio(sorteio, campo)
+
+        avaliacao = Avaliacao(data=hoje, medidas=Medidas(**novas))
+        recalculados = AnalisadorAvaliacao.serializar_resultados(
+            AnalisadorAvaliacao.recalcular_avaliacao(avaliacao, usuario, anteriores, alterados)
+        )
+        esperado = AnalisadorAvaliacao.serializar_resultados(
+            AnalisadorAvaliacao.processar_avaliacao(Avaliacao(data=hoje, medidas=Medidas(**novas)), usuario)
+        )
+        assert recalculados == esperado, (medidas, novas)
+
+
+if __name__ == '__main__':
+    test_processar_lote_igual_ao_escalar()
+    print("✓ Lote igual ao cálculo escalar")
+    test_recalcular_igual_ao_calculo_completo()
+    print("✓ Recálculo parcial igual ao completo")
@@ -0,0 +1,256 @@
+"""
+Testes da API (web/app.py) com o cliente de teste do Flask, nos modos JSON e SQLite
+"""
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from web import app as app_web
+from web import db_sqlite
+from web.armazenamento import ArmazenamentoJSON
+from web.consulta_admin import IndiceAdmin
+from web.coortes import CoortesJSON
+from web.estatisticas import EstatisticasJSON
+from web.importacao import TAMANHO_LOTE
+from web.quantis import QuantisJSON
+
+MODOS = ('json', 'sqlite')
+
+# Estado do módulo trocado por servidor()
+_ATRIBUTOS_APP = ('USE_DATABASE', 'USE_SQLITE', 'TIPO_BANCO', 'db', 'armazenamento',
+                  'estatisticas_json', 'coortes_json', 'quantis_json', 'indice_admin')
+_ATRIBUTOS_SQLITE = ('DATABASE_PATH', '_pool', 'agendar_quantis')
+_AUSENTE = object()
+
+MEDIDAS = {'altura': 165, 'peso': 62, 'pescoco': 32, 'cintura': 70, 'quadril': 98}
+
+
+@contextmanager
+def servidor(diretorio, modo):
+    """O app com dados novos em `diretorio`, no modo 'json' ou 'sqlite'"""
+    originais = {(modulo, nome): getattr(modulo, nome, _AUSENTE)
+                 for modulo, nomes in ((app_web, _ATRIBUTOS_APP), (db_sqlite, _ATRIBUTOS_SQLITE))
+                 for nome in nomes}
+    try:
+        if modo == 'sqlite':
+            db_sqlite.DATABASE_PATH = str(diretorio / 'medidas.db')
+            db_sqlite._pool = None
+            # Esboços dos percentis incorporados na hora, sem a thread de fundo
+            db_sqlite.agendar_quantis = db_sqlite.incorporar_quantis
+            app_web.USE_DATABASE = app_web.USE_SQLITE = True
+            app_web.TIPO_BANCO = 'SQLite'
+            app_web.db = db_sqlite
+        else:
+            app_web.USE_DATABASE = False
+            app_web.armazenamento = ArmazenamentoJSON(str(diretorio / 'usuarios.json'))
+            for nome, classe in (('estatisticas_json', EstatisticasJSON), ('coortes_json', CoortesJSON),
+                                 ('quantis_json', QuantisJSON), ('indice_admin', IndiceAdmin)):
+                observador = classe()
+                app_web.armazenamento.observar(observador)
+                setattr(app_web, nome, observador)
+        yield app_web.app
+    finally:
+        if modo == 'sqlite' and db_sqlite._pool is not None:
+            db_sqlite._pool.fechar_todas()
+        for (modulo, nome), valor in originais.items():
+            if valor is _AUSENTE:
+                if hasattr(modulo, nome):
+                    delattr(modulo, nome)
+            else:
+                setattr(modulo, nome, valor)
+
+
+def entrar(app, nome, sexo='F'):
+    """Cliente com conta, sessão e perfil completos"""
+    cliente = app.test_client()
+    assert cliente.post('/api/registro', json={'nome': nome, 'senha': 'senha123'}).status_code == 200
+    assert cliente.post('/api/login', json={'nome': nome, 'senha': 'senha123'}).status_code == 200
+    resposta = cliente.post('/api/usuario', json={'sexo': sexo, 'data_nascimento': '1990-05-10', 'altura': 165})
+    assert resposta.status_code == 200
+    return cliente
+
+
+def criar_avaliacao(cliente, data='2024-03-01', **medidas):
+    resposta = cliente.post('/api/avaliacoes', json={'data': data, 'medidas': {**MEDIDAS, **medidas}})
+    assert resposta.status_code == 200
+    return resposta.get_json()['id']
+
+
+def listar(cliente):
+    resposta = cliente.get('/api/avaliacoes')
+    assert resposta.status_code == 200
+    return resposta.get_json(), resposta.headers['X-Token-Sincronizacao']
+
+
+# ===== PATCH /api/avaliacoes/<id> =====
+
+def test_patch_de_outra_conta(tmp_path):
+    """A avaliação de outra conta não é encontrada (nem alterada)"""
+    for modo in MODOS:
+        with servidor(tmp_path / modo, modo) as app:
+            ana = entrar(app, 'ana')
+            avaliacao_id = criar_avaliacao(ana)
+            bia = entrar(app, 'bia')
+
+            resposta = bia.patch(f'/api/avaliacoes/{avaliacao_id}', json={'medidas': {'peso': 70}})
+            assert resposta.status_code == 404, modo
+            assert bia.patch('/api/avaliacoes/999999', json={'medidas': {'peso': 70}}).status_code == 404
+            assert float(listar(ana)[0][0]['medidas']['peso']) == 62
+
+
+def test_patch_altura(tmp_path):
+    """No banco a altura é do perfil (400); no JSON cada avaliação guarda a sua"""
+    with servidor(tmp_path / 'sqlite', 'sqlite') as app:
+        cliente = entrar(app, 'ana')
+        avaliacao_id = criar_avaliacao(cliente)
+        resposta = cliente.patch(f'/api/avaliacoes/{avaliacao_id}', json={'medidas': {'altura': 170}})
+        assert resposta.status_code == 400
+
+    with servidor(tmp_path / 'json', 'json') as app:
+        cliente = entrar(app, 'ana')
+        avaliacao_id = criar_avaliacao(cliente)
+        resposta = cliente.patch(f'/api/avaliacoes/{avaliacao_id}', json={'medidas': {'altura': 170}})
+        assert resposta.status_code == 200
+        assert resposta.get_json()['medidas'] == {'altura': 170}
+        assert 'imc' in resposta.get_json()['resultados']
+
+
+def test_patch_sem_mudanca(tmp_path):
+    """Medidas iguais às salvas: delta vazio, sem gravar nem mudar a versão"""
+    for modo in MODOS:
+        with servidor(tmp_path / modo, modo) as app:
+            cliente = entrar(app, 'ana')
+            avaliacao_id = criar_avaliacao(cliente)
+            antes, token = listar(cliente)
+
+            resposta = cliente.patch(f'/api/avaliacoes/{avaliacao_id}',
+                                     json={'medidas': {'peso': 62, 'cintura': '70'}})
+            assert resposta.status_code == 200, modo
+            assert resposta.get_json() == {'id': avaliacao_id, 'medidas': {}, 'resultados': {}, 'removidos': []}
+            depois, token_depois = listar(cliente)
+            assert token_depois == token and depois == antes
+
+
+def test_patch_removidos(tmp_path):
+    """Apagar o quadril (mulher) remove a gordura e a RCQ dos resultados"""
+    for modo in MODOS:
+        with servidor(tmp_path / modo, modo) as app:
+            cliente = entrar(app, 'ana')
+            avaliacao_id = criar_avaliacao(cliente)
+            assert 'percentual_gordura' in listar(cliente)[0][0]['resultados']
+
+            resposta = cliente.patch(f'/api/avaliacoes/{avaliacao_id}', json={'medidas': {'quadril': None}})
+            assert resposta.status_code == 200, modo
+            delta = resposta.get_json()
+            assert {'percentual_gordura', 'massa_magra_kg', 'rcq'} <= set(delta['removidos'])
+            resultados = listar(cliente)[0][0]['resultados']
+            assert not set(delta['removidos']) & set(resultados)
+
+
+def test_patch_guarda_como_recebido(tmp_path):
+    """No JSON a medida corrigida é gravada como chegou, como no POST"""
+    with servidor(tmp_path, 'json') as app:
+        cliente = entrar(app, 'ana')
+        avaliacao_id = criar_avaliacao(cliente)
+        resposta = cliente.patch(f'/api/avaliacoes/{avaliacao_id}', json={'medidas': {'peso': 64}})
+        assert resposta.get_json()['medidas'] == {'peso': 64}
+        medidas = listar(cliente)[0][0]['medidas']
+        assert medidas['peso'] == 64 and isinstance(medidas['peso'], int)
+        assert isinstance(medidas['cintura'], int)
+
+
+# ===== ETag de GET /api/avaliacoes =====
+
+def revalidar(cliente, etag):
+    """Status e ETag de um GET da lista condicionado à ETag que o cliente tem"""
+    resposta = cliente.get('/api/avaliacoes', headers={'If-None-Match': etag})
+    assert resposta.status_code in (200, 304)
+    assert resposta.headers['ETag']
+    return resposta.status_code, resposta.headers['ETag']
+
+
+def test_etag_da_lista(tmp_path):
+    """304 enquanto nada muda; 200 (e ETag nova) após POST, PATCH, DELETE e mudança de perfil"""
+    for modo in MODOS:
+        with servidor(tmp_path / modo, modo) as app:
+            cliente = entrar(app, 'ana')
+            avaliacao_id = criar_avaliacao(cliente)
+            resposta = cliente.get('/api/avaliacoes')
+            etag = resposta.headers['ETag']
+            assert revalidar(cliente, etag) == (304, etag), modo
+
+            alteracoes = (
+                lambda: criar_avaliacao(cliente, data='2024-04-01', peso=60),
+                lambda: cliente.patch(f'/api/avaliacoes/{avaliacao_id}', json={'medidas': {'cintura': 72}}),
+                lambda: cliente.delete(f'/api/avaliacoes/{avaliacao_id}'),
+                lambda: cliente.post('/api/usuario', json={'sexo': 'M', 'data_nascimento': '1990-05-10',
+                                                           'altura': 165}),
+            )
+            for alterar in alteracoes:
+                alterar()
+                status, nova = revalidar(cliente, etag)
+                assert status == 200 and nova != etag, modo
+                etag = nova
+                assert revalidar(cliente, etag) == (304, etag), modo
+
+            # Uma ETag antiga não vale mais
+            assert revalidar(cliente, resposta.headers['ETag'])[0] == 200
+
+
+
+# ===== POST /api/avaliacoes/import =====
+
+def test_importacao_uma_transacao_por_lote(tmp_path):
+    """No JSON cada lote é uma transação do journal; a linha ruim só entra no relatório"""
+    with servidor(tmp_path, 'json') as app:
+        armazenamento = app_web.armazenamento
+        # Sem compactação no meio: o journal guarda todas as transações
+        armazenamento.limite_compactacao = float('inf')
+        cliente = entrar(app, 'ana')
+        validas = 2 * TAMANHO_LOTE + 100
+        linhas = ['data,peso,pescoco,cintura,quadril']
+        linhas += [f"{date(2000, 1, 1) + timedelta(days=i)},{60 + i % 20},32,70,98" for i in range(validas)]
+        # Linha ruim no meio do segundo lote (linha TAMANHO_LOTE + 11 do arquivo)
+        linhas.insert(TAMANHO_LOTE + 10, '2024-13-01,60,32,70,98')
+        with open(armazenamento.arquivo_journal, 'rb') as f:
+            inicio = len(f.readlines())
+
+        resposta = cliente.post('/api/avaliacoes/import', data='\n'.join(linhas) + '\n', content_type='text/csv')
+        assert resposta.status_code == 200
+        relatorio = resposta.get_json()
+        assert relatorio['importadas'] == validas and relatorio['rejeitadas'] == 1
+        assert [erro['linha'] for erro in relatorio['erros']] == [TAMANHO_LOTE + 11]
+
+        with open(armazenamento.arquivo_journal, 'rb') as f:
+            transacoes = [json.loads(linha) for linha in f.readlines()[inicio:]]
+        estendidas = [operacoes[0][2] for operacoes in transacoes]
+        assert [len(itens) for itens in estendidas] == [TAMANHO_LOTE, TAMANHO_LOTE, 100]
+        # Cada transação também versiona as avaliações do seu lote
+        assert all(len(operacoes) == len(itens) + 1 for operacoes, itens in zip(transacoes, estendidas))
+
+        avaliacoes = app_web.carregar_dados()['avaliacoes']['1']
+        assert len(avaliacoes) == validas
+        assert len({av['id'] for av in avaliacoes}) == validas
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    for teste, descricao in (
+        (test_patch_de_outra_conta, "PATCH de outra conta: 404"),
+        (test_patch_altura, "PATCH da altura"),
+        (test_patch_sem_mudanca, "PATCH sem mudança"),
+        (test_patch_removidos, "PATCH com resultados removidos"),
+        (test_patch_guarda_como_recebido, "PATCH grava como recebido"),
+        (test_etag_da_lista, "ETag da lista de avaliações"),
+        (test_importacao_uma_transacao_por_lote, "Importação: uma transação por lote"),
+    ):
+        with tempfile.TemporaryDirectory() as diretorio:
+            teste(Path(diretorio))
+        print(f"✓ {descricao}")
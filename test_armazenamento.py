@@ -0,0 +1,77 @@
+"""
+Teste do journal do armazenamento JSON (web/armazenamento.py)
+"""
+import os
+import sys
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from web.armazenamento import ArmazenamentoJSON
+
+
+def test_linha_interrompida_no_fim_do_journal(tmp_path):
+    """Uma escrita interrompida é ignorada na leitura e descartada na próxima escrita"""
+    arquivo = str(tmp_path / 'usuarios.json')
+    armazenamento = ArmazenamentoJSON(arquivo)
+    armazenamento.registrar(('set', ['contas', 'ana'], {'id': 1}))
+
+    # Queda no meio da gravação: a última linha fica sem o '\n'
+    with open(armazenamento.arquivo_journal, 'ab') as f:
+        f.write(b'[["set",["contas","bia"],{"id"')
+
+    outro = ArmazenamentoJSON(arquivo)
+    assert list(outro.carregar()['contas']) == ['ana']
+
+    outro.registrar(('set', ['contas', 'caio'], {'id': 3}))
+    with open(armazenamento.arquivo_journal, 'rb') as f:
+        assert f.read().count(b'bia') == 0
+
+    # Um processo novo reproduz o journal inteiro sem erro
+    assert sorted(ArmazenamentoJSON(arquivo).carregar()['contas']) == ['ana', 'caio']
+
+
+def test_queda_durante_a_compactacao(tmp_path):
+    """Uma queda entre a troca do snapshot e o journal novo não reaplica o journal antigo"""
+    arquivo = str(tmp_path / 'usuarios.json')
+    armazenamento = ArmazenamentoJSON(arquivo)
+    armazenamento.registrar(('inserir', ['avaliacoes', '1'], {'id': 'a'}))
+    armazenamento.registrar(('versionar', ['sincronizacao', '1'], 'a'))
+
+    def queda(geracao):
+        raise OSError('queda simulada')
+
+    armazenamento._novo_journal = queda
+    try:
+        armazenamento.compactar()
+    except OSError:
+        pass
+
+    outro = ArmazenamentoJSON(arquivo)
+    dados = outro.carregar()
+    assert dados['avaliacoes']['1'] == [{'id': 'a'}]
+    assert dados['sincronizacao']['1'] == {'versao': 1, 'itens': {'a': 1}}
+
+    # A próxima escrita começa um journal novo, que volta a ser reproduzido
+    outro.registrar(('inserir', ['avaliacoes', '1'], {'id': 'b'}))
+    dados = ArmazenamentoJSON(arquivo).carregar()
+    assert [item['id'] for item in dados['avaliacoes']['1']] == ['b', 'a']
+    assert dados['sincronizacao']['1']['versao'] == 1
+    assert '_geracao_journal' not in dados
+
+    outro.compactar()
+    outro.registrar(('set', ['contas', 'ana'], {'id': 1}))
+    dados = ArmazenamentoJSON(arquivo).carregar()
+    assert len(dados['avaliacoes']['1']) == 2 and list(dados['contas']) == ['ana']
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        test_linha_interrompida_no_fim_do_journal(Path(diretorio))
+    print("✓ Journal com linha interrompida")
+    with tempfile.TemporaryDirectory() as diretorio:
+        test_queda_durante_a_compactacao(Path(diretorio))
+    print("✓ Queda durante a compactação")
@@ -0,0 +1,87 @@
+"""
+Teste da importação em massa (web/importacao.py): relatório por linha e lotes
+"""
+import io
+import json
+import os
+import sys
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from web.importacao import importar, ler_registros
+
+
+def importar_texto(texto, formato, tamanho_lote):
+    """Relatório e lotes gravados (tamanho de cada um) da importação do texto"""
+    lotes = []
+    relatorio = importar(ler_registros(io.BytesIO(texto.encode('utf-8')), formato), 'F', 35,
+                         lambda lote: lotes.append(list(lote)), altura_perfil=165.0,
+                         tamanho_lote=tamanho_lote)
+    return relatorio, lotes
+
+
+def linha_csv(dia, peso=60):
+    return f"2024-01-{dia:02d};{peso};32;70;98"
+
+
+def test_csv_com_linha_ruim_no_meio_do_lote():
+    """A linha inválida entra no relatório (com o número da linha) e não quebra o lote"""
+    linhas = ['data;peso;pescoco;cintura;quadril']
+    linhas += [linha_csv(dia) for dia in range(1, 5)]
+    linhas += ['2024-01-05;abc;32;70;98']          # linha 6: peso inválido, no meio do 2º lote
+    linhas += ['31/02/2024;60;32;70;98']           # linha 7: data inexistente
+    linhas += [linha_csv(dia) for dia in range(8, 11)]
+    linhas += ['2024-01-11;60;32;70;98;1']         # linha 11: coluna a mais
+    relatorio, lotes = importar_texto('\n'.join(linhas) + '\n', 'csv', 3)
+
+    assert relatorio['importadas'] == 7 and relatorio['rejeitadas'] == 3
+    assert [erro['linha'] for erro in relatorio['erros']] == [6, 7, 11]
+    assert 'peso' in relatorio['erros'][0]['erro']
+    assert 'data' in relatorio['erros'][1]['erro']
+    # Lotes cheios na ordem do arquivo, só com as válidas; o resto no último
+    assert [len(lote) for lote in lotes] == [3, 3, 1]
+    datas = [av['data'] for lote in lotes for av in lote]
+    assert datas == [f"2024-01-{dia:02d}" for dia in (1, 2, 3, 4, 8, 9, 10)]
+    assert all('imc' in av['resultados'] and av['medidas']['altura'] == 165.0 for lote in lotes for av in lote)
+
+
+def test_ndjson_com_linha_ruim_no_meio_do_lote():
+    """JSON inválido, linha que não é objeto e medida inválida: relatório por linha"""
+    registros = [json.dumps({'data': f'2024-02-{dia:02d}', 'medidas': {'peso': 60, 'cintura': 70}})
+                 for dia in range(1, 4)]
+    registros.insert(1, '{"data": "2024-02-10", "peso": ')     # linha 2
+    registros.insert(2, '[1, 2]')                              # linha 3
+    registros.insert(3, '')                                    # linha 4: em branco, ignorada
+    registros.append(json.dumps({'data': '2024-02-11', 'peso': -5}))  # linha 7
+    registros.append(json.dumps({'data': '2024-02-12', 'peso': '61,5'}))
+    relatorio, lotes = importar_texto('\n'.join(registros), 'ndjson', 2)
+
+    assert relatorio['importadas'] == 4 and relatorio['rejeitadas'] == 3
+    assert [erro['linha'] for erro in relatorio['erros']] == [2, 3, 7]
+    assert 'JSON inválido' in relatorio['erros'][0]['erro']
+    assert [len(lote) for lote in lotes] == [2, 2]
+    assert lotes[1][1]['medidas']['peso'] == 61.5
+
+
+def test_limites_dos_lotes():
+    """Lote exato, um a mais e nenhuma linha válida"""
+    cabecalho = 'data;peso;pescoco;cintura;quadril\n'
+    for validas, esperado in ((4, [4]), (5, [4, 1]), (8, [4, 4]), (0, [])):
+        texto = cabecalho + ''.join(linha_csv(dia) + '\n' for dia in range(1, validas + 1))
+        relatorio, lotes = importar_texto(texto, 'csv', 4)
+        assert [len(lote) for lote in lotes] == esperado
+        assert relatorio == {'importadas': validas, 'rejeitadas': 0, 'erros': []}
+
+    # Só linhas ruins: nenhuma gravação
+    relatorio, lotes = importar_texto(cabecalho + '2024-01-01;;;;\nx;60;;;\n', 'csv', 4)
+    assert lotes == [] and relatorio['rejeitadas'] == 2
+
+
+if __name__ == '__main__':
+    test_csv_com_linha_ruim_no_meio_do_lote()
+    print("✓ CSV com linha ruim no meio do lote")
+    test_ndjson_com_linha_ruim_no_meio_do_lote()
+    print("✓ NDJSON com linha ruim no meio do lote")
+    test_limites_dos_lotes()
+    print("✓ Limites dos lotes")
@@ -6,6 +6,7 @@ Fornece API REST e serve a interface web
 from flask import Flask, render_template, request, jsonify, session, redirect, url_for
 from flask_cors import CORS
 from datetime import date, datetime
+from itertools import islice
 import os
 import sys
 import hashlib
@@ -19,11 +20,26 @@ from src.models.usuario import Usuario, Sexo
 from src.models.medidas import Medidas
 from src.models.avaliacao import Avaliacao
 from src.services.analisador import AnalisadorAvaliacao
+from src.services.catalogo import CATALOGO, VERSAO_CATALOGO, compactar_resultados
+from web.serializacao import FORMATOS, CODIFICADORES, MIME_JSON
+from web.importacao import FORMATOS_IMPORTACAO, ler_registros, importar, para_float
+from web.exportacao import FORMATOS_EXPORTACAO, TAMANHO_LOTE_EXPORTACAO, colunas_exportacao, exportar
+from web.consulta_admin import TABELAS_ADMIN, IndiceAdmin, ler_consulta, paginar
+from web.estatisticas import EstatisticasJSON, dias_ativos, resumir
+from web.coortes import CoortesJSON, ler_consulta_coortes, montar, faixa_etaria
+from web.quantis import QuantisJSON, anotar
 
-# Verifica se deve usar PostgreSQL ou JSON
-USE_DATABASE = os.environ.get('POSTGRES_URL') or os.environ.get('DATABASE_URL')
+# Verifica se deve usar PostgreSQL, SQLite ou JSON
+DATABASE_URL = os.environ.get('POSTGRES_URL') or os.environ.get('DATABASE_URL') or ''
+USE_SQLITE = bool(os.environ.get('SQLITE_PATH')) or DATABASE_URL.startswith('sqlite:///')
+USE_DATABASE = USE_SQLITE or bool(DATABASE_URL)
+TIPO_BANCO = 'SQLite' if USE_SQLITE else 'PostgreSQL'
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'usuarios.json')
 
-if USE_DATABASE:
+if USE_SQLITE:
+    from web import db_sqlite as db
+    print(f"✅ Usando SQLite ({db.DATABASE_PATH}) - dados serão persistidos")
+elif USE_DATABASE:
     try:
         from web import db
         print("✅ Usando PostgreSQL - dados serão persistidos")
@@ -31,13 +47,27 @@ if USE_DATABASE:
         print(f"⚠️ Erro ao conectar PostgreSQL: {e}")
         print("⚠️ Voltando para modo JSON (dados não persistem no Vercel!)")
         USE_DATABASE = False
-        import json
-        DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'usuarios.json')
 else:
     print("⚠️ DATABASE_URL não configurada - usando JSON local")
     print("⚠️ ATENÇÃO: No Vercel, os dados serão perdidos após cada deploy/restart!")
-    import json
-    DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'usuarios.json')
+
+if not USE_DATABASE:
+    from web.armazenamento import ArmazenamentoJSON
+    armazenamento = ArmazenamentoJSON(DATA_FILE)
+    # Agregados do painel admin e percentis, atualizados a cada operação aplicada ao documento
+    estatisticas_json = EstatisticasJSON()
+    armazenamento.observar(estatisticas_json)
+    coortes_json = CoortesJSON()
+    armazenamento.observar(coortes_json)
+    quantis_json = QuantisJSON()
+    armazenamento.observar(quantis_json)
+    indice_admin = IndiceAdmin()
+    armazenamento.observar(indice_admin)
+
+# Cache de resultados do analisador (opcional): ANALISADOR_CACHE=<nº de entradas>
+if int(os.environ.get('ANALISADOR_CACHE') or 0) > 0:
+    AnalisadorAvaliacao.ativar_cache(int(os.environ['ANALISADOR_CACHE']))
+    print(f"✅ Cache do analisador ativo ({os.environ['ANALISADOR_CACHE']} entradas)")
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'chave-secreta-dev-12345')
@@ -51,6 +81,19 @@ CORS(app)
 # Lista de usuários admin (nomes de conta)
 ADMINS = ['admin', 'Admin', 'ADMIN', 'Vilacio', 'vilacio', 'VILACIO']
 
+# Paginação do histórico de avaliações
+AVALIACOES_POR_PAGINA = 10
+MAXIMO_POR_PAGINA = 100
+
+# Cache-Control das respostas com ETag: dados da conta sempre revalidados;
+# status só muda com a configuração do servidor
+CACHE_PRIVADO = 'private, no-cache'
+CACHE_STATUS = 'public, max-age=60'
+
+# Medidas que podem ser corrigidas via PATCH /api/avaliacoes/<id>
+CAMPOS_EDITAVEIS = ('altura', 'peso', 'pescoco', 'ombros', 'peitoral', 'cintura', 'abdomen', 'quadril',
+                    'braco_relaxado', 'braco_contraido', 'antebraco', 'coxa', 'panturrilha')
+
 
 def hash_senha(senha):
     """Gera hash SHA256 da senha"""
@@ -64,18 +107,437 @@ def is_admin():
 
 # ===== MODO JSON (DESENVOLVIMENTO) =====
 def carregar_dados():
-    """Carrega dados do arquivo JSON"""
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {'contas': {}, 'usuarios': {}, 'avaliacoes': {}}
+    """Carrega dados do armazenamento JSON (snapshot + journal)"""
+    return armazenamento.carregar()
+
+
+def registrar_alteracao(*operacoes):
+    """Grava uma alteração no journal (custo proporcional ao registro, não ao arquivo)"""
+    armazenamento.registrar(*operacoes)
+
+
+def versoes_json(conta_id):
+    """Versões das avaliações da conta: {'versao': atual, 'itens': {id: versão}}"""
+    return carregar_dados().get('sincronizacao', {}).get(str(conta_id)) or {'versao': 0, 'itens': {}}
+
+
+def versionar(conta_id, avaliacao_id):
+    """Operação do journal que marca a avaliação como alterada (sincronização)"""
+    return ('versionar', ['sincronizacao', str(conta_id)], avaliacao_id)
+
+
+def guardar_perfil(usuario):
+    """Guarda na sessão os dados do perfil usados nos cálculos (evita reconsultar no POST)"""
+    session['perfil'] = {
+        'nome': usuario['nome'],
+        'sexo': usuario['sexo'],
+        'data_nascimento': str(usuario['data_nascimento'])
+    }
+
+
+def parametros_paginacao():
+    """
+    Lê limit, before (cursor), from e to da query string.
+    
+    Returns:
+        Tupla (limite, antes, de, ate)
+    
+    Raises:
+        ValueError: Se limit não for inteiro ou alguma data não for AAAA-MM-DD
+    """
+    try:
+        limite = int(request.args.get('limit', AVALIACOES_POR_PAGINA))
+    except ValueError:
+        raise ValueError('Parâmetro limit inválido')
+    limite = min(max(limite, 1), MAXIMO_POR_PAGINA)
+    
+    datas = []
+    for param in ('before', 'from', 'to'):
+        valor = request.args.get(param) or None
+        if valor:
+            try:
+                date.fromisoformat(valor)
+            except ValueError:
+                raise ValueError(f'Parâmetro {param} deve estar no formato AAAA-MM-DD')
+        datas.append(valor)
+    return (limite, *datas)
+
+
+def parametro_secoes():
+    """
+    Lê secoes (lista separada por vírgulas) da query string.
+    
+    Returns:
+        Lista de seções, ou None se o parâmetro não foi informado (todas)
+    
+    Raises:
+        ValueError: Se alguma seção não existir
+    """
+    valor = request.args.get('secoes')
+    if not valor:
+        return None
+    secoes = [secao.strip() for secao in valor.split(',') if secao.strip()]
+    AnalisadorAvaliacao.resolver_secoes(secoes)
+    return secoes
+
+
+def parametro_textos():
+    """
+    Lê textos da query string: 'catalogo' troca os textos repetidos dos
+    resultados por códigos resolvidos com /api/catalogo; 'completos' (padrão)
+    mantém os textos.
+    
+    Raises:
+        ValueError: Se o valor não for reconhecido
+    """
+    valor = request.args.get('textos') or 'completos'
+    if valor not in ('completos', 'catalogo'):
+        raise ValueError("Parâmetro textos deve ser 'completos' ou 'catalogo'")
+    return valor == 'catalogo'
+
+
+def formato_resposta():
+    """Tipo MIME da resposta negociado pelo cabeçalho Accept"""
+    return FORMATOS[request.accept_mimetypes.best_match(list(FORMATOS), default=MIME_JSON)]
+
+
+def responder(dados):
+    """
+    Resposta no formato pedido no cabeçalho Accept: JSON (padrão), MessagePack
+    (application/msgpack ou application/x-msgpack) ou CBOR (application/cbor).
+    """
+    formato = formato_resposta()
+    if formato == MIME_JSON:
+        resposta = jsonify(dados)
+    else:
+        corpo = CODIFICADORES[formato](dados, app.json.default)
+        resposta = app.response_class(corpo, mimetype=formato)
+    resposta.vary.add('Accept')
+    return resposta
+
+
+def parametro_since():
+    """
+    Lê since (token de sincronização devolvido em X-Token-Sincronizacao) da query string.
+    
+    Returns:
+        Versão a partir da qual listar alterações, ou None se o parâmetro não
+        foi informado (lista paginada)
+    
+    Raises:
+        ValueError: Se o token não for um inteiro não negativo
+    """
+    valor = request.args.get('since')
+    if not valor:
+        return None
+    if not valor.isdigit():
+        raise ValueError('Parâmetro since inválido')
+    return int(valor)
+
+
+def preparar_resultados(avaliacoes, secoes, compactar):
+    """
+    Aplica secoes e textos=catalogo aos resultados de uma lista de avaliações.
+    
+    Devolve cópias: no modo JSON os itens são os do cache do armazenamento.
+    """
+    if secoes is not None:
+        avaliacoes = [
+            {**av, 'resultados': AnalisadorAvaliacao.filtrar_secoes(av.get('resultados') or {}, secoes)}
+            for av in avaliacoes
+        ]
+    if compactar:
+        avaliacoes = [
+            {**av, 'resultados': compactar_resultados(av.get('resultados') or {})}
+            for av in avaliacoes
+        ]
+    return avaliacoes
+
+
+def anotar_percentis(usuario, avaliacoes):
+    """
+    Percentis da população (web/quantis.py) na avaliação mais recente, o
+    primeiro item de uma página que começa do início do histórico.
+    
+    Devolve a lista com o primeiro item copiado e anotado em 'percentis'
+    (sem anotação se a coorte for pequena ou o perfil estiver incompleto).
+    """
+    if not usuario or not avaliacoes:
+        return avaliacoes
+    ultima = avaliacoes[0]
+    sexo, nascimento = usuario.get('sexo'), usuario.get('data_nascimento')
+    faixa = faixa_etaria(nascimento, ultima.get('data'))
+    if not sexo or faixa is None:
+        return avaliacoes
+    esbocos = db.ler_quantis(sexo, faixa) if USE_DATABASE else quantis_json.coorte(sexo, faixa)
+    percentis = anotar(ultima.get('resultados'), ultima.get('data'), sexo, nascimento, esbocos)
+    if percentis is None:
+        return avaliacoes
+    return [{**ultima, 'percentis': percentis}] + avaliacoes[1:]
+
+
+def condicional(resposta, cache=CACHE_PRIVADO):
+    """
+    ETag forte do corpo (hash do conteúdo) e Cache-Control; devolve 304 sem
+    corpo se o cliente já tem essa versão (If-None-Match).
+    """
+    resposta.headers['Cache-Control'] = cache
+    resposta.add_etag()
+    return resposta.make_conditional(request)
+
+
+def etag_versao(*partes):
+    """
+    ETag derivada da versão dos dados (sem montar o corpo): inclui o formato
+    negociado e a query string, pois cada combinação é uma representação diferente.
+    """
+    chave = '|'.join(str(parte) for parte in partes + (formato_resposta(), request.query_string.decode()))
+    return hashlib.sha256(chave.encode()).hexdigest()[:32]
+
+
+def nao_modificado(etag, cache=CACHE_PRIVADO, fraca=False):
+    """Resposta 304 para uma ETag já conhecida pelo cliente"""
+    resposta = app.response_class(status=304)
+    resposta.set_etag(etag, weak=fraca)
+    resposta.headers['Cache-Control'] = cache
+    resposta.vary.add('Accept')
+    return resposta
+
+
+def dados_status():
+    """Status do sistema e configuração do banco (GET /api/status)"""
+    return {
+        'status': 'online',
+        'database': {
+            'type': TIPO_BANCO if USE_DATABASE else 'JSON (Local File)',
+            'persistent': USE_DATABASE,
+            'warning': None if USE_DATABASE else 'Dados serão perdidos no Vercel sem banco configurado'
+        },
+        'environment': 'production' if os.environ.get('VERCEL') else 'development'
+    }
+
 
+def usuario_do_perfil(perfil):
+    """Monta o Usuario usado nos cálculos a partir do perfil (sessão, JSON ou banco)"""
+    return Usuario(
+        nome=perfil['nome'],
+        sexo=Sexo(perfil['sexo']),
+        data_nascimento=datetime.strptime(str(perfil['data_nascimento'])[:10], '%Y-%m-%d').date()
+    )
 
-def salvar_dados(dados):
-    """Salva dados no arquivo JSON"""
-    os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(dados, f, ensure_ascii=False, indent=2, default=str)
+
+def medidas_da_linha(av, altura):
+    """Monta o dicionário de medidas (campos de Medidas) a partir de uma linha de avaliacoes"""
+    def valor(v):
+        return float(v) if v else None
+    
+    return {
+        'altura': float(altura),
+        'peso': float(av['peso']),
+        'pescoco': valor(av.get('pescoco')),
+        'ombros': valor(av.get('ombros')),
+        'peitoral': valor(av.get('peitoral')),
+        'cintura': valor(av.get('cintura')),
+        'abdomen': valor(av.get('abdomen')),
+        'quadril': valor(av.get('quadril')),
+        'braco_relaxado': valor(av.get('braco_relaxado')),
+        'braco_contraido': valor(av.get('braco_contraido')),
+        'antebraco': valor(av.get('antebraco')),
+        'coxa': valor(av.get('coxa') or av.get('coxa_proximal')),
+        'panturrilha': valor(av.get('panturrilha'))
+    }
+
+
+def etag_avaliacoes(conta_id, token, altura, coorte=None):
+    """
+    ETag de GET /api/avaliacoes: versão das avaliações da conta, altura do
+    perfil (usada nas medidas, no modo banco) e versões dos cálculos e dos textos.
+    
+    Na página anotada com percentis, `coorte` (coorte_percentis) acrescenta o
+    que muda os percentis sem mudar as avaliações da conta.
+    """
+    return etag_versao(conta_id, token, altura, coorte,
+                       AnalisadorAvaliacao.VERSAO_CALCULO, VERSAO_CATALOGO)
+
+
+def coorte_percentis(sexo, nascimento, versao):
+    """
+    Parte da ETag dos percentis: o sexo e o nascimento escolhem a coorte, e a
+    versão dos esboços do sexo cresce quando outras contas incluem valores.
+    """
+    return (sexo, str(nascimento) if nascimento else None, versao)
+
+
+def versao_percentis(usuario):
+    """Versão dos esboços do sexo do perfil (lida antes dos próprios esboços)"""
+    sexo = usuario.get('sexo') if usuario else None
+    if not sexo:
+        return 0
+    return db.obter_versao_quantis(sexo) if USE_DATABASE else quantis_json.versao(sexo)
+
+
+def carregar_avaliacoes(conta_id, limite, antes=None, de=None, ate=None, desde=None):
+    """
+    Perfil e uma página de avaliações da conta (ou, com `desde`, só o que
+    mudou depois dessa versão). No modo banco, uma única consulta.
+    
+    Returns:
+        Tupla (usuario, avaliacoes, removidas, proximo_cursor, token) - perfil
+        (None se não cadastrado), itens da API, IDs apagados (só com `desde`),
+        cursor da próxima página e versão atual dos dados
+    """
+    proximo_cursor = None
+    removidas = []
+    if USE_DATABASE:
+        # Perfil (com a versão atual) + avaliações em uma única consulta
+        if desde is None:
+            # Uma a mais para saber se há próxima página
+            usuario, avaliacoes_db = db.obter_usuario_com_avaliacoes(conta_id, limite + 1, antes, de, ate)
+            if len(avaliacoes_db) > limite:
+                avaliacoes_db = avaliacoes_db[:limite]
+                proximo_cursor = str(avaliacoes_db[-1]['data'])[:10]
+        else:
+            usuario, avaliacoes_db, removidas = db.obter_alteracoes(conta_id, desde)
+        avaliacoes = []
+        token = 0
+        if usuario:
+            guardar_perfil(usuario)
+            token = usuario.get('versao_alteracoes') or 0
+            avaliacoes = avaliacoes_do_banco(usuario, avaliacoes_db)
+    else:
+        # Token lido antes da lista: uma alteração no meio volta no próximo since
+        versoes = versoes_json(conta_id)
+        token = versoes['versao']
+        dados = carregar_dados()
+        usuario = dados['usuarios'].get(str(conta_id))
+        avaliacoes = []
+        if desde is None:
+            avaliacoes, proximo_cursor = armazenamento.pagina(
+                ['avaliacoes', str(conta_id)], limite, antes, de, ate
+            )
+        elif desde <= token:
+            alteradas = {avaliacao_id for avaliacao_id, versao in list(versoes['itens'].items())
+                         if versao > desde}
+            avaliacoes = sorted(
+                (av for av in dados['avaliacoes'].get(str(conta_id), [])
+                 if av.get('id') in alteradas),
+                key=lambda av: str(av.get('data') or ''), reverse=True
+            )
+            removidas = sorted(alteradas - {av['id'] for av in avaliacoes})
+    return usuario, avaliacoes, removidas, proximo_cursor, token
+
+
+def dados_iniciais(conta_id, compactar=False):
+    """
+    Dados do primeiro carregamento da interface (GET /api/bootstrap e index):
+    o mesmo que /api/status, /api/admin/check, /api/usuario e a primeira
+    página de /api/avaliacoes, com uma única consulta ao banco.
+    """
+    usuario, avaliacoes, _, proximo_cursor, token = carregar_avaliacoes(conta_id, AVALIACOES_POR_PAGINA)
+    dados = {
+        'status': dados_status(),
+        'is_admin': is_admin(),
+        'usuario': (dict(usuario) if USE_DATABASE else usuario) if usuario else None,
+        'avaliacoes': preparar_resultados(anotar_percentis(usuario, avaliacoes), None, compactar),
+        'proximo_cursor': proximo_cursor,
+        'token_sincronizacao': str(token)
+    }
+    if compactar:
+        dados['catalogo_versao'] = VERSAO_CATALOGO
+    return dados
+
+
+def avaliacoes_do_banco(usuario, avaliacoes_db):
+    """
+    Monta os itens da API a partir das linhas de avaliacoes do usuário.
+    
+    Resultados vêm persistidos; só recalcula (em lote) e grava os ausentes ou
+    de versão antiga.
+    """
+    pendentes = []
+    avaliacoes_completas = []
+    for av in avaliacoes_db:
+        item = {
+            'id': str(av['id']),
+            'data': str(av['data']),
+            'medidas': medidas_da_linha(av, usuario['altura']),
+            'resultados': av.get('resultados')
+        }
+        if item['resultados'] is None or av.get('versao_calculo') != AnalisadorAvaliacao.VERSAO_CALCULO:
+            pendentes.append((av['id'], item))
+        avaliacoes_completas.append(item)
+    
+    if pendentes:
+        colunas = {
+            campo: [item['medidas'][campo] for _, item in pendentes]
+            for campo in pendentes[0][1]['medidas']
+        }
+        calculados = AnalisadorAvaliacao.processar_lote(
+            colunas,
+            [usuario['sexo']] * len(pendentes),
+            [usuario_do_perfil(usuario).idade] * len(pendentes)
+        )
+        for (_, item), resultados in zip(pendentes, calculados):
+            item['resultados'] = resultados
+        db.atualizar_resultados(
+            [(avaliacao_id, item['resultados']) for avaliacao_id, item in pendentes],
+            AnalisadorAvaliacao.VERSAO_CALCULO
+        )
+    return avaliacoes_completas
+
+
+def completar_resultados(linhas):
+    """
+    Recalcula (em lote) os resultados ausentes ou de versão antiga de linhas
+    exportadas do banco; cada linha traz o perfil (sexo, data_nascimento, altura).
+    """
+    pendentes = [linha for linha in linhas
+                 if linha.get('resultados') is None
+                 or linha.get('versao_calculo') != AnalisadorAvaliacao.VERSAO_CALCULO]
+    if pendentes:
+        medidas = [medidas_da_linha(linha, linha['altura']) for linha in pendentes]
+        calculados = AnalisadorAvaliacao.processar_lote(
+            {campo: [m[campo] for m in medidas] for campo in medidas[0]},
+            [linha['sexo'] for linha in pendentes],
+            [usuario_do_perfil(linha).idade for linha in pendentes]
+        )
+        for linha, resultados in zip(pendentes, calculados):
+            linha['resultados'] = resultados
+            linha['versao_calculo'] = AnalisadorAvaliacao.VERSAO_CALCULO
+    return linhas
+
+
+def em_lotes(itens, tamanho):
+    """Agrupa um iterador em listas de até `tamanho` itens, sem materializá-lo"""
+    itens = iter(itens)
+    while True:
+        lote = list(islice(itens, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+def linhas_json(tabela):
+    """
+    Linhas de uma tabela do modo JSON, nas colunas da exportação, percorrendo
+    o documento em cache sob demanda (sem copiá-lo).
+    """
+    dados = carregar_dados()
+    if tabela == 'contas':
+        for nome, conta in list(dados.get('contas', {}).items()):
+            yield {'id': conta.get('id'), 'nome': nome, 'created_at': conta.get('created_at')}
+    elif tabela == 'usuarios':
+        for conta_id, usuario in list(dados.get('usuarios', {}).items()):
+            yield {'conta_id': int(conta_id), **usuario}
+    else:
+        for conta_id, avaliacoes in list(dados.get('avaliacoes', {}).items()):
+            nome = (dados['usuarios'].get(conta_id) or {}).get('nome')
+            # A lista guarda a mais recente primeiro: exporta na ordem de criação
+            for av in reversed(avaliacoes):
+                medidas = {campo: valor if valor != '' else None
+                           for campo, valor in (av.get('medidas') or {}).items()}
+                yield {**medidas, 'id': av.get('id'), 'conta_id': int(conta_id), 'nome': nome,
+                       'data': av.get('data'), 'resultados': av.get('resultados')}
 
 
 # ===== ROTAS DE AUTENTICAÇÃO =====
@@ -108,12 +570,11 @@ def registro():
                 return jsonify({'erro': 'Nome já está em uso'}), 400
             
             conta_id = len(dados['contas']) + 1
-            dados['contas'][nome] = {
+            registrar_alteracao(('set', ['contas', nome], {
                 'id': conta_id,
                 'senha_hash': hash_senha(senha),
                 'created_at': datetime.now().isoformat()
-            }
-            salvar_dados(dados)
+            }))
         
         return jsonify({'sucesso': True, 'conta_id': conta_id})
     except Exception as e:
@@ -179,21 +640,9 @@ def mudar_senha():
         nome = session.get('nome')
         
         if USE_DATABASE:
-            # Verificar senha atual e atualizar no PostgreSQL
-            if not db.autenticar(nome, senha_atual):
+            # Verifica a senha atual e atualiza no mesmo comando
+            if not db.atualizar_senha(nome, senha_atual, nova_senha):
                 return jsonify({'erro': 'Senha atual incorreta'}), 401
-            
-            # Atualizar senha
-            nova_senha_hash = db.hash_senha(nova_senha)
-            conn = db.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE contas SET senha_hash = %s WHERE nome = %s",
-                (nova_senha_hash, nome)
-            )
-            conn.commit()
-            cursor.close()
-            conn.close()
         else:
             # Usar JSON
             dados = carregar_dados()
@@ -203,8 +652,7 @@ def mudar_senha():
                 return jsonify({'erro': 'Senha atual incorreta'}), 401
             
             # Atualizar senha
-            conta['senha_hash'] = hash_senha(nova_senha)
-            salvar_dados(dados)
+            registrar_alteracao(('mesclar', ['contas', nome], {'senha_hash': hash_senha(nova_senha)}))
         
         return jsonify({'sucesso': True, 'mensagem': 'Senha alterada com sucesso'})
     
@@ -227,24 +675,59 @@ def requer_login(f):
 
 @app.route('/')
 def index():
-    """Página principal"""
+    """Página principal (com os dados iniciais embutidos: sem requisições antes do primeiro render)"""
     if 'conta_id' not in session:
         return redirect(url_for('login_page'))
-    return render_template('index.html', is_admin=is_admin())
+    try:
+        inicial = dados_iniciais(session['conta_id'], compactar=True)
+    except Exception as e:
+        # A página carrega mesmo assim; o app.js busca /api/bootstrap
+        print(f"Erro ao montar dados iniciais: {e}")
+        inicial = None
+    return render_template('index.html', is_admin=is_admin(), dados_iniciais=inicial)
+
+
+@app.route('/api/bootstrap')
+@requer_login
+def bootstrap():
+    """
+    Tudo o que a interface precisa para o primeiro render, em uma resposta:
+    status, admin, perfil e a primeira página de avaliações (com o token de
+    sincronização e o cursor da próxima página).
+    """
+    try:
+        compactar = parametro_textos()
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    resposta = responder(dados_iniciais(session['conta_id'], compactar))
+    resposta.headers['Cache-Control'] = CACHE_PRIVADO
+    return resposta
 
 
 @app.route('/api/status')
 def status():
     """Retorna status do sistema e configuração do banco"""
-    return jsonify({
-        'status': 'online',
-        'database': {
-            'type': 'PostgreSQL' if USE_DATABASE else 'JSON (Local File)',
-            'persistent': USE_DATABASE,
-            'warning': None if USE_DATABASE else 'Dados serão perdidos no Vercel sem banco configurado'
-        },
-        'environment': 'production' if os.environ.get('VERCEL') else 'development'
-    })
+    return condicional(jsonify(dados_status()), CACHE_STATUS)
+
+
+@app.route('/api/catalogo')
+def catalogo_api():
+    """
+    Textos dos resultados compactos (?textos=catalogo), por código.
+    
+    Com ?v=<versão atual> a resposta pode ficar em cache indefinidamente:
+    qualquer mudança nos textos muda a versão (cabeçalho X-Catalogo-Versao).
+    """
+    if VERSAO_CATALOGO in request.if_none_match:
+        resposta = app.response_class(status=304)
+    else:
+        resposta = jsonify({'versao': VERSAO_CATALOGO, 'textos': CATALOGO})
+    resposta.set_etag(VERSAO_CATALOGO)
+    if request.args.get('v') == VERSAO_CATALOGO:
+        resposta.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        resposta.headers['Cache-Control'] = 'no-cache'
+    return resposta
 
 
 @app.route('/api/usuario', methods=['GET', 'POST', 'PUT'])
@@ -257,13 +740,13 @@ def usuario_api():
         # Retorna dados do usuário
         if USE_DATABASE:
             usuario = db.obter_usuario_por_conta(conta_id)
+            if usuario:
+                guardar_perfil(usuario)
         else:
             dados = carregar_dados()
             usuario = dados['usuarios'].get(str(conta_id))
         
-        if usuario:
-            return jsonify(dict(usuario) if USE_DATABASE else usuario)
-        return jsonify(None)
+        return condicional(jsonify((dict(usuario) if USE_DATABASE else usuario) if usuario else None))
     
     elif request.method == 'POST' or request.method == 'PUT':
         # Cria ou atualiza usuário
@@ -291,10 +774,10 @@ def usuario_api():
         if USE_DATABASE:
             # Usar PostgreSQL
             db.criar_usuario(conta_id, data['data_nascimento'], data['sexo'], altura)
+            guardar_perfil({**data, 'nome': session['nome']})
         else:
             # Usar JSON
-            dados = carregar_dados()
-            dados['usuarios'][str(conta_id)] = {
+            registrar_alteracao(('set', ['usuarios', str(conta_id)], {
                 'conta_id': conta_id,
                 'nome': session['nome'],
                 'sexo': data['sexo'],
@@ -302,8 +785,7 @@ def usuario_api():
                 'altura': altura,
                 'idade': idade,
                 'created_at': datetime.now().isoformat()
-            }
-            salvar_dados(dados)
+            }))
         
         return jsonify({'sucesso': True})
 
@@ -315,75 +797,69 @@ def avaliacoes_api():
     conta_id = session['conta_id']
     
     if request.method == 'GET':
-        # Retorna avaliações do usuário
-        if USE_DATABASE:
-            usuario = db.obter_usuario_por_conta(conta_id)
-            if not usuario:
-                return jsonify([])
-            avaliacoes_db = db.obter_avaliacoes(usuario['id'])
-            
-            # Recalcular resultados para cada avaliação
-            usuario_obj = Usuario(
-                nome=usuario['nome'],
-                sexo=Sexo(usuario['sexo']),
-                data_nascimento=usuario['data_nascimento']
-            )
-            
-            avaliacoes_completas = []
-            for av in avaliacoes_db:
-                medidas = Medidas(
-                    altura=float(usuario['altura']),
-                    peso=float(av['peso']),
-                    pescoco=float(av['pescoco']) if av.get('pescoco') else None,
-                    ombros=float(av['ombros']) if av.get('ombros') else None,
-                    peitoral=float(av['peitoral']) if av.get('peitoral') else None,
-                    cintura=float(av['cintura']) if av.get('cintura') else None,
-                    abdomen=float(av['abdomen']) if av.get('abdomen') else None,
-                    quadril=float(av['quadril']) if av.get('quadril') else None,
-                    braco_relaxado=float(av['braco_relaxado']) if av.get('braco_relaxado') else None,
-                    braco_contraido=float(av['braco_contraido']) if av.get('braco_contraido') else None,
-                    antebraco=float(av['antebraco']) if av.get('antebraco') else None,
-                    coxa=float(av.get('coxa') or av.get('coxa_proximal')) if (av.get('coxa') or av.get('coxa_proximal')) else None,
-                    panturrilha=float(av['panturrilha']) if av.get('panturrilha') else None
-                )
-                
-                avaliacao = Avaliacao(
-                    data=av['data'],
-                    medidas=medidas,
-                    objetivo=''
-                )
-                
-                resultados = AnalisadorAvaliacao.processar_avaliacao(avaliacao, usuario_obj)
-                
-                avaliacoes_completas.append({
-                    'id': str(av['id']),
-                    'data': str(av['data']),
-                    'medidas': {
-                        'altura': float(usuario['altura']),
-                        'peso': float(av['peso']),
-                        'pescoco': float(av['pescoco']) if av.get('pescoco') else None,
-                        'ombros': float(av['ombros']) if av.get('ombros') else None,
-                        'peitoral': float(av['peitoral']) if av.get('peitoral') else None,
-                        'cintura': float(av['cintura']) if av.get('cintura') else None,
-                        'abdomen': float(av['abdomen']) if av.get('abdomen') else None,
-                        'quadril': float(av['quadril']) if av.get('quadril') else None,
-                        'braco_relaxado': float(av['braco_relaxado']) if av.get('braco_relaxado') else None,
-                        'braco_contraido': float(av['braco_contraido']) if av.get('braco_contraido') else None,
-                        'antebraco': float(av['antebraco']) if av.get('antebraco') else None,
-                        'coxa': float(av.get('coxa') or av.get('coxa_proximal')) if (av.get('coxa') or av.get('coxa_proximal')) else None,
-                        'panturrilha': float(av['panturrilha']) if av.get('panturrilha') else None
-                    },
-                    'resultados': resultados
-                })
-            
-            return jsonify(avaliacoes_completas)
+        # Retorna uma página do histórico (mais recentes primeiro); o cursor da
+        # próxima página vai no cabeçalho X-Proximo-Cursor. Com since=<token>,
+        # só o que mudou depois do token. O token atual vai em X-Token-Sincronizacao.
+        try:
+            limite, antes, de, ate = parametros_paginacao()
+            secoes = parametro_secoes()
+            compactar = parametro_textos()
+            desde = parametro_since()
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+        
+        # A primeira página traz os percentis da população (anotar_percentis)
+        anotada = desde is None and antes is None and ate is None
+        
+        # Revalidação (If-None-Match): a ETag sai da versão dos dados da conta
+        # (e, com percentis, da coorte e dos esboços), então o 304 não consulta
+        # as avaliações nem passa pelo analisador
+        if request.if_none_match:
+            if USE_DATABASE:
+                versao = db.obter_versao_dados(conta_id) or {}
+                token, altura = versao.get('versao_alteracoes', 0), versao.get('altura')
+                coorte = coorte_percentis(versao.get('sexo'), versao.get('data_nascimento'),
+                                          versao.get('versao_quantis', 0))
+            else:
+                token, altura = versoes_json(conta_id)['versao'], None
+                perfil = carregar_dados()['usuarios'].get(str(conta_id))
+                coorte = coorte_percentis((perfil or {}).get('sexo'), (perfil or {}).get('data_nascimento'),
+                                          versao_percentis(perfil))
+            etag = etag_avaliacoes(conta_id, token, altura, coorte if anotada else None)
+            if etag in request.if_none_match:
+                resposta = nao_modificado(etag)
+                resposta.headers['X-Token-Sincronizacao'] = str(token)
+                return resposta
+        
+        usuario, avaliacoes, removidas, proximo_cursor, token = carregar_avaliacoes(
+            conta_id, limite, antes, de, ate, desde
+        )
+        
+        if desde is not None and desde > token:
+            # Token de outro armazenamento (ou de antes de uma restauração)
+            return jsonify({'erro': 'Token de sincronização inválido; recarregue a lista'}), 410
+        
+        coorte = None
+        if anotada:
+            # Versão lida antes dos esboços: uma inclusão no meio só antecipa o próximo 200
+            coorte = coorte_percentis((usuario or {}).get('sexo'), (usuario or {}).get('data_nascimento'),
+                                      versao_percentis(usuario))
+            avaliacoes = anotar_percentis(usuario, avaliacoes)
+        avaliacoes = preparar_resultados(avaliacoes, secoes, compactar)
+        if desde is None:
+            resposta = responder(avaliacoes)
         else:
-            dados = carregar_dados()
-            print(f"🔍 GET Avaliações - conta_id: {conta_id}")
-            print(f"🔍 Chaves em avaliacoes: {list(dados['avaliacoes'].keys())}")
-            avaliacoes = dados['avaliacoes'].get(str(conta_id), [])
-            print(f"🔍 Total de avaliações encontradas: {len(avaliacoes)}")
-            return jsonify(avaliacoes)
+            resposta = responder({'alteradas': avaliacoes, 'removidas': [str(i) for i in removidas]})
+        
+        altura = usuario['altura'] if USE_DATABASE and usuario else None
+        resposta.set_etag(etag_avaliacoes(conta_id, token, altura, coorte))
+        resposta.headers['Cache-Control'] = CACHE_PRIVADO
+        resposta.headers['X-Token-Sincronizacao'] = str(token)
+        if proximo_cursor:
+            resposta.headers['X-Proximo-Cursor'] = proximo_cursor
+        if compactar:
+            resposta.headers['X-Catalogo-Versao'] = VERSAO_CATALOGO
+        return resposta
     
     elif request.method == 'POST':
         # Cria nova avaliação
@@ -392,24 +868,19 @@ def avaliacoes_api():
         try:
             # Obter dados do usuário
             if USE_DATABASE:
-                usuario = db.obter_usuario_por_conta(conta_id)
-                if not usuario:
-                    return jsonify({'erro': 'Complete seu cadastro primeiro'}), 400
-                usuario_obj = Usuario(
-                    nome=usuario['nome'],
-                    sexo=Sexo(usuario['sexo']),
-                    data_nascimento=datetime.strptime(str(usuario['data_nascimento']), '%Y-%m-%d').date()
-                )
+                # Perfil guardado na sessão; o INSERT confere se ainda é o mesmo
+                perfil = session.get('perfil')
+                if not perfil:
+                    usuario = db.obter_usuario_por_conta(conta_id)
+                    if not usuario:
+                        return jsonify({'erro': 'Complete seu cadastro primeiro'}), 400
+                    guardar_perfil(usuario)
+                    perfil = session['perfil']
             else:
                 dados = carregar_dados()
-                usuario_data = dados['usuarios'].get(str(conta_id))
-                if not usuario_data:
+                perfil = dados['usuarios'].get(str(conta_id))
+                if not perfil:
                     return jsonify({'erro': 'Complete seu cadastro primeiro'}), 400
-                usuario_obj = Usuario(
-                    nome=usuario_data['nome'],
-                    sexo=Sexo(usuario_data['sexo']),
-                    data_nascimento=datetime.strptime(usuario_data['data_nascimento'], '%Y-%m-%d').date()
-                )
             
             # Criar objeto Medidas (converter valores para float)
             medidas_dict = data['medidas']
@@ -417,26 +888,20 @@ def avaliacoes_api():
             # Debug: log da coxa
             print(f"🔍 APP.PY - Coxa recebida no medidas_dict: {medidas_dict.get('coxa')}")
             
-            def to_float(value):
-                """Converte valor para float, retorna None se vazio"""
-                if value is None or value == '':
-                    return None
-                return float(value)
-            
             medidas = Medidas(
                 altura=float(medidas_dict['altura']),
                 peso=float(medidas_dict['peso']),
-                pescoco=to_float(medidas_dict.get('pescoco')),
-                ombros=to_float(medidas_dict.get('ombros')),
-                peitoral=to_float(medidas_dict.get('peitoral')),
-                cintura=to_float(medidas_dict.get('cintura')),
-                abdomen=to_float(medidas_dict.get('abdomen')),
-                quadril=to_float(medidas_dict.get('quadril')),
-                braco_relaxado=to_float(medidas_dict.get('braco_relaxado')),
-                braco_contraido=to_float(medidas_dict.get('braco_contraido')),
-                antebraco=to_float(medidas_dict.get('antebraco')),
-                coxa=to_float(medidas_dict.get('coxa')),
-                panturrilha=to_float(medidas_dict.get('panturrilha'))
+                pescoco=para_float(medidas_dict.get('pescoco')),
+                ombros=para_float(medidas_dict.get('ombros')),
+                peitoral=para_float(medidas_dict.get('peitoral')),
+                cintura=para_float(medidas_dict.get('cintura')),
+                abdomen=para_float(medidas_dict.get('abdomen')),
+                quadril=para_float(medidas_dict.get('quadril')),
+                braco_relaxado=para_float(medidas_dict.get('braco_relaxado')),
+                braco_contraido=para_float(medidas_dict.get('braco_contraido')),
+                antebraco=para_float(medidas_dict.get('antebraco')),
+                coxa=para_float(medidas_dict.get('coxa')),
+                panturrilha=para_float(medidas_dict.get('panturrilha'))
             )
             
             print(f"🔍 APP.PY - Objeto Medidas criado com coxa: {medidas.coxa}")
@@ -450,7 +915,9 @@ def avaliacoes_api():
             )
             
             # PROCESSAR CÁLCULOS
-            resultados = AnalisadorAvaliacao.processar_avaliacao(avaliacao, usuario_obj)
+            resultados = AnalisadorAvaliacao.serializar_resultados(
+                AnalisadorAvaliacao.processar_avaliacao(avaliacao, usuario_do_perfil(perfil))
+            )
             
             # Salvar com resultados
             avaliacao_completa = {
@@ -462,19 +929,40 @@ def avaliacoes_api():
             }
             
             if USE_DATABASE:
-                db.salvar_avaliacao(
-                    usuario['id'],
-                    avaliacao_completa['data'],
-                    medidas_dict['peso'],
-                    medidas_dict
-                )
+                def salvar(perfil, resultados):
+                    return db.salvar_avaliacao_por_conta(
+                        conta_id,
+                        perfil['sexo'],
+                        perfil['data_nascimento'],
+                        avaliacao_completa['data'],
+                        medidas_dict['peso'],
+                        medidas_dict,
+                        resultados,
+                        AnalisadorAvaliacao.VERSAO_CALCULO
+                    )
+                
+                avaliacao_id = salvar(perfil, resultados)
+                if avaliacao_id is None:
+                    # Perfil mudou desde que foi guardado na sessão: recalcula com o atual
+                    usuario = db.obter_usuario_por_conta(conta_id)
+                    if not usuario:
+                        session.pop('perfil', None)
+                        return jsonify({'erro': 'Complete seu cadastro primeiro'}), 400
+                    guardar_perfil(usuario)
+                    perfil = session['perfil']
+                    resultados = AnalisadorAvaliacao.serializar_resultados(
+                        AnalisadorAvaliacao.processar_avaliacao(avaliacao, usuario_do_perfil(perfil))
+                    )
+                    avaliacao_completa['resultados'] = resultados
+                    avaliacao_id = salvar(perfil, resultados)
+                avaliacao_completa['id'] = str(avaliacao_id)
             else:
-                if str(conta_id) not in dados['avaliacoes']:
-                    dados['avaliacoes'][str(conta_id)] = []
-                dados['avaliacoes'][str(conta_id)].insert(0, avaliacao_completa)
-                salvar_dados(dados)
+                registrar_alteracao(
+                    ('inserir', ['avaliacoes', str(conta_id)], avaliacao_completa),
+                    versionar(conta_id, avaliacao_completa['id'])
+                )
             
-            return jsonify(avaliacao_completa)
+            return responder(avaliacao_completa)
             
         except Exception as e:
             print(f"Erro ao processar avaliação: {e}")
@@ -482,6 +970,72 @@ def avaliacoes_api():
             return jsonify({'erro': f'Erro ao processar avaliação: {str(e)}'}), 500
 
 
+@app.route('/api/avaliacoes/import', methods=['POST'])
+@requer_login
+def importar_avaliacoes():
+    """
+    Importa avaliações de um arquivo CSV ou NDJSON (corpo da requisição).
+    
+    O arquivo é lido como fluxo e gravado em lotes (uma escrita por lote);
+    responde com o relatório de linhas importadas e rejeitadas.
+    """
+    conta_id = session['conta_id']
+    formato = FORMATOS_IMPORTACAO.get(request.mimetype)
+    if not formato:
+        tipos = ', '.join(sorted(FORMATOS_IMPORTACAO))
+        return jsonify({'erro': f'Envie o arquivo com Content-Type {tipos}'}), 415
+    
+    if USE_DATABASE:
+        perfil = db.obter_usuario_por_conta(conta_id)
+    else:
+        perfil = carregar_dados()['usuarios'].get(str(conta_id))
+    if not perfil:
+        return jsonify({'erro': 'Complete seu cadastro primeiro'}), 400
+    
+    try:
+        registros = ler_registros(request.stream, formato)
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    
+    if USE_DATABASE:
+        def gravar(lote):
+            db.salvar_avaliacoes(
+                perfil['id'],
+                [(av['data'], av['medidas']['peso'], av['medidas'], av['resultados']) for av in lote],
+                AnalisadorAvaliacao.VERSAO_CALCULO
+            )
+    else:
+        # Uma transação do journal por lote, como no banco: só o lote atual fica
+        # em memória. IDs no formato dos criados pelo POST, numerados na ordem do arquivo
+        inicio = datetime.now().isoformat()
+        gravados = 0
+        
+        def gravar(lote):
+            nonlocal gravados
+            itens = [{'id': f"{inicio}-{gravados + i}", **av} for i, av in enumerate(lote, 1)]
+            registrar_alteracao(
+                ('estender', ['avaliacoes', str(conta_id)], itens),
+                *(versionar(conta_id, item['id']) for item in itens)
+            )
+            gravados += len(itens)
+    
+    try:
+        relatorio = importar(
+            registros,
+            perfil['sexo'],
+            usuario_do_perfil(perfil).idade,
+            gravar,
+            altura_perfil=float(perfil['altura']) if perfil.get('altura') else None,
+            so_perfil=USE_DATABASE
+        )
+    except Exception as e:
+        print(f"Erro ao importar avaliações: {e}")
+        print(traceback.format_exc())
+        return jsonify({'erro': f'Erro ao importar avaliações: {str(e)}'}), 500
+    
+    return responder(relatorio)
+
+
 @app.route('/api/avaliacoes/<avaliacao_id>', methods=['DELETE'])
 @requer_login
 def deletar_avaliacao(avaliacao_id):
@@ -490,19 +1044,126 @@ def deletar_avaliacao(avaliacao_id):
     
     try:
         if USE_DATABASE:
-            sucesso = db.deletar_avaliacao(int(avaliacao_id))
-            return jsonify({'sucesso': sucesso})
+            # Só avaliações da própria conta (a mesma verificação do PATCH)
+            try:
+                av = db.obter_avaliacao_por_conta(conta_id, int(avaliacao_id))
+            except ValueError:
+                av = None
+            if not av:
+                return jsonify({'erro': 'Avaliação não encontrada'}), 404
+            sucesso = db.deletar_avaliacao(av['id'])
+            return responder({'sucesso': sucesso})
         else:
+            # Id desconhecido: 404, sem gastar versão nem anotar a remoção
             dados = carregar_dados()
-            avaliacoes = dados['avaliacoes'].get(str(conta_id), [])
-            dados['avaliacoes'][str(conta_id)] = [a for a in avaliacoes if a['id'] != avaliacao_id]
-            salvar_dados(dados)
-            return jsonify({'sucesso': True})
+            if not any(item.get('id') == avaliacao_id for item in dados['avaliacoes'].get(str(conta_id), [])):
+                return jsonify({'erro': 'Avaliação não encontrada'}), 404
+            registrar_alteracao(
+                ('remover', ['avaliacoes', str(conta_id)], avaliacao_id),
+                versionar(conta_id, avaliacao_id)
+            )
+            return responder({'sucesso': True})
     except Exception as e:
         print(f"Erro ao deletar avaliação: {e}")
         return jsonify({'erro': str(e)}), 500
 
 
+@app.route('/api/avaliacoes/<avaliacao_id>', methods=['PATCH'])
+@requer_login
+def editar_avaliacao(avaliacao_id):
+    """
+    Corrige algumas medidas de uma avaliação.
+
+    Recebe {"medidas": {campo: valor, ...}} só com as medidas alteradas, recalcula
+    apenas os resultados que dependem delas e grava só o que mudou. Devolve o
+    delta: medidas alteradas, resultados novos/alterados e chaves removidas.
+    """
+    conta_id = session['conta_id']
+    novas = (request.json or {}).get('medidas')
+    if not isinstance(novas, dict) or not novas:
+        return jsonify({'erro': 'Informe as medidas a alterar'}), 400
+    desconhecidas = sorted(set(novas) - set(CAMPOS_EDITAVEIS))
+    if desconhecidas:
+        return jsonify({'erro': f"Medidas desconhecidas: {', '.join(desconhecidas)}"}), 400
+    if USE_DATABASE and 'altura' in novas:
+        return jsonify({'erro': 'A altura é alterada no perfil'}), 400
+    try:
+        # Convertidas só para comparar e calcular: gravadas como recebidas, como no POST
+        valores = {campo: para_float(valor) for campo, valor in novas.items()}
+    except (ValueError, TypeError):
+        return jsonify({'erro': 'Medida inválida'}), 400
+
+    try:
+        if USE_DATABASE:
+            try:
+                av = db.obter_avaliacao_por_conta(conta_id, int(avaliacao_id))
+            except ValueError:
+                av = None
+            if not av:
+                return jsonify({'erro': 'Avaliação não encontrada'}), 404
+            perfil = av
+            atuais = medidas_da_linha(av, av['altura'])
+            # Resultados de versão antiga não servem de base: recalcula tudo
+            anteriores = av.get('resultados') \
+                if av.get('versao_calculo') == AnalisadorAvaliacao.VERSAO_CALCULO else None
+        else:
+            dados = carregar_dados()
+            perfil = dados['usuarios'].get(str(conta_id))
+            av = next((item for item in dados['avaliacoes'].get(str(conta_id), [])
+                       if item.get('id') == avaliacao_id), None)
+            if not av or not perfil:
+                return jsonify({'erro': 'Avaliação não encontrada'}), 404
+            medidas_salvas = av.get('medidas') or {}
+            atuais = {campo: para_float(medidas_salvas.get(campo)) for campo in CAMPOS_EDITAVEIS}
+            atuais['altura'] = atuais['altura'] or float(perfil['altura'])
+            anteriores = av.get('resultados')
+
+        alteradas = {campo: valor for campo, valor in valores.items() if valor != atuais[campo]}
+        if not alteradas:
+            return responder({'id': avaliacao_id, 'medidas': {}, 'resultados': {}, 'removidos': []})
+
+        try:
+            avaliacao = Avaliacao(
+                data=date.fromisoformat(str(av['data'])[:10]),
+                medidas=Medidas(**{**atuais, **alteradas})
+            )
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+
+        usuario = usuario_do_perfil(perfil)
+        if anteriores:
+            resultados = AnalisadorAvaliacao.recalcular_avaliacao(avaliacao, usuario, anteriores, alteradas)
+        else:
+            resultados = AnalisadorAvaliacao.processar_avaliacao(avaliacao, usuario)
+        resultados = AnalisadorAvaliacao.serializar_resultados(resultados)
+
+        anteriores = anteriores or {}
+        alterados = {chave: valor for chave, valor in resultados.items()
+                     if chave not in anteriores or anteriores[chave] != valor}
+        removidos = [chave for chave in anteriores if chave not in resultados]
+
+        if USE_DATABASE:
+            db.atualizar_medidas(conta_id, int(avaliacao_id), alteradas, resultados,
+                                 alterados, removidos, AnalisadorAvaliacao.VERSAO_CALCULO)
+        else:
+            caminho = ['avaliacoes', str(conta_id), {'id': avaliacao_id}]
+            if isinstance(av.get('resultados'), dict):
+                operacoes_resultados = [('mesclar', caminho + ['resultados'], alterados)]
+                operacoes_resultados += [('del', caminho + ['resultados', chave]) for chave in removidos]
+            else:
+                operacoes_resultados = [('set', caminho + ['resultados'], resultados)]
+            registrar_alteracao(('mesclar', caminho + ['medidas'], {campo: novas[campo] for campo in alteradas}),
+                                *operacoes_resultados, versionar(conta_id, avaliacao_id))
+
+        return responder({'id': avaliacao_id, 'medidas': {campo: novas[campo] for campo in alteradas},
+                          'resultados': alterados, 'removidos': removidos})
+
+    except Exception as e:
+        print(f"Erro ao editar avaliação: {e}")
+        print(traceback.format_exc())
+        return jsonify({'erro': f'Erro ao editar avaliação: {str(e)}'}), 500
+
+
 # ===== ROTAS ADMIN =====
 @app.route('/api/admin/check', methods=['GET'])
 @requer_login
@@ -511,131 +1172,171 @@ def check_admin():
     return jsonify({'is_admin': is_admin()})
 
 
+def pagina_admin(tabela, consulta):
+    """Uma página da tabela no painel admin, com o total filtrado e o cursor da seguinte"""
+    if USE_DATABASE:
+        linhas, total, exato = db.consultar_tabela(tabela, consulta)
+    else:
+        # Sincroniza o cache (e o índice) com escritas de outros processos
+        carregar_dados()
+        linhas, total, exato = indice_admin.consultar(tabela, consulta)
+    itens, proximo_cursor = paginar(linhas, tabela, consulta)
+    return {
+        'tabela': tabela,
+        'itens': itens,
+        'total': total,
+        'total_exato': exato,
+        'proximo_cursor': proximo_cursor,
+        'page': consulta['pagina'],
+        'page_size': consulta['tamanho'],
+        'sort': ('-' if consulta['decrescente'] else '') + consulta['ordem'],
+    }
+
+
 @app.route('/api/admin/database', methods=['GET'])
 @requer_login
 def admin_database():
-    """Retorna dados completos do database (apenas admin)"""
+    """
+    Navega pelas tabelas do database, uma página por vez (apenas admin).
+    
+    table=contas|usuarios|avaliacoes, com page, page_size, sort e filtros
+    (ver web/consulta_admin.py); table=all devolve a primeira página de cada.
+    """
     if not is_admin():
         return jsonify({'erro': 'Acesso negado'}), 403
     
     table = request.args.get('table', 'all')  # all, contas, usuarios, avaliacoes
+    if table != 'all' and table not in TABELAS_ADMIN:
+        return jsonify({'erro': f"Parâmetro table deve ser all ou um de: {', '.join(TABELAS_ADMIN)}"}), 400
     
     try:
-        if USE_DATABASE:
-            # Implementar consulta ao PostgreSQL por tabela
-            with db.get_db_connection() as conn:
-                with conn.cursor() as cur:
-                    result = {}
-                    
-                    if table == 'all' or table == 'contas':
-                        cur.execute("SELECT id, nome, email FROM contas ORDER BY id")
-                        result['contas'] = cur.fetchall()
-                    
-                    if table == 'all' or table == 'usuarios':
-                        cur.execute("""
-                            SELECT u.*, c.nome 
-                            FROM usuarios u 
-                            JOIN contas c ON u.conta_id = c.id 
-                            ORDER BY u.id
-                        """)
-                        result['usuarios'] = cur.fetchall()
-                    
-                    if table == 'all' or table == 'avaliacoes':
-                        cur.execute("""
-                            SELECT a.*, c.nome 
-                            FROM avaliacoes a 
-                            JOIN usuarios u ON a.usuario_id = u.id 
-                            JOIN contas c ON u.conta_id = c.id 
-                            ORDER BY a.data DESC 
-                            LIMIT 100
-                        """)
-                        result['avaliacoes'] = cur.fetchall()
-                    
-                    # Se for tabela específica, retornar array direto
-                    if table != 'all':
-                        return jsonify(result.get(table, []))
-                    
-                    return jsonify(result)
-        else:
-            dados = carregar_dados()
-            
-            # Filtrar por tabela se necessário
-            if table == 'contas':
-                contas_safe = {}
-                for nome, conta in dados.get('contas', {}).items():
-                    conta_copy = conta.copy()
-                    if 'senha_hash' in conta_copy:
-                        conta_copy['senha_hash'] = '***HIDDEN***'
-                    contas_safe[nome] = conta_copy
-                return jsonify(contas_safe)
-            
-            elif table == 'usuarios':
-                return jsonify(dados.get('usuarios', {}))
-            
-            elif table == 'avaliacoes':
-                return jsonify(dados.get('avaliacoes', {}))
-            
-            else:  # all
-                dados_safe = dados.copy()
-                if 'contas' in dados_safe:
-                    for nome, conta in dados_safe['contas'].items():
-                        if 'senha_hash' in conta:
-                            conta['senha_hash'] = '***HIDDEN***'
-                
-                return jsonify(dados_safe)
-                
+        if table != 'all':
+            return responder(pagina_admin(table, ler_consulta(request.args, table)))
+        
+        # Filtros que não se aplicam a uma das tabelas são ignorados nela
+        return responder({
+            tabela: pagina_admin(tabela, ler_consulta(request.args, tabela, estrito=False))
+            for tabela in TABELAS_ADMIN
+        })
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
     except Exception as e:
         print(f"Erro ao carregar database: {e}")
         print(traceback.format_exc())
         return jsonify({'erro': str(e)}), 500
 
 
+@app.route('/api/admin/export', methods=['GET'])
+@requer_login
+def admin_export():
+    """
+    Exporta uma tabela inteira (format=ndjson|csv, table=contas|usuarios|avaliacoes,
+    resultados=1 para incluir os resultados calculados), apenas admin.
+    
+    O arquivo é gerado e enviado em partes à medida que as linhas são lidas.
+    """
+    if not is_admin():
+        return jsonify({'erro': 'Acesso negado'}), 403
+    
+    formato = request.args.get('format', 'ndjson')
+    tabela = request.args.get('table', 'avaliacoes')
+    resultados = request.args.get('resultados') in ('1', 'true')
+    if formato not in FORMATOS_EXPORTACAO:
+        return jsonify({'erro': f"Parâmetro format deve ser um de: {', '.join(FORMATOS_EXPORTACAO)}"}), 400
+    try:
+        colunas = colunas_exportacao(tabela, resultados)
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    
+    if USE_DATABASE:
+        lotes = db.exportar_tabela(tabela, resultados, TAMANHO_LOTE_EXPORTACAO)
+        if 'resultados' in colunas:
+            lotes = (completar_resultados(lote) for lote in lotes)
+    else:
+        lotes = em_lotes(linhas_json(tabela), TAMANHO_LOTE_EXPORTACAO)
+    
+    resposta = app.response_class(
+        exportar(lotes, formato, colunas, app.json.default),
+        content_type=FORMATOS_EXPORTACAO[formato]
+    )
+    resposta.headers['Content-Disposition'] = \
+        f'attachment; filename="{tabela}-{date.today():%Y%m%d}.{formato}"'
+    resposta.headers['Cache-Control'] = 'no-store'
+    # Proxies (nginx) repassam cada parte sem acumular a resposta
+    resposta.headers['X-Accel-Buffering'] = 'no'
+    return resposta
+
+
 @app.route('/api/admin/stats', methods=['GET'])
 @requer_login
 def admin_stats():
-    """Retorna estatísticas do sistema (apenas admin)"""
+    """
+    Retorna estatísticas do sistema (apenas admin).
+    
+    Totais, avaliações recentes, usuários ativos e gordura média por sexo saem
+    de contadores mantidos a cada escrita (web/estatisticas.py): o custo não
+    depende do tamanho das tabelas.
+    """
     if not is_admin():
         return jsonify({'erro': 'Acesso negado'}), 403
     
+    hoje = date.today()
     try:
         if USE_DATABASE:
-            with db.get_db_connection() as conn:
-                with conn.cursor() as cur:
-                    # Contar contas
-                    cur.execute("SELECT COUNT(*) FROM contas")
-                    total_contas = cur.fetchone()['count']
-                    
-                    # Contar usuários
-                    cur.execute("SELECT COUNT(*) FROM usuarios")
-                    total_usuarios = cur.fetchone()['count']
-                    
-                    # Contar avaliações
-                    cur.execute("SELECT COUNT(*) FROM avaliacoes")
-                    total_avaliacoes = cur.fetchone()['count']
-                    
-                    return jsonify({
-                        'total_contas': total_contas,
-                        'total_usuarios': total_usuarios,
-                        'total_avaliacoes': total_avaliacoes,
-                        'modo': 'PostgreSQL'
-                    })
+            janela = dias_ativos(hoje)
+            contadores, por_data = db.ler_estatisticas(janela[-1], janela[0])
+            resumo = {**resumir(contadores, por_data, hoje), 'modo': TIPO_BANCO}
         else:
-            dados = carregar_dados()
-            total_contas = len(dados.get('contas', {}))
-            total_usuarios = len(dados.get('usuarios', {}))
-            total_avaliacoes = sum(len(avs) for avs in dados.get('avaliacoes', {}).values())
-            
-            return jsonify({
-                'total_contas': total_contas,
-                'total_usuarios': total_usuarios,
-                'total_avaliacoes': total_avaliacoes,
-                'modo': 'JSON'
-            })
+            # Sincroniza o cache (e os contadores) com escritas de outros processos
+            carregar_dados()
+            resumo = {**estatisticas_json.resumo(hoje), 'modo': 'JSON'}
+        
+        # ETag (fraca) só dos contadores: os diagnósticos (pool, caches) mudam a
+        # cada requisição e não invalidam a versão do cliente
+        etag = etag_versao(*sorted(resumo.items()))
+        if request.if_none_match.contains_weak(etag):
+            return nao_modificado(etag, fraca=True)
+        if USE_DATABASE:
+            resumo['pool'] = db.estatisticas_pool()
+        else:
+            resumo['cache'] = armazenamento.estatisticas()
+        resumo['analisador_cache'] = AnalisadorAvaliacao.estatisticas_cache()
+        resposta = responder(resumo)
+        resposta.set_etag(etag, weak=True)
+        resposta.headers['Cache-Control'] = CACHE_PRIVADO
+        return resposta
     except Exception as e:
         print(f"Erro ao carregar estatísticas: {e}")
         return jsonify({'erro': str(e)}), 500
 
 
+@app.route('/api/admin/cohorts', methods=['GET'])
+@requer_login
+def admin_cohorts():
+    """
+    Distribuições por coorte - métrica, sexo, faixa etária e mês (apenas admin).
+    
+    Filtros metricas, sexo, faixa, from e to (AAAA-MM) e group (dimensões
+    mantidas). Sai de agregados mantidos a cada escrita (web/coortes.py): a
+    leitura não percorre as avaliações.
+    """
+    if not is_admin():
+        return jsonify({'erro': 'Acesso negado'}), 403
+    
+    try:
+        consulta = ler_consulta_coortes(request.args)
+        if USE_DATABASE:
+            return condicional(responder(montar(db.ler_coortes(consulta), consulta)))
+        # Sincroniza o cache (e as coortes) com escritas de outros processos
+        carregar_dados()
+        return condicional(responder(coortes_json.consultar(consulta)))
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        print(f"Erro ao carregar coortes: {e}")
+        return jsonify({'erro': str(e)}), 500
+
+
 if __name__ == '__main__':
     import webbrowser
     import threading
@@ -643,7 +1344,7 @@ if __name__ == '__main__':
     print("=" * 60)
     print("🏋️ SISTEMA DE MEDIDAS CORPORAIS")
     print("=" * 60)
-    print(f"\n🗄️  Modo: {'PostgreSQL' if USE_DATABASE else 'JSON (Desenvolvimento)'}")
+    print(f"\n🗄️  Modo: {TIPO_BANCO if USE_DATABASE else 'JSON (Desenvolvimento)'}")
     print("\n🌐 Servidor iniciado em: http://localhost:5000")
     print("\nPressione Ctrl+C para encerrar\n")
     
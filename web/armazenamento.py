@@ -0,0 +1,499 @@
+"""
+Armazenamento JSON com journal append-only (modo desenvolvimento)
+
+O estado completo fica em um snapshot (data/usuarios.json, mesmo formato de
+sempre: contas/usuarios/avaliacoes). Cada alteração é gravada como uma linha
+compacta no journal (data/usuarios.journal), e de tempos em tempos uma thread
+em segundo plano consolida snapshot + journal em um novo snapshot.
+
+Formato de cada linha do journal (uma transação):
+    [["set", ["contas", "nome"], {...}], ["del", ["usuarios", "1"]], ...]
+
+Operações:
+    set      - define o valor no caminho (cria dicionários intermediários)
+    del      - remove a chave do caminho (se existir)
+    inserir  - insere o valor na posição 0 da lista no caminho (cria a lista)
+    estender - insere cada item da lista valor na posição 0, em ordem (o mesmo
+               que um inserir por item, com uma única cópia da lista)
+    remover  - remove da lista no caminho os itens com 'id' igual ao valor
+    mesclar  - atualiza o dicionário no caminho com as chaves do valor
+    versionar - incrementa o contador de versões no caminho e registra a nova
+                versão para o item de id igual ao valor (sincronização incremental)
+
+Segmentos de caminho são chaves de dicionário (str) ou seletores {"id": valor},
+que localizam um item de lista pelo campo 'id'.
+
+Gerações: a primeira linha do journal é um cabeçalho {"geracao": N}, e o
+snapshot guarda em "_geracao_journal" a geração do último journal consolidado
+nele. Um journal de geração já consolidada (queda entre a troca do snapshot e
+a criação do journal novo) é ignorado na leitura, e não reaplicado por cima do
+snapshot. Journals antigos, sem cabeçalho, são a geração 0.
+"""
+
+import os
+import json
+import threading
+from bisect import bisect_left, bisect_right
+
+try:
+    import fcntl
+except ImportError:  # Windows - apenas o lock entre threads
+    fcntl = None
+
+
+# Tamanho do journal (bytes) a partir do qual a compactação é disparada
+LIMITE_COMPACTACAO = int(os.environ.get('JOURNAL_MAX_BYTES', 1024 * 1024))
+
+# Chave do snapshot com a geração do último journal consolidado
+CHAVE_GERACAO = '_geracao_journal'
+
+
+def estrutura_vazia():
+    """Documento inicial quando ainda não há dados"""
+    return {'contas': {}, 'usuarios': {}, 'avaliacoes': {}, 'sincronizacao': {}}
+
+
+def _resolver(dados, caminho, criar=False):
+    """Percorre o caminho e retorna o contêiner final (ou None se não existir)"""
+    atual = dados
+    for segmento in caminho:
+        if isinstance(segmento, dict):
+            alvo = segmento.get('id')
+            atual = next((item for item in atual if item.get('id') == alvo), None) \
+                if isinstance(atual, list) else None
+        elif isinstance(atual, dict):
+            if segmento not in atual:
+                if not criar:
+                    return None
+                atual[segmento] = {}
+            atual = atual[segmento]
+        else:
+            return None
+        if atual is None:
+            return None
+    return atual
+
+
+def aplicar_operacao(dados, operacao):
+    """Aplica uma operação do journal sobre o documento em memória"""
+    op, caminho, valor = (list(operacao) + [None])[:3]
+    pai = _resolver(dados, caminho[:-1], criar=(op in ('set', 'inserir', 'estender', 'versionar')))
+    chave = caminho[-1]
+
+    if pai is None:
+        return
+
+    if isinstance(chave, dict):
+        # Seletor {"id": ...} como último segmento: substitui/remove o item da lista
+        if not isinstance(pai, list):
+            return
+        indices = [i for i, item in enumerate(pai) if item.get('id') == chave.get('id')]
+        if op == 'set':
+            for i in indices:
+                pai[i] = valor
+        elif op == 'del':
+            pai[:] = [item for item in pai if item.get('id') != chave.get('id')]
+        elif op == 'mesclar':
+            for i in indices:
+                pai[i].update(valor)
+        return
+
+    if op == 'set':
+        pai[chave] = valor
+    elif op == 'del':
+        pai.pop(chave, None)
+    elif op == 'inserir':
+        pai[chave] = [valor] + pai.get(chave, [])
+    elif op == 'estender':
+        pai[chave] = valor[::-1] + pai.get(chave, [])
+    elif op == 'remover':
+        if isinstance(pai.get(chave), list):
+            pai[chave] = [item for item in pai[chave] if item.get('id') != valor]
+    elif op == 'mesclar':
+        if isinstance(pai.get(chave), dict):
+            pai[chave].update(valor)
+    elif op == 'versionar':
+        # Reproduzida na ordem do journal, a contagem é a mesma em todo processo
+        versoes = pai.setdefault(chave, {'versao': 0, 'itens': {}})
+        versoes['versao'] += 1
+        versoes['itens'][valor] = versoes['versao']
+    else:
+        raise ValueError(f"Operação de journal desconhecida: {op}")
+
+
+def _assinatura(caminho):
+    """Identifica a versão de um arquivo por (inode, tamanho, mtime)"""
+    try:
+        st = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _prefixo(caminho):
+    """Parte do caminho formada por chaves de dicionário (antes do primeiro seletor)"""
+    prefixo = []
+    for segmento in caminho:
+        if not isinstance(segmento, str):
+            break
+        prefixo.append(segmento)
+    return tuple(prefixo)
+
+
+class ArmazenamentoJSON:
+    """
+    Snapshot JSON + journal append-only com compactação em segundo plano.
+
+    O documento carregado fica em cache no processo e só é relido quando o
+    snapshot ou o journal mudam (inode, tamanho ou mtime). Se apenas o journal
+    cresceu (escrita de outro processo), só as linhas novas são reproduzidas.
+    As escritas deste processo atualizam o cache no lugar.
+
+    O documento retornado por carregar() é compartilhado: não deve ser
+    modificado pelo chamador (use registrar()).
+
+    Listas consultadas por faixa (ex.: avaliações por data) ganham um índice
+    ordenado em memória, descartado quando uma operação toca o mesmo caminho;
+    estruturas sobre o documento inteiro (derivado) são descartadas a cada operação.
+    Estruturas mantidas incrementalmente (ex.: contadores, índice do painel
+    admin) usam observar().
+    """
+
+    def __init__(self, arquivo_snapshot, arquivo_journal=None, limite_compactacao=LIMITE_COMPACTACAO):
+        self.arquivo_snapshot = os.path.abspath(arquivo_snapshot)
+        base, _ = os.path.splitext(self.arquivo_snapshot)
+        self.arquivo_journal = arquivo_journal or base + '.journal'
+        self.arquivo_lock = base + '.lock'
+        self.limite_compactacao = limite_compactacao
+        self._lock = threading.RLock()
+        self._compactando = False
+
+        # Cache do documento
+        self._cache = None
+        self._assinatura_snapshot = None
+        self._assinatura_journal = None
+        self._offset_journal = 0
+        # Geração do journal consolidado no snapshot (None: snapshot sem registro)
+        # e do journal em disco (None: ainda não existe)
+        self._geracao_snapshot = None
+        self._geracao_journal = None
+        self.acertos = 0
+        self.falhas = 0
+        self.incrementais = 0
+
+        # Índices ordenados: (caminho, campo) -> (chaves, itens), em ordem crescente
+        self._indices = {}
+
+        # Mantêm estruturas próprias a partir das operações (ver observar)
+        self._observadores = []
+
+    # ===== LOCKS =====
+    def _travar(self, exclusivo):
+        """Adquire o lock entre threads e, se disponível, entre processos"""
+        self._lock.acquire()
+        if fcntl is None:
+            return None
+        try:
+            os.makedirs(os.path.dirname(self.arquivo_lock), exist_ok=True)
+            arquivo = open(self.arquivo_lock, 'a')
+            fcntl.flock(arquivo, fcntl.LOCK_EX if exclusivo else fcntl.LOCK_SH)
+            return arquivo
+        except Exception:
+            self._lock.release()
+            raise
+
+    def _destravar(self, arquivo):
+        if arquivo is not None:
+            fcntl.flock(arquivo, fcntl.LOCK_UN)
+            arquivo.close()
+        self._lock.release()
+
+    # ===== LEITURA =====
+    def _ler_snapshot(self):
+        if os.path.exists(self.arquivo_snapshot):
+            with open(self.arquivo_snapshot, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return estrutura_vazia()
+
+    def _aplicar(self, dados, operacao):
+        """Aplica a operação e descarta os índices do caminho afetado"""
+        # Recargas completas montam outro documento: os observadores são avisados no fim
+        observadores = self._observadores if dados is self._cache else ()
+        for observador in observadores:
+            observador.antes(dados, operacao)
+        aplicar_operacao(dados, operacao)
+        afetado = _prefixo(operacao[1])
+        for chave in list(self._indices):
+            caminho = chave[0]
+            if caminho[:len(afetado)] == afetado[:len(caminho)]:
+                del self._indices[chave]
+        for observador in observadores:
+            observador.aplicada(dados, operacao)
+
+    def _reproduzir_journal(self, dados, inicio=0):
+        """
+        Aplica as transações do journal a partir do offset; retorna o offset
+        final (o fim da última linha completa: uma linha interrompida fica de
+        fora e é descartada pela próxima escrita)
+        """
+        if not os.path.exists(self.arquivo_journal):
+            self._geracao_journal = None
+            return 0
+        if inicio == 0:
+            self._geracao_journal = 0  # Sem cabeçalho: journal antigo
+        posicao = inicio
+        with open(self.arquivo_journal, 'rb') as f:
+            f.seek(inicio)
+            for linha in f:
+                if not linha.endswith(b'\n'):
+                    break  # Escrita interrompida - ignora a transação incompleta
+                posicao += len(linha)
+                if not linha.strip():
+                    continue
+                transacao = json.loads(linha)
+                if isinstance(transacao, dict):
+                    self._geracao_journal = transacao.get('geracao', 0)
+                elif not self._journal_consolidado():
+                    for operacao in transacao:
+                        self._aplicar(dados, operacao)
+        return posicao
+
+    def _journal_consolidado(self):
+        """O journal em disco já está contido no snapshot (não deve ser reaplicado)"""
+        return self._geracao_snapshot is not None and self._geracao_journal is not None \
+            and self._geracao_journal <= self._geracao_snapshot
+
+    def _novo_journal(self, geracao):
+        """Substitui o journal por um vazio (só o cabeçalho) da geração informada"""
+        cabecalho = (json.dumps({'geracao': geracao}) + '\n').encode('utf-8')
+        temporario = self.arquivo_journal + '.tmp'
+        with open(temporario, 'wb') as f:
+            f.write(cabecalho)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.arquivo_journal)
+        self._geracao_journal = geracao
+        self._offset_journal = len(cabecalho)
+        self._assinatura_journal = _assinatura(self.arquivo_journal)
+
+    def _sincronizar(self):
+        """Garante que o cache reflete os arquivos em disco (chamar com lock)"""
+        snapshot = _assinatura(self.arquivo_snapshot)
+        journal = _assinatura(self.arquivo_journal)
+
+        if self._cache is not None and snapshot == self._assinatura_snapshot:
+            if journal == self._assinatura_journal:
+                self.acertos += 1
+                return self._cache
+
+            # Journal só cresceu: reproduz apenas o trecho novo
+            anterior = self._assinatura_journal
+            if journal is not None and journal[1] >= self._offset_journal and \
+                    (anterior is None or anterior[0] == journal[0]):
+                self._offset_journal = self._reproduzir_journal(self._cache, self._offset_journal)
+                self._assinatura_journal = journal
+                self.incrementais += 1
+                return self._cache
+
+        self._indices.clear()
+        dados = self._ler_snapshot()
+        self._geracao_snapshot = dados.pop(CHAVE_GERACAO, None)
+        for chave, valor in estrutura_vazia().items():
+            dados.setdefault(chave, valor)
+        self._offset_journal = self._reproduzir_journal(dados)
+        self._cache = dados
+        self._assinatura_snapshot = snapshot
+        self._assinatura_journal = journal
+        self.falhas += 1
+        for observador in self._observadores:
+            observador.carregar(dados)
+        return dados
+
+    def carregar(self):
+        """Retorna o documento completo (snapshot + journal), via cache"""
+        lock = self._travar(exclusivo=False)
+        try:
+            return self._sincronizar()
+        finally:
+            self._destravar(lock)
+
+    def estatisticas(self):
+        """Contadores do cache (acertos, recargas completas e incrementais)"""
+        total = self.acertos + self.falhas + self.incrementais
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'incrementais': self.incrementais,
+            'taxa_acerto': round(self.acertos / total, 4) if total else None,
+            'journal_bytes': self._offset_journal
+        }
+
+    def indice_ordenado(self, caminho, campo='data'):
+        """
+        Índice da lista no caminho, ordenado por campo (crescente).
+
+        Returns:
+            Tupla (chaves, itens) - listas paralelas, para busca com bisect
+        """
+        lock = self._travar(exclusivo=False)
+        try:
+            self._sincronizar()
+            chave = (_prefixo(caminho), campo)
+            indice = self._indices.get(chave)
+            if indice is None:
+                lista = _resolver(self._cache, caminho) or []
+                # Listas guardam a mais recente primeiro: em empates, mantém essa ordem
+                itens = sorted(reversed(lista), key=lambda item: str(item.get(campo) or ''))
+                indice = ([str(item.get(campo) or '') for item in itens], itens)
+                self._indices[chave] = indice
+            return indice
+        finally:
+            self._destravar(lock)
+
+    def observar(self, observador):
+        """
+        Registra um observador das alterações do documento em cache.
+
+        O observador implementa carregar(dados), chamado quando o documento é
+        (re)carregado por inteiro, e antes(dados, operacao) e
+        aplicada(dados, operacao), chamados antes e depois de cada operação
+        aplicada ao cache - deste processo ou de outro, lida do journal. As
+        chamadas acontecem com o lock do armazenamento.
+        """
+        lock = self._travar(exclusivo=False)
+        try:
+            self._observadores.append(observador)
+            if self._cache is not None:
+                observador.carregar(self._cache)
+        finally:
+            self._destravar(lock)
+
+    def derivado(self, nome, construir):
+        """
+        Estrutura calculada sobre o documento inteiro (ex.: índice do painel
+        admin), mantida em cache até a próxima alteração.
+
+        Args:
+            nome: Identifica a estrutura
+            construir: Função (documento) -> estrutura; não deve modificar o documento
+        """
+        lock = self._travar(exclusivo=False)
+        try:
+            self._sincronizar()
+            # Caminho vazio: qualquer operação descarta a estrutura
+            chave = ((), nome)
+            estrutura = self._indices.get(chave)
+            if estrutura is None:
+                estrutura = construir(self._cache)
+                self._indices[chave] = estrutura
+            return estrutura
+        finally:
+            self._destravar(lock)
+
+    def pagina(self, caminho, limite, antes=None, de=None, ate=None, campo='data'):
+        """
+        Itens da lista no caminho em ordem decrescente de campo, paginados por cursor.
+
+        Args:
+            antes: Cursor - só itens com campo < antes
+            de, ate: Intervalo inclusivo do campo
+
+        Returns:
+            Tupla (itens, proximo_cursor); proximo_cursor é None na última página
+        """
+        chaves, itens = self.indice_ordenado(caminho, campo)
+        inicio = bisect_left(chaves, de) if de else 0
+        fim = len(chaves)
+        if antes:
+            fim = bisect_left(chaves, antes, inicio, fim)
+        if ate:
+            fim = min(fim, bisect_right(chaves, ate, inicio))
+        if fim <= inicio:
+            return [], None
+
+        corte = max(inicio, fim - limite)
+        # O cursor é a própria chave: itens empatados não são divididos entre páginas
+        corte = bisect_left(chaves, chaves[corte], inicio, corte + 1)
+        proximo = chaves[corte] if corte > inicio else None
+        return itens[corte:fim][::-1], proximo
+
+    # ===== ESCRITA =====
+    def registrar(self, *operacoes):
+        """Acrescenta uma transação (uma ou mais operações) ao journal"""
+        linha = json.dumps(
+            [list(op) for op in operacoes],
+            ensure_ascii=False, separators=(',', ':'), default=str
+        ) + '\n'
+        bruto = linha.encode('utf-8')
+
+        lock = self._travar(exclusivo=True)
+        try:
+            dados = self._sincronizar()
+            os.makedirs(os.path.dirname(self.arquivo_journal), exist_ok=True)
+            # Sem journal, ou com um já consolidado no snapshot: começa a próxima geração
+            if self._offset_journal == 0 or self._journal_consolidado():
+                self._novo_journal(max(self._geracao_snapshot or 0, self._geracao_journal or 0) + 1)
+            # Restos de uma escrita interrompida depois da última linha completa:
+            # sem o corte, a nova transação seria emendada neles
+            journal = _assinatura(self.arquivo_journal)
+            if journal is not None and journal[1] > self._offset_journal:
+                os.truncate(self.arquivo_journal, self._offset_journal)
+            with open(self.arquivo_journal, 'ab') as f:
+                f.write(bruto)
+                f.flush()
+                os.fsync(f.fileno())
+                tamanho = f.tell()
+
+            # Atualiza o cache com a mesma representação gravada em disco
+            for operacao in json.loads(linha):
+                self._aplicar(dados, operacao)
+            self._offset_journal = tamanho
+            self._assinatura_journal = _assinatura(self.arquivo_journal)
+        finally:
+            self._destravar(lock)
+
+        if tamanho >= self.limite_compactacao:
+            self.compactar_em_segundo_plano()
+        return tamanho
+
+    # ===== COMPACTAÇÃO =====
+    def compactar(self):
+        """
+        Consolida snapshot + journal em um novo snapshot e inicia um journal
+        vazio da geração seguinte. O snapshot registra a geração consolidada:
+        uma queda antes do journal novo não reaplica o antigo.
+        """
+        lock = self._travar(exclusivo=True)
+        try:
+            dados = self._sincronizar()
+            geracao = max(self._geracao_snapshot or 0, self._geracao_journal or 0)
+            temporario = self.arquivo_snapshot + '.tmp'
+            os.makedirs(os.path.dirname(self.arquivo_snapshot), exist_ok=True)
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump({**dados, CHAVE_GERACAO: geracao}, f, ensure_ascii=False, indent=2, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporario, self.arquivo_snapshot)
+            self._geracao_snapshot = geracao
+            self._assinatura_snapshot = _assinatura(self.arquivo_snapshot)
+            self._novo_journal(geracao + 1)
+            return dados
+        finally:
+            self._destravar(lock)
+
+    def compactar_em_segundo_plano(self):
+        """Dispara a compactação em uma thread daemon (uma por vez)"""
+        with self._lock:
+            if self._compactando:
+                return
+            self._compactando = True
+
+        def executar():
+            try:
+                self.compactar()
+            except Exception as e:
+                print(f"⚠️ Erro ao compactar journal: {e}")
+            finally:
+                self._compactando = False
+
+        threading.Thread(target=executar, daemon=True).start()
@@ -0,0 +1,545 @@
+"""
+Consulta paginada das tabelas no painel admin
+
+Parâmetros da query string (GET /api/admin/database?table=...):
+    after                  - cursor da página seguinte (proximo_cursor da anterior)
+    page, page_size        - página (a partir de 1) e linhas por página
+    sort                   - campo de ordenação; '-campo' para decrescente
+    nome                   - prefixo do nome da conta (sem diferenciar maiúsculas)
+    sexo                   - M ou F
+    from, to               - intervalo inclusivo de datas da avaliação (AAAA-MM-DD)
+    <campo>_min, _max      - intervalo inclusivo de um campo numérico
+
+A paginação é por chave (keyset): o cursor leva o campo de ordenação e a
+chave da tabela da última linha entregue, e a página seguinte começa depois
+dela, sem percorrer as anteriores. page continua aceito (OFFSET) para saltar
+a uma página próxima do início; com after, é ignorado.
+
+No modo banco a consulta vira SQL (db.consultar_tabela), apoiada por índices;
+no modo JSON é resolvida sobre um IndiceAdmin, que observa as operações
+aplicadas ao documento em cache e mantém as ordenações e os índices dos
+filtros a cada uma, sem remontar nada.
+"""
+
+import base64
+import binascii
+import json
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from web.estatisticas import ObservadorContas
+
+
+LINHAS_POR_PAGINA = 50
+MAXIMO_LINHAS_POR_PAGINA = 200
+
+# Com filtros, o total é contado até aqui; acima disso é uma estimativa
+MAXIMO_CONTAGEM = 10000
+
+# Modo JSON: um filtro que deixa até 1/FATOR_SELETIVO das linhas do trecho é
+# resolvido pelo seu índice (candidatos ordenados); senão, o trecho é percorrido
+FATOR_SELETIVO = 8
+
+# Campos de cada tabela: ordenáveis, com intervalo (_min/_max) e ordenação padrão
+TABELAS_ADMIN = {
+    'contas': {
+        'ordenacao': ('id', 'nome', 'created_at'),
+        'faixas': (),
+        'filtros': ('nome',),
+        'padrao': 'id',
+    },
+    'usuarios': {
+        'ordenacao': ('conta_id', 'nome', 'data_nascimento', 'altura'),
+        'faixas': ('altura',),
+        'filtros': ('nome', 'sexo'),
+        'padrao': 'conta_id',
+    },
+    'avaliacoes': {
+        'ordenacao': ('id', 'data', 'nome', 'peso', 'imc', 'gordura', 'massa_magra'),
+        'faixas': ('peso', 'imc', 'gordura', 'massa_magra'),
+        'filtros': ('nome', 'sexo', 'from', 'to'),
+        'padrao': '-data',
+    },
+}
+
+# Chave de desempate (ordem estável entre páginas)
+CHAVE_TABELA = {'contas': 'id', 'usuarios': 'conta_id', 'avaliacoes': 'id'}
+
+MEDIDAS_ADMIN = ('altura', 'peso', 'pescoco', 'ombros', 'peitoral', 'cintura', 'abdomen', 'quadril',
+                 'braco_relaxado', 'braco_contraido', 'antebraco', 'coxa', 'panturrilha')
+
+
+def ler_consulta(args, tabela: str, estrito: bool = True) -> Dict[str, Any]:
+    """
+    Lê paginação, ordenação e filtros da query string para uma tabela.
+
+    Args:
+        args: request.args
+        tabela: 'contas', 'usuarios' ou 'avaliacoes'
+        estrito: Recusa filtros e ordenação que a tabela não tem (com False,
+            são ignorados - usado em table=all)
+
+    Returns:
+        Dicionário com pagina, tamanho, cursor ((valor, chave) da última linha
+        da página anterior, ou None), ordem, decrescente, nome, sexo, de, ate e
+        faixas ({campo: (minimo, maximo)})
+
+    Raises:
+        ValueError: Parâmetro inválido (ou que não se aplica à tabela)
+    """
+    spec = TABELAS_ADMIN[tabela]
+
+    def inteiro(nome, padrao):
+        valor = args.get(nome)
+        if not valor:
+            return padrao
+        if not valor.isdigit() or int(valor) < 1:
+            raise ValueError(f'Parâmetro {nome} deve ser um inteiro positivo')
+        return int(valor)
+
+    def aplicavel(nome):
+        if args.get(nome) in (None, ''):
+            return False
+        if nome in spec['filtros']:
+            return True
+        if estrito:
+            raise ValueError(f'Filtro {nome} não se aplica a {tabela}')
+        return False
+
+    consulta = {
+        'pagina': inteiro('page', 1),
+        'tamanho': min(inteiro('page_size', LINHAS_POR_PAGINA), MAXIMO_LINHAS_POR_PAGINA),
+        'cursor': _ler_cursor(args.get('after')) if args.get('after') else None,
+        'nome': None, 'sexo': None, 'de': None, 'ate': None, 'faixas': {},
+    }
+
+    ordem = args.get('sort') or spec['padrao']
+    if ordem.lstrip('-') not in spec['ordenacao']:
+        if estrito:
+            raise ValueError(f"Parâmetro sort deve ser um de: {', '.join(spec['ordenacao'])}")
+        ordem = spec['padrao']
+    consulta['ordem'] = ordem.lstrip('-')
+    consulta['decrescente'] = ordem.startswith('-')
+
+    if aplicavel('nome'):
+        consulta['nome'] = args['nome'].strip()
+    if aplicavel('sexo'):
+        if args['sexo'] not in ('M', 'F'):
+            raise ValueError("Parâmetro sexo deve ser 'M' ou 'F'")
+        consulta['sexo'] = args['sexo']
+    for param, chave in (('from', 'de'), ('to', 'ate')):
+        if aplicavel(param):
+            try:
+                date.fromisoformat(args[param])
+            except ValueError:
+                raise ValueError(f'Parâmetro {param} deve estar no formato AAAA-MM-DD')
+            consulta[chave] = args[param]
+
+    for nome in args:
+        campo, _, limite = nome.rpartition('_')
+        if limite not in ('min', 'max') or args.get(nome) in (None, ''):
+            continue
+        if campo not in spec['faixas']:
+            if estrito:
+                raise ValueError(f'Filtro {nome} não se aplica a {tabela}')
+            continue
+        try:
+            valor = float(args[nome])
+        except ValueError:
+            raise ValueError(f'Parâmetro {nome} deve ser numérico')
+        minimo, maximo = consulta['faixas'].get(campo, (None, None))
+        consulta['faixas'][campo] = (valor, maximo) if limite == 'min' else (minimo, valor)
+    if consulta['cursor']:
+        consulta['pagina'] = 1
+    return consulta
+
+
+# ===== CURSOR =====
+
+def _serializavel(valor):
+    if isinstance(valor, datetime):
+        return valor.isoformat(sep=' ')
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def _codificar_cursor(valor, chave) -> str:
+    texto = json.dumps([_serializavel(valor), _serializavel(chave)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def _ler_cursor(texto: str) -> tuple:
+    try:
+        valor, chave = json.loads(base64.urlsafe_b64decode(texto + '=' * (-len(texto) % 4)))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError('Parâmetro after inválido')
+    escalares = (str, int, float)
+    if isinstance(valor, bool) or isinstance(chave, bool) \
+            or not (valor is None or isinstance(valor, escalares)) or not isinstance(chave, (str, int)):
+        raise ValueError('Parâmetro after inválido')
+    return valor, chave
+
+
+def paginar(linhas: List[Dict[str, Any]], tabela: str, consulta: Dict[str, Any]) -> Tuple[list, Optional[str]]:
+    """
+    Separa a página do cursor da seguinte.
+
+    Args:
+        linhas: Resultado de consultar_tabela / IndiceAdmin.consultar, com até
+            uma linha além do tamanho da página
+
+    Returns:
+        Tupla (linhas da página, cursor da página seguinte ou None na última)
+    """
+    if len(linhas) <= consulta['tamanho']:
+        return linhas, None
+    linhas = linhas[:consulta['tamanho']]
+    ultima = linhas[-1]
+    return linhas, _codificar_cursor(ultima.get(consulta['ordem']), ultima.get(CHAVE_TABELA[tabela]))
+
+
+# ===== MODO JSON =====
+
+# Ordenação auxiliar do filtro por prefixo do nome (sem diferenciar maiúsculas)
+_NOME_MINUSCULO = 'nome_minusculo'
+
+
+def _numero(valor) -> Optional[float]:
+    """Medida do documento JSON como número (o POST guarda o valor recebido)"""
+    try:
+        return float(valor) if valor not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _chave(valor) -> tuple:
+    """Chave de ordenação: valores ausentes antes de todos"""
+    return (0,) if valor is None else (1, valor)
+
+
+def _campo(linha: Dict[str, Any], campo: str):
+    if campo == _NOME_MINUSCULO:
+        nome = linha.get('nome')
+        return nome.lower() if nome is not None else None
+    return linha.get(campo)
+
+
+class IndiceAdmin(ObservadorContas):
+    """
+    Linhas das três tabelas do documento JSON, com as colunas da consulta do
+    banco, e os índices das consultas: uma ordenação por campo (criada na
+    primeira consulta que a usa), as chaves por sexo e a ordenação dos nomes
+    em minúsculas (prefixo).
+
+    Observa o ArmazenamentoJSON como os agregados de web/estatisticas.py: cada
+    operação retira as linhas do que vai mudar e as devolve recalculadas,
+    atualizando os índices no lugar (busca binária). As linhas nunca são
+    alteradas, só substituídas: consultar() pode devolvê-las sem copiar.
+    """
+
+    # Campos do perfil que aparecem nas linhas (os demais não as alteram)
+    CAMPOS_PERFIL = ('nome', 'sexo', 'data_nascimento', 'altura')
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.carregar({})
+
+    def carregar(self, dados: Dict[str, Any]) -> None:
+        """Recalcula tudo (documento carregado do disco)"""
+        with self._lock:
+            # Nome da conta (como c.nome no banco), não o nome do perfil
+            self._nomes = {str(conta.get('id')): nome for nome, conta in dados.get('contas', {}).items()}
+            super().carregar(dados)
+            for nome, conta in dados.get('contas', {}).items():
+                self._incluir('contas', self._linha_conta(nome, conta))
+
+    def _zerar(self):
+        self._linhas = {tabela: {} for tabela in TABELAS_ADMIN}
+        # Tabela -> sexo -> chaves; (tabela, campo) -> (chaves, posições, linhas)
+        self._sexos = {'usuarios': {}, 'avaliacoes': {}}
+        self._ordenacoes = {}
+        self._conta_anterior = None
+
+    # ----- Linhas -----
+
+    @staticmethod
+    def _linha_conta(nome: str, conta: Dict[str, Any]) -> Dict[str, Any]:
+        return {'id': conta.get('id'), 'nome': nome, 'created_at': conta.get('created_at')}
+
+    def _contribuicao(self, conta_id: str, avaliacoes: Optional[list] = None) -> list:
+        """Linhas (tabela, linha) do perfil e das avaliações da conta (só das avaliações dadas)"""
+        perfil = self._dados.get('usuarios', {}).get(conta_id)
+        nome = self._nomes.get(conta_id, (perfil or {}).get('nome'))
+        linhas = []
+        if avaliacoes is None:
+            if perfil is not None:
+                linhas.append(('usuarios', {
+                    'conta_id': int(conta_id), 'nome': nome, 'sexo': perfil.get('sexo'),
+                    'data_nascimento': perfil.get('data_nascimento'), 'altura': _numero(perfil.get('altura')),
+                }))
+            avaliacoes = self._dados.get('avaliacoes', {}).get(conta_id) or []
+        sexo = (perfil or {}).get('sexo')
+        for av in avaliacoes:
+            medidas = av.get('medidas') or {}
+            resultados = av.get('resultados') or {}
+            linha = {'id': av.get('id'), 'conta_id': int(conta_id), 'nome': nome, 'sexo': sexo,
+                     'data': av.get('data')}
+            linha.update((campo, _numero(medidas.get(campo))) for campo in MEDIDAS_ADMIN)
+            linha['imc'] = resultados.get('imc')
+            linha['gordura'] = resultados.get('percentual_gordura')
+            linha['massa_magra'] = resultados.get('massa_magra_kg')
+            linhas.append(('avaliacoes', linha))
+        return linhas
+
+    def _afetadas(self, conta_id: str, operacao: list, depois: bool) -> list:
+        caminho = operacao[1]
+        # As medidas também são colunas do painel
+        if caminho[0] == 'avaliacoes' and len(caminho) >= 4 and caminho[3] == 'medidas':
+            return [av for av in self._dados.get('avaliacoes', {}).get(conta_id) or []
+                    if av.get('id') == caminho[2].get('id')]
+        return super()._afetadas(conta_id, operacao, depois)
+
+    # ----- Índices -----
+
+    @staticmethod
+    def _posicao(tabela: str, campo: str, linha: Dict[str, Any]) -> tuple:
+        return (_chave(_campo(linha, campo)), _chave(linha.get(CHAVE_TABELA[tabela])))
+
+    def _incluir(self, tabela: str, linha: Dict[str, Any]) -> None:
+        chave = linha.get(CHAVE_TABELA[tabela])
+        self._remover(tabela, chave)
+        self._linhas[tabela][chave] = linha
+        if tabela in self._sexos:
+            self._sexos[tabela].setdefault(linha.get('sexo'), set()).add(chave)
+        for (nome, campo), (chaves, posicoes, linhas) in self._ordenacoes.items():
+            if nome == tabela:
+                posicao = self._posicao(tabela, campo, linha)
+                i = bisect_left(posicoes, posicao)
+                chaves.insert(i, posicao[0])
+                posicoes.insert(i, posicao)
+                linhas.insert(i, linha)
+
+    def _remover(self, tabela: str, chave) -> None:
+        linha = self._linhas[tabela].pop(chave, None)
+        if linha is None:
+            return
+        if tabela in self._sexos:
+            self._sexos[tabela].get(linha.get('sexo'), set()).discard(chave)
+        for (nome, campo), (chaves, posicoes, linhas) in self._ordenacoes.items():
+            if nome == tabela:
+                posicao = self._posicao(tabela, campo, linha)
+                i = bisect_left(posicoes, posicao)
+                if i < len(posicoes) and posicoes[i] == posicao:
+                    del chaves[i], posicoes[i], linhas[i]
+
+    def _aplicar(self, conta_id: str, contribuicao: list, sinal: int) -> None:
+        for tabela, linha in contribuicao:
+            if sinal > 0:
+                self._incluir(tabela, linha)
+            else:
+                self._remover(tabela, linha.get(CHAVE_TABELA[tabela]))
+
+    # ----- Operações -----
+
+    def antes(self, dados: Dict[str, Any], operacao: list) -> None:
+        caminho = operacao[1]
+        with self._lock:
+            if len(caminho) >= 2 and caminho[0] == 'contas' and isinstance(caminho[1], str):
+                conta = dados.get('contas', {}).get(caminho[1])
+                self._conta_anterior = conta.get('id') if conta else None
+            else:
+                super().antes(dados, operacao)
+
+    def aplicada(self, dados: Dict[str, Any], operacao: list) -> None:
+        caminho = operacao[1]
+        with self._lock:
+            if len(caminho) >= 2 and caminho[0] == 'contas' and isinstance(caminho[1], str):
+                self._conta_alterada(dados, caminho[1])
+            elif caminho and caminho[0] == 'contas':
+                self.carregar(dados)
+            else:
+                super().aplicada(dados, operacao)
+
+    def _conta_alterada(self, dados: Dict[str, Any], nome: str) -> None:
+        """Conta criada, alterada ou removida; um id novo renomeia as linhas da conta"""
+        self._dados = dados
+        id_anterior, self._conta_anterior = self._conta_anterior, None
+        conta = dados.get('contas', {}).get(nome)
+        if id_anterior is not None:
+            self._remover('contas', id_anterior)
+        if conta is not None:
+            self._incluir('contas', self._linha_conta(nome, conta))
+        anterior = str(id_anterior) if id_anterior is not None else None
+        atual = str(conta.get('id')) if conta else None
+        if anterior != atual:
+            if self._nomes.get(anterior) == nome:
+                del self._nomes[anterior]
+            if atual is not None:
+                self._nomes[atual] = nome
+            for conta_id in {anterior, atual} - {None}:
+                if conta_id in dados.get('usuarios', {}) or conta_id in dados.get('avaliacoes', {}):
+                    self._aplicar(conta_id, self._contribuicao(conta_id), 1)
+
+    # ----- Consulta -----
+
+    def ordenado(self, tabela: str, campo: str) -> Tuple[List[tuple], List[tuple], List[Dict[str, Any]]]:
+        """
+        (chaves, posições, linhas) em ordem crescente de campo, empates pela
+        chave da tabela; posições são os pares (campo, chave) dos cursores
+        """
+        with self._lock:
+            ordenacao = self._ordenacoes.get((tabela, campo))
+            if ordenacao is None:
+                itens = sorted((self._posicao(tabela, campo, linha), linha)
+                               for linha in self._linhas[tabela].values())
+                posicoes = [posicao for posicao, _ in itens]
+                ordenacao = ([posicao[0] for posicao in posicoes], posicoes, [linha for _, linha in itens])
+                self._ordenacoes[(tabela, campo)] = ordenacao
+            return ordenacao
+
+    def _candidatos(self, tabela: str, consulta: Dict[str, Any], faixas: Dict[str, tuple]) -> list:
+        """
+        Linhas de cada filtro, pelo seu índice: lista de (quantidade, função
+        que devolve as linhas), uma por filtro
+        """
+        candidatos = []
+        if consulta['sexo'] is not None:
+            chaves = self._sexos[tabela].get(consulta['sexo'], set())
+            candidatos.append((len(chaves), lambda chaves=chaves, linhas=self._linhas[tabela]:
+                               [linhas[chave] for chave in chaves]))
+        intervalos = dict(faixas)
+        if consulta['nome']:
+            prefixo = consulta['nome'].lower()
+            intervalos[_NOME_MINUSCULO] = (prefixo, prefixo + '\U0010ffff')
+        for campo, (minimo, maximo) in intervalos.items():
+            chaves, _, linhas = self.ordenado(tabela, campo)
+            inicio = bisect_left(chaves, (1, minimo) if minimo is not None else (1,))
+            if campo == _NOME_MINUSCULO:
+                fim = bisect_left(chaves, (1, maximo), inicio)
+            else:
+                fim = bisect_right(chaves, (1, maximo), inicio) if maximo is not None else len(chaves)
+            candidatos.append((fim - inicio, lambda linhas=linhas, inicio=inicio, fim=fim: linhas[inicio:fim]))
+        return candidatos
+
+    def consultar(self, tabela: str, consulta: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], int, bool]:
+        """
+        Uma página da tabela (mesma semântica de db.consultar_tabela).
+
+        O intervalo do campo de ordenação e o cursor são resolvidos por busca
+        binária. Com outros filtros, o mais seletivo dá os candidatos pelo
+        seu índice: se são poucos, são ordenados e a página sai deles, com o
+        total exato; senão a página percorre o trecho a partir do cursor, e o
+        total conta os candidatos até MAXIMO_CONTAGEM (acima, é estimado).
+
+        Returns:
+            Tupla (linhas da página e a primeira da seguinte, se houver; total
+            de linhas que atendem aos filtros; se o total é exato)
+        """
+        with self._lock:
+            return self._consultar(tabela, consulta)
+
+    def _consultar(self, tabela, consulta):
+        campo = consulta['ordem']
+        chaves, posicoes, linhas = self.ordenado(tabela, campo)
+        faixas = dict(consulta['faixas'])
+        if tabela == 'avaliacoes' and (consulta['de'] or consulta['ate']):
+            faixas['data'] = (consulta['de'], consulta['ate'])
+
+        inicio, fim = 0, len(linhas)
+        if campo in faixas:
+            minimo, maximo = faixas.pop(campo)
+            if minimo is not None:
+                inicio = bisect_left(chaves, (1, minimo))
+            else:
+                inicio = bisect_left(chaves, (1,))
+            if maximo is not None:
+                fim = bisect_right(chaves, (1, maximo), inicio)
+
+        # O total não depende do cursor: conta o trecho inteiro
+        continua_em = inicio if not consulta['decrescente'] else fim
+        if consulta['cursor']:
+            valor, chave = consulta['cursor']
+            try:
+                if consulta['decrescente']:
+                    continua_em = min(fim, bisect_left(posicoes, (_chave(valor), _chave(chave)), inicio, fim))
+                else:
+                    continua_em = max(inicio, bisect_right(posicoes, (_chave(valor), _chave(chave)), inicio, fim))
+            except TypeError:
+                raise ValueError('Parâmetro after inválido')
+
+        pular = (consulta['pagina'] - 1) * consulta['tamanho']
+        limite = consulta['tamanho'] + 1
+        candidatos = self._candidatos(tabela, consulta, faixas)
+        if not candidatos:
+            if consulta['decrescente']:
+                fatia = linhas[max(inicio, continua_em - pular - limite):max(inicio, continua_em - pular)]
+                return fatia[::-1], fim - inicio, True
+            return linhas[continua_em + pular:continua_em + pular + limite], fim - inicio, True
+
+        prefixo = consulta['nome'].lower() if consulta['nome'] else None
+        sexo = consulta['sexo']
+        # Limites do trecho e do cursor em posições (None: depois da última)
+        primeira = posicoes[inicio] if inicio < len(posicoes) else None
+        depois_do_fim = posicoes[fim] if fim < len(posicoes) else None
+
+        def no_trecho(posicao):
+            return (primeira is None or posicao >= primeira) and (depois_do_fim is None or posicao < depois_do_fim)
+
+        def atende(linha):
+            if prefixo is not None and not (linha.get('nome') or '').lower().startswith(prefixo):
+                return False
+            if sexo is not None and linha.get('sexo') != sexo:
+                return False
+            for nome, (minimo, maximo) in faixas.items():
+                valor = linha.get(nome)
+                if valor is None or (minimo is not None and valor < minimo) \
+                        or (maximo is not None and valor > maximo):
+                    return False
+            return True
+
+        quantidade, ler = min(candidatos, key=lambda candidato: candidato[0])
+        if quantidade * FATOR_SELETIVO <= fim - inicio:
+            # Poucos candidatos: filtrados e ordenados, com o total exato
+            selecionadas = sorted(
+                (posicao, linha) for posicao, linha in
+                ((self._posicao(tabela, campo, linha), linha) for linha in ler())
+                if no_trecho(posicao) and atende(linha)
+            )
+            corte = posicoes[continua_em] if continua_em < len(posicoes) else None
+            em = len(selecionadas) if corte is None else bisect_left(selecionadas, (corte,))
+            if consulta['decrescente']:
+                pagina = selecionadas[max(0, em - pular - limite):max(0, em - pular)][::-1]
+            else:
+                pagina = selecionadas[em + pular:em + pular + limite]
+            return [linha for _, linha in pagina], len(selecionadas), True
+
+        # Filtros pouco seletivos: a página percorre o trecho a partir do cursor
+        trecho = reversed(range(inicio, continua_em)) if consulta['decrescente'] else range(continua_em, fim)
+        pagina = []
+        for posicao in trecho:
+            linha = linhas[posicao]
+            if atende(linha):
+                if pular:
+                    pular -= 1
+                else:
+                    pagina.append(linha)
+                    if len(pagina) == limite:
+                        break
+
+        # O total conta os candidatos até MAXIMO_CONTAGEM e estima o resto pela proporção
+        total = vistos = 0
+        for linha in ler():
+            vistos += 1
+            if atende(linha) and no_trecho(self._posicao(tabela, campo, linha)):
+                total += 1
+                if total >= MAXIMO_CONTAGEM:
+                    break
+        if vistos < quantidade:
+            return pagina, round(total * quantidade / vistos), False
+        return pagina, total, True
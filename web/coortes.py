@@ -0,0 +1,294 @@
+"""
+Agregados por coorte (GET /api/admin/cohorts), mantidos a cada escrita
+
+Coorte = métrica x sexo x faixa etária (na data da avaliação) x mês (AAAA-MM).
+Cada coorte guarda, por intervalo do histograma (ou por categoria, nas
+métricas categóricas), contagem, soma, soma dos quadrados, mínimo e máximo.
+Os números da coorte são a soma dos intervalos, e agrupar coortes (ex.: todos
+os meses de uma faixa) é somar linhas: a leitura não passa pelas avaliações.
+
+Mínimo e máximo não se desfazem: quando uma avaliação sai (remoção, novo
+cálculo ou mudança de perfil) eles só são zerados quando o intervalo esvazia.
+Por ficarem por intervalo, o erro é no máximo a largura de um intervalo (nas
+pontas abertas, sem limite); recalcular_coortes os torna exatos.
+
+No banco as linhas ficam na tabela coortes, mantida por triggers a partir de
+coortes_metricas (database.sql, db_sqlite.py). No modo JSON ficam em um
+CoortesJSON, que observa as operações aplicadas ao documento em cache.
+"""
+
+import math
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from web.estatisticas import ObservadorContas
+
+
+# Métrica -> (caminho em resultados, início, largura e número de intervalos do
+# histograma). Sem largura a métrica é categórica (histograma por valor).
+# O primeiro e o último intervalo são abertos. Os mesmos valores estão em
+# coortes_metricas no database.sql: ao mudá-los, recalcule as coortes.
+METRICAS_COORTE = {
+    'percentual_gordura': (('percentual_gordura',), 0.0, 2.5, 24),
+    'imc': (('imc',), 10.0, 1.0, 40),
+    'rca': (('rca',), 0.3, 0.02, 30),
+    'score_estetico': (('score_estetico_avancado', 'score_total'), 0.0, 5.0, 20),
+    'somatotipo': (('somatotipo',), None, None, None),
+}
+
+# Faixas etárias: (idade mínima, rótulo), em ordem crescente
+FAIXAS_ETARIAS = (
+    (0, '<18'), (18, '18-24'), (25, '25-34'), (35, '35-44'),
+    (45, '45-54'), (55, '55-64'), (65, '65+'),
+)
+
+# Dimensões de uma coorte (GET /api/admin/cohorts?group=...)
+DIMENSOES_COORTE = ('sexo', 'faixa', 'mes')
+
+# Colunas de uma linha de coortes
+COLUNAS_COORTE = ('metrica', 'sexo', 'faixa', 'mes', 'classe', 'n', 'soma', 'soma_quadrados',
+                  'minimo', 'maximo')
+
+
+def _data(valor) -> Optional[date]:
+    try:
+        return date.fromisoformat(str(valor)[:10])
+    except ValueError:
+        return None
+
+
+def faixa_etaria(nascimento, data) -> Optional[str]:
+    """Faixa etária na data (datas ou texto ISO); None se uma das datas faltar"""
+    nascimento, data = _data(nascimento), _data(data)
+    if nascimento is None or data is None:
+        return None
+    idade = data.year - nascimento.year - ((data.month, data.day) < (nascimento.month, nascimento.day))
+    rotulo = None
+    for minima, nome in FAIXAS_ETARIAS:
+        if idade >= minima:
+            rotulo = nome
+    return rotulo
+
+
+def _valor(resultados: Dict[str, Any], caminho: tuple):
+    for chave in caminho:
+        if not isinstance(resultados, dict):
+            return None
+        resultados = resultados.get(chave)
+    return resultados
+
+
+def classe(metrica: str, valor) -> str:
+    """Intervalo do histograma (índice, como texto) ou categoria do valor"""
+    _, inicio, largura, intervalos = METRICAS_COORTE[metrica]
+    if largura is None:
+        return valor
+    # Truncamento e limites como no SQL (CAST AS INTEGER / floor com GREATEST e LEAST)
+    return str(max(0, min(intervalos - 1, int((valor - inicio) / largura))))
+
+
+def contribuicoes(resultados: Optional[Dict[str, Any]], data, sexo: Optional[str],
+                  nascimento) -> List[Tuple[tuple, Optional[float]]]:
+    """
+    Linhas de coortes de uma avaliação.
+
+    Returns:
+        Lista de ((metrica, sexo, faixa, mes, classe), valor); valor é None
+        nas métricas categóricas
+    """
+    faixa = faixa_etaria(nascimento, data)
+    if not resultados or not sexo or faixa is None:
+        return []
+    mes = str(data)[:7]
+    linhas = []
+    for metrica, (caminho, _, largura, _) in METRICAS_COORTE.items():
+        valor = _valor(resultados, caminho)
+        if largura is None:
+            if isinstance(valor, str):
+                linhas.append(((metrica, sexo, faixa, mes, valor), None))
+        elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            linhas.append(((metrica, sexo, faixa, mes, classe(metrica, valor)), float(valor)))
+    return linhas
+
+
+def somar(linhas: Dict[tuple, list], chave: tuple, valor: Optional[float], sinal: int) -> None:
+    """
+    Soma (sinal 1) ou retira (-1) um valor da linha de coortes, como o upsert
+    dos triggers: intervalo vazio sai, e retiradas não mexem nos extremos.
+    """
+    linha = linhas.get(chave)
+    if linha is None:
+        linha = linhas[chave] = [0, 0.0, 0.0, None, None]
+    linha[0] += sinal
+    if linha[0] == 0:
+        del linhas[chave]
+        return
+    if valor is not None:
+        linha[1] += sinal * valor
+        linha[2] += sinal * valor * valor
+        if sinal > 0:
+            linha[3] = valor if linha[3] is None else min(linha[3], valor)
+            linha[4] = valor if linha[4] is None else max(linha[4], valor)
+
+
+def ler_consulta_coortes(args) -> Dict[str, Any]:
+    """
+    Lê os parâmetros de GET /api/admin/cohorts.
+
+    Parâmetros:
+        metricas  - lista separada por vírgulas (padrão: todas)
+        sexo      - M ou F
+        faixa     - uma das FAIXAS_ETARIAS
+        from, to  - intervalo inclusivo de meses (AAAA-MM)
+        group     - dimensões mantidas, separadas por vírgulas (padrão:
+                    sexo,faixa,mes); as demais são somadas. Vazio: uma
+                    coorte por métrica
+
+    Raises:
+        ValueError: Parâmetro inválido
+    """
+    def lista(nome, validos, padrao):
+        valor = args.get(nome)
+        if valor is None:
+            return list(padrao)
+        itens = [item.strip() for item in valor.split(',') if item.strip()]
+        invalidos = [item for item in itens if item not in validos]
+        if invalidos:
+            raise ValueError(f"Parâmetro {nome} deve conter apenas: {', '.join(validos)}")
+        # Na ordem canônica, sem repetições
+        return [item for item in validos if item in itens]
+
+    consulta = {
+        'metricas': lista('metricas', tuple(METRICAS_COORTE), METRICAS_COORTE) or list(METRICAS_COORTE),
+        'agrupar': lista('group', DIMENSOES_COORTE, DIMENSOES_COORTE),
+        'sexo': args.get('sexo') or None,
+        'faixa': args.get('faixa') or None,
+        'de': None, 'ate': None,
+    }
+    if consulta['sexo'] not in (None, 'M', 'F'):
+        raise ValueError("Parâmetro sexo deve ser 'M' ou 'F'")
+    rotulos = [rotulo for _, rotulo in FAIXAS_ETARIAS]
+    if consulta['faixa'] not in [None] + rotulos:
+        raise ValueError(f"Parâmetro faixa deve ser um de: {', '.join(rotulos)}")
+    for param, chave in (('from', 'de'), ('to', 'ate')):
+        valor = args.get(param)
+        if valor:
+            if _data(valor + '-01') is None or len(valor) != 7:
+                raise ValueError(f'Parâmetro {param} deve estar no formato AAAA-MM')
+            consulta[chave] = valor
+    return consulta
+
+
+def atende(consulta: Dict[str, Any], chave: tuple) -> bool:
+    """Se a linha (metrica, sexo, faixa, mes, classe) passa pelos filtros"""
+    metrica, sexo, faixa, mes, _ = chave
+    return (metrica in consulta['metricas']
+            and consulta['sexo'] in (None, sexo)
+            and consulta['faixa'] in (None, faixa)
+            and (consulta['de'] is None or mes >= consulta['de'])
+            and (consulta['ate'] is None or mes <= consulta['ate']))
+
+
+def _intervalos(metrica: str) -> list:
+    _, inicio, largura, intervalos = METRICAS_COORTE[metrica]
+    limites = [round(inicio + i * largura, 6) for i in range(1, intervalos)]
+    return [[None if i == 0 else limites[i - 1], limites[i] if i < len(limites) else None]
+            for i in range(intervalos)]
+
+
+def montar(linhas: Iterable[Dict[str, Any]], consulta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Resposta de /api/admin/cohorts a partir das linhas de coortes já filtradas.
+
+    As linhas são somadas por métrica, dimensões de consulta['agrupar'] e
+    classe (dimensões ausentes da linha contam como já somadas).
+    """
+    agrupar = consulta['agrupar']
+    coortes = {}
+    for linha in linhas:
+        if not linha['n'] or linha['n'] <= 0:
+            continue
+        chave = (linha['metrica'],) + tuple(linha[dimensao] for dimensao in agrupar)
+        coorte = coortes.setdefault(chave, {'n': 0, 'soma': 0.0, 'soma_quadrados': 0.0,
+                                            'minimo': None, 'maximo': None, 'classes': {}})
+        coorte['n'] += linha['n']
+        coorte['soma'] += linha['soma'] or 0
+        coorte['soma_quadrados'] += linha['soma_quadrados'] or 0
+        for extremo, escolher in (('minimo', min), ('maximo', max)):
+            if linha[extremo] is not None:
+                atual = coorte[extremo]
+                coorte[extremo] = linha[extremo] if atual is None else escolher(atual, linha[extremo])
+        coorte['classes'][linha['classe']] = coorte['classes'].get(linha['classe'], 0) + linha['n']
+
+    ordem = {metrica: i for i, metrica in enumerate(METRICAS_COORTE)}
+    itens = []
+    for chave in sorted(coortes, key=lambda chave: (ordem[chave[0]],) + chave[1:]):
+        coorte = coortes[chave]
+        metrica = chave[0]
+        item = dict(zip(('metrica',) + tuple(agrupar), chave))
+        item['n'] = int(coorte['n'])
+        if METRICAS_COORTE[metrica][2] is None:
+            item['histograma'] = dict(sorted(coorte['classes'].items()))
+        else:
+            n = coorte['n']
+            media = coorte['soma'] / n
+            item['media'] = round(media, 4)
+            item['desvio_padrao'] = round(math.sqrt(max(coorte['soma_quadrados'] / n - media * media, 0.0)), 4)
+            item['minimo'] = coorte['minimo']
+            item['maximo'] = coorte['maximo']
+            histograma = [0] * METRICAS_COORTE[metrica][3]
+            for indice, total in coorte['classes'].items():
+                histograma[int(indice)] += total
+            item['histograma'] = histograma
+        itens.append(item)
+
+    return {
+        'metricas': {
+            metrica: ({'intervalos': _intervalos(metrica)} if METRICAS_COORTE[metrica][2] is not None
+                      else {'categorica': True})
+            for metrica in consulta['metricas']
+        },
+        'agrupar': agrupar,
+        'coortes': itens,
+    }
+
+
+# ===== MODO JSON =====
+
+class CoortesJSON(ObservadorContas):
+    """
+    Linhas de coortes sobre o documento JSON: (metrica, sexo, faixa, mes,
+    classe) -> [n, soma, soma_quadrados, minimo, maximo].
+
+    Cada conta contribui com as linhas das suas avaliações; contas sem perfil
+    não entram (como no banco, onde a coorte vem do usuário).
+    """
+
+    def __init__(self):
+        self.carregar({})
+
+    def _zerar(self):
+        self.linhas = {}
+
+    def _contribuicao(self, conta_id: str, avaliacoes: Optional[list] = None) -> list:
+        perfil = self._dados.get('usuarios', {}).get(conta_id) or {}
+        if not perfil.get('sexo'):
+            return []
+        if avaliacoes is None:
+            avaliacoes = self._dados.get('avaliacoes', {}).get(conta_id) or []
+        sexo, nascimento = perfil['sexo'], perfil.get('data_nascimento')
+        return [linha
+                for av in avaliacoes
+                for linha in contribuicoes(av.get('resultados'), av.get('data'), sexo, nascimento)]
+
+    def _aplicar(self, conta_id: str, contribuicao: list, sinal: int) -> None:
+        for chave, valor in contribuicao:
+            somar(self.linhas, chave, valor, sinal)
+
+    def consultar(self, consulta: Dict[str, Any]) -> Dict[str, Any]:
+        """Resposta de /api/admin/cohorts"""
+        return montar(
+            (dict(zip(COLUNAS_COORTE, chave + tuple(valores)))
+             for chave, valores in self.linhas.items() if atende(consulta, chave)),
+            consulta
+        )
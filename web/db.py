@@ -3,25 +3,75 @@ Módulo de conexão com banco de dados PostgreSQL
 """
 import os
 import hashlib
+import threading
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, Json, execute_batch, execute_values
+from collections import Counter
 from contextlib import contextmanager
 
+from web.pool import PoolConexoes
+from web.coortes import DIMENSOES_COORTE
+from web.consulta_admin import MAXIMO_CONTAGEM
+from web.quantis import (METRICAS_PERCENTIL, LIMITE_OBSOLETOS, EsbocoQuantis, IncorporacaoQuantis,
+                         contribuicoes, incorporar_fila)
+
 # URL de conexão do PostgreSQL (será configurada no Vercel)
 DATABASE_URL = os.environ.get('POSTGRES_URL') or os.environ.get('DATABASE_URL')
 
+_pool = None
+_pool_lock = threading.Lock()
+
+def _conectar():
+    """Abre uma nova conexão física com o PostgreSQL"""
+    return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+
+def _conexao_valida(conn):
+    """Verificação de saúde de uma conexão ociosa"""
+    if conn.closed:
+        return False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+def obter_pool():
+    """Retorna o pool de conexões do processo (criado na primeira chamada)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = PoolConexoes.do_ambiente(_conectar, validar=_conexao_valida)
+                pool.aquecer()
+                _pool = pool
+    return _pool
+
+def estatisticas_pool():
+    """Estatísticas do pool (em uso, ociosas, tempo de espera)"""
+    return obter_pool().estatisticas()
+
 @contextmanager
 def get_db_connection():
-    """Context manager para conexão com banco de dados"""
-    conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+    """Context manager para conexão com banco de dados (retirada do pool)"""
+    pool = obter_pool()
+    conn = pool.obter()
+    quebrada = False
     try:
         yield conn
         conn.commit()
     except Exception as e:
-        conn.rollback()
+        # Conexões quebradas são descartadas; o pool abre outra na próxima retirada
+        quebrada = conn.closed or isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+        if not quebrada:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                quebrada = True
         raise e
     finally:
-        conn.close()
+        pool.devolver(conn, descartar=bool(quebrada))
 
 def hash_senha(senha):
     """Gera hash SHA256 da senha"""
@@ -50,6 +100,16 @@ def autenticar(nome, senha):
             result = cur.fetchone()
             return result['id'] if result else None
 
+def atualizar_senha(nome, senha_atual, nova_senha):
+    """Troca a senha se a atual conferir; retorna True se alterou"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "UPDATE contas SET senha_hash = %s WHERE nome = %s AND senha_hash = %s",
+                (hash_senha(nova_senha), nome, hash_senha(senha_atual))
+            )
+            return cur.rowcount > 0
+
 def criar_usuario(conta_id, data_nascimento, sexo, altura):
     """Cria ou atualiza dados pessoais do usuário vinculado à conta"""
     with get_db_connection() as conn:
@@ -64,7 +124,10 @@ def criar_usuario(conta_id, data_nascimento, sexo, altura):
                    RETURNING id""",
                 (conta_id, data_nascimento, sexo, altura)
             )
-            return cur.fetchone()['id']
+            usuario_id = cur.fetchone()['id']
+    # Sexo ou nascimento novos: as avaliações mudam de coorte nos esboços
+    agendar_quantis()
+    return usuario_id
 
 def obter_usuario_por_conta(conta_id):
     """Obtém dados do usuário pela conta"""
@@ -79,17 +142,18 @@ def obter_usuario_por_conta(conta_id):
             )
             return cur.fetchone()
 
-def salvar_avaliacao(usuario_id, data, peso, medidas):
-    """Salva uma nova avaliação"""
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                """INSERT INTO avaliacoes (
-                    usuario_id, data, peso, pescoco, ombros, peitoral, cintura, 
+def _colunas_resultado(resultados):
+    """Extrai as colunas escalares (imc, gordura, massa magra) dos resultados"""
+    resultados = resultados or {}
+    return (resultados.get('imc'), resultados.get('percentual_gordura'),
+            resultados.get('massa_magra_kg'))
+
+_COLUNAS_AVALIACAO = """usuario_id, data, peso, pescoco, ombros, peitoral, cintura, 
                     abdomen, quadril, braco_relaxado, braco_contraido, antebraco, 
-                    punho, coxa_proximal, coxa_medial, coxa_distal, panturrilha, tornozelo
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (usuario_id, data) DO UPDATE SET
+                    punho, coxa_proximal, coxa_medial, coxa_distal, panturrilha, tornozelo,
+                    imc, gordura_corporal, massa_magra, resultados, versao_calculo"""
+
+_CONFLITO_AVALIACAO = """ON CONFLICT (usuario_id, data) DO UPDATE SET
                     peso = EXCLUDED.peso,
                     pescoco = EXCLUDED.pescoco,
                     ombros = EXCLUDED.ombros,
@@ -105,31 +169,288 @@ def salvar_avaliacao(usuario_id, data, peso, medidas):
                     coxa_medial = EXCLUDED.coxa_medial,
                     coxa_distal = EXCLUDED.coxa_distal,
                     panturrilha = EXCLUDED.panturrilha,
-                    tornozelo = EXCLUDED.tornozelo
-                RETURNING id""",
-                (usuario_id, data, peso, medidas.get('pescoco'), medidas.get('ombros'),
-                 medidas.get('peitoral'), medidas.get('cintura'), medidas.get('abdomen'),
-                 medidas.get('quadril'), medidas.get('braco_relaxado'), medidas.get('braco_contraido'),
-                 medidas.get('antebraco'), medidas.get('punho'), 
-                 medidas.get('coxa') or medidas.get('coxa_proximal'),  # Aceitar ambos nomes
-                 medidas.get('coxa_medial'), medidas.get('coxa_distal'), medidas.get('panturrilha'),
-                 medidas.get('tornozelo'))
+                    tornozelo = EXCLUDED.tornozelo,
+                    imc = EXCLUDED.imc,
+                    gordura_corporal = EXCLUDED.gordura_corporal,
+                    massa_magra = EXCLUDED.massa_magra,
+                    resultados = EXCLUDED.resultados,
+                    versao_calculo = EXCLUDED.versao_calculo"""
+
+_UPSERT_AVALIACAO = _CONFLITO_AVALIACAO + """
+                RETURNING id"""
+
+def _valores_avaliacao(data, peso, medidas, resultados, versao_calculo):
+    """Valores das colunas de avaliacoes (sem usuario_id), na ordem de _COLUNAS_AVALIACAO"""
+    imc, gordura, massa_magra = _colunas_resultado(resultados)
+    return (data, peso, medidas.get('pescoco'), medidas.get('ombros'),
+            medidas.get('peitoral'), medidas.get('cintura'), medidas.get('abdomen'),
+            medidas.get('quadril'), medidas.get('braco_relaxado'), medidas.get('braco_contraido'),
+            medidas.get('antebraco'), medidas.get('punho'), 
+            medidas.get('coxa') or medidas.get('coxa_proximal'),  # Aceitar ambos nomes
+            medidas.get('coxa_medial'), medidas.get('coxa_distal'), medidas.get('panturrilha'),
+            medidas.get('tornozelo'),
+            imc, gordura, massa_magra,
+            Json(resultados) if resultados is not None else None, versao_calculo)
+
+def salvar_avaliacao(usuario_id, data, peso, medidas, resultados=None, versao_calculo=None):
+    """Salva uma nova avaliação (com os resultados calculados, se informados)"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""INSERT INTO avaliacoes ({_COLUNAS_AVALIACAO})
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+                        %s, %s, %s, %s, %s)
+                {_UPSERT_AVALIACAO}""",
+                (usuario_id,) + _valores_avaliacao(data, peso, medidas, resultados, versao_calculo)
             )
-            return cur.fetchone()['id']
+            avaliacao_id = cur.fetchone()['id']
+    agendar_quantis()
+    return avaliacao_id
+
+def salvar_avaliacao_por_conta(conta_id, sexo, data_nascimento, data, peso, medidas,
+                               resultados=None, versao_calculo=None):
+    """
+    Salva uma avaliação resolvendo usuario_id a partir da conta no mesmo comando.
+    
+    O sexo e a data de nascimento usados no cálculo dos resultados são conferidos
+    no próprio INSERT: se o perfil mudou (ou não existe), nada é gravado.
+    
+    Returns:
+        ID da avaliação, ou None se o perfil não confere
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""WITH u AS (
+                    SELECT id FROM usuarios
+                    WHERE conta_id = %s AND sexo = %s AND data_nascimento = %s
+                )
+                INSERT INTO avaliacoes ({_COLUNAS_AVALIACAO})
+                SELECT u.id, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+                       %s, %s, %s, %s, %s
+                FROM u
+                {_UPSERT_AVALIACAO}""",
+                (conta_id, sexo, data_nascimento) +
+                _valores_avaliacao(data, peso, medidas, resultados, versao_calculo)
+            )
+            linha = cur.fetchone()
+    agendar_quantis()
+    return linha['id'] if linha else None
+
+def salvar_avaliacoes(usuario_id, itens, versao_calculo):
+    """
+    Grava várias avaliações do usuário em um único comando (importação).
+    
+    Mesma regra de salvar_avaliacao: uma avaliação por data (a última do lote
+    prevalece, e substitui a já gravada).
+    
+    Args:
+        itens: Lista de tuplas (data, peso, medidas, resultados)
+        versao_calculo: Versão dos cálculos usada
+    """
+    # O ON CONFLICT não aceita a mesma data duas vezes no mesmo comando
+    por_data = {str(item[0]): item for item in itens}
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            execute_values(
+                cur,
+                f"""INSERT INTO avaliacoes ({_COLUNAS_AVALIACAO})
+                VALUES %s
+                {_CONFLITO_AVALIACAO}""",
+                [(usuario_id,) + _valores_avaliacao(data, peso, medidas, resultados, versao_calculo)
+                 for data, peso, medidas, resultados in por_data.values()],
+                page_size=max(len(por_data), 1)
+            )
+    agendar_quantis()
 
-def obter_avaliacoes(usuario_id, limit=10):
-    """Obtém as últimas avaliações do usuário"""
+def atualizar_resultados(itens, versao_calculo):
+    """
+    Grava resultados recalculados de várias avaliações em uma única conexão.
+    
+    Args:
+        itens: Lista de tuplas (avaliacao_id, resultados)
+        versao_calculo: Versão dos cálculos usada
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            execute_batch(
+                cur,
+                """UPDATE avaliacoes
+                   SET imc = %s, gordura_corporal = %s, massa_magra = %s,
+                       resultados = %s, versao_calculo = %s
+                   WHERE id = %s""",
+                [(*_colunas_resultado(resultados), Json(resultados), versao_calculo, avaliacao_id)
+                 for avaliacao_id, resultados in itens]
+            )
+    agendar_quantis()
+
+# Medidas editáveis -> coluna de avaliacoes
+_COLUNAS_MEDIDAS = {
+    'peso': 'peso', 'pescoco': 'pescoco', 'ombros': 'ombros', 'peitoral': 'peitoral',
+    'cintura': 'cintura', 'abdomen': 'abdomen', 'quadril': 'quadril',
+    'braco_relaxado': 'braco_relaxado', 'braco_contraido': 'braco_contraido',
+    'antebraco': 'antebraco', 'coxa': 'coxa_proximal', 'panturrilha': 'panturrilha'
+}
+
+def obter_avaliacao_por_conta(conta_id, avaliacao_id):
+    """Obtém uma avaliação da conta com o perfil usado nos cálculos (None se não existir)"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """SELECT a.*, u.sexo, u.data_nascimento, u.altura, c.nome
+                   FROM avaliacoes a
+                   JOIN usuarios u ON a.usuario_id = u.id
+                   JOIN contas c ON u.conta_id = c.id
+                   WHERE a.id = %s AND u.conta_id = %s""",
+                (avaliacao_id, conta_id)
+            )
+            return cur.fetchone()
+
+def atualizar_medidas(conta_id, avaliacao_id, medidas, resultados, alterados, removidos, versao_calculo):
+    """
+    Grava a correção de algumas medidas de uma avaliação da conta.
+    
+    Só as colunas das medidas alteradas são escritas; em `resultados` (JSONB)
+    são mescladas as chaves de `alterados` e removidas as de `removidos`.
+    
+    Args:
+        medidas: Medidas alteradas (campo -> valor)
+        resultados: Resultados completos (para as colunas imc, gordura, massa magra)
+        alterados: Chaves de resultado com valor novo
+        removidos: Chaves de resultado que deixaram de existir
+    
+    Returns:
+        True se a avaliação foi atualizada
+    """
+    atribuicoes = [f"{_COLUNAS_MEDIDAS[campo]} = %s" for campo in medidas]
     with get_db_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
-                """SELECT * FROM avaliacoes 
-                   WHERE usuario_id = %s 
+                f"""UPDATE avaliacoes
+                   SET {''.join(a + ', ' for a in atribuicoes)}
+                       imc = %s, gordura_corporal = %s, massa_magra = %s,
+                       resultados = (COALESCE(resultados, '{{}}'::jsonb) || %s) - %s::text[],
+                       versao_calculo = %s
+                   WHERE id = %s
+                     AND usuario_id = (SELECT id FROM usuarios WHERE conta_id = %s)""",
+                (*medidas.values(), *_colunas_resultado(resultados),
+                 Json(alterados), list(removidos), versao_calculo, avaliacao_id, conta_id)
+            )
+            atualizada = cur.rowcount > 0
+    agendar_quantis()
+    return atualizada
+
+def _filtro_periodo(antes=None, de=None, ate=None):
+    """Condições de data (cursor e intervalo) para a consulta de avaliações"""
+    condicoes, params = [], []
+    if antes:
+        condicoes.append("data < %s")
+        params.append(antes)
+    if de:
+        condicoes.append("data >= %s")
+        params.append(de)
+    if ate:
+        condicoes.append("data <= %s")
+        params.append(ate)
+    return ''.join(f" AND {c}" for c in condicoes), params
+
+def obter_avaliacoes(usuario_id, limit=10, antes=None, de=None, ate=None):
+    """
+    Obtém as avaliações do usuário, da mais recente para a mais antiga.
+    
+    Paginação por cursor: antes = data da última avaliação da página anterior
+    (usa o índice (usuario_id, data DESC), sem OFFSET).
+    """
+    filtro, params = _filtro_periodo(antes, de, ate)
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""SELECT * FROM avaliacoes 
+                   WHERE usuario_id = %s{filtro}
                    ORDER BY data DESC 
                    LIMIT %s""",
-                (usuario_id, limit)
+                [usuario_id] + params + [limit]
             )
             return cur.fetchall()
 
+def obter_usuario_com_avaliacoes(conta_id, limit=10, antes=None, de=None, ate=None):
+    """
+    Obtém o perfil do usuário e suas avaliações (mesma paginação de
+    obter_avaliacoes) em uma única consulta.
+    
+    Returns:
+        Tupla (usuario, avaliacoes); (None, []) se a conta não tem perfil
+    """
+    filtro, params = _filtro_periodo(antes, de, ate)
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""SELECT u.*, c.nome,
+                          (SELECT COALESCE(json_agg(a), '[]'::json)
+                           FROM (SELECT * FROM avaliacoes
+                                 WHERE usuario_id = u.id{filtro}
+                                 ORDER BY data DESC
+                                 LIMIT %s) a) AS avaliacoes
+                   FROM usuarios u
+                   JOIN contas c ON u.conta_id = c.id
+                   WHERE u.conta_id = %s""",
+                params + [limit, conta_id]
+            )
+            usuario = cur.fetchone()
+            if not usuario:
+                return None, []
+            avaliacoes = usuario.pop('avaliacoes')
+            return usuario, avaliacoes
+
+def obter_versao_dados(conta_id):
+    """
+    Versão das avaliações, altura e coorte do perfil e versão dos esboços do
+    sexo (base da ETag da lista; None sem perfil)
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """SELECT u.versao_alteracoes, u.altura, u.sexo, u.data_nascimento,
+                          COALESCE(q.versao, 0) AS versao_quantis
+                   FROM usuarios u
+                   LEFT JOIN quantis_versoes q ON q.sexo = u.sexo
+                   WHERE u.conta_id = %s""",
+                (conta_id,)
+            )
+            return cur.fetchone()
+
+def obter_alteracoes(conta_id, desde):
+    """
+    Obtém o perfil do usuário e o que mudou nas avaliações depois da versão
+    `desde` (u.versao_alteracoes é a versão atual), em uma única consulta.
+    
+    Returns:
+        Tupla (usuario, avaliacoes, removidas) - avaliações criadas/alteradas
+        (mais recentes primeiro) e IDs das apagadas; (None, [], []) se a conta
+        não tem perfil
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """SELECT u.*, c.nome,
+                          (SELECT COALESCE(json_agg(a ORDER BY a.data DESC), '[]'::json)
+                           FROM avaliacoes a
+                           WHERE a.usuario_id = u.id AND a.versao_alteracao > %s) AS avaliacoes,
+                          (SELECT COALESCE(json_agg(r.avaliacao_id), '[]'::json)
+                           FROM avaliacoes_removidas r
+                           WHERE r.usuario_id = u.id AND r.versao > %s) AS removidas
+                   FROM usuarios u
+                   JOIN contas c ON u.conta_id = c.id
+                   WHERE u.conta_id = %s""",
+                (desde, desde, conta_id)
+            )
+            usuario = cur.fetchone()
+            if not usuario:
+                return None, [], []
+            avaliacoes = usuario.pop('avaliacoes')
+            removidas = usuario.pop('removidas')
+            return usuario, avaliacoes, removidas
+
 def deletar_avaliacao(avaliacao_id):
     """Deleta uma avaliação pelo ID"""
     with get_db_connection() as conn:
@@ -138,7 +459,371 @@ def deletar_avaliacao(avaliacao_id):
                 "DELETE FROM avaliacoes WHERE id = %s",
                 (avaliacao_id,)
             )
-            return cur.rowcount > 0
+            removida = cur.rowcount > 0
+    agendar_quantis()
+    return removida
+
+def ler_estatisticas(de, ate):
+    """
+    Contadores do painel admin, mantidos pelos triggers (sem COUNT(*) nas tabelas).
+
+    Args:
+        de, ate: Intervalo de datas (inclusivo) dos contadores por data
+
+    Returns:
+        Tupla ({chave: valor}, {data ISO: (avaliacoes, ultimas)})
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT chave, valor FROM estatisticas")
+            contadores = {linha['chave']: linha['valor'] for linha in cur.fetchall()}
+            cur.execute(
+                "SELECT data, avaliacoes, ultimas FROM estatisticas_datas WHERE data BETWEEN %s AND %s",
+                (de, ate)
+            )
+            por_data = {linha['data'].isoformat(): (linha['avaliacoes'], linha['ultimas'])
+                        for linha in cur.fetchall()}
+            return contadores, por_data
+
+def recalcular_estatisticas():
+    """Reconstrói os contadores do painel admin a partir das tabelas"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT recalcular_estatisticas()")
+
+
+def ler_coortes(consulta):
+    """
+    Linhas de coortes que atendem aos filtros, já somadas nas dimensões fora
+    de consulta['agrupar'] (ver web/coortes.py: ler_consulta_coortes, montar).
+    """
+    dimensoes = [d for d in DIMENSOES_COORTE if d in consulta['agrupar']]
+    condicoes = ["metrica = ANY(%s)", "n > 0"]
+    parametros = [list(consulta['metricas'])]
+    for coluna, chave, operador in (('sexo', 'sexo', '='), ('faixa', 'faixa', '='),
+                                    ('mes', 'de', '>='), ('mes', 'ate', '<=')):
+        if consulta[chave] is not None:
+            condicoes.append(f"{coluna} {operador} %s")
+            parametros.append(consulta[chave])
+    grupo = ', '.join(['metrica'] + dimensoes + ['classe'])
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""SELECT {grupo}, SUM(n) AS n, SUM(soma) AS soma, SUM(soma_quadrados) AS soma_quadrados,
+                           MIN(minimo) AS minimo, MAX(maximo) AS maximo
+                    FROM coortes WHERE {' AND '.join(condicoes)}
+                    GROUP BY {grupo}""",
+                parametros
+            )
+            return cur.fetchall()
+
+
+def recalcular_coortes():
+    """Reconstrói as coortes a partir das avaliações (mínimos e máximos exatos)"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT recalcular_coortes()")
+
+# Se há o que incorporar: a fila ou uma coorte com obsoletos demais (coortes_obsoletas)
+HA_QUANTIS_PENDENTES = """
+SELECT EXISTS (SELECT 1 FROM quantis_pendentes)
+    OR EXISTS (SELECT 1 FROM quantis_obsoletos o
+               WHERE o.n > %s * COALESCE((SELECT MAX((q.esboco->>'n')::int) FROM quantis q
+                                          WHERE q.sexo = o.sexo AND q.faixa = o.faixa), 0)) AS pendentes
+"""
+
+def _incorporar_quantis(cur, esperar=True):
+    """
+    Inclui nos esboços as avaliações de quantis_pendentes e esvazia a fila,
+    reconstruindo as coortes com obsoletos demais (incorporar_fila). O LOCK
+    deixa uma incorporação por vez; as escritas seguem enfileirando e as
+    leituras de quantis não esperam, pois o modo não bloqueia SELECT.
+    
+    Args:
+        esperar: Com False, desiste se outra incorporação está em andamento
+    
+    Returns:
+        False se desistiu (a transação fica abortada: o chamador a desfaz)
+    """
+    caminhos = ', '.join("a.resultados #> '{%s}'" % ','.join(caminho)
+                         for caminho, _ in METRICAS_PERCENTIL.values())
+    colunas = f"u.sexo, u.data_nascimento, a.data, jsonb_build_array({caminhos}) AS valores"
+
+    def ler_contribuicoes():
+        return [linha
+                for av in cur.fetchall()
+                for linha in contribuicoes(dict(zip(METRICAS_PERCENTIL, av['valores'])),
+                                           av['data'], av['sexo'], av['data_nascimento'])]
+
+    def avaliacoes_sexo(sexo):
+        cur.execute(
+            f"""SELECT {colunas}
+                FROM avaliacoes a JOIN usuarios u ON u.id = a.usuario_id
+                WHERE u.sexo = %s AND a.resultados IS NOT NULL""",
+            (sexo,)
+        )
+        return ler_contribuicoes()
+
+    try:
+        cur.execute("LOCK TABLE quantis IN SHARE ROW EXCLUSIVE MODE" + ('' if esperar else ' NOWAIT'))
+    except psycopg2.OperationalError as e:
+        # 55P03: lock_not_available (NOWAIT)
+        if esperar or e.pgcode != '55P03':
+            raise
+        return False
+    cur.execute(
+        f"""WITH fila AS (DELETE FROM quantis_pendentes RETURNING avaliacao_id)
+            SELECT {colunas}
+            FROM fila
+            JOIN avaliacoes a ON a.id = fila.avaliacao_id
+            JOIN usuarios u ON u.id = a.usuario_id"""
+    )
+    linhas = ler_contribuicoes()
+    cur.execute("SELECT sexo, faixa, n FROM quantis_obsoletos")
+    obsoletos = {(linha['sexo'], linha['faixa']): linha['n'] for linha in cur.fetchall()}
+    esbocos = {}
+    for sexo, faixa in {(sexo, faixa) for (_, sexo, faixa), _ in linhas} | set(obsoletos):
+        cur.execute("SELECT metrica, esboco FROM quantis WHERE sexo = %s AND faixa = %s", (sexo, faixa))
+        for linha in cur.fetchall():
+            esbocos[(linha['metrica'], sexo, faixa)] = EsbocoQuantis.de_dict(linha['esboco'])
+    alterados, reconstruidas, versoes = incorporar_fila(esbocos, linhas, obsoletos, avaliacoes_sexo)
+    if reconstruidas:
+        execute_batch(cur, "DELETE FROM quantis WHERE sexo = %s AND faixa = %s", list(reconstruidas))
+        # Desconta só o que foi lido: escritas concorrentes continuam contando
+        execute_batch(cur, "UPDATE quantis_obsoletos SET n = n - %s WHERE sexo = %s AND faixa = %s",
+                      [(obsoletos[coorte],) + coorte for coorte in reconstruidas])
+        cur.execute("DELETE FROM quantis_obsoletos WHERE n <= 0")
+    if alterados:
+        execute_values(
+            cur,
+            """INSERT INTO quantis (metrica, sexo, faixa, esboco) VALUES %s
+               ON CONFLICT (metrica, sexo, faixa) DO UPDATE SET esboco = EXCLUDED.esboco""",
+            [chave + (Json(esbocos[chave].para_dict()),) for chave in alterados]
+        )
+    if versoes:
+        execute_values(
+            cur,
+            """INSERT INTO quantis_versoes (sexo, versao) VALUES %s
+               ON CONFLICT (sexo) DO UPDATE SET versao = quantis_versoes.versao + EXCLUDED.versao""",
+            list(versoes.items())
+        )
+    return True
+
+def incorporar_quantis():
+    """
+    Inclui a fila nos esboços (e reconstrói as coortes obsoletas), se houver.
+    
+    Não espera por outra incorporação em andamento, e ler_quantis nunca bloqueia.
+    
+    Returns:
+        False se desistiu por causa de outra incorporação (a fila fica para depois)
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(HA_QUANTIS_PENDENTES, (LIMITE_OBSOLETOS,))
+            if cur.fetchone()['pendentes'] and not _incorporar_quantis(cur, esperar=False):
+                conn.rollback()
+                return False
+    return True
+
+# As escritas só agendam a incorporação, feita em lote por uma thread
+_incorporacao = IncorporacaoQuantis(incorporar_quantis)
+
+def agendar_quantis():
+    """Agenda a incorporação da fila dos esboços (chamado depois das escritas que enfileiram)"""
+    _incorporacao.agendar()
+
+def obter_versao_quantis(sexo):
+    """Versão dos esboços de um sexo: cresce a cada valor incluído (0 se nenhum)"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT versao FROM quantis_versoes WHERE sexo = %s", (sexo,))
+            linha = cur.fetchone()
+            return linha['versao'] if linha else 0
+
+def ler_quantis(sexo, faixa):
+    """
+    Esboços de quantis de uma coorte (ver web/quantis.py), como estão: a fila
+    é incorporada em segundo plano (agendar_quantis), não pela leitura.
+
+    Returns:
+        Dicionário métrica -> EsbocoQuantis
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT metrica, esboco FROM quantis WHERE sexo = %s AND faixa = %s", (sexo, faixa))
+            return {linha['metrica']: EsbocoQuantis.de_dict(linha['esboco']) for linha in cur.fetchall()}
+
+
+def recalcular_quantis():
+    """Reconstrói os esboços de quantis a partir das avaliações (tira o que foi removido ou mudou)"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT recalcular_quantis()")
+            _incorporar_quantis(cur)
+
+# Painel admin (consulta_admin): tabelas de origem, colunas e campo -> expressão
+_CONSULTA_ADMIN = {
+    'contas': (
+        "contas c",
+        "c.id, c.nome, c.created_at",
+        {'id': 'c.id', 'nome': 'c.nome', 'created_at': 'c.created_at'},
+    ),
+    'usuarios': (
+        "usuarios u JOIN contas c ON u.conta_id = c.id",
+        "u.conta_id, c.nome, u.sexo, u.data_nascimento, u.altura",
+        {'conta_id': 'u.conta_id', 'nome': 'c.nome', 'sexo': 'u.sexo',
+         'data_nascimento': 'u.data_nascimento', 'altura': 'u.altura'},
+    ),
+    'avaliacoes': (
+        "avaliacoes a JOIN usuarios u ON a.usuario_id = u.id JOIN contas c ON u.conta_id = c.id",
+        """a.id, u.conta_id, c.nome, u.sexo, a.data, u.altura, a.peso, a.pescoco, a.ombros, a.peitoral,
+           a.cintura, a.abdomen, a.quadril, a.braco_relaxado, a.braco_contraido, a.antebraco,
+           a.coxa_proximal AS coxa, a.panturrilha, a.imc, a.gordura_corporal AS gordura, a.massa_magra""",
+        {'id': 'a.id', 'data': 'a.data', 'nome': 'c.nome', 'sexo': 'u.sexo', 'peso': 'a.peso',
+         'imc': 'a.imc', 'gordura': 'a.gordura_corporal', 'massa_magra': 'a.massa_magra'},
+    ),
+}
+_CHAVE_ADMIN = {'contas': 'c.id', 'usuarios': 'u.conta_id', 'avaliacoes': 'a.id'}
+
+def consultar_tabela(tabela, consulta):
+    """
+    Uma página de uma tabela para o painel admin, com filtros e ordenação
+    resolvidos no banco (ver consulta_admin.ler_consulta).
+    
+    O prefixo do nome usa LIKE sobre o índice em lower(nome) text_pattern_ops; datas e
+    medidas usam os índices de avaliacoes. A página começa depois do cursor
+    (paginação por chave); sem filtros o total vem dos contadores de
+    estatisticas, com filtros é contado até MAXIMO_CONTAGEM e, acima disso,
+    estimado pelo planejador.
+    
+    Returns:
+        Tupla (linhas da página e a primeira da seguinte, se houver; total de
+        linhas que atendem aos filtros; se o total é exato)
+    """
+    origem, colunas, campos = _CONSULTA_ADMIN[tabela]
+    condicoes, params = [], []
+    if consulta['nome']:
+        prefixo = consulta['nome'].lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        condicoes.append("lower(c.nome) LIKE %s")
+        params.append(prefixo + '%')
+    if consulta['sexo']:
+        condicoes.append("u.sexo = %s")
+        params.append(consulta['sexo'])
+    if consulta['de']:
+        condicoes.append("a.data >= %s")
+        params.append(consulta['de'])
+    if consulta['ate']:
+        condicoes.append("a.data <= %s")
+        params.append(consulta['ate'])
+    for campo, (minimo, maximo) in consulta['faixas'].items():
+        if minimo is not None:
+            condicoes.append(f"{campos[campo]} >= %s")
+            params.append(minimo)
+        if maximo is not None:
+            condicoes.append(f"{campos[campo]} <= %s")
+            params.append(maximo)
+    where = f" WHERE {' AND '.join(condicoes)}" if condicoes else ''
+    
+    campo, chave = campos[consulta['ordem']], _CHAVE_ADMIN[tabela]
+    direcao = 'DESC' if consulta['decrescente'] else 'ASC'
+    ordem = f"{campo} {direcao}"
+    if campo != chave:
+        ordem += f", {chave} {direcao}"
+    pagina = condicoes[:]
+    params_pagina = params[:]
+    if consulta['cursor']:
+        condicao, valores = _apos_cursor(campo, chave, consulta['cursor'], consulta['decrescente'])
+        pagina.append(condicao)
+        params_pagina.extend(valores)
+    where_pagina = f" WHERE {' AND '.join(pagina)}" if pagina else ''
+    deslocamento = (consulta['pagina'] - 1) * consulta['tamanho']
+    
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            if not condicoes:
+                cur.execute("SELECT valor FROM estatisticas WHERE chave = %s", (tabela,))
+                contador = cur.fetchone()
+                total, exato = int(contador['valor']) if contador else 0, True
+            else:
+                cur.execute(
+                    f"SELECT COUNT(*) AS total FROM (SELECT 1 FROM {origem}{where} LIMIT %s) t",
+                    params + [MAXIMO_CONTAGEM + 1]
+                )
+                total = cur.fetchone()['total']
+                exato = total <= MAXIMO_CONTAGEM
+                if not exato:
+                    cur.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {origem}{where}", params)
+                    estimativa = cur.fetchone()['QUERY PLAN'][0]['Plan']['Plan Rows']
+                    total = max(int(estimativa), MAXIMO_CONTAGEM)
+            cur.execute(
+                f"SELECT {colunas} FROM {origem}{where_pagina} ORDER BY {ordem} LIMIT %s OFFSET %s",
+                params_pagina + [consulta['tamanho'] + 1, deslocamento]
+            )
+            return cur.fetchall(), total, exato
+
+def _apos_cursor(campo, chave, cursor, decrescente):
+    """
+    Condição das linhas depois do cursor (valor, chave) na ordem de
+    consultar_tabela. No PostgreSQL NULL vem depois de todos em ASC e antes em DESC.
+    """
+    valor, ultima = cursor
+    if campo == chave:
+        return f"{chave} {'<' if decrescente else '>'} %s", [ultima]
+    if decrescente:
+        if valor is None:
+            return f"({campo} IS NOT NULL OR {chave} < %s)", [ultima]
+        return f"({campo} < %s OR ({campo} = %s AND {chave} < %s))", [valor, valor, ultima]
+    if valor is None:
+        return f"({campo} IS NULL AND {chave} > %s)", [ultima]
+    return f"({campo} > %s OR ({campo} = %s AND {chave} > %s) OR {campo} IS NULL)", [valor, valor, ultima]
+
+
+# Consultas da exportação: colunas de exportacao.COLUNAS_EXPORTACAO
+_EXPORTACAO = {
+    'contas': "SELECT id, nome, created_at FROM contas ORDER BY id",
+    'usuarios': """SELECT u.conta_id, c.nome, u.sexo, u.data_nascimento, u.altura
+                   FROM usuarios u
+                   JOIN contas c ON u.conta_id = c.id
+                   ORDER BY u.conta_id""",
+    'avaliacoes': """SELECT a.id, u.conta_id, c.nome, a.data, u.altura, a.peso, a.pescoco, a.ombros,
+                            a.peitoral, a.cintura, a.abdomen, a.quadril, a.braco_relaxado,
+                            a.braco_contraido, a.antebraco, a.coxa_proximal AS coxa, a.panturrilha{resultados}
+                     FROM avaliacoes a
+                     JOIN usuarios u ON a.usuario_id = u.id
+                     JOIN contas c ON u.conta_id = c.id
+                     ORDER BY a.id""",
+}
+# Com resultados: também o perfil usado para recalcular os ausentes ou de versão antiga
+_EXPORTACAO_RESULTADOS = ", a.versao_calculo, a.resultados, u.sexo, u.data_nascimento"
+
+def exportar_tabela(tabela, resultados=False, tamanho=1000):
+    """
+    Percorre uma tabela inteira em lotes, com um cursor no servidor (named cursor):
+    só `tamanho` linhas ficam em memória por vez.
+    
+    Args:
+        tabela: 'contas', 'usuarios' ou 'avaliacoes'
+        resultados: Inclui versao_calculo e resultados (avaliações), com o perfil
+        tamanho: Linhas por lote
+    
+    Yields:
+        Listas de linhas (dicionários)
+    """
+    sql = _EXPORTACAO[tabela].format(resultados=_EXPORTACAO_RESULTADOS if resultados else '')
+    with get_db_connection() as conn:
+        try:
+            with conn.cursor(name='exportacao') as cur:
+                cur.execute(sql)
+                while True:
+                    linhas = cur.fetchmany(tamanho)
+                    if not linhas:
+                        break
+                    yield linhas
+        except GeneratorExit:
+            # Download interrompido: encerra a transação do cursor antes de devolver a conexão
+            conn.rollback()
+            raise
 
 def init_db():
     """Inicializa o banco de dados com as tabelas necessárias"""
@@ -0,0 +1,1556 @@
+"""
+Módulo de banco de dados SQLite (modo embarcado)
+
+Alternativa ao PostgreSQL para instalações de um único servidor: mesmo
+esquema de database.sql (contas, usuarios, avaliacoes) e mesmas funções de
+web/db.py, usando apenas a biblioteca padrão (sqlite3) em modo WAL.
+
+Configuração:
+    SQLITE_PATH=data/medidas.db
+    ou DATABASE_URL=sqlite:///data/medidas.db
+
+Importação única a partir do JSON:
+    python -m web.db_sqlite --importar data/usuarios.json
+
+Reconstrução das estatísticas, das coortes e dos esboços de percentis:
+    python -m web.db_sqlite --recalcular
+"""
+import os
+import sys
+import json
+import hashlib
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from web.pool import PoolConexoes
+from web.importacao import para_float
+from web.consulta_admin import MAXIMO_CONTAGEM
+from web.coortes import METRICAS_COORTE, FAIXAS_ETARIAS, DIMENSOES_COORTE
+from web.quantis import (METRICAS_PERCENTIL, LIMITE_OBSOLETOS, EsbocoQuantis, IncorporacaoQuantis,
+                         contribuicoes, incorporar_fila)
+
+
+def _caminho_configurado():
+    """Caminho do arquivo SQLite a partir das variáveis de ambiente"""
+    url = os.environ.get('DATABASE_URL') or ''
+    if os.environ.get('SQLITE_PATH'):
+        return os.environ['SQLITE_PATH']
+    if url.startswith('sqlite:///'):
+        return url[len('sqlite:///'):]
+    return os.path.join(os.path.dirname(__file__), '..', 'data', 'medidas.db')
+
+
+DATABASE_PATH = _caminho_configurado()
+
+# Esquema equivalente ao database.sql (tipos adaptados ao SQLite)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome VARCHAR(255) NOT NULL UNIQUE,
+    senha_hash VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS usuarios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conta_id INTEGER NOT NULL REFERENCES contas(id) ON DELETE CASCADE,
+    data_nascimento DATE NOT NULL,
+    sexo VARCHAR(20) NOT NULL,
+    altura DECIMAL(5,2) NOT NULL,
+    versao_alteracoes INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(conta_id)
+);
+
+CREATE TABLE IF NOT EXISTS avaliacoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    usuario_id INTEGER NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+    data DATE NOT NULL,
+    peso DECIMAL(5,2) NOT NULL,
+
+    pescoco DECIMAL(5,2),
+    ombros DECIMAL(5,2),
+    peitoral DECIMAL(5,2),
+    cintura DECIMAL(5,2),
+    abdomen DECIMAL(5,2),
+    quadril DECIMAL(5,2),
+    braco_relaxado DECIMAL(5,2),
+    braco_contraido DECIMAL(5,2),
+    antebraco DECIMAL(5,2),
+    punho DECIMAL(5,2),
+    coxa_proximal DECIMAL(5,2),
+    coxa_medial DECIMAL(5,2),
+    coxa_distal DECIMAL(5,2),
+    panturrilha DECIMAL(5,2),
+    tornozelo DECIMAL(5,2),
+
+    imc DECIMAL(5,2),
+    gordura_corporal DECIMAL(5,2),
+    massa_magra DECIMAL(5,2),
+    resultados JSON,
+    versao_calculo INTEGER,
+    versao_alteracao INTEGER,
+
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    UNIQUE(usuario_id, data)
+);
+
+CREATE INDEX IF NOT EXISTS idx_usuarios_conta ON usuarios(conta_id);
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_usuario ON avaliacoes(usuario_id);
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_data ON avaliacoes(data);
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_usuario_data ON avaliacoes(usuario_id, data DESC);
+-- Painel admin: prefixo do nome (LIKE sem diferenciar maiúsculas) e faixas de medidas
+CREATE INDEX IF NOT EXISTS idx_contas_nome ON contas(nome COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_peso ON avaliacoes(peso);
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_imc ON avaliacoes(imc);
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_gordura ON avaliacoes(gordura_corporal);
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_massa_magra ON avaliacoes(massa_magra);
+
+CREATE TABLE IF NOT EXISTS avaliacoes_removidas (
+    usuario_id INTEGER NOT NULL,
+    avaliacao_id INTEGER NOT NULL,
+    versao INTEGER NOT NULL,
+    PRIMARY KEY (usuario_id, avaliacao_id)
+);
+
+-- Estatísticas do painel admin (web/estatisticas.py), mantidas pelos triggers de SCHEMA_ESTATISTICAS
+CREATE TABLE IF NOT EXISTS estatisticas (
+    chave TEXT PRIMARY KEY,
+    valor REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS estatisticas_datas (
+    data DATE PRIMARY KEY,
+    avaliacoes INTEGER NOT NULL DEFAULT 0,
+    ultimas INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS estatisticas_usuarios (
+    usuario_id INTEGER PRIMARY KEY,
+    sexo TEXT NOT NULL,
+    gordura_soma REAL NOT NULL DEFAULT 0,
+    gordura_n INTEGER NOT NULL DEFAULT 0,
+    ultima_avaliacao DATE,
+    data_nascimento DATE
+);
+
+-- Agregados por coorte (web/coortes.py), mantidos pelos triggers de SCHEMA_COORTES
+CREATE TABLE IF NOT EXISTS coortes (
+    metrica TEXT NOT NULL,
+    sexo TEXT NOT NULL,
+    faixa TEXT NOT NULL,
+    mes TEXT NOT NULL,
+    classe TEXT NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0,
+    soma REAL NOT NULL DEFAULT 0,
+    soma_quadrados REAL NOT NULL DEFAULT 0,
+    minimo REAL,
+    maximo REAL,
+    PRIMARY KEY (metrica, sexo, faixa, mes, classe)
+);
+
+-- Métricas agregadas (preenchida a partir de METRICAS_COORTE)
+CREATE TABLE IF NOT EXISTS coortes_metricas (
+    metrica TEXT PRIMARY KEY,
+    posicao INTEGER NOT NULL,
+    caminho TEXT NOT NULL,
+    inicio REAL,
+    largura REAL,
+    intervalos INTEGER
+);
+
+-- Esboços de quantis por coorte (web/quantis.py), serializados em JSON
+CREATE TABLE IF NOT EXISTS quantis (
+    metrica TEXT NOT NULL,
+    sexo TEXT NOT NULL,
+    faixa TEXT NOT NULL,
+    esboco JSON NOT NULL,
+    PRIMARY KEY (metrica, sexo, faixa)
+);
+
+-- Avaliações com resultados ainda não incluídas nos esboços
+CREATE TABLE IF NOT EXISTS quantis_pendentes (
+    avaliacao_id INTEGER PRIMARY KEY
+);
+
+-- Valores já incluídos nos esboços de cada sexo (versão dos percentis na ETag)
+CREATE TABLE IF NOT EXISTS quantis_versoes (
+    sexo TEXT PRIMARY KEY,
+    versao INTEGER NOT NULL DEFAULT 0
+);
+
+-- Valores que saíram de cada coorte e continuam nos esboços (ver web/quantis.py)
+CREATE TABLE IF NOT EXISTS quantis_obsoletos (
+    sexo TEXT NOT NULL,
+    faixa TEXT NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (sexo, faixa)
+);
+"""
+
+# Versões de alteração (sincronização incremental), como os triggers de
+# database.sql; executado depois de _migrar, pois usa as colunas novas
+SCHEMA_VERSOES = """
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_usuario_versao ON avaliacoes(usuario_id, versao_alteracao);
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_removidas_versao ON avaliacoes_removidas(usuario_id, versao);
+
+CREATE TRIGGER IF NOT EXISTS trg_avaliacoes_versao_insert AFTER INSERT ON avaliacoes
+BEGIN
+    UPDATE usuarios SET versao_alteracoes = versao_alteracoes + 1 WHERE id = NEW.usuario_id;
+    UPDATE avaliacoes SET versao_alteracao =
+        (SELECT versao_alteracoes FROM usuarios WHERE id = NEW.usuario_id)
+    WHERE id = NEW.id;
+END;
+
+-- Só as colunas que o usuário altera: o backfill dos resultados (versao_calculo
+-- nova) não muda a versão - a ETag da lista já inclui VERSAO_CALCULO.
+-- O UPDATE do próprio trigger muda versao_alteracao e não dispara de novo
+CREATE TRIGGER IF NOT EXISTS trg_avaliacoes_versao_medidas AFTER UPDATE OF
+    usuario_id, data, peso, pescoco, ombros, peitoral, cintura, abdomen, quadril, braco_relaxado,
+    braco_contraido, antebraco, punho, coxa_proximal, coxa_medial, coxa_distal, panturrilha, tornozelo
+ON avaliacoes
+WHEN NEW.versao_alteracao IS OLD.versao_alteracao
+BEGIN
+    UPDATE usuarios SET versao_alteracoes = versao_alteracoes + 1 WHERE id = NEW.usuario_id;
+    UPDATE avaliacoes SET versao_alteracao =
+        (SELECT versao_alteracoes FROM usuarios WHERE id = NEW.usuario_id)
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_avaliacoes_removida AFTER DELETE ON avaliacoes
+BEGIN
+    UPDATE usuarios SET versao_alteracoes = versao_alteracoes + 1 WHERE id = OLD.usuario_id;
+    INSERT OR REPLACE INTO avaliacoes_removidas (usuario_id, avaliacao_id, versao)
+    SELECT id, OLD.id, versao_alteracoes FROM usuarios WHERE id = OLD.usuario_id;
+END;
+"""
+
+# Contadores do painel admin, como os triggers de database.sql: avaliações
+# atualizam estatisticas_usuarios (criada e mantida pelos triggers de usuarios
+# em SCHEMA_COORTES), que repassa aos totais por sexo e por data
+SCHEMA_ESTATISTICAS = """
+CREATE TRIGGER IF NOT EXISTS trg_contas_estatisticas_insert AFTER INSERT ON contas
+BEGIN
+    INSERT INTO estatisticas (chave, valor) VALUES ('contas', 1)
+    ON CONFLICT (chave) DO UPDATE SET valor = valor + excluded.valor;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_contas_estatisticas_delete AFTER DELETE ON contas
+BEGIN
+    INSERT INTO estatisticas (chave, valor) VALUES ('contas', -1)
+    ON CONFLICT (chave) DO UPDATE SET valor = valor + excluded.valor;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_estatisticas_usuarios_insert AFTER INSERT ON estatisticas_usuarios
+BEGIN
+    INSERT INTO estatisticas (chave, valor)
+    VALUES ('usuarios', 1), ('gordura_soma:' || NEW.sexo, NEW.gordura_soma), ('gordura_n:' || NEW.sexo, NEW.gordura_n)
+    ON CONFLICT (chave) DO UPDATE SET valor = valor + excluded.valor;
+    INSERT INTO estatisticas_datas (data, ultimas) SELECT NEW.ultima_avaliacao, 1 WHERE NEW.ultima_avaliacao IS NOT NULL
+    ON CONFLICT (data) DO UPDATE SET ultimas = ultimas + excluded.ultimas;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_estatisticas_usuarios_update AFTER UPDATE ON estatisticas_usuarios
+BEGIN
+    INSERT INTO estatisticas (chave, valor)
+    VALUES ('gordura_soma:' || OLD.sexo, -OLD.gordura_soma), ('gordura_n:' || OLD.sexo, -OLD.gordura_n),
+           ('gordura_soma:' || NEW.sexo, NEW.gordura_soma), ('gordura_n:' || NEW.sexo, NEW.gordura_n)
+    ON CONFLICT (chave) DO UPDATE SET valor = valor + excluded.valor;
+    INSERT INTO estatisticas_datas (data, ultimas)
+    SELECT OLD.ultima_avaliacao, -1 WHERE OLD.ultima_avaliacao IS NOT NULL
+    ON CONFLICT (data) DO UPDATE SET ultimas = ultimas + excluded.ultimas;
+    INSERT INTO estatisticas_datas (data, ultimas)
+    SELECT NEW.ultima_avaliacao, 1 WHERE NEW.ultima_avaliacao IS NOT NULL
+    ON CONFLICT (data) DO UPDATE SET ultimas = ultimas + excluded.ultimas;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_estatisticas_usuarios_delete AFTER DELETE ON estatisticas_usuarios
+BEGIN
+    INSERT INTO estatisticas (chave, valor)
+    VALUES ('usuarios', -1), ('gordura_soma:' || OLD.sexo, -OLD.gordura_soma), ('gordura_n:' || OLD.sexo, -OLD.gordura_n)
+    ON CONFLICT (chave) DO UPDATE SET valor = valor + excluded.valor;
+    INSERT INTO estatisticas_datas (data, ultimas) SELECT OLD.ultima_avaliacao, -1 WHERE OLD.ultima_avaliacao IS NOT NULL
+    ON CONFLICT (data) DO UPDATE SET ultimas = ultimas + excluded.ultimas;
+END;
+
+-- A data mais recente vem do índice (usuario_id, data DESC)
+CREATE TRIGGER IF NOT EXISTS trg_avaliacoes_estatisticas_insert AFTER INSERT ON avaliacoes
+BEGIN
+    INSERT INTO estatisticas (chave, valor) VALUES ('avaliacoes', 1)
+    ON CONFLICT (chave) DO UPDATE SET valor = valor + excluded.valor;
+    INSERT INTO estatisticas_datas (data, avaliacoes) VALUES (NEW.data, 1)
+    ON CONFLICT (data) DO UPDATE SET avaliacoes = avaliacoes + excluded.avaliacoes;
+    UPDATE estatisticas_usuarios SET
+        gordura_soma = gordura_soma + COALESCE(NEW.gordura_corporal, 0),
+        gordura_n = gordura_n + (NEW.gordura_corporal IS NOT NULL),
+        ultima_avaliacao = (SELECT MAX(data) FROM avaliacoes WHERE usuario_id = NEW.usuario_id)
+    WHERE usuario_id = NEW.usuario_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_avaliacoes_estatisticas_update AFTER UPDATE OF data, gordura_corporal ON avaliacoes
+WHEN NEW.data IS NOT OLD.data OR NEW.gordura_corporal IS NOT OLD.gordura_corporal
+BEGIN
+    INSERT INTO estatisticas_datas (data, avaliacoes) VALUES (OLD.data, -1), (NEW.data, 1)
+    ON CONFLICT (data) DO UPDATE SET avaliacoes = avaliacoes + excluded.avaliacoes;
+    UPDATE estatisticas_usuarios SET
+        gordura_soma = gordura_soma - COALESCE(OLD.gordura_corporal, 0) + COALESCE(NEW.gordura_corporal, 0),
+        gordura_n = gordura_n - (OLD.gordura_corporal IS NOT NULL) + (NEW.gordura_corporal IS NOT NULL),
+        ultima_avaliacao = (SELECT MAX(data) FROM avaliacoes WHERE usuario_id = NEW.usuario_id)
+    WHERE usuario_id = NEW.usuario_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_avaliacoes_estatisticas_delete AFTER DELETE ON avaliacoes
+BEGIN
+    INSERT INTO estatisticas (chave, valor) VALUES ('avaliacoes', -1)
+    ON CONFLICT (chave) DO UPDATE SET valor = valor + excluded.valor;
+    INSERT INTO estatisticas_datas (data, avaliacoes) VALUES (OLD.data, -1)
+    ON CONFLICT (data) DO UPDATE SET avaliacoes = avaliacoes + excluded.avaliacoes;
+    UPDATE estatisticas_usuarios SET
+        gordura_soma = gordura_soma - COALESCE(OLD.gordura_corporal, 0),
+        gordura_n = gordura_n - (OLD.gordura_corporal IS NOT NULL),
+        ultima_avaliacao = (SELECT MAX(data) FROM avaliacoes WHERE usuario_id = OLD.usuario_id)
+    WHERE usuario_id = OLD.usuario_id;
+END;
+"""
+
+# Reconstrução completa dos contadores (bancos criados antes deles)
+RECALCULO_ESTATISTICAS = """
+DELETE FROM estatisticas_usuarios;
+INSERT INTO estatisticas_usuarios (usuario_id, sexo, data_nascimento, gordura_soma, gordura_n, ultima_avaliacao)
+SELECT u.id, u.sexo, u.data_nascimento, COALESCE(SUM(a.gordura_corporal), 0), COUNT(a.gordura_corporal),
+       MAX(a.data)
+FROM usuarios u LEFT JOIN avaliacoes a ON a.usuario_id = u.id
+GROUP BY u.id, u.sexo, u.data_nascimento;
+
+DELETE FROM estatisticas;
+INSERT INTO estatisticas (chave, valor)
+SELECT 'contas', COUNT(*) FROM contas
+UNION ALL SELECT 'usuarios', COUNT(*) FROM estatisticas_usuarios
+UNION ALL SELECT 'avaliacoes', COUNT(*) FROM avaliacoes
+UNION ALL SELECT 'gordura_soma:' || sexo, SUM(gordura_soma) FROM estatisticas_usuarios GROUP BY sexo
+UNION ALL SELECT 'gordura_n:' || sexo, SUM(gordura_n) FROM estatisticas_usuarios GROUP BY sexo;
+
+DELETE FROM estatisticas_datas;
+INSERT INTO estatisticas_datas (data, avaliacoes, ultimas)
+SELECT data, SUM(avaliacoes), SUM(ultimas) FROM (
+    SELECT data, COUNT(*) AS avaliacoes, 0 AS ultimas FROM avaliacoes GROUP BY data
+    UNION ALL
+    SELECT ultima_avaliacao, 0, COUNT(*) FROM estatisticas_usuarios
+    WHERE ultima_avaliacao IS NOT NULL GROUP BY ultima_avaliacao
+) GROUP BY data;
+"""
+
+
+def _metricas_coorte():
+    """Linhas de coortes_metricas a partir de METRICAS_COORTE"""
+    return [(metrica, posicao, '$.' + '.'.join(caminho), inicio, largura, intervalos)
+            for posicao, (metrica, (caminho, inicio, largura, intervalos)) in enumerate(METRICAS_COORTE.items())]
+
+
+def _linhas_coortes(fonte):
+    """
+    SELECT das linhas de coortes (metrica, sexo, faixa, mes, classe, valor)
+    das avaliações de `fonte`, um SELECT com as colunas sexo, nascimento, data
+    e resultados. Mesmas regras de web/coortes.py (contribuicoes).
+    """
+    idade = ("CAST(strftime('%Y', x.data) AS INTEGER) - CAST(strftime('%Y', x.nascimento) AS INTEGER)"
+             " - (strftime('%m-%d', x.data) < strftime('%m-%d', x.nascimento))")
+    faixa = ' '.join(f"WHEN y.idade >= {minima} THEN '{rotulo}'" for minima, rotulo in reversed(FAIXAS_ETARIAS))
+    # Um só json_extract por avaliação (resultados tem alguns KB): os valores
+    # das métricas, na ordem de coortes_metricas.posicao, em um array pequeno
+    caminhos = ', '.join(f"'{caminho}'" for _, _, caminho, *_ in _metricas_coorte())
+    return f"""
+        SELECT m.metrica, y.sexo, CASE {faixa} END AS faixa, y.mes,
+               CASE WHEN m.largura IS NULL THEN v.value
+                    ELSE CAST(MAX(0, MIN(m.intervalos - 1, CAST((v.value - m.inicio) / m.largura AS INTEGER))) AS TEXT)
+               END AS classe,
+               CASE WHEN m.largura IS NOT NULL THEN v.value END AS valor
+        FROM (SELECT x.sexo, {idade} AS idade, strftime('%Y-%m', x.data) AS mes,
+                     json_extract(x.resultados, {caminhos}) AS valores
+              FROM ({fonte}) AS x LIMIT -1) AS y  -- LIMIT: calculado uma vez (não copiado nas expressões de fora)
+        JOIN json_each(y.valores) AS v
+        JOIN coortes_metricas m ON m.posicao = v.key
+         AND CASE WHEN m.largura IS NULL THEN v.type = 'text' ELSE v.type IN ('integer', 'real') END
+        WHERE y.sexo IS NOT NULL AND y.idade >= 0"""
+
+
+def _somar_coortes(fonte, sinal):
+    """
+    Soma (sinal 1) ou retira (-1) das coortes as avaliações de `fonte`.
+    Retiradas não mexem nos extremos; um intervalo vazio recomeça do zero.
+    """
+    extremo = 'valor' if sinal > 0 else 'NULL'
+    return f"""
+    INSERT INTO coortes (metrica, sexo, faixa, mes, classe, n, soma, soma_quadrados, minimo, maximo)
+    SELECT metrica, sexo, faixa, mes, classe, {sinal}, {sinal} * COALESCE(valor, 0),
+           {sinal} * COALESCE(valor * valor, 0), {extremo}, {extremo}
+    FROM ({_linhas_coortes(fonte)}) AS c
+    WHERE true
+    ON CONFLICT (metrica, sexo, faixa, mes, classe) DO UPDATE SET
+        n = n + excluded.n,
+        soma = CASE WHEN n + excluded.n > 0 THEN soma + excluded.soma ELSE 0 END,
+        soma_quadrados = CASE WHEN n + excluded.n > 0 THEN soma_quadrados + excluded.soma_quadrados ELSE 0 END,
+        minimo = CASE WHEN n + excluded.n <= 0 THEN NULL
+                      WHEN minimo IS NULL OR excluded.minimo < minimo THEN excluded.minimo ELSE minimo END,
+        maximo = CASE WHEN n + excluded.n <= 0 THEN NULL
+                      WHEN maximo IS NULL OR excluded.maximo > maximo THEN excluded.maximo ELSE maximo END"""
+
+
+def _avaliacao(linha):
+    """Fonte de _somar_coortes: a avaliação NEW ou OLD, com o perfil de estatisticas_usuarios"""
+    return (f"SELECT e.sexo, e.data_nascimento AS nascimento, {linha}.data AS data, "
+            f"{linha}.resultados AS resultados FROM estatisticas_usuarios e WHERE e.usuario_id = {linha}.usuario_id")
+
+
+def _avaliacoes_usuario(perfil):
+    """Fonte de _somar_coortes: todas as avaliações do usuário NEW ou OLD, com esse perfil"""
+    return (f"SELECT {perfil}.sexo AS sexo, {perfil}.data_nascimento AS nascimento, a.data, a.resultados "
+            f"FROM avaliacoes a WHERE a.usuario_id = {perfil}.id")
+
+
+# Coortes, como os triggers de database.sql. O perfil (sexo e nascimento) de
+# cada usuário fica em estatisticas_usuarios: ao remover um usuário, suas
+# avaliações saem uma vez só, seja pelo trigger de usuarios (as que ainda
+# existem), seja pelo de avaliacoes (enquanto o perfil existe)
+SCHEMA_COORTES = f"""
+CREATE TRIGGER IF NOT EXISTS trg_usuarios_perfil_insert AFTER INSERT ON usuarios
+BEGIN
+    INSERT OR IGNORE INTO estatisticas_usuarios (usuario_id, sexo, data_nascimento)
+    VALUES (NEW.id, NEW.sexo, NEW.data_nascimento);
+END;
+
+-- As avaliações mudam de coorte: saem com o perfil antigo e entram com o novo
+CREATE TRIGGER IF NOT EXISTS trg_usuarios_perfil_update AFTER UPDATE OF sexo, data_nascimento ON usuarios
+WHEN NEW.sexo IS NOT OLD.sexo OR NEW.data_nascimento IS NOT OLD.data_nascimento
+BEGIN
+    {_somar_coortes(_avaliacoes_usuario('OLD'), -1)};
+    UPDATE estatisticas_usuarios SET sexo = NEW.sexo, data_nascimento = NEW.data_nascimento
+    WHERE usuario_id = NEW.id;
+    {_somar_coortes(_avaliacoes_usuario('NEW'), 1)};
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_usuarios_perfil_delete AFTER DELETE ON usuarios
+BEGIN
+    {_somar_coortes(_avaliacoes_usuario('OLD'), -1)};
+    DELETE FROM estatisticas_usuarios WHERE usuario_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_avaliacoes_coortes_insert AFTER INSERT ON avaliacoes
+BEGIN
+    {_somar_coortes(_avaliacao('NEW'), 1)};
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_avaliacoes_coortes_update AFTER UPDATE OF usuario_id, data, resultados ON avaliacoes
+WHEN NEW.usuario_id IS NOT OLD.usuario_id OR NEW.data IS NOT OLD.data OR NEW.resultados IS NOT OLD.resultados
+BEGIN
+    {_somar_coortes(_avaliacao('OLD'), -1)};
+    {_somar_coortes(_avaliacao('NEW'), 1)};
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_avaliacoes_coortes_delete AFTER DELETE ON avaliacoes
+BEGIN
+    {_somar_coortes(_avaliacao('OLD'), -1)};
+END;
+"""
+
+# Triggers de versões anteriores, substituídos pelos de SCHEMA_VERSOES, SCHEMA_COORTES e SCHEMA_QUANTIS
+TRIGGERS_SUBSTITUIDOS = ('trg_usuarios_estatisticas_insert', 'trg_usuarios_estatisticas_sexo',
+                         'trg_usuarios_estatisticas_delete', 'trg_avaliacoes_quantis_update',
+                         'trg_avaliacoes_versao_update')
+
+# Reconstrução completa das coortes (backfill; exata também nos mínimos e máximos)
+RECALCULO_COORTES = f"""
+UPDATE estatisticas_usuarios SET data_nascimento =
+    (SELECT data_nascimento FROM usuarios WHERE id = estatisticas_usuarios.usuario_id)
+WHERE data_nascimento IS NOT
+    (SELECT data_nascimento FROM usuarios WHERE id = estatisticas_usuarios.usuario_id);
+
+DELETE FROM coortes;
+INSERT INTO coortes (metrica, sexo, faixa, mes, classe, n, soma, soma_quadrados, minimo, maximo)
+SELECT metrica, sexo, faixa, mes, classe, COUNT(*), COALESCE(SUM(valor), 0),
+       COALESCE(SUM(valor * valor), 0), MIN(valor), MAX(valor)
+FROM ({_linhas_coortes(
+    "SELECT u.sexo, u.data_nascimento AS nascimento, a.data, a.resultados "
+    "FROM avaliacoes a JOIN usuarios u ON u.id = a.usuario_id"
+)}) AS c
+GROUP BY metrica, sexo, faixa, mes, classe;
+"""
+
+def _faixa_etaria(nascimento, data):
+    """Expressão SQL da faixa etária na data (FAIXAS_ETARIAS); NULL sem uma das datas"""
+    idade = (f"(CAST(strftime('%Y', {data}) AS INTEGER) - CAST(strftime('%Y', {nascimento}) AS INTEGER)"
+             f" - (strftime('%m-%d', {data}) < strftime('%m-%d', {nascimento})))")
+    casos = ' '.join(f"WHEN {idade} >= {minima} THEN '{rotulo}'" for minima, rotulo in reversed(FAIXAS_ETARIAS))
+    return f"CASE {casos} END"
+
+
+def _marcar_obsoletos(fonte, avaliacao_id):
+    """
+    Conta em quantis_obsoletos as avaliações de `fonte`, um SELECT com as
+    colunas sexo, nascimento e data (só as que têm resultados). Uma avaliação
+    ainda na fila (expressão avaliacao_id) não chegou aos esboços: não conta.
+    """
+    return f"""
+    INSERT INTO quantis_obsoletos (sexo, faixa, n)
+    SELECT sexo, faixa, COUNT(*)
+    FROM (SELECT x.sexo, {_faixa_etaria('x.nascimento', 'x.data')} AS faixa FROM ({fonte}
+          AND NOT EXISTS (SELECT 1 FROM quantis_pendentes p WHERE p.avaliacao_id = {avaliacao_id})) AS x)
+    WHERE sexo IS NOT NULL AND faixa IS NOT NULL
+    GROUP BY sexo, faixa
+    ON CONFLICT (sexo, faixa) DO UPDATE SET n = n + excluded.n"""
+
+
+# Fila dos esboços de quantis, como os triggers de database.sql: a avaliação
+# entra sempre que é gravada com resultados novos (ou muda de data ou de dono)
+# e os resultados anteriores ficam obsoletos; mudanças de perfil tornam
+# obsoletas todas as avaliações do usuário e as devolvem à fila
+# (incorporar_quantis as inclui nos esboços, em segundo plano). Sem OR IGNORE:
+# dentro de um trigger vale a resolução de conflitos do comando de fora (upsert)
+SCHEMA_QUANTIS = f"""
+CREATE TRIGGER IF NOT EXISTS trg_avaliacoes_quantis_insert AFTER INSERT ON avaliacoes
+WHEN NEW.resultados IS NOT NULL
+BEGIN
+    INSERT OR IGNORE INTO quantis_pendentes (avaliacao_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_avaliacoes_quantis_alteracao AFTER UPDATE OF usuario_id, data, resultados ON avaliacoes
+WHEN NEW.usuario_id IS NOT OLD.usuario_id OR NEW.data IS NOT OLD.data OR NEW.resultados IS NOT OLD.resultados
+BEGIN
+    {_marcar_obsoletos(_avaliacao('OLD') + ' AND OLD.resultados IS NOT NULL', 'OLD.id')};
+    INSERT INTO quantis_pendentes (avaliacao_id) SELECT NEW.id
+    WHERE NEW.resultados IS NOT NULL AND NOT EXISTS (SELECT 1 FROM quantis_pendentes WHERE avaliacao_id = NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_avaliacoes_quantis_delete AFTER DELETE ON avaliacoes
+WHEN OLD.resultados IS NOT NULL
+BEGIN
+    {_marcar_obsoletos(_avaliacao('OLD'), 'OLD.id')};
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_usuarios_quantis_perfil AFTER UPDATE OF sexo, data_nascimento ON usuarios
+WHEN NEW.sexo IS NOT OLD.sexo OR NEW.data_nascimento IS NOT OLD.data_nascimento
+BEGIN
+    {_marcar_obsoletos(_avaliacoes_usuario('OLD') + ' AND a.resultados IS NOT NULL', 'a.id')};
+    INSERT INTO quantis_pendentes (avaliacao_id)
+    SELECT id FROM avaliacoes a WHERE usuario_id = NEW.id AND resultados IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM quantis_pendentes p WHERE p.avaliacao_id = a.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_usuarios_quantis_delete AFTER DELETE ON usuarios
+BEGIN
+    {_marcar_obsoletos(_avaliacoes_usuario('OLD') + ' AND a.resultados IS NOT NULL', 'a.id')};
+END;
+"""
+
+# Se há o que incorporar: a fila ou uma coorte com obsoletos demais (coortes_obsoletas)
+HA_QUANTIS_PENDENTES = """
+SELECT EXISTS (SELECT 1 FROM quantis_pendentes)
+    OR EXISTS (SELECT 1 FROM quantis_obsoletos o
+               WHERE o.n > ? * COALESCE((SELECT MAX(json_extract(q.esboco, '$.n')) FROM quantis q
+                                         WHERE q.sexo = o.sexo AND q.faixa = o.faixa), 0)) AS pendentes
+"""
+
+# Reconstrução dos esboços: todas as avaliações com resultados voltam à fila
+RECALCULO_QUANTIS = """
+DELETE FROM quantis;
+DELETE FROM quantis_obsoletos;
+DELETE FROM quantis_pendentes;
+INSERT INTO quantis_pendentes (avaliacao_id) SELECT id FROM avaliacoes WHERE resultados IS NOT NULL;
+"""
+
+
+
+# Segundos que uma conexão espera pelo bloqueio de escrita de outra
+ESPERA_BLOQUEIO = 30
+
+# Conversões de tipos (equivalentes ao que o psycopg2 devolve)
+sqlite3.register_adapter(date, lambda d: d.isoformat())
+sqlite3.register_adapter(datetime, lambda d: d.isoformat(sep=' '))
+sqlite3.register_converter('DATE', lambda b: date.fromisoformat(b.decode()))
+sqlite3.register_converter('TIMESTAMP', lambda b: datetime.fromisoformat(b.decode()))
+sqlite3.register_converter('JSON', json.loads)
+
+# Colunas adicionadas depois da primeira versão do esquema (bancos existentes)
+MIGRACOES = {
+    'usuarios': [('versao_alteracoes', 'INTEGER NOT NULL DEFAULT 0')],
+    'estatisticas_usuarios': [('data_nascimento', 'DATE')],
+    'avaliacoes': [('resultados', 'JSON'), ('versao_calculo', 'INTEGER'),
+                   ('versao_alteracao', 'INTEGER')],
+}
+
+
+def _migrar(conn):
+    """Adiciona colunas que faltam em bancos criados por versões anteriores"""
+    for tabela, colunas in MIGRACOES.items():
+        existentes = {linha['name'] for linha in conn.execute(f"PRAGMA table_info({tabela})")}
+        for coluna, tipo in colunas:
+            if coluna not in existentes:
+                conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo}")
+
+
+def _linha_como_dict(cursor, linha):
+    """Row factory equivalente ao RealDictCursor"""
+    return {coluna[0]: linha[i] for i, coluna in enumerate(cursor.description)}
+
+
+def _conectar():
+    """Abre uma conexão configurada (WAL, chaves estrangeiras, dict rows)"""
+    diretorio = os.path.dirname(os.path.abspath(DATABASE_PATH))
+    os.makedirs(diretorio, exist_ok=True)
+    conn = sqlite3.connect(
+        DATABASE_PATH,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        timeout=ESPERA_BLOQUEIO,
+        check_same_thread=False
+    )
+    conn.row_factory = _linha_como_dict
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+def _conexao_valida(conn):
+    """Verificação de saúde de uma conexão ociosa"""
+    try:
+        conn.execute("SELECT 1")
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def _criar_esquema(conn):
+    """Tabelas, migrações e triggers; contadores reconstruídos se ainda não existem"""
+    conn.executescript(SCHEMA)
+    _migrar(conn)
+    conn.executescript(SCHEMA_VERSOES)
+    conn.executescript(SCHEMA_ESTATISTICAS)
+    for trigger in TRIGGERS_SUBSTITUIDOS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.executescript(SCHEMA_COORTES)
+    # Banco criado antes das estatísticas (ou novo): conta o que já existe
+    if not conn.execute("SELECT 1 FROM estatisticas WHERE chave = 'contas'").fetchone():
+        conn.executescript("BEGIN IMMEDIATE;" + RECALCULO_ESTATISTICAS + "COMMIT;")
+    # Coortes novas ou com outros intervalos: agrega de novo o que já existe
+    metricas = _metricas_coorte()
+    atuais = [tuple(linha.values()) for linha in conn.execute(
+        "SELECT metrica, posicao, caminho, inicio, largura, intervalos FROM coortes_metricas ORDER BY posicao")]
+    if atuais != metricas or not conn.execute("SELECT 1 FROM coortes LIMIT 1").fetchone():
+        valores = ', '.join(
+            '(' + ', '.join('NULL' if v is None else f"'{v}'" if isinstance(v, str) else repr(v) for v in linha) + ')'
+            for linha in metricas
+        )
+        conn.executescript(f"""BEGIN IMMEDIATE;
+            DELETE FROM coortes_metricas;
+            INSERT INTO coortes_metricas (metrica, posicao, caminho, inicio, largura, intervalos) VALUES {valores};
+            {RECALCULO_COORTES}
+            COMMIT;""")
+    conn.executescript(SCHEMA_QUANTIS)
+    # Esboços novos: enfileira o que já tem resultados e incorpora
+    if not conn.execute("SELECT 1 FROM quantis LIMIT 1").fetchone() \
+            and not conn.execute("SELECT 1 FROM quantis_pendentes LIMIT 1").fetchone():
+        conn.executescript("BEGIN IMMEDIATE;" + RECALCULO_QUANTIS + "COMMIT;")
+    _incorporar_quantis(conn)
+
+
+def _incorporar_quantis(conn, esperar=True):
+    """
+    Inclui nos esboços as avaliações de quantis_pendentes e esvazia a fila,
+    reconstruindo as coortes com obsoletos demais (incorporar_fila), em uma
+    transação (BEGIN IMMEDIATE: uma incorporação por vez).
+
+    Args:
+        esperar: Com False, desiste se outra conexão está escrevendo
+
+    Returns:
+        False se desistiu (a fila fica para a próxima incorporação)
+    """
+    # Um json_extract por avaliação: os valores das métricas, na ordem de METRICAS_PERCENTIL
+    caminhos = ', '.join(f"'$.{'.'.join(caminho)}'" for caminho, _ in METRICAS_PERCENTIL.values())
+    colunas = f"u.sexo, u.data_nascimento, a.data, json_extract(a.resultados, {caminhos}) AS valores"
+
+    def ler_contribuicoes(consulta, parametros=()):
+        return [
+            linha
+            for av in conn.execute(consulta, parametros)
+            for linha in contribuicoes(dict(zip(METRICAS_PERCENTIL, json.loads(av['valores'] or '[]'))),
+                                       av['data'], av['sexo'], av['data_nascimento'])
+        ]
+
+    if esperar:
+        conn.execute("BEGIN IMMEDIATE")
+    else:
+        conn.execute("PRAGMA busy_timeout = 0")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            return False
+        finally:
+            conn.execute(f"PRAGMA busy_timeout = {ESPERA_BLOQUEIO * 1000}")
+    try:
+        linhas = ler_contribuicoes(
+            f"""SELECT {colunas}
+                FROM quantis_pendentes p
+                JOIN avaliacoes a ON a.id = p.avaliacao_id
+                JOIN usuarios u ON u.id = a.usuario_id"""
+        )
+        obsoletos = {(linha['sexo'], linha['faixa']): linha['n']
+                     for linha in conn.execute("SELECT sexo, faixa, n FROM quantis_obsoletos")}
+        esbocos = {}
+        for sexo, faixa in {(sexo, faixa) for (_, sexo, faixa), _ in linhas} | set(obsoletos):
+            for linha in conn.execute("SELECT metrica, esboco FROM quantis WHERE sexo = ? AND faixa = ?",
+                                      (sexo, faixa)):
+                esbocos[(linha['metrica'], sexo, faixa)] = EsbocoQuantis.de_dict(linha['esboco'])
+        alterados, reconstruidas, versoes = incorporar_fila(
+            esbocos, linhas, obsoletos,
+            lambda sexo: ler_contribuicoes(
+                f"""SELECT {colunas}
+                    FROM avaliacoes a JOIN usuarios u ON u.id = a.usuario_id
+                    WHERE u.sexo = ? AND a.resultados IS NOT NULL""",
+                (sexo,)
+            )
+        )
+        conn.executemany("DELETE FROM quantis WHERE sexo = ? AND faixa = ?", list(reconstruidas))
+        conn.executemany("DELETE FROM quantis_obsoletos WHERE sexo = ? AND faixa = ?", list(reconstruidas))
+        conn.executemany(
+            "INSERT OR REPLACE INTO quantis (metrica, sexo, faixa, esboco) VALUES (?, ?, ?, ?)",
+            [chave + (json.dumps(esbocos[chave].para_dict()),) for chave in alterados]
+        )
+        conn.executemany(
+            """INSERT INTO quantis_versoes (sexo, versao) VALUES (?, ?)
+               ON CONFLICT (sexo) DO UPDATE SET versao = versao + excluded.versao""",
+            list(versoes.items())
+        )
+        conn.execute("DELETE FROM quantis_pendentes")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return True
+
+
+def incorporar_quantis():
+    """
+    Inclui a fila nos esboços (e reconstrói as coortes obsoletas), se houver.
+
+    Não espera por outra escrita em andamento: ler_quantis nunca bloqueia (lê
+    os esboços já incorporados).
+
+    Returns:
+        False se desistiu por causa de outra escrita (a fila fica para depois)
+    """
+    with get_db_connection() as conn:
+        if conn.execute(HA_QUANTIS_PENDENTES, (LIMITE_OBSOLETOS,)).fetchone()['pendentes']:
+            return _incorporar_quantis(conn, esperar=False)
+    return True
+
+
+# As escritas só agendam a incorporação, feita em lote por uma thread
+_incorporacao = IncorporacaoQuantis(incorporar_quantis)
+
+
+def agendar_quantis():
+    """Agenda a incorporação da fila dos esboços (chamado depois das escritas que enfileiram)"""
+    _incorporacao.agendar()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obter_pool():
+    """Retorna o pool de conexões do processo (cria o esquema na primeira chamada)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = PoolConexoes.do_ambiente(_conectar, validar=_conexao_valida)
+                with pool.conexao() as conn:
+                    _criar_esquema(conn)
+                    conn.commit()
+                _pool = pool
+    return _pool
+
+
+def estatisticas_pool():
+    """Estatísticas do pool (em uso, ociosas, tempo de espera)"""
+    return obter_pool().estatisticas()
+
+
+@contextmanager
+def get_db_connection():
+    """Context manager para conexão com banco de dados (retirada do pool)"""
+    pool = obter_pool()
+    conn = pool.obter()
+    quebrada = False
+    try:
+        yield conn
+        conn.commit()
+    except Exception as e:
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            quebrada = True
+        raise e
+    finally:
+        pool.devolver(conn, descartar=quebrada)
+
+
+def hash_senha(senha):
+    """Gera hash SHA256 da senha"""
+    return hashlib.sha256(senha.encode()).hexdigest()
+
+
+def criar_conta(nome, senha):
+    """Cria uma nova conta de usuário"""
+    senha_hash = hash_senha(senha)
+    with get_db_connection() as conn:
+        cur = conn.execute(
+            "INSERT INTO contas (nome, senha_hash) VALUES (?, ?) RETURNING id",
+            (nome, senha_hash)
+        )
+        return cur.fetchone()['id']
+
+
+def autenticar(nome, senha):
+    """Autentica um usuário e retorna o ID da conta"""
+    senha_hash = hash_senha(senha)
+    with get_db_connection() as conn:
+        result = conn.execute(
+            "SELECT id FROM contas WHERE nome = ? AND senha_hash = ?",
+            (nome, senha_hash)
+        ).fetchone()
+        return result['id'] if result else None
+
+
+def atualizar_senha(nome, senha_atual, nova_senha):
+    """Troca a senha se a atual conferir; retorna True se alterou"""
+    with get_db_connection() as conn:
+        cur = conn.execute(
+            "UPDATE contas SET senha_hash = ? WHERE nome = ? AND senha_hash = ?",
+            (hash_senha(nova_senha), nome, hash_senha(senha_atual))
+        )
+        return cur.rowcount > 0
+
+
+def criar_usuario(conta_id, data_nascimento, sexo, altura):
+    """Cria ou atualiza dados pessoais do usuário vinculado à conta"""
+    with get_db_connection() as conn:
+        cur = conn.execute(
+            """INSERT INTO usuarios (conta_id, data_nascimento, sexo, altura)
+               VALUES (?, ?, ?, ?)
+               ON CONFLICT (conta_id) DO UPDATE SET
+                   data_nascimento = excluded.data_nascimento,
+                   sexo = excluded.sexo,
+                   altura = excluded.altura,
+                   updated_at = CURRENT_TIMESTAMP
+               RETURNING id""",
+            (conta_id, data_nascimento, sexo, altura)
+        )
+        usuario_id = cur.fetchone()['id']
+    # Sexo ou nascimento novos: as avaliações mudam de coorte nos esboços
+    agendar_quantis()
+    return usuario_id
+
+
+def obter_usuario_por_conta(conta_id):
+    """Obtém dados do usuário pela conta"""
+    with get_db_connection() as conn:
+        return conn.execute(
+            """SELECT u.*, c.nome
+               FROM usuarios u
+               JOIN contas c ON u.conta_id = c.id
+               WHERE u.conta_id = ?""",
+            (conta_id,)
+        ).fetchone()
+
+
+def _colunas_resultado(resultados):
+    """Extrai as colunas escalares (imc, gordura, massa magra) dos resultados"""
+    resultados = resultados or {}
+    return (resultados.get('imc'), resultados.get('percentual_gordura'),
+            resultados.get('massa_magra_kg'))
+
+
+_COLUNAS_AVALIACAO = """usuario_id, data, peso, pescoco, ombros, peitoral, cintura,
+                abdomen, quadril, braco_relaxado, braco_contraido, antebraco,
+                punho, coxa_proximal, coxa_medial, coxa_distal, panturrilha, tornozelo,
+                imc, gordura_corporal, massa_magra, resultados, versao_calculo"""
+
+_CONFLITO_AVALIACAO = """ON CONFLICT (usuario_id, data) DO UPDATE SET
+                peso = excluded.peso,
+                pescoco = excluded.pescoco,
+                ombros = excluded.ombros,
+                peitoral = excluded.peitoral,
+                cintura = excluded.cintura,
+                abdomen = excluded.abdomen,
+                quadril = excluded.quadril,
+                braco_relaxado = excluded.braco_relaxado,
+                braco_contraido = excluded.braco_contraido,
+                antebraco = excluded.antebraco,
+                punho = excluded.punho,
+                coxa_proximal = excluded.coxa_proximal,
+                coxa_medial = excluded.coxa_medial,
+                coxa_distal = excluded.coxa_distal,
+                panturrilha = excluded.panturrilha,
+                tornozelo = excluded.tornozelo,
+                imc = excluded.imc,
+                gordura_corporal = excluded.gordura_corporal,
+                massa_magra = excluded.massa_magra,
+                resultados = excluded.resultados,
+                versao_calculo = excluded.versao_calculo"""
+
+_UPSERT_AVALIACAO = _CONFLITO_AVALIACAO + """
+            RETURNING id"""
+
+
+def _valores_avaliacao(data, peso, medidas, resultados, versao_calculo):
+    """Valores das colunas de avaliacoes (sem usuario_id), na ordem de _COLUNAS_AVALIACAO"""
+    imc, gordura, massa_magra = _colunas_resultado(resultados)
+    return (data, peso, medidas.get('pescoco'), medidas.get('ombros'),
+            medidas.get('peitoral'), medidas.get('cintura'), medidas.get('abdomen'),
+            medidas.get('quadril'), medidas.get('braco_relaxado'), medidas.get('braco_contraido'),
+            medidas.get('antebraco'), medidas.get('punho'),
+            medidas.get('coxa') or medidas.get('coxa_proximal'),  # Aceitar ambos nomes
+            medidas.get('coxa_medial'), medidas.get('coxa_distal'), medidas.get('panturrilha'),
+            medidas.get('tornozelo'),
+            imc, gordura, massa_magra,
+            json.dumps(resultados) if resultados is not None else None, versao_calculo)
+
+
+def salvar_avaliacao(usuario_id, data, peso, medidas, resultados=None, versao_calculo=None):
+    """Salva uma nova avaliação (com os resultados calculados, se informados)"""
+    with get_db_connection() as conn:
+        cur = conn.execute(
+            f"""INSERT INTO avaliacoes ({_COLUNAS_AVALIACAO})
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            {_UPSERT_AVALIACAO}""",
+            (usuario_id,) + _valores_avaliacao(data, peso, medidas, resultados, versao_calculo)
+        )
+        avaliacao_id = cur.fetchone()['id']
+    agendar_quantis()
+    return avaliacao_id
+
+
+def salvar_avaliacao_por_conta(conta_id, sexo, data_nascimento, data, peso, medidas,
+                               resultados=None, versao_calculo=None):
+    """
+    Salva uma avaliação resolvendo usuario_id a partir da conta no mesmo comando.
+
+    O sexo e a data de nascimento usados no cálculo dos resultados são conferidos
+    no próprio INSERT: se o perfil mudou (ou não existe), nada é gravado.
+
+    Returns:
+        ID da avaliação, ou None se o perfil não confere
+    """
+    with get_db_connection() as conn:
+        # "WHERE true" evita a ambiguidade do ON CONFLICT após INSERT ... SELECT no SQLite
+        linha = conn.execute(
+            f"""WITH u AS (
+                SELECT id FROM usuarios
+                WHERE conta_id = ? AND sexo = ? AND data_nascimento = ?
+            )
+            INSERT INTO avaliacoes ({_COLUNAS_AVALIACAO})
+            SELECT u.id, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+            FROM u WHERE true
+            {_UPSERT_AVALIACAO}""",
+            (conta_id, sexo, data_nascimento) +
+            _valores_avaliacao(data, peso, medidas, resultados, versao_calculo)
+        ).fetchone()
+    agendar_quantis()
+    return linha['id'] if linha else None
+
+
+def salvar_avaliacoes(usuario_id, itens, versao_calculo):
+    """
+    Grava várias avaliações do usuário em uma única transação (importação).
+
+    Mesma regra de salvar_avaliacao: uma avaliação por data (a última do lote
+    prevalece, e substitui a já gravada).
+
+    Args:
+        itens: Lista de tuplas (data, peso, medidas, resultados)
+        versao_calculo: Versão dos cálculos usada
+    """
+    with get_db_connection() as conn:
+        conn.executemany(
+            f"""INSERT INTO avaliacoes ({_COLUNAS_AVALIACAO})
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            {_CONFLITO_AVALIACAO}""",
+            [(usuario_id,) + _valores_avaliacao(data, peso, medidas, resultados, versao_calculo)
+             for data, peso, medidas, resultados in itens]
+        )
+    agendar_quantis()
+
+
+def atualizar_resultados(itens, versao_calculo):
+    """
+    Grava resultados recalculados de várias avaliações em uma única conexão.
+
+    Args:
+        itens: Lista de tuplas (avaliacao_id, resultados)
+        versao_calculo: Versão dos cálculos usada
+    """
+    with get_db_connection() as conn:
+        conn.executemany(
+            """UPDATE avaliacoes
+               SET imc = ?, gordura_corporal = ?, massa_magra = ?,
+                   resultados = ?, versao_calculo = ?
+               WHERE id = ?""",
+            [(*_colunas_resultado(resultados), json.dumps(resultados), versao_calculo, avaliacao_id)
+             for avaliacao_id, resultados in itens]
+        )
+    agendar_quantis()
+
+
+# Medidas editáveis -> coluna de avaliacoes
+_COLUNAS_MEDIDAS = {
+    'peso': 'peso', 'pescoco': 'pescoco', 'ombros': 'ombros', 'peitoral': 'peitoral',
+    'cintura': 'cintura', 'abdomen': 'abdomen', 'quadril': 'quadril',
+    'braco_relaxado': 'braco_relaxado', 'braco_contraido': 'braco_contraido',
+    'antebraco': 'antebraco', 'coxa': 'coxa_proximal', 'panturrilha': 'panturrilha'
+}
+
+
+def obter_avaliacao_por_conta(conta_id, avaliacao_id):
+    """Obtém uma avaliação da conta com o perfil usado nos cálculos (None se não existir)"""
+    with get_db_connection() as conn:
+        return conn.execute(
+            """SELECT a.*, u.sexo, u.data_nascimento, u.altura, c.nome
+               FROM avaliacoes a
+               JOIN usuarios u ON a.usuario_id = u.id
+               JOIN contas c ON u.conta_id = c.id
+               WHERE a.id = ? AND u.conta_id = ?""",
+            (avaliacao_id, conta_id)
+        ).fetchone()
+
+
+def atualizar_medidas(conta_id, avaliacao_id, medidas, resultados, alterados, removidos, versao_calculo):
+    """
+    Grava a correção de algumas medidas de uma avaliação da conta.
+
+    Só as colunas das medidas alteradas são escritas; em `resultados` (JSON)
+    as chaves de `alterados` são definidas e as de `removidos` apagadas.
+
+    Args:
+        medidas: Medidas alteradas (campo -> valor)
+        resultados: Resultados completos (para as colunas imc, gordura, massa magra)
+        alterados: Chaves de resultado com valor novo
+        removidos: Chaves de resultado que deixaram de existir
+
+    Returns:
+        True se a avaliação foi atualizada
+    """
+    atribuicoes = [f"{_COLUNAS_MEDIDAS[campo]} = ?" for campo in medidas]
+    expressao, params_json = "COALESCE(resultados, '{}')", []
+    if alterados:
+        expressao = f"json_set({expressao}{', ?, json(?)' * len(alterados)})"
+        for chave, valor in alterados.items():
+            params_json += [f'$."{chave}"', json.dumps(valor)]
+    if removidos:
+        expressao = f"json_remove({expressao}{', ?' * len(removidos)})"
+        params_json += [f'$."{chave}"' for chave in removidos]
+    with get_db_connection() as conn:
+        cur = conn.execute(
+            f"""UPDATE avaliacoes
+               SET {''.join(a + ', ' for a in atribuicoes)}
+                   imc = ?, gordura_corporal = ?, massa_magra = ?,
+                   resultados = {expressao},
+                   versao_calculo = ?
+               WHERE id = ?
+                 AND usuario_id = (SELECT id FROM usuarios WHERE conta_id = ?)""",
+            (*medidas.values(), *_colunas_resultado(resultados), *params_json,
+             versao_calculo, avaliacao_id, conta_id)
+        )
+        atualizada = cur.rowcount > 0
+    agendar_quantis()
+    return atualizada
+
+
+def _filtro_periodo(antes=None, de=None, ate=None):
+    """Condições de data (cursor e intervalo) para a consulta de avaliações"""
+    condicoes, params = [], []
+    if antes:
+        condicoes.append("data < ?")
+        params.append(antes)
+    if de:
+        condicoes.append("data >= ?")
+        params.append(de)
+    if ate:
+        condicoes.append("data <= ?")
+        params.append(ate)
+    return ''.join(f" AND {c}" for c in condicoes), params
+
+
+def obter_avaliacoes(usuario_id, limit=10, antes=None, de=None, ate=None):
+    """
+    Obtém as avaliações do usuário, da mais recente para a mais antiga.
+
+    Paginação por cursor: antes = data da última avaliação da página anterior
+    (usa o índice (usuario_id, data DESC), sem OFFSET).
+    """
+    filtro, params = _filtro_periodo(antes, de, ate)
+    with get_db_connection() as conn:
+        return conn.execute(
+            f"""SELECT * FROM avaliacoes
+               WHERE usuario_id = ?{filtro}
+               ORDER BY data DESC
+               LIMIT ?""",
+            [usuario_id] + params + [limit]
+        ).fetchall()
+
+
+def obter_usuario_com_avaliacoes(conta_id, limit=10, antes=None, de=None, ate=None):
+    """
+    Obtém o perfil do usuário e suas avaliações (mesma paginação de
+    obter_avaliacoes) com uma única conexão.
+
+    Returns:
+        Tupla (usuario, avaliacoes); (None, []) se a conta não tem perfil
+    """
+    filtro, params = _filtro_periodo(antes, de, ate)
+    with get_db_connection() as conn:
+        usuario = conn.execute(
+            """SELECT u.*, c.nome
+               FROM usuarios u
+               JOIN contas c ON u.conta_id = c.id
+               WHERE u.conta_id = ?""",
+            (conta_id,)
+        ).fetchone()
+        if not usuario:
+            return None, []
+        avaliacoes = conn.execute(
+            f"""SELECT * FROM avaliacoes
+               WHERE usuario_id = ?{filtro}
+               ORDER BY data DESC
+               LIMIT ?""",
+            [usuario['id']] + params + [limit]
+        ).fetchall()
+        return usuario, avaliacoes
+
+
+def obter_versao_dados(conta_id):
+    """
+    Versão das avaliações, altura e coorte do perfil e versão dos esboços do
+    sexo (base da ETag da lista; None sem perfil)
+    """
+    with get_db_connection() as conn:
+        return conn.execute(
+            """SELECT u.versao_alteracoes, u.altura, u.sexo, u.data_nascimento,
+                      COALESCE(q.versao, 0) AS versao_quantis
+               FROM usuarios u
+               LEFT JOIN quantis_versoes q ON q.sexo = u.sexo
+               WHERE u.conta_id = ?""",
+            (conta_id,)
+        ).fetchone()
+
+
+def obter_alteracoes(conta_id, desde):
+    """
+    Obtém o perfil do usuário e o que mudou nas avaliações depois da versão
+    `desde` (versao_alteracoes do perfil é a versão atual), em uma única transação.
+
+    Returns:
+        Tupla (usuario, avaliacoes, removidas) - avaliações criadas/alteradas
+        (mais recentes primeiro) e IDs das apagadas; (None, [], []) se a conta
+        não tem perfil
+    """
+    with get_db_connection() as conn:
+        # Leituras da mesma transação veem o mesmo estado (sem escritas no meio)
+        conn.execute("BEGIN")
+        usuario = conn.execute(
+            """SELECT u.*, c.nome
+               FROM usuarios u
+               JOIN contas c ON u.conta_id = c.id
+               WHERE u.conta_id = ?""",
+            (conta_id,)
+        ).fetchone()
+        if not usuario:
+            return None, [], []
+        avaliacoes = conn.execute(
+            """SELECT * FROM avaliacoes
+               WHERE usuario_id = ? AND versao_alteracao > ?
+               ORDER BY data DESC""",
+            (usuario['id'], desde)
+        ).fetchall()
+        removidas = [linha['avaliacao_id'] for linha in conn.execute(
+            "SELECT avaliacao_id FROM avaliacoes_removidas WHERE usuario_id = ? AND versao > ?",
+            (usuario['id'], desde)
+        )]
+        return usuario, avaliacoes, removidas
+
+
+def deletar_avaliacao(avaliacao_id):
+    """Deleta uma avaliação pelo ID"""
+    with get_db_connection() as conn:
+        removida = conn.execute("DELETE FROM avaliacoes WHERE id = ?", (avaliacao_id,)).rowcount > 0
+    agendar_quantis()
+    return removida
+
+
+def ler_estatisticas(de, ate):
+    """
+    Contadores do painel admin, mantidos pelos triggers (sem COUNT(*) nas tabelas).
+
+    Args:
+        de, ate: Intervalo de datas (inclusivo) dos contadores por data
+
+    Returns:
+        Tupla ({chave: valor}, {data ISO: (avaliacoes, ultimas)})
+    """
+    with get_db_connection() as conn:
+        contadores = {linha['chave']: linha['valor']
+                      for linha in conn.execute("SELECT chave, valor FROM estatisticas")}
+        por_data = {
+            str(linha['data']): (linha['avaliacoes'], linha['ultimas'])
+            for linha in conn.execute(
+                "SELECT data, avaliacoes, ultimas FROM estatisticas_datas WHERE data BETWEEN ? AND ?",
+                (de, ate)
+            )
+        }
+        return contadores, por_data
+
+
+def ler_coortes(consulta):
+    """
+    Linhas de coortes que atendem aos filtros, já somadas nas dimensões fora
+    de consulta['agrupar'] (ver web/coortes.py: ler_consulta_coortes, montar).
+    """
+    dimensoes = [d for d in DIMENSOES_COORTE if d in consulta['agrupar']]
+    condicoes = [f"metrica IN ({', '.join('?' * len(consulta['metricas']))})", "n > 0"]
+    parametros = list(consulta['metricas'])
+    for coluna, chave, operador in (('sexo', 'sexo', '='), ('faixa', 'faixa', '='),
+                                    ('mes', 'de', '>='), ('mes', 'ate', '<=')):
+        if consulta[chave] is not None:
+            condicoes.append(f"{coluna} {operador} ?")
+            parametros.append(consulta[chave])
+    grupo = ', '.join(['metrica'] + dimensoes + ['classe'])
+    with get_db_connection() as conn:
+        return conn.execute(
+            f"""SELECT {grupo}, SUM(n) AS n, SUM(soma) AS soma, SUM(soma_quadrados) AS soma_quadrados,
+                       MIN(minimo) AS minimo, MAX(maximo) AS maximo
+                FROM coortes WHERE {' AND '.join(condicoes)}
+                GROUP BY {grupo}""",
+            parametros
+        ).fetchall()
+
+
+def obter_versao_quantis(sexo):
+    """Versão dos esboços de um sexo: cresce a cada valor incluído (0 se nenhum)"""
+    with get_db_connection() as conn:
+        linha = conn.execute("SELECT versao FROM quantis_versoes WHERE sexo = ?", (sexo,)).fetchone()
+        return linha['versao'] if linha else 0
+
+
+def ler_quantis(sexo, faixa):
+    """
+    Esboços de quantis de uma coorte (ver web/quantis.py), como estão: a fila
+    é incorporada em segundo plano (agendar_quantis), não pela leitura.
+
+    Returns:
+        Dicionário métrica -> EsbocoQuantis
+    """
+    with get_db_connection() as conn:
+        return {
+            linha['metrica']: EsbocoQuantis.de_dict(linha['esboco'])
+            for linha in conn.execute("SELECT metrica, esboco FROM quantis WHERE sexo = ? AND faixa = ?",
+                                      (sexo, faixa))
+        }
+
+
+# Painel admin (consulta_admin): tabelas de origem, colunas e campo -> expressão
+_CONSULTA_ADMIN = {
+    'contas': (
+        "contas c",
+        "c.id, c.nome, c.created_at",
+        {'id': 'c.id', 'nome': 'c.nome', 'created_at': 'c.created_at'},
+    ),
+    'usuarios': (
+        "usuarios u JOIN contas c ON u.conta_id = c.id",
+        "u.conta_id, c.nome, u.sexo, u.data_nascimento, u.altura",
+        {'conta_id': 'u.conta_id', 'nome': 'c.nome', 'sexo': 'u.sexo',
+         'data_nascimento': 'u.data_nascimento', 'altura': 'u.altura'},
+    ),
+    'avaliacoes': (
+        "avaliacoes a JOIN usuarios u ON a.usuario_id = u.id JOIN contas c ON u.conta_id = c.id",
+        """a.id, u.conta_id, c.nome, u.sexo, a.data, u.altura, a.peso, a.pescoco, a.ombros, a.peitoral,
+           a.cintura, a.abdomen, a.quadril, a.braco_relaxado, a.braco_contraido, a.antebraco,
+           a.coxa_proximal AS coxa, a.panturrilha, a.imc, a.gordura_corporal AS gordura, a.massa_magra""",
+        {'id': 'a.id', 'data': 'a.data', 'nome': 'c.nome', 'sexo': 'u.sexo', 'peso': 'a.peso',
+         'imc': 'a.imc', 'gordura': 'a.gordura_corporal', 'massa_magra': 'a.massa_magra'},
+    ),
+}
+_CHAVE_ADMIN = {'contas': 'c.id', 'usuarios': 'u.conta_id', 'avaliacoes': 'a.id'}
+
+
+def consultar_tabela(tabela, consulta):
+    """
+    Uma página de uma tabela para o painel admin, com filtros e ordenação
+    resolvidos no banco (ver consulta_admin.ler_consulta).
+
+    O prefixo do nome usa LIKE sobre o índice em nome COLLATE NOCASE; datas e
+    medidas usam os índices de avaliacoes. A página começa depois do cursor
+    (paginação por chave); sem filtros o total vem dos contadores de
+    estatisticas, com filtros é contado até MAXIMO_CONTAGEM.
+
+    Returns:
+        Tupla (linhas da página e a primeira da seguinte, se houver; total de
+        linhas que atendem aos filtros; se o total é exato)
+    """
+    origem, colunas, campos = _CONSULTA_ADMIN[tabela]
+    condicoes, params = [], []
+    if consulta['nome']:
+        prefixo = consulta['nome'].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        condicoes.append("c.nome LIKE ? ESCAPE '\\'")
+        params.append(prefixo + '%')
+    if consulta['sexo']:
+        condicoes.append("u.sexo = ?")
+        params.append(consulta['sexo'])
+    if consulta['de']:
+        condicoes.append("a.data >= ?")
+        params.append(consulta['de'])
+    if consulta['ate']:
+        condicoes.append("a.data <= ?")
+        params.append(consulta['ate'])
+    for campo, (minimo, maximo) in consulta['faixas'].items():
+        if minimo is not None:
+            condicoes.append(f"{campos[campo]} >= ?")
+            params.append(minimo)
+        if maximo is not None:
+            condicoes.append(f"{campos[campo]} <= ?")
+            params.append(maximo)
+    where = f" WHERE {' AND '.join(condicoes)}" if condicoes else ''
+
+    campo, chave = campos[consulta['ordem']], _CHAVE_ADMIN[tabela]
+    direcao = 'DESC' if consulta['decrescente'] else 'ASC'
+    ordem = f"{campo} {direcao}"
+    if campo != chave:
+        ordem += f", {chave} {direcao}"
+    pagina = condicoes[:]
+    params_pagina = params[:]
+    if consulta['cursor']:
+        condicao, valores = _apos_cursor(campo, chave, consulta['cursor'], consulta['decrescente'])
+        pagina.append(condicao)
+        params_pagina.extend(valores)
+    where_pagina = f" WHERE {' AND '.join(pagina)}" if pagina else ''
+    deslocamento = (consulta['pagina'] - 1) * consulta['tamanho']
+
+    with get_db_connection() as conn:
+        if not condicoes:
+            contador = conn.execute("SELECT valor FROM estatisticas WHERE chave = ?", (tabela,)).fetchone()
+            total, exato = int(contador['valor']) if contador else 0, True
+        else:
+            total = conn.execute(
+                f"SELECT COUNT(*) AS total FROM (SELECT 1 FROM {origem}{where} LIMIT ?)",
+                params + [MAXIMO_CONTAGEM + 1]
+            ).fetchone()['total']
+            total, exato = min(total, MAXIMO_CONTAGEM), total <= MAXIMO_CONTAGEM
+        linhas = conn.execute(
+            f"SELECT {colunas} FROM {origem}{where_pagina} ORDER BY {ordem} LIMIT ? OFFSET ?",
+            params_pagina + [consulta['tamanho'] + 1, deslocamento]
+        ).fetchall()
+        return linhas, total, exato
+
+
+def _apos_cursor(campo, chave, cursor, decrescente):
+    """
+    Condição das linhas depois do cursor (valor, chave) na ordem de
+    consultar_tabela. No SQLite NULL vem antes de todos em ASC e depois em DESC.
+    """
+    valor, ultima = cursor
+    if campo == chave:
+        return f"{chave} {'<' if decrescente else '>'} ?", [ultima]
+    if decrescente:
+        if valor is None:
+            return f"({campo} IS NULL AND {chave} < ?)", [ultima]
+        return f"({campo} < ? OR ({campo} = ? AND {chave} < ?) OR {campo} IS NULL)", [valor, valor, ultima]
+    if valor is None:
+        return f"({campo} IS NOT NULL OR {chave} > ?)", [ultima]
+    return f"({campo} > ? OR ({campo} = ? AND {chave} > ?))", [valor, valor, ultima]
+
+
+
+# Consultas da exportação: colunas de exportacao.COLUNAS_EXPORTACAO
+_EXPORTACAO = {
+    'contas': "SELECT id, nome, created_at FROM contas ORDER BY id",
+    'usuarios': """SELECT u.conta_id, c.nome, u.sexo, u.data_nascimento, u.altura
+                   FROM usuarios u
+                   JOIN contas c ON u.conta_id = c.id
+                   ORDER BY u.conta_id""",
+    'avaliacoes': """SELECT a.id, u.conta_id, c.nome, a.data, u.altura, a.peso, a.pescoco, a.ombros,
+                            a.peitoral, a.cintura, a.abdomen, a.quadril, a.braco_relaxado,
+                            a.braco_contraido, a.antebraco, a.coxa_proximal AS coxa, a.panturrilha{resultados}
+                     FROM avaliacoes a
+                     JOIN usuarios u ON a.usuario_id = u.id
+                     JOIN contas c ON u.conta_id = c.id
+                     ORDER BY a.id""",
+}
+# Com resultados: também o perfil usado para recalcular os ausentes ou de versão antiga
+_EXPORTACAO_RESULTADOS = ", a.versao_calculo, a.resultados, u.sexo, u.data_nascimento"
+
+
+def exportar_tabela(tabela, resultados=False, tamanho=1000):
+    """
+    Percorre uma tabela inteira em lotes; o cursor do SQLite lê as linhas sob
+    demanda, então só `tamanho` linhas ficam em memória por vez.
+
+    Args:
+        tabela: 'contas', 'usuarios' ou 'avaliacoes'
+        resultados: Inclui versao_calculo e resultados (avaliações), com o perfil
+        tamanho: Linhas por lote
+
+    Yields:
+        Listas de linhas (dicionários)
+    """
+    sql = _EXPORTACAO[tabela].format(resultados=_EXPORTACAO_RESULTADOS if resultados else '')
+    with get_db_connection() as conn:
+        cur = conn.execute(sql)
+        try:
+            while True:
+                linhas = cur.fetchmany(tamanho)
+                if not linhas:
+                    break
+                yield linhas
+        finally:
+            cur.close()
+
+
+def init_db():
+    """Inicializa o banco de dados com as tabelas necessárias"""
+    with get_db_connection() as conn:
+        _criar_esquema(conn)
+
+
+def recalcular_estatisticas():
+    """Reconstrói os contadores do painel admin a partir das tabelas"""
+    with get_db_connection() as conn:
+        conn.executescript("BEGIN IMMEDIATE;" + RECALCULO_ESTATISTICAS + "COMMIT;")
+
+
+def recalcular_coortes():
+    """Reconstrói as coortes a partir das avaliações (mínimos e máximos exatos)"""
+    with get_db_connection() as conn:
+        conn.executescript("BEGIN IMMEDIATE;" + RECALCULO_COORTES + "COMMIT;")
+
+
+def recalcular_quantis():
+    """Reconstrói os esboços de quantis a partir das avaliações (tira o que foi removido ou mudou)"""
+    with get_db_connection() as conn:
+        conn.executescript("BEGIN IMMEDIATE;" + RECALCULO_QUANTIS + "COMMIT;")
+        _incorporar_quantis(conn)
+
+
+def importar_json(arquivo):
+    """
+    Importa contas, usuários e avaliações de um usuarios.json (modo JSON), em
+    uma única transação.
+
+    IDs de conta são preservados. Avaliações com a mesma data para o mesmo
+    usuário são mescladas (a mais recente prevalece), como no PostgreSQL.
+    Medidas vazias viram NULL e os resultados já calculados são mantidos (sem
+    versão de cálculo no JSON, são recalculados na primeira leitura).
+
+    Returns:
+        Dicionário com a quantidade importada de cada tabela e 'conflitos':
+        registros não importados, com o motivo (ex.: ID de conta já usado por
+        outro nome)
+    """
+    from web.armazenamento import ArmazenamentoJSON
+
+    dados = ArmazenamentoJSON(arquivo).carregar()
+    totais = {'contas': 0, 'usuarios': 0, 'avaliacoes': 0, 'conflitos': []}
+
+    def conflito(tabela, chave, erro):
+        motivo = f'campo ausente: {erro.args[0]}' if isinstance(erro, KeyError) else str(erro)
+        totais['conflitos'].append({'tabela': tabela, 'chave': chave, 'erro': motivo})
+
+    with get_db_connection() as conn:
+        contas = set()
+        for nome, conta in dados.get('contas', {}).items():
+            try:
+                conn.execute(
+                    """INSERT INTO contas (id, nome, senha_hash, created_at) VALUES (?, ?, ?, ?)
+                       ON CONFLICT (nome) DO UPDATE SET senha_hash = excluded.senha_hash""",
+                    (conta['id'], nome, conta['senha_hash'],
+                     conta.get('created_at', datetime.now().isoformat()).replace('T', ' '))
+                )
+            except (sqlite3.IntegrityError, KeyError) as e:
+                conflito('contas', nome, e)
+                continue
+            contas.add(str(conta['id']))
+            totais['contas'] += 1
+
+        usuarios = {}
+        for conta_id, usuario in dados.get('usuarios', {}).items():
+            # Perfil de uma conta que não entrou iria para outra conta com o mesmo ID
+            if conta_id not in contas:
+                conflito('usuarios', conta_id, 'conta não importada')
+                continue
+            try:
+                usuarios[conta_id] = conn.execute(
+                    """INSERT INTO usuarios (conta_id, data_nascimento, sexo, altura) VALUES (?, ?, ?, ?)
+                       ON CONFLICT (conta_id) DO UPDATE SET
+                           data_nascimento = excluded.data_nascimento,
+                           sexo = excluded.sexo,
+                           altura = excluded.altura
+                       RETURNING id""",
+                    (int(conta_id), usuario['data_nascimento'], usuario['sexo'], para_float(usuario['altura']))
+                ).fetchone()['id']
+            except (sqlite3.IntegrityError, KeyError, ValueError) as e:
+                conflito('usuarios', conta_id, e)
+                continue
+            totais['usuarios'] += 1
+
+        for conta_id, avaliacoes in dados.get('avaliacoes', {}).items():
+            if conta_id not in usuarios:
+                continue
+            # A lista JSON é mais recente primeiro: importar do fim para o início
+            for av in reversed(avaliacoes):
+                try:
+                    medidas = {campo: para_float(valor) for campo, valor in (av.get('medidas') or {}).items()}
+                    conn.execute(
+                        f"""INSERT INTO avaliacoes ({_COLUNAS_AVALIACAO})
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        {_UPSERT_AVALIACAO}""",
+                        (usuarios[conta_id],) + _valores_avaliacao(
+                            av['data'], medidas['peso'], medidas, av.get('resultados'), av.get('versao_calculo')
+                        )
+                    ).fetchone()
+                except (sqlite3.IntegrityError, KeyError, ValueError, TypeError) as e:
+                    conflito('avaliacoes', av.get('id'), e)
+                    continue
+                totais['avaliacoes'] += 1
+
+    incorporar_quantis()
+    return totais
+
+
+if __name__ == '__main__':
+    import argparse
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    parser = argparse.ArgumentParser(description='Banco SQLite do sistema de medidas')
+    parser.add_argument('--importar', metavar='JSON', help='Importa um usuarios.json existente')
+    parser.add_argument('--recalcular', action='store_true',
+                        help='Reconstrói as estatísticas, as coortes e os esboços de percentis')
+    args = parser.parse_args()
+
+    init_db()
+    print(f"🗄️  Banco SQLite: {os.path.abspath(DATABASE_PATH)}")
+    if args.importar:
+        totais = importar_json(args.importar)
+        print(f"✅ Importados: {totais['contas']} contas, {totais['usuarios']} usuários, "
+              f"{totais['avaliacoes']} avaliações")
+        for item in totais['conflitos']:
+            print(f"⚠️ Não importado ({item['tabela']} {item['chave']}): {item['erro']}")
+    if args.recalcular:
+        recalcular_estatisticas()
+        recalcular_coortes()
+        recalcular_quantis()
+        print("✅ Estatísticas, coortes e esboços de percentis reconstruídos")
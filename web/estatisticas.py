@@ -0,0 +1,262 @@
+"""
+Estatísticas do painel admin (GET /api/admin/stats), mantidas a cada escrita
+
+Nada é contado na leitura: a resposta sai de contadores atualizados junto
+com as alterações, então o custo não depende do tamanho das tabelas.
+
+Contadores (chave -> valor):
+    contas, usuarios, avaliacoes - totais
+    gordura_soma:<sexo>          - soma de percentual_gordura das avaliações
+    gordura_n:<sexo>             - avaliações com percentual_gordura
+
+Por data (data -> (avaliacoes, ultimas)):
+    avaliacoes - avaliações com essa data
+    ultimas    - usuários cuja avaliação mais recente é dessa data
+
+No banco os contadores ficam nas tabelas estatisticas, estatisticas_datas e
+estatisticas_usuarios, mantidas por triggers (database.sql, db_sqlite.py).
+No modo JSON ficam em um EstatisticasJSON, que observa as operações
+aplicadas ao documento em cache (ArmazenamentoJSON.observar).
+"""
+
+from collections import Counter
+from datetime import date, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+
+# Janelas (em dias, contando hoje) das avaliações recentes e dos usuários ativos
+DIAS_RECENTES = 7
+DIAS_ATIVOS = 30
+
+
+def dias_ativos(hoje: date) -> list:
+    """Datas (ISO) da janela de usuários ativos, de hoje para trás"""
+    return [(hoje - timedelta(days=i)).isoformat() for i in range(DIAS_ATIVOS)]
+
+
+def resumir(contadores: Dict[str, float], por_data: Dict[str, Tuple[int, int]],
+            hoje: date) -> Dict[str, Any]:
+    """
+    Resposta de /api/admin/stats a partir dos contadores.
+
+    Args:
+        contadores: Contadores (chave -> valor)
+        por_data: Data ISO -> (avaliacoes, ultimas), ao menos dos últimos DIAS_ATIVOS dias
+        hoje: Data de referência das janelas
+    """
+    datas = dias_ativos(hoje)
+    gordura = {}
+    for chave, soma in list(contadores.items()):
+        if chave.startswith('gordura_soma:'):
+            sexo = chave.split(':', 1)[1]
+            total = contadores.get(f'gordura_n:{sexo}') or 0
+            if total > 0:
+                gordura[sexo] = round(soma / total, 2)
+    return {
+        'total_contas': int(contadores.get('contas', 0)),
+        'total_usuarios': int(contadores.get('usuarios', 0)),
+        'total_avaliacoes': int(contadores.get('avaliacoes', 0)),
+        f'avaliacoes_{DIAS_RECENTES}_dias': sum(por_data.get(d, (0, 0))[0] for d in datas[:DIAS_RECENTES]),
+        f'avaliacoes_{DIAS_ATIVOS}_dias': sum(por_data.get(d, (0, 0))[0] for d in datas),
+        f'usuarios_ativos_{DIAS_ATIVOS}_dias': sum(por_data.get(d, (0, 0))[1] for d in datas),
+        'gordura_media': dict(sorted(gordura.items())),
+    }
+
+
+# ===== MODO JSON =====
+
+def _gordura(avaliacao: Dict[str, Any]) -> Optional[float]:
+    valor = (avaliacao.get('resultados') or {}).get('percentual_gordura')
+    return float(valor) if isinstance(valor, (int, float)) and not isinstance(valor, bool) else None
+
+
+class ObservadorContas:
+    """
+    Agregados sobre o documento JSON somados conta a conta.
+
+    Cada conta contribui com um valor calculado do seu perfil e das suas
+    avaliações (_contribuicao), somado aos agregados por _aplicar. Uma operação
+    em avaliacoes/<id> ou usuarios/<id> retira a contribuição do que vai mudar
+    antes de ser aplicada e a devolve, recalculada, depois. O que muda sai do
+    payload da operação (a avaliação inserida, removida ou selecionada por
+    {"id": ...}): o custo de uma escrita não depende das avaliações da conta.
+    Só uma operação sobre a lista inteira, ou uma mudança de perfil em
+    CAMPOS_PERFIL, recalcula a conta.
+    """
+
+    # Campos do perfil de que a contribuição depende
+    CAMPOS_PERFIL = ('sexo', 'data_nascimento')
+
+    def carregar(self, dados: Dict[str, Any]) -> None:
+        """Recalcula tudo (documento carregado do disco)"""
+        self._dados = dados
+        self._zerar()
+        self._parcial = False
+        for conta_id in set(dados.get('avaliacoes', {})) | set(dados.get('usuarios', {})):
+            self._aplicar(conta_id, self._contribuicao(conta_id), 1)
+
+    @staticmethod
+    def _conta(operacao: list) -> Optional[str]:
+        """Conta alterada pela operação (None se não for uma só)"""
+        caminho = operacao[1]
+        if len(caminho) >= 2 and caminho[0] in ('avaliacoes', 'usuarios') and isinstance(caminho[1], str):
+            return caminho[1]
+        return None
+
+    def _parcial_possivel(self, conta_id: str, operacao: list) -> bool:
+        """Se a operação altera só as avaliações que _afetadas encontra"""
+        op, caminho = operacao[0], operacao[1]
+        if caminho[0] == 'usuarios':
+            if len(caminho) != 2 or op not in ('set', 'mesclar') or not isinstance(operacao[2], dict):
+                return False
+            perfil = self._dados.get('usuarios', {}).get(conta_id) or {}
+            novo = operacao[2] if op == 'set' else {**perfil, **operacao[2]}
+            return all(perfil.get(campo) == novo.get(campo) for campo in self.CAMPOS_PERFIL)
+        if len(caminho) == 2:
+            return op in ('inserir', 'estender', 'remover')
+        return isinstance(caminho[2], dict)
+
+    def _afetadas(self, conta_id: str, operacao: list, depois: bool) -> list:
+        """
+        Avaliações da conta que a operação altera, como estão antes ou depois
+        dela (só para operações aceitas por _parcial_possivel)
+        """
+        op, caminho = operacao[0], operacao[1]
+        if caminho[0] == 'usuarios':
+            return []
+        if len(caminho) == 2:
+            if op == 'inserir':
+                return [operacao[2]] if depois else []
+            if op == 'estender':
+                return list(operacao[2]) if depois else []
+            return [] if depois else [av for av in self._dados.get('avaliacoes', {}).get(conta_id) or []
+                                      if av.get('id') == operacao[2]]
+        # As medidas não entram nos agregados (só data e resultados)
+        if len(caminho) >= 4 and caminho[3] == 'medidas':
+            return []
+        return [av for av in self._dados.get('avaliacoes', {}).get(conta_id) or []
+                if av.get('id') == caminho[2].get('id')]
+
+    def antes(self, dados: Dict[str, Any], operacao: list) -> None:
+        """Retira a contribuição do que a operação vai alterar"""
+        conta_id = self._conta(operacao)
+        if conta_id is not None:
+            self._dados = dados
+            self._parcial = self._parcial_possivel(conta_id, operacao)
+            avaliacoes = self._afetadas(conta_id, operacao, False) if self._parcial else None
+            self._aplicar(conta_id, self._contribuicao(conta_id, avaliacoes), -1)
+
+    def aplicada(self, dados: Dict[str, Any], operacao: list) -> None:
+        """Devolve a contribuição recalculada após uma operação aplicada ao documento"""
+        self._dados = dados
+        caminho = operacao[1]
+        conta_id = self._conta(operacao)
+        if conta_id is not None:
+            avaliacoes = self._afetadas(conta_id, operacao, True) if self._parcial else None
+            self._aplicar(conta_id, self._contribuicao(conta_id, avaliacoes), 1)
+        elif not caminho or caminho[0] in ('avaliacoes', 'usuarios'):
+            self.carregar(dados)
+
+    def _zerar(self) -> None:
+        raise NotImplementedError
+
+    def _contribuicao(self, conta_id: str, avaliacoes: Optional[list] = None) -> Any:
+        """Contribuição das avaliações dadas da conta (None: todas)"""
+        raise NotImplementedError
+
+    def _aplicar(self, conta_id: str, contribuicao: Any, sinal: int) -> None:
+        raise NotImplementedError
+
+
+class EstatisticasJSON(ObservadorContas):
+    """
+    Contadores de /api/admin/stats sobre o documento JSON.
+
+    Cada conta contribui com suas avaliações (contagem por data e gordura
+    por sexo); a data mais recente de cada usuário sai das datas da conta,
+    guardadas à parte.
+    """
+
+    # A data de nascimento não entra nos contadores
+    CAMPOS_PERFIL = ('sexo',)
+
+    def __init__(self):
+        self.carregar({})
+
+    def carregar(self, dados: Dict[str, Any]) -> None:
+        """Recalcula tudo (documento carregado do disco)"""
+        super().carregar(dados)
+        self._contar_cadastros()
+
+    def _zerar(self):
+        self.contadores = Counter()
+        self.por_data = {}
+        # Conta -> Counter das datas das avaliações; conta -> data contada em ultimas
+        self._datas = {}
+        self._ultimas = {}
+
+    def _contar_cadastros(self):
+        self.contadores['contas'] = len(self._dados.get('contas', {}))
+        self.contadores['usuarios'] = len(self._dados.get('usuarios', {}))
+
+    def _contribuicao(self, conta_id: str, avaliacoes: Optional[list] = None) -> Dict[str, Any]:
+        perfil = self._dados.get('usuarios', {}).get(conta_id) or {}
+        if avaliacoes is None:
+            avaliacoes = self._dados.get('avaliacoes', {}).get(conta_id) or []
+        gorduras = [g for g in map(_gordura, avaliacoes) if g is not None]
+        return {
+            'avaliacoes': len(avaliacoes),
+            'datas': Counter(str(av.get('data'))[:10] for av in avaliacoes),
+            'sexo': perfil.get('sexo'),
+            'gordura': (sum(gorduras), len(gorduras)),
+        }
+
+    def _aplicar(self, conta_id: str, contribuicao: Dict[str, Any], sinal: int) -> None:
+        self.contadores['avaliacoes'] += sinal * contribuicao['avaliacoes']
+        datas = self._datas.setdefault(conta_id, Counter())
+        for data, total in contribuicao['datas'].items():
+            avaliacoes, ultimas = self.por_data.get(data, (0, 0))
+            self.por_data[data] = (avaliacoes + sinal * total, ultimas)
+            datas[data] += sinal * total
+            if datas[data] <= 0:
+                del datas[data]
+        if not datas:
+            del self._datas[conta_id]
+        if contribuicao['sexo']:
+            soma, total = contribuicao['gordura']
+            self.contadores[f"gordura_soma:{contribuicao['sexo']}"] += sinal * soma
+            self.contadores[f"gordura_n:{contribuicao['sexo']}"] += sinal * total
+        self._acertar_ultima(conta_id, contribuicao)
+
+    def _acertar_ultima(self, conta_id: str, contribuicao: Dict[str, Any]) -> None:
+        """Move a conta em ultimas se a sua avaliação mais recente mudou"""
+        anterior = self._ultimas.get(conta_id)
+        datas = self._datas.get(conta_id)
+        if not datas or not contribuicao['sexo']:
+            # Sem perfil a conta não é um usuário (como no banco)
+            atual = None
+        elif anterior is None or anterior not in datas:
+            atual = max(datas)
+        else:
+            atual = max(anterior, max(contribuicao['datas'], default=anterior))
+        if atual == anterior:
+            return
+        if anterior is not None:
+            avaliacoes, ultimas = self.por_data.get(anterior, (0, 0))
+            self.por_data[anterior] = (avaliacoes, ultimas - 1)
+            del self._ultimas[conta_id]
+        if atual is not None:
+            avaliacoes, ultimas = self.por_data.get(atual, (0, 0))
+            self.por_data[atual] = (avaliacoes, ultimas + 1)
+            self._ultimas[conta_id] = atual
+
+    def aplicada(self, dados: Dict[str, Any], operacao: list) -> None:
+        """Atualiza os contadores após uma operação aplicada ao documento"""
+        super().aplicada(dados, operacao)
+        caminho = operacao[1]
+        if not caminho or caminho[0] in ('contas', 'usuarios'):
+            self._contar_cadastros()
+
+    def resumo(self, hoje: date) -> Dict[str, Any]:
+        """Resposta de /api/admin/stats"""
+        return resumir(self.contadores, self.por_data, hoje)
@@ -0,0 +1,106 @@
+"""
+Exportação completa de uma tabela (NDJSON ou CSV)
+
+O conteúdo chega em lotes (listas de linhas, já como dicionários) de um
+iterador preguiçoso: cursor no servidor no PostgreSQL, cursor do SQLite ou
+percurso do documento JSON. Cada lote vira um pedaço de texto da resposta,
+enviada em partes (chunked), então a memória não cresce com o tamanho da tabela.
+
+As colunas de cada tabela são as mesmas nos três armazenamentos; o CSV de
+avaliações usa os nomes de medida aceitos por POST /api/avaliacoes/import.
+"""
+
+import csv
+import io
+import json
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+
+# Formato -> tipo MIME da resposta
+FORMATOS_EXPORTACAO = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Linhas lidas (e enviadas) por vez
+TAMANHO_LOTE_EXPORTACAO = 1000
+
+# Colunas exportadas de cada tabela (sem senhas)
+COLUNAS_EXPORTACAO = {
+    'contas': ('id', 'nome', 'created_at'),
+    'usuarios': ('conta_id', 'nome', 'sexo', 'data_nascimento', 'altura'),
+    'avaliacoes': ('id', 'conta_id', 'nome', 'data', 'altura', 'peso', 'pescoco', 'ombros', 'peitoral',
+                   'cintura', 'abdomen', 'quadril', 'braco_relaxado', 'braco_contraido', 'antebraco',
+                   'coxa', 'panturrilha'),
+}
+
+# Colunas acrescentadas às avaliações com os resultados
+COLUNAS_RESULTADOS = ('versao_calculo', 'resultados')
+
+
+def colunas_exportacao(tabela: str, resultados: bool = False) -> tuple:
+    """
+    Colunas exportadas da tabela, na ordem do arquivo.
+
+    Raises:
+        ValueError: Se a tabela não puder ser exportada
+    """
+    if tabela not in COLUNAS_EXPORTACAO:
+        raise ValueError(f"Parâmetro table deve ser um de: {', '.join(COLUNAS_EXPORTACAO)}")
+    colunas = COLUNAS_EXPORTACAO[tabela]
+    if resultados and tabela == 'avaliacoes':
+        colunas += COLUNAS_RESULTADOS
+    return colunas
+
+
+def _ndjson(lotes: Iterable[List[Dict[str, Any]]], colunas: tuple, padrao: Callable) -> Iterator[str]:
+    for lote in lotes:
+        yield ''.join(
+            json.dumps({coluna: linha.get(coluna) for coluna in colunas},
+                       ensure_ascii=False, separators=(',', ':'), default=padrao) + '\n'
+            for linha in lote
+        )
+
+
+def _csv(lotes: Iterable[List[Dict[str, Any]]], colunas: tuple, padrao: Callable) -> Iterator[str]:
+    def celula(valor):
+        if valor is None:
+            return ''
+        if isinstance(valor, (dict, list)):
+            return json.dumps(valor, ensure_ascii=False, separators=(',', ':'), default=padrao)
+        return valor
+
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator='\n')
+    escritor.writerow(colunas)
+    for lote in lotes:
+        escritor.writerows([celula(linha.get(coluna)) for coluna in colunas] for linha in lote)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Tabela vazia: só o cabeçalho
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def exportar(lotes: Iterable[List[Dict[str, Any]]], formato: str, colunas: tuple,
+             padrao: Optional[Callable] = None) -> Iterator[str]:
+    """
+    Texto do arquivo exportado, um pedaço por lote.
+
+    Args:
+        lotes: Iterador de listas de linhas (dicionários)
+        formato: 'ndjson' ou 'csv'
+        colunas: Colunas de cada linha, na ordem (demais chaves são ignoradas)
+        padrao: Conversor de tipos não serializáveis em JSON (datas, Decimal)
+    """
+    padrao = padrao or str
+
+    def converter(valor):
+        # Colunas DECIMAL do PostgreSQL: números no NDJSON, como nos outros armazenamentos
+        return float(valor) if isinstance(valor, Decimal) else padrao(valor)
+
+    if formato == 'csv':
+        return _csv(lotes, colunas, converter)
+    return _ndjson(lotes, colunas, converter)
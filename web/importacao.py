@@ -0,0 +1,264 @@
+"""
+Importação em massa de avaliações (CSV ou NDJSON)
+
+Lê o arquivo enviado como um fluxo, linha a linha, e processa lotes de
+TAMANHO_LOTE avaliações: cada linha é validada (ValidadorMedidas e
+ValidadorAvaliacao), os resultados do lote são calculados de uma vez com
+AnalisadorAvaliacao.processar_lote e o lote é entregue a `gravar` (uma
+escrita por lote). A memória usada depende do tamanho do lote, não do arquivo.
+
+Formatos:
+    CSV    - cabeçalho com data, peso e as demais medidas (nomes de
+             CAMPOS_MEDIDAS); separador ',' ou ';' e decimal com ponto ou vírgula
+    NDJSON - um objeto por linha, com as medidas no próprio objeto ou em
+             "medidas" (o mesmo corpo de POST /api/avaliacoes)
+
+Datas em AAAA-MM-DD ou DD/MM/AAAA. Linhas inválidas não interrompem a
+importação: entram no relatório com o número da linha e o motivo.
+"""
+
+import csv
+import io
+import json
+import math
+from datetime import datetime
+from itertools import chain
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.services.analisador import AnalisadorAvaliacao
+from src.validators.validadores import ValidadorAvaliacao, ValidadorMedidas
+
+
+# Tipo MIME do corpo -> formato
+FORMATOS_IMPORTACAO = {
+    'text/csv': 'csv',
+    'application/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+}
+
+# Avaliações calculadas e gravadas por vez
+TAMANHO_LOTE = 500
+
+# Erros detalhados no relatório (os demais só entram na contagem)
+MAXIMO_ERROS = 1000
+
+# Medidas aceitas (as mesmas de POST /api/avaliacoes)
+CAMPOS_MEDIDAS = ('altura', 'peso', 'pescoco', 'ombros', 'peitoral', 'cintura', 'abdomen', 'quadril',
+                  'braco_relaxado', 'braco_contraido', 'antebraco', 'coxa', 'panturrilha')
+
+FORMATOS_DATA = ('%Y-%m-%d', '%d/%m/%Y')
+
+
+# ===== LEITURA =====
+
+def _texto(fluxo) -> io.TextIOWrapper:
+    """Texto UTF-8 (com ou sem BOM) sobre o fluxo binário da requisição"""
+    if not isinstance(fluxo, io.BufferedIOBase):
+        fluxo = io.BufferedReader(fluxo)
+    return io.TextIOWrapper(fluxo, encoding='utf-8-sig', newline='')
+
+
+def _registros_csv(texto: io.TextIOWrapper) -> Iterator[Tuple[int, Any]]:
+    cabecalho = texto.readline()
+    # Planilhas em português costumam exportar com ';' (a vírgula é o decimal)
+    separador = ';' if cabecalho.count(';') > cabecalho.count(',') else ','
+    leitor = csv.reader(chain([cabecalho], texto), delimiter=separador)
+    campos = [campo.strip().lower() for campo in next(leitor, [])]
+    faltando = [campo for campo in ('data', 'peso') if campo not in campos]
+    if faltando:
+        raise ValueError(f"Cabeçalho do CSV sem a(s) coluna(s): {', '.join(faltando)}")
+    return _linhas_csv(leitor, campos)
+
+
+def _linhas_csv(leitor, campos: List[str]) -> Iterator[Tuple[int, Any]]:
+    for valores in leitor:
+        if not any(valor.strip() for valor in valores):
+            continue
+        if len(valores) > len(campos):
+            yield leitor.line_num, ValueError(f"{len(valores)} colunas (cabeçalho tem {len(campos)})")
+        else:
+            yield leitor.line_num, dict(zip(campos, valores))
+
+
+def _registros_ndjson(texto: io.TextIOWrapper) -> Iterator[Tuple[int, Any]]:
+    for numero, linha in enumerate(texto, 1):
+        if not linha.strip():
+            continue
+        try:
+            registro = json.loads(linha)
+        except ValueError as e:
+            yield numero, ValueError(f"JSON inválido: {e}")
+            continue
+        if isinstance(registro, dict):
+            yield numero, registro
+        else:
+            yield numero, ValueError("Cada linha deve ser um objeto JSON")
+
+
+def ler_registros(fluxo, formato: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Registros do arquivo, um por vez.
+
+    Args:
+        fluxo: Arquivo binário (ex.: request.stream)
+        formato: 'csv' ou 'ndjson'
+
+    Yields:
+        Tuplas (linha, registro) - registro é um dict ou o ValueError da linha
+
+    Raises:
+        ValueError: Formato desconhecido ou cabeçalho do CSV sem data/peso
+    """
+    if formato == 'csv':
+        return _registros_csv(_texto(fluxo))
+    if formato == 'ndjson':
+        return _registros_ndjson(_texto(fluxo))
+    raise ValueError(f"Formato de importação desconhecido: {formato}")
+
+
+# ===== VALIDAÇÃO =====
+
+def para_float(valor):
+    """Converte valor para float, retorna None se vazio"""
+    if valor is None or valor == '':
+        return None
+    return float(valor)
+
+
+def _numero(campo: str, valor: Any) -> Optional[float]:
+    if valor is None or (isinstance(valor, str) and not valor.strip()):
+        return None
+    if isinstance(valor, bool):
+        raise ValueError(f"{campo}: valor inválido ({valor})")
+    try:
+        numero = float(valor.strip().replace(',', '.') if isinstance(valor, str) else valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"{campo}: valor inválido ({valor!r})")
+    if not math.isfinite(numero):
+        raise ValueError(f"{campo}: valor inválido ({valor!r})")
+    return numero
+
+
+def _data(valor: Any) -> str:
+    texto = str(valor or '').strip()
+    if not texto:
+        raise ValueError("data é obrigatória")
+    for formato in FORMATOS_DATA:
+        try:
+            data_aval = datetime.strptime(texto, formato).date()
+            break
+        except ValueError:
+            continue
+    else:
+        raise ValueError(f"data inválida ({texto}); use AAAA-MM-DD ou DD/MM/AAAA")
+    valida, erro = ValidadorAvaliacao.validar_data(data_aval)
+    if not valida:
+        raise ValueError(erro)
+    return data_aval.isoformat()
+
+
+def avaliacao_do_registro(registro: Dict[str, Any], altura_perfil: Optional[float] = None,
+                          so_perfil: bool = False) -> Dict[str, Any]:
+    """
+    Avaliação ({'data', 'medidas', 'objetivo'}) a partir de um registro do arquivo.
+
+    Args:
+        registro: Linha do CSV ou objeto do NDJSON
+        altura_perfil: Altura usada quando a linha não traz altura
+        so_perfil: Usa sempre altura_perfil (modo banco, em que a altura fica no perfil)
+
+    Raises:
+        ValueError: Com todos os problemas encontrados na linha
+    """
+    origem = registro.get('medidas') if isinstance(registro.get('medidas'), dict) else registro
+    erros = []
+    medidas = {}
+    for campo in CAMPOS_MEDIDAS:
+        if campo == 'altura' and so_perfil:
+            medidas[campo] = altura_perfil
+            continue
+        try:
+            medidas[campo] = _numero(campo, origem.get(campo))
+        except ValueError as e:
+            medidas[campo] = None
+            erros.append(str(e))
+            continue
+        if campo == 'altura' and medidas[campo] is None:
+            medidas[campo] = altura_perfil
+        if campo in ('altura', 'peso') and medidas[campo] is None:
+            erros.append(f"{campo} é obrigatório")
+    erros += ValidadorMedidas.validar_todas_medidas(medidas)
+
+    try:
+        data = _data(registro.get('data'))
+    except ValueError as e:
+        erros.insert(0, str(e))
+
+    if erros:
+        raise ValueError('; '.join(erros))
+    return {
+        'data': data,
+        'medidas': medidas,
+        'objetivo': str(registro.get('objetivo') or '')
+    }
+
+
+# ===== IMPORTAÇÃO =====
+
+def importar(registros: Iterator[Tuple[int, Any]], sexo: str, idade: int,
+             gravar: Callable[[List[Dict[str, Any]]], None],
+             altura_perfil: Optional[float] = None, so_perfil: bool = False,
+             tamanho_lote: int = TAMANHO_LOTE) -> Dict[str, Any]:
+    """
+    Valida, calcula e grava as avaliações dos registros, em lotes.
+
+    Args:
+        registros: Saída de ler_registros
+        sexo, idade: Perfil usado nos cálculos
+        gravar: Recebe cada lote (avaliações com 'resultados', na ordem do
+            arquivo) e o grava de uma vez
+        altura_perfil, so_perfil: Altura das linhas (ver avaliacao_do_registro)
+
+    Returns:
+        Relatório {'importadas', 'rejeitadas', 'erros': [{'linha', 'erro'}]};
+        só os primeiros MAXIMO_ERROS erros são detalhados. Um arquivo que não
+        pode mais ser lido (ex.: codificação inválida) encerra a importação
+        com um erro; os lotes anteriores já estão gravados.
+    """
+    relatorio = {'importadas': 0, 'rejeitadas': 0, 'erros': []}
+
+    def rejeitar(linha, erro):
+        relatorio['rejeitadas'] += 1
+        if len(relatorio['erros']) < MAXIMO_ERROS:
+            relatorio['erros'].append({'linha': linha, 'erro': erro})
+
+    def processar(lote):
+        colunas = {campo: [av['medidas'][campo] for av in lote] for campo in CAMPOS_MEDIDAS}
+        resultados = AnalisadorAvaliacao.processar_lote(colunas, [sexo] * len(lote), [idade] * len(lote))
+        for av, resultado in zip(lote, resultados):
+            av['resultados'] = resultado
+        gravar(lote)
+        relatorio['importadas'] += len(lote)
+
+    lote = []
+    linha = 0
+    try:
+        for linha, registro in registros:
+            if isinstance(registro, Exception):
+                rejeitar(linha, str(registro))
+                continue
+            try:
+                lote.append(avaliacao_do_registro(registro, altura_perfil, so_perfil))
+            except ValueError as e:
+                rejeitar(linha, str(e))
+                continue
+            if len(lote) >= tamanho_lote:
+                processar(lote)
+                lote = []
+    except (UnicodeDecodeError, csv.Error) as e:
+        relatorio['erros'].append({'linha': linha + 1, 'erro': f"Arquivo inválido, importação interrompida: {e}"})
+    if lote:
+        processar(lote)
+    return relatorio
@@ -0,0 +1,210 @@
+"""
+Pool de conexões com banco de dados
+
+Mantém conexões abertas entre requisições em vez de abrir uma nova conexão
+(TCP + autenticação) a cada chamada. Limitado por um máximo configurável,
+seguro entre threads e com verificação de saúde na retirada.
+
+Configuração (variáveis de ambiente):
+    DB_POOL_MIN      - conexões mantidas abertas (padrão: 1)
+    DB_POOL_MAX      - limite de conexões simultâneas (padrão: 10)
+    DB_POOL_TIMEOUT  - segundos esperando uma conexão livre (padrão: 30)
+    DB_POOL_PING     - segundos ociosa antes de testar com SELECT 1 (padrão: 30)
+"""
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolEsgotado(Exception):
+    """Nenhuma conexão ficou livre dentro do tempo limite"""
+
+
+class PoolConexoes:
+    """
+    Pool limitado de conexões reutilizáveis.
+
+    Args:
+        criar: Função sem argumentos que abre uma nova conexão
+        validar: Função (conexao) -> bool usada para testar conexões ociosas
+        fechar: Função (conexao) que encerra uma conexão descartada
+        minimo: Conexões mantidas abertas
+        maximo: Limite de conexões (em uso + ociosas)
+        timeout: Segundos de espera por uma conexão livre
+        intervalo_ping: Conexões ociosas há mais tempo que isso são validadas
+    """
+
+    def __init__(self, criar, validar=None, fechar=None, minimo=1, maximo=10,
+                 timeout=30.0, intervalo_ping=30.0):
+        if maximo < 1 or minimo < 0 or minimo > maximo:
+            raise ValueError(f"Limites de pool inválidos: min={minimo}, max={maximo}")
+
+        self._criar = criar
+        self._validar = validar
+        self._fechar = fechar or (lambda conn: conn.close())
+        self.minimo = minimo
+        self.maximo = maximo
+        self.timeout = timeout
+        self.intervalo_ping = intervalo_ping
+
+        self._cond = threading.Condition()
+        self._ociosas = deque()  # (conexao, instante_devolucao)
+        self._total = 0
+        self._em_uso = 0
+        self._pid = os.getpid()
+
+        # Estatísticas
+        self._retiradas = 0
+        self._esperas = 0
+        self._espera_total = 0.0
+        self._espera_maxima = 0.0
+        self._criadas = 0
+        self._reconexoes = 0
+
+    @classmethod
+    def do_ambiente(cls, criar, validar=None, fechar=None):
+        """Cria o pool com os limites das variáveis DB_POOL_*"""
+        return cls(
+            criar, validar=validar, fechar=fechar,
+            minimo=int(os.environ.get('DB_POOL_MIN', 1)),
+            maximo=int(os.environ.get('DB_POOL_MAX', 10)),
+            timeout=float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+            intervalo_ping=float(os.environ.get('DB_POOL_PING', 30))
+        )
+
+    def _verificar_fork(self):
+        """Após fork (ex.: workers do gunicorn) as conexões herdadas não são reutilizadas"""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._ociosas.clear()
+            self._total = 0
+            self._em_uso = 0
+
+    def _nova_conexao(self):
+        conn = self._criar()
+        with self._cond:
+            self._criadas += 1
+        return conn
+
+    def _descartar(self, conn):
+        try:
+            self._fechar(conn)
+        except Exception:
+            pass
+
+    def obter(self):
+        """Retira uma conexão do pool (bloqueia até timeout se estiver cheio)"""
+        inicio = time.monotonic()
+        limite = inicio + self.timeout
+        conn, devolvida_em = None, None
+
+        with self._cond:
+            self._verificar_fork()
+            esperou = False
+            while True:
+                if self._ociosas:
+                    conn, devolvida_em = self._ociosas.pop()
+                    break
+                if self._total < self.maximo:
+                    self._total += 1
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    raise PoolEsgotado(
+                        f"Nenhuma conexão livre em {self.timeout}s (máximo: {self.maximo})"
+                    )
+                esperou = True
+                self._cond.wait(restante)
+
+            self._em_uso += 1
+            espera = time.monotonic() - inicio
+            self._retiradas += 1
+            self._espera_total += espera
+            self._espera_maxima = max(self._espera_maxima, espera)
+            if esperou:
+                self._esperas += 1
+
+        # Abrir / validar fora do lock (envolve rede)
+        try:
+            if conn is None:
+                return self._nova_conexao()
+
+            ociosa_por = time.monotonic() - devolvida_em
+            if self._validar and ociosa_por >= self.intervalo_ping and not self._validar(conn):
+                self._descartar(conn)
+                with self._cond:
+                    self._reconexoes += 1
+                return self._nova_conexao()
+            return conn
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._em_uso -= 1
+                self._cond.notify()
+            raise
+
+    def devolver(self, conn, descartar=False):
+        """Devolve a conexão ao pool (ou a fecha, se estiver quebrada)"""
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            self._em_uso -= 1
+            if descartar:
+                self._total -= 1
+                self._reconexoes += 1
+            else:
+                self._ociosas.append((conn, time.monotonic()))
+            self._cond.notify()
+
+        if descartar:
+            self._descartar(conn)
+
+    @contextmanager
+    def conexao(self):
+        """Context manager: retira e devolve uma conexão"""
+        conn = self.obter()
+        try:
+            yield conn
+        except Exception:
+            self.devolver(conn, descartar=True)
+            raise
+        else:
+            self.devolver(conn)
+
+    def aquecer(self):
+        """Abre conexões até o mínimo configurado"""
+        conexoes = []
+        with self._cond:
+            faltam = max(0, self.minimo - self._total)
+        for _ in range(faltam):
+            conexoes.append(self.obter())
+        for conn in conexoes:
+            self.devolver(conn)
+
+    def fechar_todas(self):
+        """Fecha as conexões ociosas (as em uso são fechadas ao serem devolvidas)"""
+        with self._cond:
+            ociosas = [conn for conn, _ in self._ociosas]
+            self._ociosas.clear()
+            self._total -= len(ociosas)
+        for conn in ociosas:
+            self._descartar(conn)
+
+    def estatisticas(self):
+        """Uso atual e histórico de esperas, para dimensionar o pool"""
+        with self._cond:
+            return {
+                'minimo': self.minimo,
+                'maximo': self.maximo,
+                'em_uso': self._em_uso,
+                'ociosas': len(self._ociosas),
+                'total': self._total,
+                'retiradas': self._retiradas,
+                'esperas': self._esperas,
+                'espera_media_ms': round(self._espera_total / self._retiradas * 1000, 3) if self._retiradas else 0.0,
+                'espera_maxima_ms': round(self._espera_maxima * 1000, 3),
+                'conexoes_criadas': self._criadas,
+                'reconexoes': self._reconexoes
+            }
@@ -0,0 +1,430 @@
+"""
+Percentis da população nos resultados mais recentes (GET /api/avaliacoes)
+
+Cada resultado de imc, percentual_gordura, rca, rcq e score estético entra em
+um esboço de quantis (KLL) da sua coorte: métrica x sexo x faixa etária (na
+data da avaliação, como em web/coortes.py). O esboço guarda algumas centenas
+de valores, qualquer que seja a população, e responde o posto de um valor com
+uma busca binária por nível: a resposta não ordena as avaliações.
+
+Esboços KLL não desfazem uma inclusão. Cada resultado gravado ou alterado
+entra no esboço; o valor que ele substitui (ou que sai com uma remoção ou
+mudança de perfil) fica lá e é contado como obsoleto na sua coorte. Quando os
+obsoletos passam de LIMITE_OBSOLETOS do tamanho da coorte, os esboços dela são
+reconstruídos a partir das avaliações atuais (coortes_obsoletas).
+
+No banco os esboços ficam serializados na tabela quantis. Os triggers só
+enfileiram a avaliação em quantis_pendentes e contam os obsoletos em
+quantis_obsoletos; a escrita apenas agenda a incorporação, que uma thread em
+segundo plano faz em lote (IncorporacaoQuantis), e a leitura (ler_quantis) é
+só um SELECT. No modo JSON ficam em um QuantisJSON, que observa as operações
+aplicadas ao documento em cache.
+"""
+
+import os
+import math
+import time
+import random
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from web.coortes import faixa_etaria, _valor
+from web.estatisticas import ObservadorContas
+
+
+# Métrica -> (caminho em resultados, se um valor maior é melhor)
+METRICAS_PERCENTIL = {
+    'imc': (('imc',), False),
+    'percentual_gordura': (('percentual_gordura',), False),
+    'rca': (('rca',), False),
+    'rcq': (('rcq',), False),
+    'score_estetico': (('score_estetico_avancado', 'score_total'), True),
+}
+
+# Tamanho do maior compactador do esboço (erro de posto em torno de 1,5% com 200)
+K_ESBOCO = 200
+# Fator de redução da capacidade a cada nível abaixo do mais alto
+FATOR_NIVEL = 2 / 3
+
+# Coortes menores não recebem percentil (pouca gente para comparar)
+MINIMO_COORTE = 20
+
+# Segundos entre a primeira escrita agendada e a incorporação da fila (as
+# escritas do intervalo entram juntas)
+INTERVALO_INCORPORACAO = float(os.environ.get('QUANTIS_INTERVALO', 1.0))
+
+# Fração de valores obsoletos (substituídos ou removidos, ainda no esboço) a
+# partir da qual os esboços de uma coorte são reconstruídos
+LIMITE_OBSOLETOS = 0.05
+
+
+class EsbocoQuantis:
+    """
+    Esboço KLL de uma distribuição: níveis de valores, cada valor do nível h
+    representando 2**h valores da população. Um nível cheio é ordenado e
+    metade dos seus valores (os de posição par ou ímpar, ao acaso) sobe para
+    o nível seguinte. Dois esboços se juntam concatenando os níveis.
+    """
+
+    def __init__(self, k: int = K_ESBOCO):
+        self.k = k
+        self.n = 0
+        self.niveis: List[List[float]] = [[]]
+        self._ordenado = True
+
+    def _capacidade(self, nivel: int) -> int:
+        return max(2, int(math.ceil(self.k * FATOR_NIVEL ** (len(self.niveis) - 1 - nivel))))
+
+    def _compactar(self) -> None:
+        while sum(map(len, self.niveis)) > sum(map(self._capacidade, range(len(self.niveis)))):
+            for nivel, valores in enumerate(self.niveis):
+                if len(valores) >= self._capacidade(nivel):
+                    if nivel + 1 == len(self.niveis):
+                        self.niveis.append([])
+                    valores.sort()
+                    # Com quantidade ímpar, o último fica no nível (o peso total não muda)
+                    sobra = [valores.pop()] if len(valores) % 2 else []
+                    self.niveis[nivel + 1].extend(valores[random.getrandbits(1)::2])
+                    self.niveis[nivel] = sobra
+                    break
+        self._ordenado = False
+
+    def atualizar(self, valor: float) -> None:
+        """Inclui um valor"""
+        self.niveis[0].append(float(valor))
+        self.n += 1
+        self._ordenado = False
+        if len(self.niveis[0]) >= self._capacidade(0):
+            self._compactar()
+
+    def juntar(self, outro: 'EsbocoQuantis') -> None:
+        """Inclui os valores de outro esboço"""
+        while len(self.niveis) < len(outro.niveis):
+            self.niveis.append([])
+        for nivel, valores in enumerate(outro.niveis):
+            self.niveis[nivel].extend(valores)
+        self.n += outro.n
+        self._compactar()
+
+    def _ordenar(self) -> None:
+        if not self._ordenado:
+            for valores in self.niveis:
+                valores.sort()
+            self._ordenado = True
+
+    def posto(self, valor: float) -> float:
+        """
+        Quantos valores da população estão abaixo de `valor` (empates contam
+        pela metade): uma busca binária por nível.
+        """
+        self._ordenar()
+        total = 0.0
+        for nivel, valores in enumerate(self.niveis):
+            abaixo = bisect_left(valores, valor)
+            total += (abaixo + bisect_right(valores, valor, abaixo)) / 2 * (1 << nivel)
+        return total
+
+    def percentil(self, valor: float) -> Optional[float]:
+        """Porcentagem da população abaixo de `valor` (None se vazio)"""
+        return 100 * self.posto(valor) / self.n if self.n else None
+
+    def para_dict(self) -> Dict[str, Any]:
+        """Forma serializável (níveis ordenados)"""
+        self._ordenar()
+        return {'k': self.k, 'n': self.n, 'niveis': self.niveis}
+
+    def copia(self) -> 'EsbocoQuantis':
+        """Cópia com os níveis ordenados (consultas sem tocar no original)"""
+        esboco = EsbocoQuantis(self.k)
+        esboco.n = self.n
+        esboco.niveis = [sorted(valores) for valores in self.niveis]
+        return esboco
+
+    @classmethod
+    def de_dict(cls, dados: Dict[str, Any]) -> 'EsbocoQuantis':
+        esboco = cls(dados.get('k', K_ESBOCO))
+        esboco.n = dados['n']
+        esboco.niveis = [list(valores) for valores in dados['niveis']] or [[]]
+        return esboco
+
+
+def valores_metricas(resultados: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Valor de cada métrica de METRICAS_PERCENTIL nos resultados"""
+    return {metrica: _valor(resultados or {}, caminho)
+            for metrica, (caminho, _) in METRICAS_PERCENTIL.items()}
+
+
+def _numero(valor) -> bool:
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+
+def contribuicoes(valores: Dict[str, Any], data, sexo: Optional[str],
+                  nascimento) -> List[Tuple[tuple, float]]:
+    """
+    Valores de uma avaliação nos esboços.
+
+    Args:
+        valores: Métrica -> valor (valores_metricas)
+
+    Returns:
+        Lista de ((metrica, sexo, faixa), valor)
+    """
+    faixa = faixa_etaria(nascimento, data)
+    if not sexo or faixa is None:
+        return []
+    return [((metrica, sexo, faixa), float(valores[metrica]))
+            for metrica in METRICAS_PERCENTIL if _numero(valores.get(metrica))]
+
+
+def incorporar(esbocos: Dict[tuple, EsbocoQuantis], linhas: Iterable[Tuple[tuple, float]]) -> set:
+    """
+    Inclui os valores de contribuicoes nos esboços (criados quando faltam).
+
+    Returns:
+        Chaves dos esboços alterados
+    """
+    alterados = set()
+    for chave, valor in linhas:
+        esboco = esbocos.get(chave)
+        if esboco is None:
+            esboco = esbocos[chave] = EsbocoQuantis()
+        esboco.atualizar(valor)
+        alterados.add(chave)
+    return alterados
+
+
+def coortes_obsoletas(obsoletos: Dict[tuple, int], esbocos: Dict[tuple, EsbocoQuantis]) -> set:
+    """
+    Coortes cujos esboços devem ser reconstruídos.
+
+    Args:
+        obsoletos: (sexo, faixa) -> valores obsoletos contados na coorte
+        esbocos: (metrica, sexo, faixa) -> esboço (ao menos os dessas coortes)
+
+    Returns:
+        Conjunto de (sexo, faixa) com mais de LIMITE_OBSOLETOS do maior esboço da coorte
+    """
+    tamanhos = Counter()
+    for (_, sexo, faixa), esboco in esbocos.items():
+        tamanhos[(sexo, faixa)] = max(tamanhos[(sexo, faixa)], esboco.n)
+    return {coorte for coorte, n in obsoletos.items() if n > 0 and n > LIMITE_OBSOLETOS * tamanhos[coorte]}
+
+
+def incorporar_fila(esbocos: Dict[tuple, EsbocoQuantis], linhas: List[Tuple[tuple, float]],
+                    obsoletos: Dict[tuple, int], avaliacoes_sexo) -> Tuple[set, set, Counter]:
+    """
+    Inclui nos esboços os valores da fila (no banco) e reconstrói as coortes
+    com obsoletos demais (coortes_obsoletas).
+
+    Args:
+        esbocos: Esboços atuais das coortes das linhas e dos obsoletos (alterados no lugar)
+        linhas: contribuicoes das avaliações da fila
+        obsoletos: (sexo, faixa) -> valores obsoletos contados na coorte
+        avaliacoes_sexo: Função sexo -> contribuicoes de todas as avaliações do
+            sexo, como estão agora (inclui as da fila)
+
+    Returns:
+        Tupla (alterados, reconstruidas, versoes): chaves dos esboços a gravar,
+        coortes reconstruídas (os esboços antigos delas saem antes) e
+        Counter sexo -> incremento da versão
+    """
+    reconstruidas = coortes_obsoletas(obsoletos, esbocos)
+    for chave in [chave for chave in esbocos if chave[1:] in reconstruidas]:
+        del esbocos[chave]
+    linhas = [linha for linha in linhas if linha[0][1:] not in reconstruidas]
+    for sexo in {sexo for sexo, _ in reconstruidas}:
+        linhas.extend(linha for linha in avaliacoes_sexo(sexo) if linha[0][1:] in reconstruidas)
+    versoes = Counter(sexo for (_, sexo, _), _ in linhas)
+    versoes.update(sexo for sexo, _ in reconstruidas)
+    return incorporar(esbocos, linhas), reconstruidas, versoes
+
+
+class IncorporacaoQuantis:
+    """
+    Incorporação da fila dos esboços em segundo plano (modos com banco).
+
+    As escritas só chamam agendar(), sem abrir conexão nem consultar nada; uma
+    thread daemon espera o intervalo, para juntar as escritas próximas, e
+    incorpora a fila de uma vez. Se a incorporação desiste (outra em andamento,
+    retorno False), tenta de novo no intervalo seguinte.
+    """
+
+    def __init__(self, incorporar_fila, intervalo: float = INTERVALO_INCORPORACAO):
+        """
+        Args:
+            incorporar_fila: Função () -> bool (False: a fila ficou para depois)
+        """
+        self._incorporar = incorporar_fila
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._agendada = False
+        self._thread = None
+
+    def agendar(self) -> None:
+        """Pede uma incorporação (várias chamadas no intervalo viram uma só)"""
+        with self._lock:
+            self._agendada = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._executar, daemon=True)
+                self._thread.start()
+
+    def _executar(self) -> None:
+        while True:
+            time.sleep(self.intervalo)
+            with self._lock:
+                if not self._agendada:
+                    self._thread = None
+                    return
+                self._agendada = False
+            try:
+                incorporada = self._incorporar()
+            except Exception as e:
+                print(f"⚠️ Erro ao incorporar os esboços de quantis: {e}")
+                incorporada = True
+            if not incorporada:
+                with self._lock:
+                    self._agendada = True
+
+
+def anotar(resultados: Optional[Dict[str, Any]], data, sexo: Optional[str], nascimento,
+           esbocos: Dict[str, EsbocoQuantis]) -> Optional[Dict[str, Any]]:
+    """
+    Percentis de uma avaliação na sua coorte.
+
+    Args:
+        esbocos: Métrica -> esboço da coorte (sexo, faixa etária na data)
+
+    Returns:
+        {'coorte': {'sexo', 'faixa'}, 'metricas': {metrica: {valor, percentil,
+        melhor_que, n}}}, só com as métricas presentes e coortes de ao menos
+        MINIMO_COORTE avaliações; None se nenhuma
+    """
+    metricas = {}
+    for (metrica, _, faixa), valor in contribuicoes(valores_metricas(resultados), data, sexo, nascimento):
+        esboco = esbocos.get(metrica)
+        if esboco is None or esboco.n < MINIMO_COORTE:
+            continue
+        percentil = esboco.percentil(valor)
+        metricas[metrica] = {
+            'valor': valor,
+            'percentil': round(percentil, 1),
+            # Porcentagem da coorte com resultado pior
+            'melhor_que': round(percentil if METRICAS_PERCENTIL[metrica][1] else 100 - percentil, 1),
+            'n': esboco.n,
+        }
+    if not metricas:
+        return None
+    return {'coorte': {'sexo': sexo, 'faixa': faixa_etaria(nascimento, data)}, 'metricas': metricas}
+
+
+# ===== MODO JSON =====
+
+class QuantisJSON(ObservadorContas):
+    """
+    Esboços sobre o documento JSON: (metrica, sexo, faixa) -> EsbocoQuantis.
+
+    Como no banco, cada operação inclui os valores novos da conta e conta os
+    que saíram como obsoletos; uma coorte que passa de LIMITE_OBSOLETOS é
+    reconstruída na hora, só com as contas que têm avaliações nela.
+
+    Os esboços mudam nas operações do journal, que outra thread pode estar
+    reproduzindo durante uma resposta: as alterações e as cópias de coorte()
+    acontecem sob o mesmo lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.carregar({})
+
+    def carregar(self, dados: Dict[str, Any]) -> None:
+        """Recalcula tudo (documento carregado do disco)"""
+        with self._lock:
+            super().carregar(dados)
+
+    def _zerar(self):
+        self.esbocos = {}
+        self._anteriores = []
+        # (sexo, faixa) -> valores obsoletos ainda nos esboços da coorte
+        self.obsoletos = Counter()
+        # (sexo, faixa) -> conta -> valores atuais da conta na coorte
+        self._membros = {}
+        # Sexo -> versão dos esboços (percentis na ETag): muda a cada inclusão ou reconstrução
+        self.versoes = {}
+
+    def _contribuicao(self, conta_id: str, avaliacoes: Optional[list] = None) -> list:
+        perfil = self._dados.get('usuarios', {}).get(conta_id) or {}
+        if avaliacoes is None:
+            avaliacoes = self._dados.get('avaliacoes', {}).get(conta_id) or []
+        return [linha
+                for av in avaliacoes if av.get('resultados')
+                for linha in contribuicoes(valores_metricas(av['resultados']), av.get('data'),
+                                           perfil.get('sexo'), perfil.get('data_nascimento'))]
+
+    def _aplicar(self, conta_id: str, contribuicao: list, sinal: int) -> None:
+        for (_, sexo, faixa), _ in contribuicao:
+            membros = self._membros.setdefault((sexo, faixa), Counter())
+            membros[conta_id] += sinal
+            if membros[conta_id] <= 0:
+                del membros[conta_id]
+        if sinal > 0:
+            incorporar(self.esbocos, contribuicao)
+            for (_, sexo, _), _ in contribuicao:
+                self.versoes[sexo] = self.versoes.get(sexo, 0) + 1
+        else:
+            # Obsoletos contam avaliações, como no banco: o maior número de valores de uma métrica
+            por_coorte = Counter()
+            for (_, sexo, faixa), n in Counter(chave for chave, _ in contribuicao).items():
+                por_coorte[(sexo, faixa)] = max(por_coorte[(sexo, faixa)], n)
+            self.obsoletos.update(por_coorte)
+
+    def _reconstruir(self, coortes: set) -> None:
+        """Esboços novos das coortes, a partir das contas que têm avaliações nelas"""
+        for sexo, faixa in coortes:
+            for chave in [chave for chave in self.esbocos if chave[1:] == (sexo, faixa)]:
+                del self.esbocos[chave]
+            incorporar(self.esbocos, [
+                (chave, valor)
+                for conta_id in self._membros.get((sexo, faixa), ())
+                for chave, valor in self._contribuicao(conta_id) if chave[1:] == (sexo, faixa)
+            ])
+            del self.obsoletos[(sexo, faixa)]
+            self.versoes[sexo] = self.versoes.get(sexo, 0) + 1
+
+    def antes(self, dados: Dict[str, Any], operacao: list) -> None:
+        """Guarda os valores que a operação pode alterar"""
+        conta_id = self._conta(operacao)
+        if conta_id is not None:
+            self._dados = dados
+            self._parcial = self._parcial_possivel(conta_id, operacao)
+            avaliacoes = self._afetadas(conta_id, operacao, False) if self._parcial else None
+            self._anteriores = self._contribuicao(conta_id, avaliacoes)
+
+    def aplicada(self, dados: Dict[str, Any], operacao: list) -> None:
+        """Inclui os valores novos, conta os que saíram e reconstrói as coortes obsoletas"""
+        self._dados = dados
+        caminho = operacao[1]
+        conta_id = self._conta(operacao)
+        if conta_id is not None:
+            avaliacoes = self._afetadas(conta_id, operacao, True) if self._parcial else None
+            anteriores, atuais = Counter(self._anteriores), Counter(self._contribuicao(conta_id, avaliacoes))
+            self._anteriores = []
+            with self._lock:
+                # Só o que mudou: uma operação que não toca nos resultados não mexe nos esboços
+                self._aplicar(conta_id, list((anteriores - atuais).elements()), -1)
+                self._aplicar(conta_id, list((atuais - anteriores).elements()), 1)
+                self._reconstruir(coortes_obsoletas(self.obsoletos, self.esbocos))
+        elif not caminho or caminho[0] in ('avaliacoes', 'usuarios'):
+            self.carregar(dados)
+
+    def versao(self, sexo: Optional[str]) -> int:
+        """Versão dos esboços de um sexo: muda a cada inclusão ou reconstrução"""
+        with self._lock:
+            return self.versoes.get(sexo, 0)
+
+    def coorte(self, sexo: Optional[str], faixa: Optional[str]) -> Dict[str, EsbocoQuantis]:
+        """Cópias (ordenadas) dos esboços de uma coorte: métrica -> EsbocoQuantis"""
+        with self._lock:
+            return {metrica: self.esbocos[(metrica, sexo, faixa)].copia()
+                    for metrica in METRICAS_PERCENTIL if (metrica, sexo, faixa) in self.esbocos}
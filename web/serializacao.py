@@ -0,0 +1,259 @@
+"""
+Formatos binários de resposta (MessagePack e CBOR)
+
+Codificadores pequenos, sem dependências, para os tipos que a API devolve
+(dict, list/tuple, str, int, float, bool, None e bytes). Tipos fora dessa lista
+passam por `padrao` (como o `default` de json.dumps) e o resultado é
+codificado no lugar; o servidor usa o mesmo conversor do JSON do Flask, então
+datas, Decimal etc. saem com a mesma representação nos três formatos.
+
+Floats usam a menor largura que representa o valor exatamente (32 bits no
+MessagePack; 16 ou 32 no CBOR, como na serialização preferida da RFC 8949) e
+64 bits nos demais, então o valor decodificado é sempre o mesmo do JSON.
+
+Referências: https://github.com/msgpack/msgpack/blob/master/spec.md
+             RFC 8949 (CBOR)
+"""
+
+import struct
+from typing import Any, Callable, Optional
+
+
+MIME_JSON = 'application/json'
+MIME_MSGPACK = 'application/msgpack'
+MIME_CBOR = 'application/cbor'
+
+# Tipo MIME aceito no cabeçalho Accept -> tipo MIME da resposta
+FORMATOS = {
+    MIME_JSON: MIME_JSON,
+    MIME_MSGPACK: MIME_MSGPACK,
+    'application/x-msgpack': MIME_MSGPACK,
+    MIME_CBOR: MIME_CBOR,
+}
+
+_HALF = struct.Struct('>e')
+_SINGLE = struct.Struct('>f')
+_DOUBLE = struct.Struct('>d')
+
+
+def _sem_conversor(valor):
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+def _exato(formato: struct.Struct, valor: float) -> Optional[bytes]:
+    """Bytes do valor no formato, se a conversão não perder precisão"""
+    try:
+        dados = formato.pack(valor)
+    except OverflowError:
+        return None
+    convertido = formato.unpack(dados)[0]
+    if convertido == valor or (convertido != convertido and valor != valor):
+        return dados
+    return None
+
+
+def _tipo_base(valor):
+    """Converte subclasses de tipos suportados para o tipo base (bool já tratado)"""
+    if isinstance(valor, str):
+        # str.__str__: o texto em si (str() de um Enum de str devolve o nome)
+        return str.__str__(valor)
+    for base in (float, int, dict, list, tuple):
+        if isinstance(valor, base):
+            return base(valor)
+
+
+# ===== MESSAGEPACK =====
+
+def _inteiro_msgpack(n: int, saida: bytearray):
+    if 0 <= n < 0x80:
+        saida.append(n)
+    elif -32 <= n < 0:
+        saida.append(n & 0xff)
+    elif n >= 0:
+        if n < 0x100:
+            saida += b'\xcc' + n.to_bytes(1, 'big')
+        elif n < 0x10000:
+            saida += b'\xcd' + n.to_bytes(2, 'big')
+        elif n < 0x100000000:
+            saida += b'\xce' + n.to_bytes(4, 'big')
+        elif n < 0x10000000000000000:
+            saida += b'\xcf' + n.to_bytes(8, 'big')
+        else:
+            raise OverflowError("Inteiro maior que 64 bits")
+    elif n >= -0x80:
+        saida += b'\xd0' + n.to_bytes(1, 'big', signed=True)
+    elif n >= -0x8000:
+        saida += b'\xd1' + n.to_bytes(2, 'big', signed=True)
+    elif n >= -0x80000000:
+        saida += b'\xd2' + n.to_bytes(4, 'big', signed=True)
+    elif n >= -0x8000000000000000:
+        saida += b'\xd3' + n.to_bytes(8, 'big', signed=True)
+    else:
+        raise OverflowError("Inteiro menor que -2^63")
+
+
+def _tamanho_msgpack(n: int, saida: bytearray, fixo: int, limite_fixo: int, cod8, cod16: int, cod32: int):
+    """Cabeçalho de str/bin/array/map: formato fixo, 8, 16 ou 32 bits"""
+    if n < limite_fixo:
+        saida.append(fixo | n)
+    elif cod8 is not None and n < 0x100:
+        saida += bytes((cod8, n))
+    elif n < 0x10000:
+        saida.append(cod16)
+        saida += n.to_bytes(2, 'big')
+    else:
+        saida.append(cod32)
+        saida += n.to_bytes(4, 'big')
+
+
+def _msgpack(valor: Any, saida: bytearray, padrao: Callable):
+    # Mais frequentes primeiro (chaves, números, dicts); subclasses no final
+    tipo = type(valor)
+    if tipo is str:
+        dados = valor.encode('utf-8')
+        n = len(dados)
+        if n < 32:
+            saida.append(0xa0 | n)
+        else:
+            _tamanho_msgpack(n, saida, 0xa0, 32, 0xd9, 0xda, 0xdb)
+        saida += dados
+    elif tipo is float:
+        dados = _exato(_SINGLE, valor)
+        if dados is not None:
+            saida.append(0xca)
+            saida += dados
+        else:
+            saida.append(0xcb)
+            saida += _DOUBLE.pack(valor)
+    elif tipo is dict:
+        _tamanho_msgpack(len(valor), saida, 0x80, 16, None, 0xde, 0xdf)
+        for chave, item in valor.items():
+            _msgpack(chave, saida, padrao)
+            _msgpack(item, saida, padrao)
+    elif valor is None:
+        saida.append(0xc0)
+    elif valor is True:
+        saida.append(0xc3)
+    elif valor is False:
+        saida.append(0xc2)
+    elif tipo is int:
+        _inteiro_msgpack(valor, saida)
+    elif tipo is list or tipo is tuple:
+        _tamanho_msgpack(len(valor), saida, 0x90, 16, None, 0xdc, 0xdd)
+        for item in valor:
+            _msgpack(item, saida, padrao)
+    elif isinstance(valor, (bytes, bytearray)):
+        # bin não tem formato fixo: limite 0 força bin8/16/32
+        _tamanho_msgpack(len(valor), saida, 0, 0, 0xc4, 0xc5, 0xc6)
+        saida += valor
+    elif isinstance(valor, (str, float, int, dict, list, tuple)):
+        # Subclasses (ex.: Enum de str, OrderedDict): como o tipo base
+        _msgpack(_tipo_base(valor), saida, padrao)
+    else:
+        _msgpack(padrao(valor), saida, padrao)
+
+
+def codificar_msgpack(valor: Any, padrao: Optional[Callable] = None) -> bytes:
+    """
+    Codifica um valor em MessagePack.
+
+    Args:
+        valor: Estrutura a codificar
+        padrao: Conversor para tipos não suportados (padrão: TypeError)
+    """
+    saida = bytearray()
+    _msgpack(valor, saida, padrao or _sem_conversor)
+    return bytes(saida)
+
+
+# ===== CBOR =====
+
+def _cabecalho_cbor(tipo: int, n: int, saida: bytearray):
+    """Cabeçalho de um item: tipo maior (3 bits) + argumento"""
+    tipo <<= 5
+    if n < 24:
+        saida.append(tipo | n)
+    elif n < 0x100:
+        saida += bytes((tipo | 24, n))
+    elif n < 0x10000:
+        saida.append(tipo | 25)
+        saida += n.to_bytes(2, 'big')
+    elif n < 0x100000000:
+        saida.append(tipo | 26)
+        saida += n.to_bytes(4, 'big')
+    elif n < 0x10000000000000000:
+        saida.append(tipo | 27)
+        saida += n.to_bytes(8, 'big')
+    else:
+        raise OverflowError("Inteiro fora do intervalo de 64 bits")
+
+
+def _cbor(valor: Any, saida: bytearray, padrao: Callable):
+    # Mesma ordem de _msgpack
+    tipo = type(valor)
+    if tipo is str:
+        dados = valor.encode('utf-8')
+        n = len(dados)
+        if n < 24:
+            saida.append(0x60 | n)
+        else:
+            _cabecalho_cbor(3, n, saida)
+        saida += dados
+    elif tipo is float:
+        dados = _exato(_HALF, valor)
+        if dados is not None:
+            saida.append(0xf9)
+        else:
+            dados = _exato(_SINGLE, valor)
+            if dados is not None:
+                saida.append(0xfa)
+            else:
+                saida.append(0xfb)
+                dados = _DOUBLE.pack(valor)
+        saida += dados
+    elif tipo is dict:
+        _cabecalho_cbor(5, len(valor), saida)
+        for chave, item in valor.items():
+            _cbor(chave, saida, padrao)
+            _cbor(item, saida, padrao)
+    elif valor is None:
+        saida.append(0xf6)
+    elif valor is True:
+        saida.append(0xf5)
+    elif valor is False:
+        saida.append(0xf4)
+    elif tipo is int:
+        if valor >= 0:
+            _cabecalho_cbor(0, valor, saida)
+        else:
+            _cabecalho_cbor(1, -1 - valor, saida)
+    elif tipo is list or tipo is tuple:
+        _cabecalho_cbor(4, len(valor), saida)
+        for item in valor:
+            _cbor(item, saida, padrao)
+    elif isinstance(valor, (bytes, bytearray)):
+        _cabecalho_cbor(2, len(valor), saida)
+        saida += valor
+    elif isinstance(valor, (str, float, int, dict, list, tuple)):
+        _cbor(_tipo_base(valor), saida, padrao)
+    else:
+        _cbor(padrao(valor), saida, padrao)
+
+
+def codificar_cbor(valor: Any, padrao: Optional[Callable] = None) -> bytes:
+    """
+    Codifica um valor em CBOR.
+
+    Args:
+        valor: Estrutura a codificar
+        padrao: Conversor para tipos não suportados (padrão: TypeError)
+    """
+    saida = bytearray()
+    _cbor(valor, saida, padrao or _sem_conversor)
+    return bytes(saida)
+
+
+CODIFICADORES = {
+    MIME_MSGPACK: codificar_msgpack,
+    MIME_CBOR: codificar_cbor,
+}
@@ -6,6 +6,8 @@
 const app = {
     usuario: null,
     avaliacoes: [],
+    proximoCursor: null,
+    tokenSincronizacao: null,
     isAdmin: false
 };
 
@@ -35,10 +37,10 @@ document.addEventListener('DOMContentLoaded', async () => {
     showLoading();
     
     try {
-        await checkSystemStatus();
-        await checkAdmin();
-        await carregarUsuario();
-        await carregarAvaliacoes();
+        await carregarDadosIniciais();
+        document.addEventListener('visibilitychange', () => {
+            if (document.visibilityState === 'visible') sincronizarAvaliacoes();
+        });
         inicializarEventos();
         inicializarMapaInterativo();
         aplicarTema();
@@ -53,6 +55,31 @@ document.addEventListener('DOMContentLoaded', async () => {
     }
 });
 
+// Status, admin, perfil e primeira página de avaliações em uma só resposta:
+// embutidos na página pelo servidor ou, se ausentes, de /api/bootstrap
+async function carregarDadosIniciais() {
+    let dados;
+    const embutidos = document.getElementById('dadosIniciais');
+    if (embutidos) {
+        dados = JSON.parse(embutidos.textContent);
+        embutidos.remove();
+    } else {
+        const response = await fetch('/api/bootstrap?textos=catalogo');
+        if (!response.ok) throw new Error('Erro ao carregar dados iniciais');
+        dados = await response.json();
+    }
+    
+    aplicarStatus(dados.status);
+    app.isAdmin = dados.is_admin;
+    aplicarUsuario(dados.usuario);
+    
+    if (dados.catalogo_versao) {
+        await i18n.carregarCatalogo(dados.catalogo_versao);
+        dados.avaliacoes.forEach(av => i18n.expandirResultados(av.resultados));
+    }
+    aplicarAvaliacoes(dados.avaliacoes, dados.proximo_cursor, dados.token_sincronizacao);
+}
+
 // ========================================
 // VERIFICAÇÃO DE STATUS DO SISTEMA
 // ========================================
@@ -61,18 +88,20 @@ async function checkSystemStatus() {
     try {
         const response = await fetch('/api/status');
         if (response.ok) {
-            const status = await response.json();
-            
-            // Se não estiver usando banco persistente, mostrar aviso
-            if (!status.database.persistent && status.environment === 'production') {
-                mostrarAvisoBancoDados();
-            }
+            aplicarStatus(await response.json());
         }
     } catch (error) {
         console.error('Erro ao verificar status:', error);
     }
 }
 
+function aplicarStatus(status) {
+    // Se não estiver usando banco persistente, mostrar aviso
+    if (!status.database.persistent && status.environment === 'production') {
+        mostrarAvisoBancoDados();
+    }
+}
+
 function mostrarAvisoBancoDados() {
     const aviso = document.createElement('div');
     aviso.className = 'database-warning';
@@ -109,12 +138,7 @@ async function carregarUsuario() {
     try {
         const response = await fetch('/api/usuario');
         if (response.ok) {
-            app.usuario = await response.json();
-            if (app.usuario) {
-                preencherFormularioUsuario();
-            } else {
-                mostrarModal();
-            }
+            aplicarUsuario(await response.json());
         }
     } catch (error) {
         console.error('Erro ao carregar usuário:', error);
@@ -122,6 +146,15 @@ async function carregarUsuario() {
     }
 }
 
+function aplicarUsuario(usuario) {
+    app.usuario = usuario;
+    if (app.usuario) {
+        preencherFormularioUsuario();
+    } else {
+        mostrarModal();
+    }
+}
+
 async function salvarUsuario(dados) {
     try {
         const response = await fetch('/api/usuario', {
@@ -180,19 +213,13 @@ function calcularIdade(dataNascimento) {
 
 async function carregarAvaliacoes() {
     try {
-        const response = await fetch('/api/avaliacoes');
+        const response = await fetch('/api/avaliacoes?textos=catalogo');
         if (response.ok) {
-            app.avaliacoes = await response.json();
-            renderizarAvaliacoes();
-            
-            // Atualizar mapa anatômico com a última avaliação
-            if (app.avaliacoes.length > 0) {
-                const ultimaAvaliacao = app.avaliacoes[0];
-                if (ultimaAvaliacao.resultados && ultimaAvaliacao.resultados.mapa_corporal) {
-                    console.log('🗺️ Atualizando mapa anatômico com última avaliação');
-                    updateDistributionMap(ultimaAvaliacao.resultados.mapa_corporal);
-                }
-            }
+            aplicarAvaliacoes(
+                await expandirAvaliacoes(response),
+                response.headers.get('X-Proximo-Cursor'),
+                response.headers.get('X-Token-Sincronizacao')
+            );
         }
     } catch (error) {
         console.error('Erro ao carregar avaliações:', error);
@@ -200,6 +227,22 @@ async function carregarAvaliacoes() {
     }
 }
 
+function aplicarAvaliacoes(avaliacoes, proximoCursor, tokenSincronizacao) {
+    app.avaliacoes = avaliacoes;
+    app.proximoCursor = proximoCursor;
+    app.tokenSincronizacao = tokenSincronizacao;
+    renderizarAvaliacoes();
+    
+    // Atualizar mapa anatômico com a última avaliação
+    if (app.avaliacoes.length > 0) {
+        const ultimaAvaliacao = app.avaliacoes[0];
+        if (ultimaAvaliacao.resultados && ultimaAvaliacao.resultados.mapa_corporal) {
+            console.log('🗺️ Atualizando mapa anatômico com última avaliação');
+            updateDistributionMap(ultimaAvaliacao.resultados.mapa_corporal);
+        }
+    }
+}
+
 async function salvarAvaliacao() {
     // Verificar se usuário está cadastrado
     if (!app.usuario) {
@@ -288,13 +331,10 @@ async function salvarAvaliacao() {
                 mostrarToast('Avaliação salva com sucesso!', 'success');
             }
             
-            // Adicionar ao início da lista
-            app.avaliacoes.unshift(avaliacao);
+            // Buscar só o que mudou (a nova avaliação, ou a do mesmo dia substituída)
+            await sincronizarAvaliacoes();
             console.log('Total de avaliações:', app.avaliacoes.length);
             
-            // Renderizar
-            renderizarAvaliacoes();
-            
             // Atualizar mapa anatômico com a nova avaliação
             if (avaliacao.resultados && avaliacao.resultados.mapa_corporal) {
                 console.log('🗺️ Atualizando mapa anatômico com nova avaliação');
@@ -327,8 +367,7 @@ async function deletarAvaliacao(id) {
         });
 
         if (response.ok) {
-            app.avaliacoes = app.avaliacoes.filter(a => a.id !== id);
-            renderizarAvaliacoes();
+            await sincronizarAvaliacoes();
             mostrarToast('Avaliação deletada', 'success');
         }
     } catch (error) {
@@ -339,6 +378,62 @@ async function deletarAvaliacao(id) {
     }
 }
 
+// Lista (ou delta) vem com textos em códigos; resolve pelo catálogo (baixado uma vez por versão)
+async function expandirAvaliacoes(response) {
+    const corpo = await response.json();
+    await i18n.carregarCatalogo(response.headers.get('X-Catalogo-Versao'));
+    (Array.isArray(corpo) ? corpo : corpo.alteradas).forEach(av => i18n.expandirResultados(av.resultados));
+    return corpo;
+}
+
+// Aplica só as alterações feitas depois do último token (de qualquer aba ou aparelho)
+async function sincronizarAvaliacoes() {
+    if (app.tokenSincronizacao === null) {
+        return carregarAvaliacoes();
+    }
+    
+    try {
+        const response = await fetch(`/api/avaliacoes?since=${encodeURIComponent(app.tokenSincronizacao)}&textos=catalogo`);
+        if (response.status === 410) {
+            return carregarAvaliacoes();
+        }
+        if (!response.ok) return;
+        
+        const delta = await expandirAvaliacoes(response);
+        app.tokenSincronizacao = response.headers.get('X-Token-Sincronizacao');
+        if (delta.alteradas.length === 0 && delta.removidas.length === 0) return;
+        
+        // Avaliações mais antigas que a última página carregada virão com "carregar mais"
+        const alteradas = delta.alteradas.filter(av => !app.proximoCursor || String(av.data) >= app.proximoCursor);
+        const substituidas = new Set(delta.removidas.concat(delta.alteradas.map(av => av.id)));
+        app.avaliacoes = app.avaliacoes
+            .filter(av => !substituidas.has(av.id))
+            .concat(alteradas)
+            .sort((a, b) => String(b.data).localeCompare(String(a.data)));
+        renderizarAvaliacoes();
+    } catch (error) {
+        console.error('Erro ao sincronizar avaliações:', error);
+    }
+}
+
+async function carregarMaisAvaliacoes() {
+    if (!app.proximoCursor) return;
+    
+    try {
+        const response = await fetch(`/api/avaliacoes?before=${encodeURIComponent(app.proximoCursor)}&textos=catalogo`);
+        if (response.ok) {
+            const pagina = await expandirAvaliacoes(response);
+            const ids = new Set(app.avaliacoes.map(a => a.id));
+            app.avaliacoes = app.avaliacoes.concat(pagina.filter(a => !ids.has(a.id)));
+            app.proximoCursor = response.headers.get('X-Proximo-Cursor');
+            renderizarAvaliacoes();
+        }
+    } catch (error) {
+        console.error('Erro ao carregar mais avaliações:', error);
+        mostrarToast('Erro ao carregar avaliações', 'error');
+    }
+}
+
 function renderizarAvaliacoes() {
     const container = document.getElementById('avaliacoesContainer');
     
@@ -360,6 +455,14 @@ function renderizarAvaliacoes() {
     }
 
     container.innerHTML = app.avaliacoes.map(av => criarCardAvaliacao(av)).join('');
+    
+    if (app.proximoCursor) {
+        container.insertAdjacentHTML('beforeend', `
+            <button class="btn-primary btn-carregar-mais" onclick="carregarMaisAvaliacoes()">
+                Carregar mais avaliações
+            </button>
+        `);
+    }
     console.log('Avaliações renderizadas com sucesso');
     
     // Inicializar eventos dos gráficos circulares após renderização
@@ -1367,6 +1470,14 @@ function inicializarEventos() {
         loadDbBtn.addEventListener('click', carregarDatabase);
     }
     
+    // Paginação do BD
+    const dbPaginaAnterior = document.getElementById('dbPaginaAnterior');
+    const dbPaginaProxima = document.getElementById('dbPaginaProxima');
+    if (dbPaginaAnterior && dbPaginaProxima) {
+        dbPaginaAnterior.addEventListener('click', () => carregarDatabase(paginaDatabase - 1));
+        dbPaginaProxima.addEventListener('click', () => carregarDatabase(paginaDatabase + 1));
+    }
+    
     // Navegação por tabelas do BD
     const dbTableBtns = document.querySelectorAll('.db-table-btn');
     dbTableBtns.forEach(btn => {
@@ -1386,6 +1497,9 @@ function inicializarEventos() {
             // Limpar conteúdo anterior
             document.getElementById('databaseContent').textContent = 'Clique em "Carregar Dados" para visualizar';
             document.getElementById('dbRecordCount').textContent = '';
+            document.getElementById('dbPaginaInfo').textContent = '';
+            document.getElementById('dbPaginaAnterior').disabled = true;
+            document.getElementById('dbPaginaProxima').disabled = true;
         });
     });
     
@@ -1703,6 +1817,13 @@ async function carregarEstatisticas() {
             const stats = await response.json();
             document.getElementById('statContas').textContent = stats.total_contas;
             document.getElementById('statAvaliacoes').textContent = stats.total_avaliacoes;
+            document.getElementById('statRecentes').textContent =
+                `${stats.avaliacoes_7_dias} / ${stats.avaliacoes_30_dias}`;
+            document.getElementById('statAtivos').textContent = stats.usuarios_ativos_30_dias;
+            const gordura = Object.entries(stats.gordura_media || {});
+            document.getElementById('statGordura').textContent = gordura.length
+                ? gordura.map(([sexo, media]) => `${sexo}: ${media}%`).join(' · ')
+                : '-';
             document.getElementById('statModo').textContent = stats.modo;
         } else {
             mostrarToast('Erro ao carregar estatísticas', 'error');
@@ -1713,33 +1834,77 @@ async function carregarEstatisticas() {
     }
 }
 
-async function carregarDatabase() {
+// Página atual do navegador de tabelas (paginação no servidor, por cursor)
+let paginaDatabase = 1;
+// Cursor de cada página já visitada (o da primeira é null)
+let cursoresDatabase = [null];
+
+function parametrosDatabase(table) {
+    const params = new URLSearchParams({ table });
+    const cursor = cursoresDatabase[paginaDatabase - 1];
+    if (cursor) params.set('after', cursor);
+    const filtros = {
+        nome: 'dbFiltroNome', sexo: 'dbFiltroSexo', from: 'dbFiltroDe', to: 'dbFiltroAte', sort: 'dbOrdem'
+    };
+    Object.entries(filtros).forEach(([param, id]) => {
+        const valor = document.getElementById(id)?.value.trim();
+        if (valor) params.set(param, valor);
+    });
+    const metrica = document.getElementById('dbFiltroMetrica')?.value;
+    if (metrica) {
+        const minimo = document.getElementById('dbFiltroMin').value;
+        const maximo = document.getElementById('dbFiltroMax').value;
+        if (minimo !== '') params.set(`${metrica}_min`, minimo);
+        if (maximo !== '') params.set(`${metrica}_max`, maximo);
+    }
+    return params;
+}
+
+async function carregarDatabase(pagina = 1) {
     const container = document.getElementById('databaseContent');
     const countSpan = document.getElementById('dbRecordCount');
+    const paginaInfo = document.getElementById('dbPaginaInfo');
+    const anterior = document.getElementById('dbPaginaAnterior');
+    const proxima = document.getElementById('dbPaginaProxima');
     const activeBtn = document.querySelector('.db-table-btn.active');
     const table = activeBtn ? activeBtn.dataset.table : 'all';
     
+    // Chamado pelo botão "Carregar Dados" com o evento: volta à primeira página
+    paginaDatabase = Number.isInteger(pagina) ? pagina : 1;
+    if (paginaDatabase === 1) cursoresDatabase = [null];
     container.textContent = 'Carregando...';
     countSpan.textContent = '';
+    paginaInfo.textContent = '';
+    anterior.disabled = true;
+    proxima.disabled = true;
     
     try {
-        const url = table === 'all' ? '/api/admin/database' : `/api/admin/database?table=${table}`;
-        const response = await fetch(url);
+        const response = await fetch(`/api/admin/database?${parametrosDatabase(table)}`);
         
         if (response.ok) {
             const data = await response.json();
-            container.textContent = JSON.stringify(data, null, 2);
             
-            // Contar registros
-            let count = 0;
             if (table === 'all') {
-                count = Object.values(data).reduce((sum, arr) => {
-                    return sum + (Array.isArray(arr) ? arr.length : 0);
-                }, 0);
+                // Primeira página de cada tabela; a paginação é por tabela
+                container.textContent = JSON.stringify(
+                    Object.fromEntries(Object.entries(data).map(([nome, pag]) => [nome, pag.itens])), null, 2
+                );
+                const count = Object.values(data).reduce((sum, pag) => sum + pag.total, 0);
                 countSpan.textContent = `${count} registros no total`;
             } else {
-                count = Array.isArray(data) ? data.length : 0;
-                countSpan.textContent = `${count} registro${count !== 1 ? 's' : ''}`;
+                container.textContent = JSON.stringify(data.itens, null, 2);
+                cursoresDatabase[paginaDatabase] = data.proximo_cursor;
+                const paginas = Math.max(1, Math.ceil(data.total / data.page_size));
+                const inicio = data.itens.length ? (paginaDatabase - 1) * data.page_size + 1 : 0;
+                const fim = (paginaDatabase - 1) * data.page_size + data.itens.length;
+                // Com filtros, acima de um limite o servidor estima o total
+                const total = data.total_exato ? `${data.total}` : `mais de ${data.total}`;
+                countSpan.textContent = `${inicio}-${fim} de ${total} registro${data.total !== 1 ? 's' : ''}`;
+                paginaInfo.textContent = data.total_exato
+                    ? `Página ${paginaDatabase} de ${paginas}`
+                    : `Página ${paginaDatabase}`;
+                anterior.disabled = paginaDatabase <= 1;
+                proxima.disabled = !data.proximo_cursor;
             }
         } else {
             const erro = await response.json();
@@ -359,6 +359,92 @@ const i18n = {
         });
     },
     
+    // Catálogo de textos dos resultados compactos (GET /api/avaliacoes?textos=catalogo)
+    catalogo: null,
+    
+    async carregarCatalogo(versao) {
+        if (this.catalogo && this.catalogo.versao === versao) return this.catalogo;
+        
+        const salvo = JSON.parse(localStorage.getItem('catalogo') || 'null');
+        if (salvo && salvo.versao === versao) {
+            this.catalogo = salvo;
+            return salvo;
+        }
+        
+        const response = await fetch(`/api/catalogo?v=${encodeURIComponent(versao)}`);
+        if (!response.ok) throw new Error('Erro ao carregar catálogo de textos');
+        this.catalogo = await response.json();
+        localStorage.setItem('catalogo', JSON.stringify(this.catalogo));
+        return this.catalogo;
+    },
+    
+    // Recoloca nos resultados os textos trocados por códigos (inverso de compactar_resultados)
+    expandirResultados(r) {
+        const textos = this.catalogo.textos;
+        if (!r) return r;
+        
+        [['imc_classificacao', 'imc_descricao', 'imc'],
+         ['rcq_classificacao', 'rcq_descricao', 'rcq'],
+         ['rca_classificacao', 'rca_descricao', 'rca'],
+         ['somatotipo', 'somatotipo_descricao', 'somatotipo']].forEach(([codigo, campo, secao]) => {
+            if (r[codigo] !== undefined && r[campo] === undefined && textos[secao][r[codigo]] !== undefined) {
+                r[campo] = textos[secao][r[codigo]];
+            }
+        });
+        
+        if (r.recomendacao_id !== undefined) {
+            r.recomendacoes = textos.recomendacoes[r.recomendacao_id];
+            delete r.recomendacao_id;
+        }
+        
+        if (r.analise_simetria) {
+            Object.entries(r.analise_simetria).forEach(([campo, codigo]) => {
+                if (typeof codigo !== 'number') return;
+                let frase = textos.analise_simetria[campo][codigo];
+                if (frase.includes('{valor}')) {
+                    const ganho = ((r.proporcoes.simetria_bracos - 1) * 100).toFixed(1);
+                    frase = frase.replace('{valor}', ganho);
+                }
+                r.analise_simetria[campo] = frase;
+            });
+        }
+        
+        const mapa = r.mapa_corporal;
+        if (mapa && mapa.regioes) {
+            Object.values(mapa.regioes).forEach(regiao => {
+                const texto = textos.desenvolvimento[regiao.classificacao];
+                if (texto && regiao.descricao === undefined) {
+                    regiao.descricao = texto.descricao;
+                    regiao.cor = texto.cor;
+                }
+            });
+            const central = mapa.gordura_central;
+            if (central) {
+                const rca = textos.gordura_central_rca[central.rca_status];
+                if (rca && central.rca_descricao === undefined) {
+                    central.rca_descricao = rca.descricao;
+                    central.rca_cor = rca.cor;
+                }
+                const rcq = textos.gordura_central_rcq[central.rcq_status];
+                if (rcq && central.rcq_descricao === undefined) {
+                    central.rcq_descricao = rcq.descricao;
+                    central.rcq_cor = rcq.cor;
+                }
+            }
+        }
+        
+        const score = r.score_estetico_avancado;
+        if (score) {
+            if (score.cor === undefined && textos.score[score.classificacao] !== undefined) {
+                score.cor = textos.score[score.classificacao];
+            }
+            if (score.pesos === undefined) {
+                score.pesos = textos.pesos_score;
+            }
+        }
+        return r;
+    },
+    
     init() {
         // Aplicar idioma salvo ao carregar página
         this.updatePageTexts();